@@ -18,6 +18,7 @@ from homeassistant_api import ha_api
 from youtube_api import get_youtube_api, set_database as set_youtube_api_database
 from database import get_database
 from stats_refresher import StatsRefresher
+from search_cache_sweeper import SearchCacheSweeper
 from song_tracker import SongTracker
 from startup_checks import run_startup_checks, check_home_assistant_api, check_youtube_api, check_database
 from constants import FALSE_VALUES
@@ -465,18 +466,34 @@ stats_refresher.start()
 atexit.register(stats_refresher.stop)
 LoggingHelper.log_operation("stats refresher", "started")
 
-# Start song tracker background task (polls HA every 30 seconds)
+# Start search cache sweeper (expiry + size budget, every 10 minutes)
+search_cache_sweeper = SearchCacheSweeper(db=db, interval_seconds=600)
+search_cache_sweeper.start()
+atexit.register(search_cache_sweeper.stop)
+LoggingHelper.log_operation("search cache sweeper", "started")
+
+# Start song tracker background task (WebSocket state changes, polling HA as fallback)
 song_tracking_enabled = os.environ.get('SONG_TRACKING_ENABLED', 'true').lower() not in FALSE_VALUES
 song_tracking_interval = int(os.environ.get('SONG_TRACKING_POLL_INTERVAL', '30'))
+song_tracking_websocket = os.environ.get('SONG_TRACKING_WEBSOCKET', 'true').lower() not in FALSE_VALUES
 
 if song_tracking_enabled:
-    song_tracker = SongTracker(ha_api=ha_api, db=db, poll_interval=song_tracking_interval)
+    song_tracker = SongTracker(ha_api=ha_api, db=db, poll_interval=song_tracking_interval,
+                               use_websocket=song_tracking_websocket)
     song_tracker.start()
     atexit.register(song_tracker.stop)
     LoggingHelper.log_operation(f"song tracker (poll interval: {song_tracking_interval}s)", "started")
 else:
     logger.info("Song tracker disabled (song_tracking_enabled=false)")
 
+# One-time import of plays from a copy of the Home Assistant recorder database
+recorder_import_path = os.environ.get('RECORDER_IMPORT_PATH', '').strip()
+if recorder_import_path:
+    from recorder_import import RecorderImporter
+    recorder_importer = RecorderImporter(db=db, recorder_path=recorder_import_path, entities=ha_api.entities)
+    recorder_importer.start()
+    atexit.register(recorder_importer.stop)
+
 # NOTE: Queue worker runs as a separate process (queue_worker.py), not a thread
 # This eliminates threading complexity and ensures only ONE worker processes the queue
 logger.debug("Queue worker runs as separate background process (started by run.sh)")
@@ -3,6 +3,7 @@ Database module for YouTube Thumbs addon.
 Provides a unified interface for all database operations.
 """
 import os
+from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 
@@ -10,10 +11,12 @@ from .connection import DatabaseConnection, DEFAULT_DB_PATH
 from .video_operations import VideoOperations
 from .stats_operations import StatsOperations
 from .api_usage_operations import APIUsageOperations
+from .quota_ledger_operations import QuotaLedgerOperations
 from .stats_cache_operations import StatsCacheOperations
 from .search_cache_operations import SearchCacheOperations
 from .logs_operations import LogsOperations
 from .queue_operations import QueueOperations
+from .play_event_operations import PlayEventOperations
 from helpers.video_helpers import get_content_hash
 
 
@@ -36,10 +39,12 @@ class Database:
         self._video_ops = VideoOperations(self._connection)
         self._stats_ops = StatsOperations(self._connection)
         self._api_usage_ops = APIUsageOperations(self._conn, self._lock)
+        self._quota_ledger_ops = QuotaLedgerOperations(self._conn, self._lock)
         self._stats_cache_ops = StatsCacheOperations(self._conn, self._lock)
         self._search_cache_ops = SearchCacheOperations(self._conn, self._lock)
         self._logs_ops = LogsOperations(self._conn, self._lock)
         self._queue_ops = QueueOperations(self._conn, self._lock)
+        self._play_event_ops = PlayEventOperations(self._conn, self._lock)
 
     # Connection methods
     @staticmethod
@@ -50,8 +55,42 @@ class Database:
     def upsert_video(self, video, date_added=None):
         return self._video_ops.upsert_video(video, date_added)
 
-    def record_play(self, yt_video_id, timestamp=None):
-        return self._video_ops.record_play(yt_video_id, timestamp)
+    def record_play(self, yt_video_id, timestamp=None, entity=None, source='manual'):
+        """Count a play in video_ratings and append it to the play event log (buffered)."""
+        recorded = self._video_ops.record_play(yt_video_id, timestamp)
+        if recorded:
+            played_at = datetime.strptime(self._timestamp(timestamp), '%Y-%m-%d %H:%M:%S') if timestamp else None
+            self._play_event_ops.record(yt_video_id, entity=entity, source=source, played_at=played_at)
+        return recorded
+
+    def record_skip(self, yt_video_id, timestamp=None):
+        return self._video_ops.record_skip(yt_video_id, timestamp)
+
+    def flush_play_events(self) -> int:
+        """Write buffered play events now."""
+        return self._play_event_ops.flush()
+
+    def import_play_events(self, events) -> int:
+        """Write historical play events in batches and count them as plays (recorder import)."""
+        return self._play_event_ops.import_events(events)
+
+    def get_play_times(self, yt_video_ids: List[str], since: datetime, until: datetime) -> Dict[str, List[str]]:
+        """Get play times of videos within a time range (buffered events are written first)."""
+        self._play_event_ops.flush()
+        return self._play_event_ops.get_play_times(yt_video_ids, since, until)
+
+    def get_migrated_play_times(self, yt_video_ids: List[str]) -> Dict[str, str]:
+        """Get when videos were last played before the event log existed (plays only counted)."""
+        return self._play_event_ops.get_migrated_play_times(yt_video_ids)
+
+    def get_next_videos(self, yt_video_id: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """Get the videos most often played right after a video (play transitions)."""
+        return self._play_event_ops.get_next_videos(yt_video_id, limit)
+
+    def get_recent_plays(self, since: datetime) -> Dict[str, Any]:
+        """Get play events since a point in time (buffered events are written first)."""
+        self._play_event_ops.flush()
+        return self._play_event_ops.get_recent_plays(since)
 
     def record_rating(self, yt_video_id, rating, timestamp=None):
         return self._video_ops.record_rating(yt_video_id, rating, timestamp)
@@ -71,6 +110,18 @@ class Database:
     def find_cached_video_combined(self, title: str, duration: int, artist: Optional[str] = None, return_hash: bool = False):
         return self._video_ops.find_cached_video_combined(title, duration, artist, return_hash)
 
+    def get_recently_played(self, limit: int = 200) -> List[Dict[str, Any]]:
+        return self._video_ops.get_recently_played(limit)
+
+    def get_videos_due_for_refresh(self, limit: int = 500, max_age_days: int = 30) -> List[str]:
+        return self._video_ops.get_videos_due_for_refresh(limit, max_age_days)
+
+    def apply_metadata_refresh(self, refreshed: List[Dict[str, Any]], unavailable: Dict[str, str]) -> None:
+        return self._video_ops.apply_metadata_refresh(refreshed, unavailable)
+
+    def mark_video_unavailable(self, yt_video_id: str, reason: str) -> None:
+        return self._video_ops.mark_video_unavailable(yt_video_id, reason)
+
     def get_pending_videos(self, limit: int = 50, reason_filter: Optional[str] = None):
         return self._video_ops.get_pending_videos(limit, reason_filter)
 
@@ -88,13 +139,21 @@ class Database:
         """Enqueue a rating operation to the unified queue."""
         return self._queue_ops.enqueue_rating(yt_video_id, rating)
 
-    def enqueue_search(self, media, callback_rating=None):
+    def enqueue_search(self, media, callback_rating=None, prefetch=False):
         """Enqueue a search operation to the unified queue."""
-        return self._queue_ops.enqueue_search(media, callback_rating)
+        return self._queue_ops.enqueue_search(media, callback_rating, prefetch)
 
-    def claim_next_queue_item(self, max_attempts: int = 5):
+    def claim_next_queue_item(self, max_attempts: int = 5, max_priority: Optional[int] = None, min_priority: int = 1):
         """Claim the next item from the unified queue (for queue worker)."""
-        return self._queue_ops.claim_next(max_attempts=max_attempts)
+        return self._queue_ops.claim_next(max_attempts=max_attempts, max_priority=max_priority, min_priority=min_priority)
+
+    def get_queue_pending_demand(self) -> Dict[str, int]:
+        """Count pending ratings, searches, deferrable (first-play) and lookahead searches."""
+        return self._queue_ops.get_pending_demand()
+
+    def get_queue_arrival_rates(self, hours: int = 168) -> Dict[str, float]:
+        """Get average rating and search arrivals per hour."""
+        return self._queue_ops.get_arrival_rates(hours)
 
     def mark_queue_item_completed(self, queue_id, api_response_data=None):
         """Mark a queue item as completed."""
@@ -104,6 +163,14 @@ class Database:
         """Mark a queue item as failed."""
         return self._queue_ops.mark_failed(queue_id, error, api_response_data)
 
+    def get_queue_debug_record(self, queue_id: int) -> Optional[Dict[str, Any]]:
+        """Get the decompressed search debug record of a queue item."""
+        return self._queue_ops.get_debug_record(queue_id)
+
+    def prune_queue_debug_records(self, days: int) -> int:
+        """Delete search debug records older than the retention window."""
+        return self._queue_ops.prune_debug_records(days)
+
     def reset_stale_processing_items(self, max_attempts: int = 5):
         """Reset queue items stuck in 'processing' status (crash recovery)."""
         return self._queue_ops.reset_stale_processing_items(max_attempts=max_attempts)
@@ -112,6 +179,10 @@ class Database:
         """List all pending items in the unified queue."""
         return self._queue_ops.list_pending(limit)
 
+    def list_pending_rating_items(self, limit: int = 50):
+        """List pending rating items in the unified queue (oldest first)."""
+        return self._queue_ops.list_pending_ratings(limit)
+
     def list_queue_history(self, limit=100):
         """List completed and failed items from the unified queue."""
         return self._queue_ops.list_history(limit)
@@ -124,6 +195,10 @@ class Database:
         """Get a specific queue item by ID."""
         return self._queue_ops.get_item_by_id(queue_id)
 
+    def get_search_match_history(self, limit: int = 200) -> List[Dict[str, Any]]:
+        """Get match rank summaries from recent search debug data (for fetch planning)."""
+        return self._queue_ops.get_search_match_history(limit)
+
     # Stats operations
     def get_total_videos(self) -> int:
         return self._stats_ops.get_total_videos()
@@ -153,6 +228,7 @@ class Database:
         return self._stats_ops.get_category_breakdown()
 
     def get_plays_by_period(self, days: int = 7) -> List[Dict]:
+        self._play_event_ops.flush()
         return self._stats_ops.get_plays_by_period(days)
 
     def get_recent_additions(self, days: int = 7) -> List[Dict]:
@@ -164,6 +240,7 @@ class Database:
     def get_play_history(self, limit: int = 100, offset: int = 0,
                          date_from: Optional[str] = None,
                          date_to: Optional[str] = None) -> List[Dict]:
+        self._play_event_ops.flush()
         return self._stats_ops.get_play_history(limit, offset, date_from, date_to)
 
     def get_rating_history(self, limit: int = 100, offset: int = 0) -> List[Dict]:
@@ -173,6 +250,7 @@ class Database:
         return self._stats_ops.search_history(query, limit)
 
     def get_listening_patterns(self) -> Dict:
+        self._play_event_ops.flush()
         return self._stats_ops.get_listening_patterns()
 
     def get_discovery_stats(self) -> List[Dict]:
@@ -209,9 +287,53 @@ class Database:
         return self._stats_ops.get_unrated_videos(page, limit)
 
     # API Usage Operations
-    def record_api_call(self, api_method: str, success: bool = True, quota_cost: int = 1, error_message: str = None) -> None:
-        """Record a YouTube API call for usage tracking."""
-        return self._api_usage_ops.record_api_call(api_method, success, quota_cost, error_message)
+    def record_api_call(
+        self,
+        api_method: str,
+        success: bool = True,
+        quota_cost: int = 1,
+        error_message: str = None,
+        credential: str = 'primary'
+    ) -> None:
+        """Record a YouTube API call for usage tracking (hourly aggregate and quota ledger)."""
+        self._api_usage_ops.record_api_call(api_method, success, quota_cost, error_message)
+        self._quota_ledger_ops.append(api_method, quota_cost, success, credential)
+
+    def get_quota_credential_usage(self, quota_day: str = None) -> Dict[str, int]:
+        """Get quota used per credential on a Pacific quota day (default: today)."""
+        return self._quota_ledger_ops.get_credential_usage(quota_day)
+
+    def get_quota_day_usage(self, quota_day: str = None) -> Dict[str, Any]:
+        """Get quota used on a Pacific quota day (default: today)."""
+        return self._quota_ledger_ops.get_day_usage(quota_day)
+
+    def get_quota_daily_totals(self, days: int = 30) -> List[Dict[str, Any]]:
+        """Get quota used per Pacific quota day for the last N days."""
+        return self._quota_ledger_ops.get_daily_totals(days)
+
+    def get_quota_day_breakdown(self, quota_day: str = None) -> List[Dict[str, Any]]:
+        """Get quota used per API method on a Pacific quota day."""
+        return self._quota_ledger_ops.get_day_breakdown(quota_day)
+
+    def set_quota_exhausted(self, exhausted_at, resets_at, source: str) -> None:
+        """Record that YouTube reported the quota as exhausted until resets_at."""
+        return self._quota_ledger_ops.set_quota_exhausted(exhausted_at, resets_at, source)
+
+    def set_credential_quota_exhausted(self, credential: str, exhausted_at, resets_at, source: str) -> None:
+        """Record that YouTube reported one credential's quota as exhausted until resets_at."""
+        return self._quota_ledger_ops.set_credential_exhausted(credential, exhausted_at, resets_at, source)
+
+    def get_credential_quota_states(self) -> Dict[str, Dict[str, Any]]:
+        """Get the quota exhausted state of each credential, cached in-process."""
+        return self._quota_ledger_ops.get_credential_states()
+
+    def clear_quota_exhausted(self) -> None:
+        """Clear the quota exhausted state."""
+        return self._quota_ledger_ops.clear_quota_exhausted()
+
+    def get_quota_state(self) -> Dict[str, Any]:
+        """Get the quota exhausted state (exhausted_at, resets_at, source), cached in-process."""
+        return self._quota_ledger_ops.get_quota_state()
 
     def get_api_usage_summary(self, days: int = 30) -> Dict[str, Any]:
         """Get API usage summary for the last N days."""
@@ -225,6 +347,10 @@ class Database:
         """Get hourly API usage for a specific day."""
         return self._api_usage_ops.get_hourly_usage(date_str)
 
+    def get_api_hourly_averages(self, days: int = 7) -> List[float]:
+        """Get average quota units per UTC hour over the last N complete days."""
+        return self._api_usage_ops.get_hourly_averages(days)
+
     def log_api_call_detailed(
         self,
         api_method: str,
@@ -299,10 +425,19 @@ class Database:
         """Find cached video by title and duration (tolerance: exact or +1s only)."""
         return self._search_cache_ops.find_by_title_and_duration(title, duration, tolerance)
 
+    def get_search_cache_entries(self, video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get unexpired search cache entries keyed by video ID."""
+        return self._search_cache_ops.get_by_video_ids(video_ids)
+
     def cleanup_search_cache(self) -> int:
         """Remove expired search cache entries."""
         return self._search_cache_ops.cleanup_expired()
 
+    def sweep_search_cache(self, max_rows: int, max_bytes: int, batch_size: int = 500,
+                           pause=None) -> Dict[str, int]:
+        """Remove expired and over-budget search cache entries (deleted in batches, pause between them)."""
+        return self._search_cache_ops.sweep(max_rows, max_bytes, batch_size, pause)
+
     def get_search_cache_stats(self) -> Dict[str, int]:
         """Get search cache statistics."""
         return self._search_cache_ops.get_stats()
@@ -178,6 +178,35 @@ class APIUsageOperations:
 
             return result
 
+    def get_hourly_averages(self, days: int = 7) -> List[float]:
+        """
+        Get average quota units per UTC hour over the last N complete days.
+
+        Args:
+            days: Number of complete days to average (today is excluded)
+
+        Returns:
+            List of 24 averages indexed by UTC hour
+        """
+        today = datetime.utcnow().date()
+        start_date = (today - timedelta(days=days)).strftime('%Y-%m-%d')
+
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                SELECT * FROM api_usage
+                WHERE date >= ? AND date < ?
+                """,
+                (start_date, today.strftime('%Y-%m-%d'))
+            )
+            rows = [dict(row) for row in cursor.fetchall()]
+
+        # Days without a row had no API calls, so average over the full window
+        return [
+            sum(row.get(f'hour_{h:02d}', 0) or 0 for row in rows) / days
+            for h in range(24)
+        ]
+
     def log_api_call_detailed(
         self,
         api_method: str,
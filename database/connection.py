@@ -1,16 +1,18 @@
 """
 Database connection and schema management.
 """
+import json
 import os
 import re
 import sqlite3
 import threading
 import warnings
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Dict, Any
 
 from logging_helper import LoggingHelper, LogType
+from helpers.time_helpers import get_quota_day
 
 # Get logger instance
 logger = LoggingHelper.get_logger(LogType.MAIN)
@@ -21,6 +23,13 @@ warnings.filterwarnings("ignore", category=DeprecationWarning, message=".*timest
 
 DEFAULT_DB_PATH = Path(os.getenv('YTT_DB_PATH', '/config/youtube_thumbs/ratings.db'))
 
+# Queue rows moved per transaction when compacting inline debug blobs
+DEBUG_MIGRATION_BATCH_SIZE = 200
+
+# One-time migrations that have run, as bits of PRAGMA user_version
+MIGRATION_PLAY_TRANSITIONS = 1  # play transitions seeded from play_events
+MIGRATION_QUOTA_LEDGER = 2  # quota ledger seeded from api_usage
+
 
 class DatabaseConnection:
     """Manages SQLite connection and schema."""
@@ -54,7 +63,11 @@ class DatabaseConnection:
             date_last_played TIMESTAMP,
             play_count INTEGER DEFAULT 1,
             rating_score INTEGER DEFAULT 0,
-            source TEXT DEFAULT 'ha_live'
+            source TEXT DEFAULT 'ha_live',
+            yt_checked_at TIMESTAMP,
+            yt_unavailable_reason TEXT,
+            skip_count INTEGER DEFAULT 0,
+            date_last_skipped TIMESTAMP
         );
         CREATE INDEX IF NOT EXISTS idx_video_ratings_yt_video_id ON video_ratings(yt_video_id);
         CREATE INDEX IF NOT EXISTS idx_video_ratings_ha_title ON video_ratings(ha_title);
@@ -110,6 +123,41 @@ class DatabaseConnection:
         CREATE INDEX IF NOT EXISTS idx_api_call_log_success ON api_call_log(success);
     """
 
+    # Append-only record of quota charged, bucketed by Pacific quota day,
+    # with a running total per day so remaining quota is a primary key read.
+    # credential_quota_state is set when YouTube reports a credential's quota
+    # exhausted; the single-row quota_state once every credential in the pool is
+    QUOTA_LEDGER_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS quota_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            quota_day TEXT NOT NULL,
+            recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            api_method TEXT NOT NULL,
+            units INTEGER NOT NULL,
+            success BOOLEAN DEFAULT 1,
+            source TEXT DEFAULT 'live',
+            credential TEXT DEFAULT 'primary'
+        );
+        CREATE INDEX IF NOT EXISTS idx_quota_ledger_day ON quota_ledger(quota_day);
+        CREATE TABLE IF NOT EXISTS quota_day_totals (
+            quota_day TEXT PRIMARY KEY,
+            units INTEGER NOT NULL DEFAULT 0,
+            calls INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS quota_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            exhausted_at TIMESTAMP,
+            resets_at TIMESTAMP,
+            source TEXT
+        );
+        CREATE TABLE IF NOT EXISTS credential_quota_state (
+            credential TEXT PRIMARY KEY,
+            exhausted_at TIMESTAMP,
+            resets_at TIMESTAMP,
+            source TEXT
+        );
+    """
+
     STATS_CACHE_SCHEMA = """
         CREATE TABLE IF NOT EXISTS stats_cache (
             cache_key TEXT PRIMARY KEY,
@@ -134,13 +182,21 @@ class DatabaseConnection:
             yt_location TEXT,
             yt_recording_date TEXT,
             cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at TIMESTAMP NOT NULL
+            expires_at TIMESTAMP NOT NULL,
+            hit_count INTEGER DEFAULT 0,
+            last_hit_at TIMESTAMP
         );
         CREATE INDEX IF NOT EXISTS idx_search_cache_duration ON search_results_cache(yt_duration);
         CREATE INDEX IF NOT EXISTS idx_search_cache_expires ON search_results_cache(expires_at);
         CREATE INDEX IF NOT EXISTS idx_search_cache_title ON search_results_cache(yt_title);
     """
 
+    # Eviction order for the search cache sweep (created after hit_count/last_hit_at are ensured)
+    SEARCH_RESULTS_CACHE_EVICTION_INDEX = """
+        CREATE INDEX IF NOT EXISTS idx_search_cache_eviction
+        ON search_results_cache(COALESCE(hit_count, 0), COALESCE(last_hit_at, cached_at));
+    """
+
     UNIFIED_QUEUE_SCHEMA = """
         CREATE TABLE IF NOT EXISTS queue (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -162,6 +218,57 @@ class DatabaseConnection:
         CREATE INDEX IF NOT EXISTS idx_queue_requested_at ON queue(requested_at DESC);
     """
 
+    # Compact, zlib-compressed search debug records (see helpers/debug_record_helpers.py).
+    # Summary columns let the fetch planner read match history without decompressing.
+    QUEUE_DEBUG_RECORDS_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS queue_debug_records (
+            queue_id INTEGER PRIMARY KEY,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            format INTEGER NOT NULL,
+            raw_size INTEGER,
+            cache_hit INTEGER NOT NULL DEFAULT 0,
+            match_rank INTEGER,
+            batch_count INTEGER NOT NULL DEFAULT 0,
+            candidates_found INTEGER,
+            data BLOB NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_queue_debug_records_created ON queue_debug_records(created_at);
+    """
+
+    # Append-only play log (UTC) with rollups maintained by each batch insert.
+    # played_at leads both indexes so time-range scans stay cheap as it grows
+    PLAY_EVENTS_SCHEMA = """
+        CREATE TABLE IF NOT EXISTS play_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            played_at TIMESTAMP NOT NULL,
+            yt_video_id TEXT NOT NULL,
+            entity TEXT,
+            source TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_play_events_played_at ON play_events(played_at);
+        CREATE INDEX IF NOT EXISTS idx_play_events_video ON play_events(yt_video_id, played_at);
+
+        CREATE TABLE IF NOT EXISTS play_rollups_hourly (
+            hour TEXT PRIMARY KEY,
+            plays INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS play_rollups_daily (
+            day TEXT NOT NULL,
+            yt_video_id TEXT NOT NULL,
+            plays INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, yt_video_id)
+        );
+
+        CREATE TABLE IF NOT EXISTS play_transitions (
+            from_video_id TEXT NOT NULL,
+            to_video_id TEXT NOT NULL,
+            transitions INTEGER NOT NULL DEFAULT 0,
+            last_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (from_video_id, to_video_id)
+        );
+    """
+
 
     def __init__(self, db_path: Path = DEFAULT_DB_PATH) -> None:
         # SECURITY: Validate and normalize the database path to prevent path injection
@@ -224,9 +331,12 @@ class DatabaseConnection:
                     self._conn.executescript(self.VIDEO_RATINGS_SCHEMA)
                     self._conn.executescript(self.API_USAGE_SCHEMA)
                     self._conn.executescript(self.API_CALL_LOG_SCHEMA)
+                    self._conn.executescript(self.QUOTA_LEDGER_SCHEMA)
                     self._conn.executescript(self.STATS_CACHE_SCHEMA)
                     self._conn.executescript(self.SEARCH_RESULTS_CACHE_SCHEMA)
                     self._conn.executescript(self.UNIFIED_QUEUE_SCHEMA)
+                    self._conn.executescript(self.QUEUE_DEBUG_RECORDS_SCHEMA)
+                    self._conn.executescript(self.PLAY_EVENTS_SCHEMA)
 
                     # Create indexes
                     self._conn.execute(
@@ -236,10 +346,241 @@ class DatabaseConnection:
                         "CREATE INDEX IF NOT EXISTS idx_video_ratings_ha_content_id ON video_ratings(ha_content_id)"
                     )
 
+                    # Add columns introduced after the table was first created
+                    self._ensure_column('search_results_cache', 'hit_count', 'INTEGER DEFAULT 0')
+                    self._ensure_column('search_results_cache', 'last_hit_at', 'TIMESTAMP')
+                    self._conn.executescript(self.SEARCH_RESULTS_CACHE_EVICTION_INDEX)
+                    self._ensure_column('video_ratings', 'yt_checked_at', 'TIMESTAMP')
+                    self._ensure_column('video_ratings', 'yt_unavailable_reason', 'TEXT')
+                    self._ensure_column('video_ratings', 'skip_count', 'INTEGER DEFAULT 0')
+                    self._ensure_column('video_ratings', 'date_last_skipped', 'TIMESTAMP')
+                    self._ensure_column('quota_ledger', 'credential', "TEXT DEFAULT 'primary'")
+
+                    # One-time re-bucketing of UTC api_usage history into the quota ledger
+                    self._migrate_api_usage_to_ledger()
+
+                    # One-time compaction of debug blobs stored inline in the queue table
+                    self._migrate_queue_debug_records()
+
+                    # One-time seeding of the play event log from date_last_played
+                    self._migrate_play_events()
+
+                    # One-time seeding of play transitions from logged plays
+                    self._migrate_play_transitions()
+
             except sqlite3.DatabaseError as exc:
                 logger.error(f"Failed to initialize SQLite schema: {exc}")
                 raise
 
+    def _ensure_column(self, table: str, column: str, definition: str) -> None:
+        """
+        Add a column to an existing table if it is missing (caller holds the lock).
+
+        CREATE TABLE IF NOT EXISTS does not touch tables from older versions,
+        so new columns are added here with ALTER TABLE.
+
+        Args:
+            table: Table name (trusted constant)
+            column: Column name (trusted constant)
+            definition: Column type and default (trusted constant)
+        """
+        existing = {row['name'] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        if column not in existing:
+            # nosec B608 - table/column/definition are hardcoded constants, not user input
+            self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            logger.info(f"Added column {table}.{column}")
+
+    def _migration_done(self, migration: int) -> bool:
+        """Check whether a one-time migration (a MIGRATION_* bit) has run (caller holds the lock)."""
+        return bool(self._conn.execute("PRAGMA user_version").fetchone()[0] & migration)
+
+    def _mark_migration_done(self, migration: int) -> None:
+        """Record a one-time migration (a MIGRATION_* bit) in PRAGMA user_version (caller holds the lock)."""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0] | migration
+        # nosec B608 - version is an integer built from constants (PRAGMA takes no parameters)
+        self._conn.execute(f"PRAGMA user_version = {int(version)}")
+
+    def _migrate_api_usage_to_ledger(self) -> None:
+        """
+        Seed an empty quota ledger from api_usage history (caller holds the lock).
+
+        api_usage buckets by UTC date and hour; each hour is moved to the Pacific
+        quota day it falls in (Pacific offsets are whole hours, so this is exact).
+        api_usage only counted units, so migrated days report 0 calls. Runs
+        once, recorded in PRAGMA user_version (an install may record its first
+        call long after startup).
+        """
+        if self._migration_done(MIGRATION_QUOTA_LEDGER):
+            return
+        if self._conn.execute("SELECT 1 FROM quota_ledger LIMIT 1").fetchone():
+            self._mark_migration_done(MIGRATION_QUOTA_LEDGER)
+            return
+
+        entries = []
+        for row in self._conn.execute("SELECT * FROM api_usage"):
+            for hour in range(24):
+                units = row[f'hour_{hour:02d}'] or 0
+                if units <= 0:
+                    continue
+                hour_start = datetime.strptime(f"{row['date']} {hour:02d}", '%Y-%m-%d %H').replace(tzinfo=timezone.utc)
+                entries.append((get_quota_day(hour_start), self.timestamp(hour_start), units))
+
+        if entries:
+            self._conn.executemany(
+                """
+                INSERT INTO quota_ledger (quota_day, recorded_at, api_method, units, success, source)
+                VALUES (?, ?, 'unknown', ?, 1, 'api_usage')
+                """,
+                entries
+            )
+            self._conn.execute(
+                """
+                INSERT INTO quota_day_totals (quota_day, units, calls)
+                SELECT quota_day, SUM(units), 0 FROM quota_ledger GROUP BY quota_day
+                """
+            )
+            logger.info(f"Migrated {len(entries)} hourly api_usage buckets into the quota ledger")
+        self._mark_migration_done(MIGRATION_QUOTA_LEDGER)
+
+    def _migrate_queue_debug_records(self) -> None:
+        """
+        Move queue.api_response_data blobs into queue_debug_records (caller holds the lock).
+
+        Each blob is compacted and compressed (scores are computed from the HA
+        title in the payload). Rows are read DEBUG_MIGRATION_BATCH_SIZE at a
+        time by id, and each batch clears its inline blobs and commits only
+        after its compact records are written, so a large queue table is never
+        loaded at once and an interrupted migration resumes where it stopped.
+        """
+        from helpers.debug_record_helpers import compact_debug_record, debug_record_row
+
+        last_id = 0
+        migrated = 0
+        while True:
+            rows = self._conn.execute(
+                """
+                SELECT id, payload, completed_at, last_attempt, api_response_data FROM queue
+                WHERE api_response_data IS NOT NULL AND id > ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                (last_id, DEBUG_MIGRATION_BATCH_SIZE)
+            ).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+
+            records = []
+            for row in rows:
+                try:
+                    data = json.loads(row['api_response_data'])
+                    payload = json.loads(row['payload'])
+                except (TypeError, ValueError):
+                    continue
+                if not isinstance(data, dict):
+                    continue
+                record = compact_debug_record(data, title=payload.get('ha_title'))
+                records.append(
+                    (row['id'], self.timestamp(row['completed_at'] or row['last_attempt'] or datetime.now(timezone.utc)))
+                    + debug_record_row(record, len(row['api_response_data']))
+                )
+
+            self._conn.executemany(
+                """
+                INSERT OR REPLACE INTO queue_debug_records
+                    (queue_id, created_at, format, raw_size, cache_hit, match_rank, batch_count, candidates_found, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                records
+            )
+            # Blobs that aren't debug data have nothing worth keeping
+            self._conn.executemany(
+                "UPDATE queue SET api_response_data = NULL WHERE id = ?",
+                [(row['id'],) for row in rows]
+            )
+            self._conn.commit()
+            migrated += len(records)
+
+        if migrated:
+            logger.info(f"Compacted {migrated} queue debug blobs into queue_debug_records")
+
+    def _migrate_play_events(self) -> None:
+        """
+        Seed an empty play event log from video_ratings (caller holds the lock).
+
+        Earlier plays were only counted, so each played video gets one event at
+        its date_last_played (source 'migrated'); analytics then start from
+        what the old date_last_played-based queries showed.
+        """
+        if self._conn.execute("SELECT 1 FROM play_events LIMIT 1").fetchone():
+            return
+
+        cursor = self._conn.execute(
+            """
+            INSERT INTO play_events (played_at, yt_video_id, entity, source)
+            SELECT date_last_played, yt_video_id, NULL, 'migrated'
+            FROM video_ratings
+            WHERE date_last_played IS NOT NULL AND play_count > 0
+            ORDER BY date_last_played
+            """
+        )
+        if cursor.rowcount <= 0:
+            return
+
+        self._conn.execute(
+            """
+            INSERT INTO play_rollups_hourly (hour, plays)
+            SELECT strftime('%Y-%m-%d %H:00:00', played_at), COUNT(*) FROM play_events GROUP BY 1
+            """
+        )
+        self._conn.execute(
+            """
+            INSERT INTO play_rollups_daily (day, yt_video_id, plays)
+            SELECT DATE(played_at), yt_video_id, COUNT(*) FROM play_events GROUP BY 1, 2
+            """
+        )
+        logger.info(f"Seeded the play event log with {cursor.rowcount} last-played events")
+
+    def _migrate_play_transitions(self) -> None:
+        """
+        Seed an empty play transition table from play_events (caller holds the lock).
+
+        Consecutive plays on the same player within TRANSITION_GAP_MINUTES of
+        each other are counted, the same rule PlayEventOperations applies when
+        it writes new events. Runs once: PRAGMA user_version records that it
+        did, since the table can stay empty (e.g. only 'migrated' events).
+        """
+        if self._migration_done(MIGRATION_PLAY_TRANSITIONS):
+            return
+        if self._conn.execute("SELECT 1 FROM play_transitions LIMIT 1").fetchone():
+            self._mark_migration_done(MIGRATION_PLAY_TRANSITIONS)
+            return
+
+        from .play_event_operations import TRANSITION_GAP_MINUTES
+        cursor = self._conn.execute(
+            """
+            INSERT INTO play_transitions (from_video_id, to_video_id, transitions, last_at)
+            SELECT from_video_id, to_video_id, COUNT(*), MAX(played_at)
+            FROM (
+                SELECT
+                    LAG(yt_video_id) OVER (PARTITION BY entity ORDER BY played_at, id) AS from_video_id,
+                    LAG(played_at) OVER (PARTITION BY entity ORDER BY played_at, id) AS previous_at,
+                    yt_video_id AS to_video_id,
+                    played_at
+                FROM play_events
+                WHERE entity IS NOT NULL
+            )
+            WHERE from_video_id IS NOT NULL
+              AND from_video_id != to_video_id
+              AND julianday(played_at) - julianday(previous_at) <= ? / 1440.0
+            GROUP BY from_video_id, to_video_id
+            """,
+            (TRANSITION_GAP_MINUTES,)
+        )
+        self._mark_migration_done(MIGRATION_PLAY_TRANSITIONS)
+        if cursor.rowcount > 0:
+            logger.info(f"Seeded {cursor.rowcount} play transitions from the play event log")
+
     @staticmethod
     def timestamp(ts = None) -> str:
         """
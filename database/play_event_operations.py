@@ -0,0 +1,366 @@
+"""
+Play event operations.
+
+Every counted play is appended to play_events (video, media player, UTC time,
+source), so history and analytics report plays rather than the single
+date_last_played of each video.
+
+Events are buffered in memory and written in batches: a flush happens when
+the buffer is full, PLAY_EVENT_FLUSH_SECONDS after the first buffered event,
+before analytics reads and at exit. play_count and date_last_played in
+video_ratings are still updated immediately by record_play.
+
+Each flush also updates two rollup tables in the same transaction, so
+analytics read a few hundred small rows instead of scanning every event:
+- play_rollups_hourly: plays per UTC hour (listening patterns by weekday/hour)
+- play_rollups_daily: plays per UTC day and video (plays per day, top videos)
+
+A third table, play_transitions, counts which video followed which on the
+same media player (a first-order Markov table), for the song tracker's
+lookahead. Only events with a known player that start within
+TRANSITION_GAP_MINUTES of the previous play there are counted; repeats of
+the same video are not transitions.
+
+Historical plays (the recorder import) bypass the buffer: import_events()
+writes them in batches together with their rollups, transitions (chained
+within the import only) and play_count/date_last_played.
+"""
+import atexit
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from logging_helper import LoggingHelper, LogType
+
+# Get logger instance
+logger = LoggingHelper.get_logger(LogType.MAIN)
+
+# Buffered events are written once this many are waiting...
+PLAY_EVENT_BATCH_SIZE = 100
+
+# ...or this long after the first one was buffered
+PLAY_EVENT_FLUSH_SECONDS = 30
+
+# A play only follows the previous one on its player if it started within this gap
+TRANSITION_GAP_MINUTES = 30
+
+# Historical events written per transaction (keeps each hold of the DB lock short)
+IMPORT_BATCH_SIZE = 2000
+
+# Videos per IN (...) lookup
+LOOKUP_CHUNK_SIZE = 500
+
+
+class PlayEventOperations:
+    """Buffered writer for the append-only play event log and its rollups."""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock) -> None:
+        self._conn = conn
+        self._lock = lock
+        self._buffer: List[Tuple[str, str, Optional[str], str]] = []
+        self._buffer_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._last_play: Dict[str, Tuple[str, str]] = {}  # entity -> (yt_video_id, played_at) of its last written event
+        atexit.register(self.flush)
+
+    def record(
+        self,
+        yt_video_id: str,
+        entity: Optional[str] = None,
+        source: str = 'manual',
+        played_at: Optional[datetime] = None
+    ) -> None:
+        """
+        Buffer one play event.
+
+        Args:
+            yt_video_id: YouTube video ID that was played
+            entity: Media player it was played on (None if unknown)
+            source: What recorded the play (song_tracker, queue_search, ...)
+            played_at: When it was played (default: now)
+        """
+        played_at = played_at or datetime.now(timezone.utc)
+        if played_at.tzinfo is not None:
+            played_at = played_at.astimezone(timezone.utc).replace(tzinfo=None)
+        event = (played_at.strftime('%Y-%m-%d %H:%M:%S'), yt_video_id, entity, source)
+
+        with self._buffer_lock:
+            self._buffer.append(event)
+            full = len(self._buffer) >= PLAY_EVENT_BATCH_SIZE
+            if not full and self._flush_timer is None:
+                self._flush_timer = threading.Timer(PLAY_EVENT_FLUSH_SECONDS, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        Write buffered events and update the rollups in one transaction.
+
+        Returns:
+            Number of events written (0 if the buffer was empty or the write failed)
+        """
+        with self._buffer_lock:
+            events, self._buffer = self._buffer, []
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        if not events:
+            return 0
+
+        start = time.perf_counter()
+        try:
+            with self._lock:
+                transitions = self._transitions(events)
+                with self._conn:
+                    self._write(events, transitions)
+        except sqlite3.Error as exc:
+            # Play counts are already in video_ratings; only the event log loses these
+            logger.error(f"Failed to write {len(events)} play events: {exc}")
+            return 0
+
+        logger.debug(f"Wrote {len(events)} play events in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return len(events)
+
+    def import_events(self, events: List[Tuple[str, str, Optional[str], str]]) -> int:
+        """
+        Write historical play events and count them as plays of their videos.
+
+        Each batch of IMPORT_BATCH_SIZE events is one transaction: the events,
+        their rollups and transitions, and play_count/date_last_played in
+        video_ratings. Transitions only chain imported events, so history
+        imported behind newer plays does not link to them.
+
+        Args:
+            events: (played_at 'YYYY-MM-DD HH:MM:SS' UTC, yt_video_id, entity, source) tuples
+                of videos in video_ratings, oldest first
+
+        Returns:
+            Number of events written (batches before a failed write stay written)
+        """
+        chains: Dict[str, Tuple[str, str]] = {}
+        written = 0
+        for offset in range(0, len(events), IMPORT_BATCH_SIZE):
+            batch = events[offset:offset + IMPORT_BATCH_SIZE]
+            plays: Dict[str, Tuple[int, str]] = {}
+            for played_at, yt_video_id, _, _ in batch:
+                count, last_played = plays.get(yt_video_id, (0, played_at))
+                plays[yt_video_id] = (count + 1, max(last_played, played_at))
+
+            try:
+                with self._lock:
+                    transitions = self._transitions(batch, chains)
+                    with self._conn:
+                        self._write(batch, transitions)
+                        self._conn.executemany(
+                            """
+                            UPDATE video_ratings
+                            SET play_count = COALESCE(play_count, 0) + ?,
+                                date_last_played = MAX(COALESCE(date_last_played, ''), ?)
+                            WHERE yt_video_id = ?
+                            """,
+                            [(count, last_played, yt_video_id) for yt_video_id, (count, last_played) in plays.items()]
+                        )
+            except sqlite3.Error as exc:
+                logger.error(f"Failed to import {len(batch)} play events: {exc}")
+                break
+            written += len(batch)
+        return written
+
+    def get_play_times(self, yt_video_ids: List[str], since: datetime, until: datetime) -> Dict[str, List[str]]:
+        """
+        Get written play times of videos within a time range.
+
+        Args:
+            yt_video_ids: Videos to look up
+            since: Earliest play time (naive UTC)
+            until: Latest play time (naive UTC)
+
+        Returns:
+            Dict of yt_video_id -> sorted played_at strings (videos without plays are left out)
+        """
+        bounds = (since.strftime('%Y-%m-%d %H:%M:%S'), until.strftime('%Y-%m-%d %H:%M:%S'))
+        times: Dict[str, List[str]] = {}
+        with self._lock:
+            for offset in range(0, len(yt_video_ids), LOOKUP_CHUNK_SIZE):
+                chunk = yt_video_ids[offset:offset + LOOKUP_CHUNK_SIZE]
+                placeholders = ', '.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"""
+                    SELECT yt_video_id, played_at FROM play_events
+                    WHERE yt_video_id IN ({placeholders}) AND played_at BETWEEN ? AND ?
+                    ORDER BY yt_video_id, played_at
+                    """,
+                    (*chunk, *bounds)
+                ).fetchall()
+                for row in rows:
+                    times.setdefault(row['yt_video_id'], []).append(str(row['played_at']))
+        return times
+
+    def get_migrated_play_times(self, yt_video_ids: List[str]) -> Dict[str, str]:
+        """
+        Get when videos were last played before the event log existed.
+
+        Plays up to then are only counted in video_ratings.play_count; the
+        event log has a single 'migrated' event at that date_last_played.
+
+        Args:
+            yt_video_ids: Videos to look up
+
+        Returns:
+            Dict of yt_video_id -> played_at of its 'migrated' event (videos without one are left out)
+        """
+        times: Dict[str, str] = {}
+        with self._lock:
+            for offset in range(0, len(yt_video_ids), LOOKUP_CHUNK_SIZE):
+                chunk = yt_video_ids[offset:offset + LOOKUP_CHUNK_SIZE]
+                placeholders = ', '.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"""
+                    SELECT yt_video_id, MAX(played_at) AS played_at FROM play_events
+                    WHERE yt_video_id IN ({placeholders}) AND source = 'migrated'
+                    GROUP BY yt_video_id
+                    """,
+                    chunk
+                ).fetchall()
+                times.update((row['yt_video_id'], str(row['played_at'])) for row in rows)
+        return times
+
+    def _write(self, events: List[Tuple[str, str, Optional[str], str]],
+               transitions: Dict[Tuple[str, str], Tuple[int, str]]) -> None:
+        """Insert events and add them to the rollups and transitions (caller holds the lock and transaction)."""
+        hourly = Counter(played_at[:13] + ':00:00' for played_at, _, _, _ in events)
+        daily = Counter((played_at[:10], yt_video_id) for played_at, yt_video_id, _, _ in events)
+
+        self._conn.executemany(
+            "INSERT INTO play_events (played_at, yt_video_id, entity, source) VALUES (?, ?, ?, ?)",
+            events
+        )
+        self._conn.executemany(
+            """
+            INSERT INTO play_rollups_hourly (hour, plays) VALUES (?, ?)
+            ON CONFLICT(hour) DO UPDATE SET plays = plays + excluded.plays
+            """,
+            list(hourly.items())
+        )
+        self._conn.executemany(
+            """
+            INSERT INTO play_rollups_daily (day, yt_video_id, plays) VALUES (?, ?, ?)
+            ON CONFLICT(day, yt_video_id) DO UPDATE SET plays = plays + excluded.plays
+            """,
+            [(day, yt_video_id, plays) for (day, yt_video_id), plays in daily.items()]
+        )
+        self._conn.executemany(
+            """
+            INSERT INTO play_transitions (from_video_id, to_video_id, transitions, last_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(from_video_id, to_video_id) DO UPDATE SET
+                transitions = transitions + excluded.transitions,
+                last_at = MAX(last_at, excluded.last_at)
+            """,
+            [(pair[0], pair[1], count, last_at) for pair, (count, last_at) in transitions.items()]
+        )
+
+    def _transitions(
+        self,
+        events: List[Tuple[str, str, Optional[str], str]],
+        chains: Optional[Dict[str, Tuple[str, str]]] = None
+    ) -> Dict[Tuple[str, str], Tuple[int, str]]:
+        """
+        Count video-to-video transitions in a batch, continuing each player's chain (caller holds the lock).
+
+        Args:
+            events: Events of the batch
+            chains: Last (yt_video_id, played_at) per player to continue from (default:
+                the live chain, which starts at each player's newest written event)
+
+        Returns:
+            Dict of (from_video_id, to_video_id) -> (count, latest played_at)
+        """
+        live = chains is None
+        last_play = self._last_play if live else chains
+        transitions: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        gap = timedelta(minutes=TRANSITION_GAP_MINUTES)
+        for played_at, yt_video_id, entity, _ in sorted(events, key=lambda event: event[0]):
+            if not entity:
+                continue
+            if live and entity not in last_play:
+                row = self._conn.execute(
+                    "SELECT yt_video_id, played_at FROM play_events WHERE entity = ? ORDER BY played_at DESC, id DESC LIMIT 1",
+                    (entity,)
+                ).fetchone()
+                if row:
+                    last_play[entity] = (row['yt_video_id'], str(row['played_at']))
+
+            previous = last_play.get(entity)
+            last_play[entity] = (yt_video_id, played_at)
+            if previous is None or previous[0] == yt_video_id:
+                continue
+            try:
+                if datetime.fromisoformat(played_at) - datetime.fromisoformat(previous[1]) > gap:
+                    continue
+            except ValueError:
+                continue
+            count, _ = transitions.get((previous[0], yt_video_id), (0, played_at))
+            transitions[(previous[0], yt_video_id)] = (count + 1, played_at)
+        return transitions
+
+    def get_next_videos(self, yt_video_id: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """
+        Get the videos most often played right after a video (written events only).
+
+        Args:
+            yt_video_id: Video that is playing now
+            limit: Maximum number of videos to return
+
+        Returns:
+            video_ratings rows plus their transition count, most likely first
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT v.*, t.transitions
+                FROM play_transitions t
+                JOIN video_ratings v ON v.yt_video_id = t.to_video_id
+                WHERE t.from_video_id = ?
+                ORDER BY t.transitions DESC, t.last_at DESC
+                LIMIT ?
+                """,
+                (yt_video_id, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_recent_plays(self, since: datetime) -> Dict[str, Any]:
+        """
+        Get written play events since a point in time, with the HA fields of each video.
+
+        Args:
+            since: Earliest play to return (naive UTC or aware)
+
+        Returns:
+            Dict with 'plays' (entity, played_at, ha_title, ha_duration, ha_artist;
+            oldest first) and 'latest' (newest played_at in the log, or None)
+        """
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT e.entity, e.played_at, v.ha_title, v.ha_duration, v.ha_artist
+                FROM play_events e
+                JOIN video_ratings v ON v.yt_video_id = e.yt_video_id
+                WHERE e.played_at >= ?
+                ORDER BY e.played_at, e.id
+                """,
+                (since.strftime('%Y-%m-%d %H:%M:%S'),)
+            ).fetchall()
+            latest = self._conn.execute("SELECT MAX(played_at) AS latest FROM play_events").fetchone()
+        return {
+            'plays': [dict(row) for row in rows],
+            'latest': latest['latest'] if latest else None
+        }
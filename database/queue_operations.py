@@ -3,15 +3,22 @@ Unified queue operations for YouTube API tasks.
 All searches and ratings flow through this single queue.
 """
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Union
 import sqlite3
 import threading
 import json
 from logging_helper import LoggingHelper, LogType
+from helpers.debug_record_helpers import compact_debug_record, decode_debug_record, debug_record_row
 
 # Get logger instance
 logger = LoggingHelper.get_logger(LogType.MAIN)
 
+# Queue priorities (lower number = processed first)
+RATING_PRIORITY = 1
+SEARCH_PRIORITY = 2             # Searches with a rating callback or repeat plays
+DEFERRABLE_SEARCH_PRIORITY = 3  # First-play searches, deferred when quota runs short
+PREFETCH_SEARCH_PRIORITY = 4    # Lookahead searches for songs expected next, only run with spare quota
+
 
 class QueueOperations:
     """Handles unified queue operations for searches and ratings."""
@@ -47,7 +54,7 @@ class QueueOperations:
         self,
         item_type: str,
         payload: Dict[str, Any],
-        priority: int = 2
+        priority: int = SEARCH_PRIORITY
     ) -> int:
         """
         Add an item to the unified queue.
@@ -55,7 +62,8 @@ class QueueOperations:
         Args:
             item_type: 'search' or 'rating'
             payload: Dictionary containing all data needed to process the item
-            priority: Lower number = higher priority (ratings=1, searches=2)
+            priority: Lower number = higher priority (ratings=1, searches=2, first-play searches=3,
+                lookahead searches=4)
 
         Returns:
             Queue item ID
@@ -81,7 +89,12 @@ class QueueOperations:
             self._conn.commit()
             return cursor.lastrowid
 
-    def claim_next(self, max_attempts: int = 5) -> Optional[Dict[str, Any]]:
+    def claim_next(
+        self,
+        max_attempts: int = 5,
+        max_priority: Optional[int] = None,
+        min_priority: int = RATING_PRIORITY
+    ) -> Optional[Dict[str, Any]]:
         """
         Atomically claim the next pending queue item.
         Returns highest priority (lowest number) pending item.
@@ -91,6 +104,8 @@ class QueueOperations:
 
         Args:
             max_attempts: Maximum number of attempts before marking as permanently failed (default: 5)
+            max_priority: Only claim items with priority <= this (None = any; used to defer items)
+            min_priority: Only claim items with priority >= this (used to hold back ratings)
 
         Returns:
             Queue item dict or None if queue is empty
@@ -101,11 +116,11 @@ class QueueOperations:
             cursor = self._conn.execute(
                 """
                 SELECT * FROM queue
-                WHERE status = 'pending' AND attempts < ?
+                WHERE status = 'pending' AND attempts < ? AND priority BETWEEN ? AND ?
                 ORDER BY priority ASC, requested_at ASC
                 LIMIT 1
                 """,
-                (max_attempts,)
+                (max_attempts, min_priority, DEFERRABLE_SEARCH_PRIORITY if max_priority is None else max_priority)
             )
             row = cursor.fetchone()
 
@@ -144,13 +159,40 @@ class QueueOperations:
 
             return item
 
-    def mark_completed(self, queue_id: int, api_response_data: str = None) -> None:
+    def _store_debug_record(self, queue_id: int, api_response_data: Union[Dict[str, Any], str, None]) -> None:
+        """
+        Compact and store search debug data for a queue item (caller holds the lock).
+
+        Args:
+            queue_id: Queue item ID
+            api_response_data: Debug data dict (or its JSON string) from the search
+        """
+        if not api_response_data:
+            return
+        if isinstance(api_response_data, str):
+            raw_size = len(api_response_data)
+            api_response_data = json.loads(api_response_data)
+        else:
+            raw_size = len(json.dumps(api_response_data))
+
+        record = compact_debug_record(api_response_data)
+        self._conn.execute(
+            """
+            INSERT OR REPLACE INTO queue_debug_records
+                (queue_id, created_at, format, raw_size, cache_hit, match_rank, batch_count, candidates_found, data)
+            VALUES (?, CURRENT_TIMESTAMP, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (queue_id,) + debug_record_row(record, raw_size)
+        )
+
+    def mark_completed(self, queue_id: int, api_response_data: Union[Dict[str, Any], str, None] = None) -> None:
         """
         Mark a queue item as completed.
 
         Args:
             queue_id: Queue item ID
-            api_response_data: Optional JSON string containing YouTube API response data for debugging
+            api_response_data: Optional YouTube API debug data (dict or JSON string),
+                stored as a compact record in queue_debug_records
         """
         with self._lock:
             self._conn.execute(
@@ -158,15 +200,15 @@ class QueueOperations:
                 UPDATE queue
                 SET status = 'completed',
                     completed_at = CURRENT_TIMESTAMP,
-                    last_error = NULL,
-                    api_response_data = ?
+                    last_error = NULL
                 WHERE id = ?
                 """,
-                (api_response_data, queue_id)
+                (queue_id,)
             )
+            self._store_debug_record(queue_id, api_response_data)
             self._conn.commit()
 
-    def mark_failed(self, queue_id: int, error: str, api_response_data: str = None) -> None:
+    def mark_failed(self, queue_id: int, error: str, api_response_data: Union[Dict[str, Any], str, None] = None) -> None:
         """
         Mark a queue item as failed.
 
@@ -180,21 +222,61 @@ class QueueOperations:
         Args:
             queue_id: Queue item ID
             error: Error message
-            api_response_data: Optional JSON string containing YouTube API response data for debugging
+            api_response_data: Optional YouTube API debug data (dict or JSON string),
+                stored as a compact record in queue_debug_records
         """
         with self._lock:
             self._conn.execute(
                 """
                 UPDATE queue
                 SET status = 'failed',
-                    last_error = ?,
-                    api_response_data = ?
+                    last_error = ?
                 WHERE id = ?
                 """,
-                (error, api_response_data, queue_id)
+                (error, queue_id)
             )
+            self._store_debug_record(queue_id, api_response_data)
             self._conn.commit()
 
+    def get_debug_record(self, queue_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Load and decompress the debug record of a queue item.
+
+        Args:
+            queue_id: Queue item ID
+
+        Returns:
+            Compact debug record dict, or None if the item has none (or it was pruned)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM queue_debug_records WHERE queue_id = ?",
+                (queue_id,)
+            ).fetchone()
+        return decode_debug_record(row['data']) if row else None
+
+    def prune_debug_records(self, days: int) -> int:
+        """
+        Delete debug records older than the retention window (and those of deleted items).
+
+        Args:
+            days: Keep records created within this many days
+
+        Returns:
+            Number of records deleted
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                DELETE FROM queue_debug_records
+                WHERE created_at < datetime('now', ? || ' days')
+                   OR queue_id NOT IN (SELECT id FROM queue)
+                """,
+                (f'-{days}',)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
     def reset_stale_processing_items(self, max_attempts: int = 5) -> int:
         """
         Reset queue items stuck in 'processing' status back to 'pending'.
@@ -268,6 +350,77 @@ class QueueOperations:
                 items.append(self._hydrate_queue_item(row))
             return items
 
+    def list_pending_ratings(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Get pending rating items (oldest first).
+
+        Args:
+            limit: Maximum number of items to return
+
+        Returns:
+            List of queue items
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                SELECT * FROM queue
+                WHERE status = 'pending' AND type = 'rating'
+                ORDER BY requested_at ASC
+                LIMIT ?
+                """,
+                (limit,)
+            )
+            return [self._hydrate_queue_item(row) for row in cursor.fetchall()]
+
+    def get_pending_demand(self) -> Dict[str, int]:
+        """
+        Count pending items by what they will cost and whether they can wait.
+
+        Returns:
+            Dict with ratings, searches (priority 2), deferrable_searches (priority 3)
+            and prefetch_searches (priority 4)
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                SELECT
+                    SUM(CASE WHEN type = 'rating' THEN 1 ELSE 0 END) as ratings,
+                    SUM(CASE WHEN type = 'search' AND priority <= ? THEN 1 ELSE 0 END) as searches,
+                    SUM(CASE WHEN type = 'search' AND priority > ? AND priority <= ? THEN 1 ELSE 0 END) as deferrable_searches,
+                    SUM(CASE WHEN type = 'search' AND priority > ? THEN 1 ELSE 0 END) as prefetch_searches
+                FROM queue
+                WHERE status IN ('pending', 'processing')
+                """,
+                (SEARCH_PRIORITY, SEARCH_PRIORITY, DEFERRABLE_SEARCH_PRIORITY, DEFERRABLE_SEARCH_PRIORITY)
+            )
+            row = cursor.fetchone()
+            return {key: row[key] or 0 for key in ('ratings', 'searches', 'deferrable_searches', 'prefetch_searches')}
+
+    def get_arrival_rates(self, hours: int = 168) -> Dict[str, float]:
+        """
+        Get average queue arrivals per hour by item type.
+
+        Args:
+            hours: Number of hours to look back (default 7 days)
+
+        Returns:
+            Dict with ratings and searches per hour (lookahead searches that
+            were never played are not counted; they only use spare quota)
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                SELECT
+                    SUM(CASE WHEN type = 'rating' THEN 1 ELSE 0 END) as ratings,
+                    SUM(CASE WHEN type = 'search' AND priority <= ? THEN 1 ELSE 0 END) as searches
+                FROM queue
+                WHERE requested_at >= datetime('now', ?)
+                """,
+                (DEFERRABLE_SEARCH_PRIORITY, f'-{int(hours)} hours')
+            )
+            row = cursor.fetchone()
+            return {key: (row[key] or 0) / hours for key in ('ratings', 'searches')}
+
     def list_history(self, limit: int = 100) -> List[Dict[str, Any]]:
         """
         Get completed and failed queue items (history).
@@ -340,10 +493,42 @@ class QueueOperations:
                 return self._hydrate_queue_item(row)
             return None
 
+    def get_search_match_history(self, limit: int = 200) -> List[Dict[str, Any]]:
+        """
+        Get where duration matches fell in recent YouTube searches.
+
+        Reads only the summary columns of queue_debug_records, so the compressed
+        debug records are never loaded into Python.
+
+        Args:
+            limit: Number of most recent searches to inspect
+
+        Returns:
+            List of dicts with match_rank (None for older rows), batch_count
+            (number of videos.list phases run) and candidates_found
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                """
+                SELECT d.match_rank, d.batch_count, d.candidates_found
+                FROM queue_debug_records d
+                JOIN queue q ON q.id = d.queue_id
+                WHERE q.type = 'search'
+                  AND q.status IN ('completed', 'failed')
+                  AND d.cache_hit = 0
+                  AND d.batch_count > 0
+                ORDER BY d.queue_id DESC
+                LIMIT ?
+                """,
+                (limit,)
+            )
+            return [dict(row) for row in cursor.fetchall()]
+
     def enqueue_search(
         self,
         ha_media: Dict[str, Any],
-        callback_rating: Optional[str] = None
+        callback_rating: Optional[str] = None,
+        prefetch: bool = False
     ) -> int:
         """
         Enqueue a search operation with deduplication (convenience method).
@@ -356,9 +541,20 @@ class QueueOperations:
         to prevent quota burning. If a search failed within the last 24 hours, don't retry.
         This prevents burning 100 quota units per search on songs that don't exist.
 
+        Searches are queued by value for quota admission control: searches with a
+        rating callback get SEARCH_PRIORITY, first plays get DEFERRABLE_SEARCH_PRIORITY
+        (the worker holds these back when the quota forecast runs short), and a
+        repeat play of a song whose search is still pending promotes it.
+
+        Lookahead searches (prefetch) for songs expected to play next get
+        PREFETCH_SEARCH_PRIORITY and count no play when they match. A play or
+        rating of the song while one is pending turns it into a regular search,
+        keeping the rating callback.
+
         Args:
             ha_media: Home Assistant media info
             callback_rating: Optional rating to apply after search succeeds
+            prefetch: Lookahead search for a song that has not played yet
 
         Returns:
             Queue item ID (existing or newly created), or None if recently failed
@@ -385,7 +581,29 @@ class QueueOperations:
             if existing:
                 # Found existing pending/processing search - return its ID instead of creating duplicate
                 existing_id = existing['id']
+                if prefetch:
+                    return existing_id
                 logger.info(f"Found existing {existing['status']} search for '{ha_title}' by '{ha_artist}' (queue_id: {existing_id})")
+
+                # Repeat play (or a rating for it) - the song is worth its search quota.
+                # The first play of a song only looked ahead for is still a first play.
+                was_prefetch = bool(json.loads(existing['payload']).get('prefetch'))
+                priority = DEFERRABLE_SEARCH_PRIORITY if was_prefetch and not callback_rating else SEARCH_PRIORITY
+                self._conn.execute(
+                    """
+                    UPDATE queue
+                    SET priority = MIN(priority, ?),
+                        payload = json_set(
+                            payload,
+                            '$.play_count', COALESCE(json_extract(payload, '$.play_count'), 1) + 1,
+                            '$.prefetch', json('false'),
+                            '$.callback_rating', COALESCE(json_extract(payload, '$.callback_rating'), ?)
+                        )
+                    WHERE id = ?
+                    """,
+                    (priority, callback_rating, existing_id)
+                )
+                self._conn.commit()
                 return existing_id
 
             # v4.2.5: Check for recent failed searches (within 24 hours)
@@ -422,9 +640,15 @@ class QueueOperations:
             'ha_content_id': ha_media.get('content_id'),
             'ha_duration': ha_media.get('duration'),
             'ha_app_name': ha_media.get('app_name'),
-            'callback_rating': callback_rating
+            'callback_rating': callback_rating,
+            'play_count': 0 if prefetch else 1,
+            'prefetch': prefetch
         }
-        return self.enqueue('search', payload, priority=2)
+        if prefetch:
+            priority = PREFETCH_SEARCH_PRIORITY
+        else:
+            priority = SEARCH_PRIORITY if callback_rating else DEFERRABLE_SEARCH_PRIORITY
+        return self.enqueue('search', payload, priority=priority)
 
     def enqueue_rating(
         self,
@@ -445,7 +669,7 @@ class QueueOperations:
             'yt_video_id': yt_video_id,
             'rating': rating
         }
-        return self.enqueue('rating', payload, priority=1)
+        return self.enqueue('rating', payload, priority=RATING_PRIORITY)
 
     def clear_completed(self, days: int = 7) -> int:
         """
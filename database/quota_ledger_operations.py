@@ -0,0 +1,279 @@
+"""
+Quota ledger operations.
+
+Every quota charge is appended to quota_ledger under the Pacific quota day it
+belongs to (YouTube resets quota at midnight Pacific, DST-aware), and the
+day's running total in quota_day_totals is updated in the same transaction,
+so "quota used today" is a single primary key read.
+
+Each ledger row records the credential (Google Cloud project) it was charged
+to, so a credential pool can pick the project with the most headroom.
+
+credential_quota_state holds a row per credential YouTube reported as
+exhausted; quota_state holds a single row written once every credential in
+the pool is exhausted. Both are read on every queue worker loop and health
+check, so they are cached in-process and only re-read when another
+connection (the other process) has committed since the last read.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
+import sqlite3
+import threading
+
+from helpers.time_helpers import get_quota_day, PACIFIC_TZ
+
+
+def _naive_utc(moment: datetime) -> datetime:
+    """Convert an aware datetime to naive UTC (naive input is assumed to be UTC)."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+class QuotaLedgerOperations:
+    """Handles the append-only quota ledger and per-day running totals."""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock) -> None:
+        self._conn = conn
+        self._lock = lock
+        self._state_cache: Optional[Dict[str, Any]] = None
+        self._credential_state_cache: Optional[Dict[str, Dict[str, Any]]] = None
+        self._state_data_version: Optional[int] = None
+
+    def append(self, api_method: str, units: int, success: bool = True, credential: str = 'primary') -> None:
+        """
+        Record quota charged for one API request.
+
+        Args:
+            api_method: YouTube API method called
+            units: Quota units charged (0 is recorded too, as a call)
+            success: Whether the call succeeded
+            credential: Credential (project) the request was charged to
+        """
+        quota_day = get_quota_day()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    """
+                    INSERT INTO quota_ledger (quota_day, api_method, units, success, credential)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    (quota_day, api_method, units, success, credential)
+                )
+                self._conn.execute(
+                    """
+                    INSERT INTO quota_day_totals (quota_day, units, calls)
+                    VALUES (?, ?, 1)
+                    ON CONFLICT(quota_day) DO UPDATE SET
+                        units = units + excluded.units,
+                        calls = calls + 1
+                    """,
+                    (quota_day, units)
+                )
+
+    def get_day_usage(self, quota_day: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get quota used on a quota day (default: the current one).
+
+        Args:
+            quota_day: Pacific date in YYYY-MM-DD format
+
+        Returns:
+            Dict with quota_day, used and calls
+        """
+        quota_day = quota_day or get_quota_day()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT units, calls FROM quota_day_totals WHERE quota_day = ?",
+                (quota_day,)
+            ).fetchone()
+        return {
+            'quota_day': quota_day,
+            'used': row['units'] if row else 0,
+            'calls': row['calls'] if row else 0
+        }
+
+    def get_credential_usage(self, quota_day: Optional[str] = None) -> Dict[str, int]:
+        """
+        Get quota used per credential on a quota day (default: the current one).
+
+        Args:
+            quota_day: Pacific date in YYYY-MM-DD format
+
+        Returns:
+            Dict of units used keyed by credential name
+        """
+        quota_day = quota_day or get_quota_day()
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT COALESCE(credential, 'primary') AS credential, SUM(units) AS used
+                FROM quota_ledger
+                WHERE quota_day = ?
+                GROUP BY COALESCE(credential, 'primary')
+                """,
+                (quota_day,)
+            ).fetchall()
+        return {row['credential']: row['used'] for row in rows}
+
+    def get_daily_totals(self, days: int = 30) -> List[Dict[str, Any]]:
+        """
+        Get quota used per quota day for the last N days (newest first).
+
+        Args:
+            days: Number of quota days to return
+
+        Returns:
+            List of dicts with quota_day, used and calls
+        """
+        cutoff = (datetime.now(PACIFIC_TZ) - timedelta(days=days)).strftime('%Y-%m-%d')
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT quota_day, units, calls FROM quota_day_totals
+                WHERE quota_day > ?
+                ORDER BY quota_day DESC
+                """,
+                (cutoff,)
+            ).fetchall()
+        return [{'quota_day': row['quota_day'], 'used': row['units'], 'calls': row['calls']} for row in rows]
+
+    def get_day_breakdown(self, quota_day: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get quota used per API method on a quota day.
+
+        Args:
+            quota_day: Pacific date in YYYY-MM-DD format (default: the current one)
+
+        Returns:
+            List of dicts with api_method, used and calls (largest first; hourly
+            buckets migrated from api_usage are not calls)
+        """
+        quota_day = quota_day or get_quota_day()
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT api_method, SUM(units) AS used,
+                       SUM(CASE WHEN source = 'api_usage' THEN 0 ELSE 1 END) AS calls
+                FROM quota_ledger
+                WHERE quota_day = ?
+                GROUP BY api_method
+                ORDER BY used DESC
+                """,
+                (quota_day,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def set_quota_exhausted(self, exhausted_at: datetime, resets_at: datetime, source: str) -> None:
+        """
+        Record that YouTube reported the quota as exhausted.
+
+        Args:
+            exhausted_at: When the quota error was received
+            resets_at: When the quota resets
+            source: API method or component that hit the limit
+        """
+        # Stored as naive UTC, like every other TIMESTAMP column
+        exhausted_at = _naive_utc(exhausted_at)
+        resets_at = _naive_utc(resets_at)
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    """
+                    INSERT INTO quota_state (id, exhausted_at, resets_at, source)
+                    VALUES (1, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        exhausted_at = excluded.exhausted_at,
+                        resets_at = excluded.resets_at,
+                        source = excluded.source
+                    """,
+                    (exhausted_at.strftime('%Y-%m-%d %H:%M:%S'), resets_at.strftime('%Y-%m-%d %H:%M:%S'), source)
+                )
+            # Own writes do not change data_version, so refresh the cached copy here
+            self._state_cache = {
+                'exhausted_at': exhausted_at.replace(microsecond=0),
+                'resets_at': resets_at.replace(microsecond=0),
+                'source': source
+            }
+
+    def set_credential_exhausted(self, credential: str, exhausted_at: datetime, resets_at: datetime, source: str) -> None:
+        """
+        Record that YouTube reported one credential's quota as exhausted.
+
+        Args:
+            credential: Credential (project) name
+            exhausted_at: When the quota error was received
+            resets_at: When the quota resets
+            source: API method or component that hit the limit
+        """
+        exhausted_at = _naive_utc(exhausted_at)
+        resets_at = _naive_utc(resets_at)
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    """
+                    INSERT INTO credential_quota_state (credential, exhausted_at, resets_at, source)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(credential) DO UPDATE SET
+                        exhausted_at = excluded.exhausted_at,
+                        resets_at = excluded.resets_at,
+                        source = excluded.source
+                    """,
+                    (credential, exhausted_at.strftime('%Y-%m-%d %H:%M:%S'),
+                     resets_at.strftime('%Y-%m-%d %H:%M:%S'), source)
+                )
+            if self._credential_state_cache is not None:
+                self._credential_state_cache[credential] = {
+                    'exhausted_at': exhausted_at.replace(microsecond=0),
+                    'resets_at': resets_at.replace(microsecond=0),
+                    'source': source
+                }
+
+    def clear_quota_exhausted(self) -> None:
+        """Clear the quota exhausted state of the pool and every credential (e.g. after a manual reset)."""
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM quota_state WHERE id = 1")
+                self._conn.execute("DELETE FROM credential_quota_state")
+            self._state_cache = {}
+            self._credential_state_cache = {}
+
+    def _refresh_state_cache(self) -> None:
+        """Re-read both quota state tables if another connection committed (caller holds the lock)."""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if (self._state_cache is None or self._credential_state_cache is None
+                or data_version != self._state_data_version):
+            row = self._conn.execute(
+                "SELECT exhausted_at, resets_at, source FROM quota_state WHERE id = 1"
+            ).fetchone()
+            self._state_cache = dict(row) if row else {}
+            rows = self._conn.execute(
+                "SELECT credential, exhausted_at, resets_at, source FROM credential_quota_state"
+            ).fetchall()
+            self._credential_state_cache = {
+                row['credential']: {key: row[key] for key in ('exhausted_at', 'resets_at', 'source')}
+                for row in rows
+            }
+            self._state_data_version = data_version
+
+    def get_quota_state(self) -> Dict[str, Any]:
+        """
+        Get the pool-wide quota exhausted state (cached; re-read only after other connections commit).
+
+        Returns:
+            Dict with exhausted_at, resets_at (naive UTC datetimes) and source, or {} if never exhausted
+        """
+        with self._lock:
+            self._refresh_state_cache()
+            return dict(self._state_cache)
+
+    def get_credential_states(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the quota exhausted state of each credential (cached like get_quota_state).
+
+        Returns:
+            Dict keyed by credential name of dicts with exhausted_at, resets_at and source
+        """
+        with self._lock:
+            self._refresh_state_cache()
+            return {name: dict(state) for name, state in self._credential_state_cache.items()}
@@ -1,16 +1,47 @@
 """
 Operations for opportunistic search results caching.
 Stores all videos from YouTube searches (not just matched ones) to reduce API calls.
+
+Duration lookups are served from an in-memory index (duration second -> entries)
+that is loaded once and then maintained incrementally, so local matching is a
+dict lookup instead of a SQLite range scan with per-row datetime comparisons.
 """
+import calendar
 import sqlite3
 import threading
+import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from logging_helper import LoggingHelper, LogType
 
 # Get logger instance
 logger = LoggingHelper.get_logger(LogType.MAIN)
 
+# Full index reload interval (catches rows deleted by the other process)
+INDEX_FULL_RELOAD_SECONDS = 3600
+
+# Approximate size of a cached row (its text columns), used for the byte budget
+ROW_BYTES_SQL = """(
+    LENGTH(yt_video_id) + LENGTH(COALESCE(yt_title, '')) +
+    LENGTH(COALESCE(yt_channel, '')) + LENGTH(COALESCE(yt_channel_id, '')) +
+    LENGTH(COALESCE(yt_description, '')) + LENGTH(COALESCE(yt_published_at, '')) +
+    LENGTH(COALESCE(yt_category_id, '')) + LENGTH(COALESCE(yt_live_broadcast, '')) +
+    LENGTH(COALESCE(yt_location, '')) + LENGTH(COALESCE(yt_recording_date, ''))
+)"""
+
+CACHE_COLUMNS = """
+    yt_video_id, yt_title, yt_channel, yt_channel_id, yt_duration,
+    yt_description, yt_published_at, yt_category_id, yt_live_broadcast,
+    yt_location, yt_recording_date
+"""
+
+
+def _to_epoch(value) -> int:
+    """Convert a stored UTC timestamp (datetime or 'YYYY-MM-DD HH:MM:SS') to epoch seconds."""
+    if isinstance(value, str):
+        value = datetime.strptime(value[:19].replace('T', ' '), '%Y-%m-%d %H:%M:%S')
+    return calendar.timegm(value.timetuple())
+
 
 class SearchCacheOperations:
     """Handles opportunistic caching of YouTube search results."""
@@ -19,6 +50,137 @@ class SearchCacheOperations:
         self._conn = conn
         self._lock = lock
 
+        # In-memory duration index: duration -> list of (video_id, title_lower, expires_epoch)
+        # All index state is guarded by self._lock (same lock as the connection)
+        self._duration_index: Dict[int, List[Tuple[str, str, int]]] = {}
+        self._index_durations: Dict[str, int] = {}  # video_id -> duration bucket
+        self._index_loaded_at = 0.0
+        self._index_max_rowid = 0
+        self._index_data_version = None
+
+        # Sweeper counters (since process start) and the size measured by the last sweep
+        self._expired_removed = 0
+        self._evicted = 0
+        self._size: Optional[Dict[str, int]] = None
+
+    # ========================================================================
+    # IN-MEMORY DURATION INDEX
+    # ========================================================================
+
+    def _index_add_locked(self, video_id: str, title: Optional[str], duration: Optional[int], expires_epoch: int) -> None:
+        """Add or replace one entry in the duration index (caller holds the lock)."""
+        self._index_remove_locked(video_id)
+        if duration is None:
+            return
+        self._duration_index.setdefault(duration, []).append(
+            (video_id, (title or '').lower(), expires_epoch)
+        )
+        self._index_durations[video_id] = duration
+
+    def _index_remove_locked(self, video_id: str) -> None:
+        """Remove one entry from the duration index (caller holds the lock)."""
+        duration = self._index_durations.pop(video_id, None)
+        if duration is None:
+            return
+        bucket = [entry for entry in self._duration_index.get(duration, []) if entry[0] != video_id]
+        if bucket:
+            self._duration_index[duration] = bucket
+        else:
+            self._duration_index.pop(duration, None)
+
+    def _index_load_rows_locked(self, min_rowid: int = 0) -> int:
+        """Load cache rows with rowid > min_rowid into the index (caller holds the lock)."""
+        cursor = self._conn.execute(
+            """
+            SELECT rowid, yt_video_id, yt_title, yt_duration, expires_at
+            FROM search_results_cache
+            WHERE rowid > ?
+            """,
+            (min_rowid,)
+        )
+        loaded = 0
+        for row in cursor.fetchall():
+            try:
+                expires_epoch = _to_epoch(row['expires_at'])
+            except (ValueError, TypeError, AttributeError):
+                continue
+            self._index_add_locked(row['yt_video_id'], row['yt_title'], row['yt_duration'], expires_epoch)
+            self._index_max_rowid = max(self._index_max_rowid, row['rowid'])
+            loaded += 1
+        return loaded
+
+    def _ensure_index_locked(self) -> None:
+        """
+        Make sure the duration index is loaded and current (caller holds the lock).
+
+        The web app and queue worker each keep their own index. PRAGMA data_version
+        only changes when ANOTHER connection commits, so rows cached by the other
+        process are picked up incrementally (new rows always get a higher rowid,
+        since INSERT OR REPLACE deletes and re-inserts).
+        """
+        now = time.time()
+        if now - self._index_loaded_at >= INDEX_FULL_RELOAD_SECONDS:
+            self._duration_index = {}
+            self._index_durations = {}
+            self._index_max_rowid = 0
+            loaded = self._index_load_rows_locked()
+            self._index_loaded_at = now
+            self._index_data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            logger.debug(f"Loaded search cache duration index: {loaded} entries in {len(self._duration_index)} buckets")
+            return
+
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._index_data_version:
+            self._index_data_version = data_version
+            self._index_load_rows_locked(self._index_max_rowid)
+
+    def _index_candidates_locked(self, duration: int, tolerance: int) -> List[Tuple[int, str, str]]:
+        """
+        Get unexpired index entries within duration +/- tolerance (caller holds the lock).
+
+        Returns:
+            List of (duration, video_id, title_lower) ordered by duration
+        """
+        now_epoch = int(time.time())
+        candidates = []
+        for bucket_duration in range(duration - tolerance, duration + tolerance + 1):
+            for video_id, title_lower, expires_epoch in self._duration_index.get(bucket_duration, ()):
+                if expires_epoch > now_epoch:
+                    candidates.append((bucket_duration, video_id, title_lower))
+        return candidates
+
+    def _fetch_rows_locked(self, video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch full cache rows by primary key (caller holds the lock)."""
+        if not video_ids:
+            return {}
+        placeholders = ','.join('?' for _ in video_ids)
+        # nosec B608 - placeholders contains only '?' markers, IDs are bound parameters
+        cursor = self._conn.execute(
+            f"SELECT {CACHE_COLUMNS} FROM search_results_cache WHERE yt_video_id IN ({placeholders})",
+            list(video_ids)
+        )
+        return {row['yt_video_id']: dict(row) for row in cursor.fetchall()}
+
+    def _record_hits_locked(self, video_ids: List[str]) -> None:
+        """Increment hit counters for cache rows that served a lookup (caller holds the lock)."""
+        if not video_ids:
+            return
+        placeholders = ','.join('?' for _ in video_ids)
+        try:
+            # nosec B608 - placeholders contains only '?' markers, IDs are bound parameters
+            self._conn.execute(
+                f"""
+                UPDATE search_results_cache
+                SET hit_count = COALESCE(hit_count, 0) + 1, last_hit_at = CURRENT_TIMESTAMP
+                WHERE yt_video_id IN ({placeholders})
+                """,
+                list(video_ids)
+            )
+            self._conn.commit()
+        except sqlite3.DatabaseError as exc:
+            # Hit counts only steer eviction, never fail a lookup over them
+            logger.debug(f"Failed to record search cache hits: {exc}")
+
     def cache_search_results(self, videos: List[Dict[str, Any]], ttl_days: int = 30) -> int:
         """
         Cache all videos from a search result for future lookups.
@@ -34,7 +196,9 @@ class SearchCacheOperations:
             return 0
 
         expires_at = (datetime.utcnow() + timedelta(days=ttl_days)).strftime('%Y-%m-%d %H:%M:%S')
+        expires_epoch = _to_epoch(expires_at)
         cached_count = 0
+        cached_entries = []
 
         with self._lock:
             for video in videos:
@@ -44,13 +208,16 @@ class SearchCacheOperations:
                         continue
 
                     # v4.0.46: Insert or update cache entry with ALL video fields
+                    # Hit counters survive the replace so eviction keeps favouring useful rows
                     self._conn.execute(
                         """
                         INSERT OR REPLACE INTO search_results_cache
                         (yt_video_id, yt_title, yt_channel, yt_channel_id, yt_duration,
                          yt_description, yt_published_at, yt_category_id, yt_live_broadcast,
-                         yt_location, yt_recording_date, expires_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                         yt_location, yt_recording_date, expires_at, hit_count, last_hit_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                                COALESCE((SELECT hit_count FROM search_results_cache WHERE yt_video_id = ?), 0),
+                                (SELECT last_hit_at FROM search_results_cache WHERE yt_video_id = ?))
                         """,
                         (
                             yt_video_id,
@@ -64,16 +231,24 @@ class SearchCacheOperations:
                             video.get('live_broadcast'),
                             video.get('location'),
                             video.get('recording_date'),
-                            expires_at
+                            expires_at,
+                            yt_video_id,
+                            yt_video_id
                         )
                     )
                     cached_count += 1
+                    cached_entries.append((yt_video_id, video.get('title'), video.get('duration')))
                 except Exception as exc:
                     logger.warning(f"Failed to cache video {video.get('yt_video_id')}: {exc}")
                     continue
 
             self._conn.commit()
 
+            # Keep the in-memory duration index in sync (only once it has been loaded)
+            if self._index_loaded_at:
+                for yt_video_id, title, duration in cached_entries:
+                    self._index_add_locked(yt_video_id, title, duration, expires_epoch)
+
         # Note: Logging moved to caller (youtube_api.py) to provide more context
         # The caller logs: "Opportunistically cached X/Y videos checked during search (Z duration matches)"
         return cached_count
@@ -89,29 +264,51 @@ class SearchCacheOperations:
         Returns:
             List of matching cached videos, or None if not found
         """
-        min_duration = duration - tolerance
-        max_duration = duration + tolerance
+        with self._lock:
+            self._ensure_index_locked()
+            candidates = self._index_candidates_locked(duration, tolerance)[:25]
+            if not candidates:
+                return None
+
+            rows = self._fetch_rows_locked([video_id for _, video_id, _ in candidates])
+            results = [rows[video_id] for _, video_id, _ in candidates if video_id in rows]
+
+        return results or None
+
+    def get_by_video_ids(self, video_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up unexpired cache entries for a list of video IDs.
+
+        Used by the batch fetcher to skip videos.list calls for videos we
+        already have full details for.
+
+        Args:
+            video_ids: YouTube video IDs to look up
+
+        Returns:
+            Dict mapping video ID to cached row (only IDs that were found)
+        """
+        if not video_ids:
+            return {}
+
+        placeholders = ','.join('?' for _ in video_ids)
 
         with self._lock:
+            # nosec B608 - placeholders contains only '?' markers, IDs are bound parameters
             cursor = self._conn.execute(
-                """
+                f"""
                 SELECT yt_video_id, yt_title, yt_channel, yt_channel_id, yt_duration,
                        yt_description, yt_published_at, yt_category_id, yt_live_broadcast,
                        yt_location, yt_recording_date
                 FROM search_results_cache
-                WHERE yt_duration BETWEEN ? AND ?
+                WHERE yt_video_id IN ({placeholders})
                   AND expires_at > datetime('now')
-                ORDER BY yt_duration
-                LIMIT 25
                 """,
-                (min_duration, max_duration)
+                list(video_ids)
             )
-            results = cursor.fetchall()
-
-            if results:
-                return [dict(row) for row in results]
-
-        return None
+            results = {row['yt_video_id']: dict(row) for row in cursor.fetchall()}
+            self._record_hits_locked(list(results))
+            return results
 
     def find_by_title_and_duration(self, title: str, duration: int, tolerance: int = 1) -> Optional[Dict[str, Any]]:
         """
@@ -125,29 +322,28 @@ class SearchCacheOperations:
         Returns:
             Matching cached video dict, or None if not found
         """
-        min_duration = duration - tolerance
-        max_duration = duration + tolerance
+        if not title:
+            return None
+
+        needle = title.lower()
 
         with self._lock:
-            cursor = self._conn.execute(
-                """
-                SELECT yt_video_id, yt_title, yt_channel, yt_channel_id, yt_duration,
-                       yt_description, yt_published_at, yt_category_id, yt_live_broadcast,
-                       yt_location, yt_recording_date
-                FROM search_results_cache
-                WHERE yt_duration BETWEEN ? AND ?
-                  AND yt_title LIKE ?
-                  AND expires_at > datetime('now')
-                ORDER BY yt_duration
-                LIMIT 1
-                """,
-                (min_duration, max_duration, f"%{title}%")
-            )
-            result = cursor.fetchone()
+            self._ensure_index_locked()
+
+            # Hash lookup on the duration buckets, then check the handful of candidates
+            for _, video_id, title_lower in self._index_candidates_locked(duration, tolerance):
+                if needle not in title_lower:
+                    continue
+
+                row = self._fetch_rows_locked([video_id]).get(video_id)
+                if not row:
+                    # Deleted by the other process since the index was loaded
+                    self._index_remove_locked(video_id)
+                    continue
 
-            if result:
-                logger.info(f"Search cache HIT: '{title}' → {result['yt_video_id']}")
-                return dict(result)
+                self._record_hits_locked([video_id])
+                logger.info(f"Search cache HIT: '{title}' → {video_id}")
+                return row
 
         return None
 
@@ -165,27 +361,156 @@ class SearchCacheOperations:
             self._conn.commit()
             deleted = cursor.rowcount
 
+            if deleted > 0 and self._index_loaded_at:
+                now_epoch = int(time.time())
+                expired_ids = [
+                    video_id
+                    for bucket in self._duration_index.values()
+                    for video_id, _, expires_epoch in bucket
+                    if expires_epoch <= now_epoch
+                ]
+                for video_id in expired_ids:
+                    self._index_remove_locked(video_id)
+
             if deleted > 0:
                 logger.info(f"Cleaned up {deleted} expired search cache entries")
 
             return deleted
 
+    def _delete_rows_locked(self, video_ids: List[str]) -> int:
+        """Delete cache rows by ID and drop them from the index (caller holds the lock)."""
+        if not video_ids:
+            return 0
+        placeholders = ','.join('?' for _ in video_ids)
+        # nosec B608 - placeholders contains only '?' markers, IDs are bound parameters
+        cursor = self._conn.execute(
+            f"DELETE FROM search_results_cache WHERE yt_video_id IN ({placeholders})",
+            list(video_ids)
+        )
+        self._conn.commit()
+        for video_id in video_ids:
+            self._index_remove_locked(video_id)
+        return cursor.rowcount
+
+    def _delete_in_batches(self, video_ids: List[str], batch_size: int,
+                           pause: Optional[Callable[[], bool]]) -> int:
+        """
+        Delete rows batch_size at a time, releasing the lock between batches.
+
+        Args:
+            video_ids: Rows to delete
+            batch_size: Maximum rows to delete per lock hold
+            pause: Called between batches; returning True stops early
+
+        Returns:
+            Number of rows deleted
+        """
+        deleted = 0
+        for start in range(0, len(video_ids), batch_size):
+            if start and pause and pause():
+                break
+            with self._lock:
+                deleted += self._delete_rows_locked(video_ids[start:start + batch_size])
+        return deleted
+
+    def sweep(self, max_rows: int, max_bytes: int, batch_size: int = 500,
+              pause: Optional[Callable[[], bool]] = None) -> Dict[str, int]:
+        """
+        Remove expired entries and evict entries over the size budget.
+
+        The cache size is measured once per sweep, and the eviction candidates
+        for the whole overage are read in one pass over the eviction index.
+        Rows are then deleted batch_size at a time so the shared connection
+        lock is only held briefly.
+
+        Eviction order: fewest hits first, then least recently hit (or cached).
+
+        Args:
+            max_rows: Maximum number of cached videos to keep
+            max_bytes: Maximum approximate size of cached text columns
+            batch_size: Maximum rows to delete per lock hold
+            pause: Called between batches (e.g. to wait briefly); returning True stops the sweep
+
+        Returns:
+            Dict with expired and evicted counts for this sweep
+        """
+        with self._lock:
+            expired_ids = [
+                row['yt_video_id'] for row in self._conn.execute(
+                    "SELECT yt_video_id FROM search_results_cache WHERE expires_at < datetime('now')"
+                )
+            ]
+        expired = self._delete_in_batches(expired_ids, batch_size, pause)
+        self._expired_removed += expired
+
+        evicted = 0
+        if expired == len(expired_ids):
+            with self._lock:
+                size = self._size_locked()
+                over_rows = size['rows'] - max_rows
+                over_bytes = size['bytes'] - max_bytes
+                candidates = []
+                if over_rows > 0 or over_bytes > 0:
+                    # nosec B608 - ROW_BYTES_SQL is a hardcoded constant
+                    cursor = self._conn.execute(
+                        f"""
+                        SELECT yt_video_id, {ROW_BYTES_SQL} AS row_bytes FROM search_results_cache
+                        ORDER BY COALESCE(hit_count, 0) ASC, COALESCE(last_hit_at, cached_at) ASC
+                        """
+                    )
+                    for row in cursor:
+                        if len(candidates) >= over_rows and over_bytes <= 0:
+                            break
+                        candidates.append(row['yt_video_id'])
+                        over_bytes -= row['row_bytes']
+                    cursor.close()
+                    size['bytes'] = max_bytes + over_bytes
+                size['rows'] -= len(candidates)
+                self._size = size
+
+            evicted = self._delete_in_batches(candidates, batch_size, pause)
+            self._evicted += evicted
+            if evicted < len(candidates):
+                self._size = None  # stopped early, measure again next time
+
+        if expired or evicted:
+            logger.info(f"Search cache sweep: removed {expired} expired, evicted {evicted} over budget")
+
+        return {'expired': expired, 'evicted': evicted}
+
+    def _size_locked(self) -> Dict[str, int]:
+        """Get row count and approximate byte size of the cache (caller holds the lock)."""
+        # nosec B608 - ROW_BYTES_SQL is a hardcoded constant
+        row = self._conn.execute(
+            f"SELECT COUNT(*) as rows, COALESCE(SUM({ROW_BYTES_SQL}), 0) as bytes FROM search_results_cache"
+        ).fetchone()
+        return {'rows': row['rows'], 'bytes': row['bytes']}
+
     def get_stats(self) -> Dict[str, int]:
         """
         Get cache statistics.
 
         Returns:
-            Dict with cache stats (total, expired, valid)
+            Dict with cache stats (total, expired, valid, hits, size_bytes as of
+            the last sweep, expired_removed, evicted)
         """
         with self._lock:
             cursor = self._conn.execute(
                 """
                 SELECT
                     COUNT(*) as total,
-                    SUM(CASE WHEN expires_at < datetime('now') THEN 1 ELSE 0 END) as expired,
-                    SUM(CASE WHEN expires_at >= datetime('now') THEN 1 ELSE 0 END) as valid
+                    COALESCE(SUM(CASE WHEN expires_at < datetime('now') THEN 1 ELSE 0 END), 0) as expired,
+                    COALESCE(SUM(CASE WHEN expires_at >= datetime('now') THEN 1 ELSE 0 END), 0) as valid,
+                    COALESCE(SUM(hit_count), 0) as hits
                 FROM search_results_cache
                 """
             )
             result = cursor.fetchone()
-            return dict(result) if result else {'total': 0, 'expired': 0, 'valid': 0}
+            stats = dict(result) if result else {'total': 0, 'expired': 0, 'valid': 0, 'hits': 0}
+            # Measured by the last sweep (a full scan of every text column)
+            if self._size is None:
+                self._size = self._size_locked()
+            stats['size_bytes'] = self._size['bytes']
+            stats['expired_removed'] = self._expired_removed
+            stats['evicted'] = self._evicted
+            return stats
@@ -192,20 +192,23 @@ class StatsOperations:
         """
         Get play count grouped by date for last N days.
 
+        Reads the daily play rollup (one row per day and video), so every play
+        is counted, not just each video's last one.
+
         Args:
             days: Number of days to look back
 
         Returns:
-            List of date/count pairs
+            List of date/play_count/unique_videos dicts (UTC dates)
         """
         with self._lock:
             cursor = self._conn.execute(
                 """
-                SELECT DATE(date_last_played) as date, COUNT(*) as play_count
-                FROM video_ratings
-                                 AND date_last_played >= datetime('now', '-' || ? || ' days')
-                GROUP BY DATE(date_last_played)
-                ORDER BY date
+                SELECT day as date, SUM(plays) as play_count, COUNT(*) as unique_videos
+                FROM play_rollups_daily
+                WHERE day >= DATE('now', '-' || ? || ' days')
+                GROUP BY day
+                ORDER BY day
                 """,
                 (days,)
             )
@@ -296,6 +299,9 @@ class StatsOperations:
         """
         Get paginated play history with optional date filtering.
 
+        One row per play event (a video played three times appears three times),
+        newest first.
+
         Args:
             limit: Maximum number of results to return
             offset: Number of results to skip
@@ -303,18 +309,32 @@ class StatsOperations:
             date_to: Optional end date filter (ISO format)
 
         Returns:
-            List of video dictionaries sorted by last played date
-        """
-        with self._lock:
-            builder = VideoQueryBuilder(self._conn)
-            builder.where_date_last_played_not_null()
-
-            if date_from:
-                builder.where_date_from(date_from)
-            if date_to:
-                builder.where_date_to(date_to)
+            List of video dictionaries with played_at, entity and play_source
+        """
+        conditions = []
+        params: List[Any] = []
+        if date_from:
+            conditions.append("e.played_at >= ?")
+            params.append(date_from)
+        if date_to:
+            conditions.append("e.played_at <= ?")
+            params.append(date_to)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
 
-            return builder.order_by("date_last_played", "DESC").limit(limit).offset(offset).execute()
+        with self._lock:
+            # nosec B608 - where only contains hardcoded conditions, values are parameterized
+            cursor = self._conn.execute(
+                f"""
+                SELECT v.*, e.played_at, e.entity, e.source as play_source
+                FROM play_events e
+                JOIN video_ratings v ON v.yt_video_id = e.yt_video_id
+                {where}
+                ORDER BY e.played_at DESC, e.id DESC
+                LIMIT ? OFFSET ?
+                """,
+                params + [limit, offset]
+            )
+            return [dict(row) for row in cursor.fetchall()]
 
     def get_rating_history(self, limit: int = 100, offset: int = 0) -> List[Dict]:
         """
@@ -350,6 +370,9 @@ class StatsOperations:
         """
         Analyze listening patterns by day of week and hour.
 
+        Reads the hourly play rollup (one row per UTC hour with plays), so
+        every play counts and the cost doesn't grow with the event log.
+
         Returns:
             Dictionary with 'by_day' and 'by_hour' keys containing pattern data
         """
@@ -358,10 +381,9 @@ class StatsOperations:
             cursor_day = self._conn.execute(
                 """
                 SELECT
-                    CAST(strftime('%w', date_last_played) AS INTEGER) as day_of_week,
-                    COUNT(*) as play_count
-                FROM video_ratings
-                WHERE date_last_played IS NOT NULL
+                    CAST(strftime('%w', hour) AS INTEGER) as day_of_week,
+                    SUM(plays) as play_count
+                FROM play_rollups_hourly
                 GROUP BY day_of_week
                 ORDER BY day_of_week
                 """
@@ -372,12 +394,11 @@ class StatsOperations:
             cursor_hour = self._conn.execute(
                 """
                 SELECT
-                    CAST(strftime('%H', date_last_played) AS INTEGER) as hour,
-                    COUNT(*) as play_count
-                FROM video_ratings
-                WHERE date_last_played IS NOT NULL
-                GROUP BY hour
-                ORDER BY hour
+                    CAST(strftime('%H', hour) AS INTEGER) as hour,
+                    SUM(plays) as play_count
+                FROM play_rollups_hourly
+                GROUP BY 1
+                ORDER BY 1
                 """
             )
             by_hour = [dict(row) for row in cursor_hour.fetchall()]
@@ -2,6 +2,7 @@
 Video-related database operations.
 """
 import sqlite3
+from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
 
 from logging_helper import LoggingHelper, LogType
@@ -140,8 +141,13 @@ class VideoOperations:
                     level="error"
                 )
 
-    def record_play(self, yt_video_id: str, timestamp: Optional[str] = None) -> None:
-        """Increment play counter and update last played timestamp."""
+    def record_play(self, yt_video_id: str, timestamp: Optional[str] = None) -> bool:
+        """
+        Increment play counter and update last played timestamp.
+
+        Returns:
+            True if the video exists and the play was counted
+        """
         ts = self._timestamp(timestamp) if timestamp else self._timestamp('')
         with self._lock:
             try:
@@ -161,12 +167,47 @@ class VideoOperations:
                             f"Cannot record play for {yt_video_id} - video not found in video_ratings. "
                             "Video should be matched by queue worker before recording plays."
                         )
+                        return False
+                    return True
             except sqlite3.DatabaseError as exc:
                 log_and_suppress(
                     exc,
                     f"Failed to record play for {yt_video_id}",
                     level="error"
                 )
+                return False
+
+    def record_skip(self, yt_video_id: str, timestamp: Optional[str] = None) -> bool:
+        """
+        Increment skip counter and update last skipped timestamp.
+
+        A skip is a track replaced by another one before it counted as a play;
+        it does not touch play_count.
+
+        Returns:
+            True if the video exists and the skip was counted
+        """
+        ts = self._timestamp(timestamp) if timestamp else self._timestamp('')
+        with self._lock:
+            try:
+                with self._conn:
+                    cur = self._conn.execute(
+                        """
+                        UPDATE video_ratings
+                        SET skip_count = COALESCE(skip_count, 0) + 1,
+                            date_last_skipped = ?
+                        WHERE yt_video_id = ?
+                        """,
+                        (ts, yt_video_id),
+                    )
+                    return cur.rowcount > 0
+            except sqlite3.DatabaseError as exc:
+                log_and_suppress(
+                    exc,
+                    f"Failed to record skip for {yt_video_id}",
+                    level="error"
+                )
+                return False
 
     def record_rating(self, yt_video_id: str, rating: str, timestamp: Optional[str] = None) -> None:
         """Update rating metadata and increment rating counter."""
@@ -298,6 +339,98 @@ class VideoOperations:
             row = cur.fetchone()
         return dict(row) if row else None
 
+    def get_recently_played(self, limit: int = 200) -> List[Dict[str, Any]]:
+        """
+        Return the most recently played videos (newest first).
+
+        Used at startup to pre-warm the song tracker's in-memory lookups and
+        play throttle in a single query.
+        """
+        with self._lock:
+            cur = self._conn.execute(
+                """
+                SELECT * FROM video_ratings
+                WHERE date_last_played IS NOT NULL
+                  AND yt_video_id IS NOT NULL
+                ORDER BY date_last_played DESC
+                LIMIT ?
+                """,
+                (limit,),
+            )
+            rows = cur.fetchall()
+        return [dict(row) for row in rows]
+
+    def get_videos_due_for_refresh(self, limit: int = 500, max_age_days: int = 30) -> List[str]:
+        """
+        Return IDs of videos whose YouTube metadata is due for a refresh.
+
+        Rows never checked, or checked more than max_age_days ago, are ranked by
+        how long since their last check divided by how long since they were last
+        played, so recently played videos with old metadata come first.
+        """
+        cutoff = self._timestamp(datetime.utcnow() - timedelta(days=max_age_days))
+        with self._lock:
+            cur = self._conn.execute(
+                """
+                SELECT yt_video_id FROM video_ratings
+                WHERE yt_checked_at IS NULL OR yt_checked_at < ?
+                ORDER BY
+                    (julianday('now') - julianday(COALESCE(yt_checked_at, date_added, '2000-01-01')))
+                    / (1.0 + julianday('now') - julianday(COALESCE(date_last_played, date_added, '2000-01-01'))) DESC
+                LIMIT ?
+                """,
+                (cutoff, limit),
+            )
+            rows = cur.fetchall()
+        return [row['yt_video_id'] for row in rows]
+
+    def apply_metadata_refresh(self, refreshed: List[Dict[str, Any]], unavailable: Dict[str, str]) -> None:
+        """
+        Write refreshed YouTube metadata in bulk (one transaction).
+
+        Args:
+            refreshed: Dicts with yt_video_id, yt_title, yt_channel, yt_channel_id,
+                       yt_category_id, yt_live_broadcast, yt_duration, yt_unavailable_reason
+            unavailable: Map of yt_video_id -> reason for videos YouTube no longer returns
+        """
+        checked_at = self._timestamp('')
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany(
+                        """
+                        UPDATE video_ratings
+                        SET yt_title = COALESCE(:yt_title, yt_title),
+                            yt_channel = COALESCE(:yt_channel, yt_channel),
+                            yt_channel_id = COALESCE(:yt_channel_id, yt_channel_id),
+                            yt_category_id = COALESCE(:yt_category_id, yt_category_id),
+                            yt_live_broadcast = COALESCE(:yt_live_broadcast, yt_live_broadcast),
+                            yt_duration = COALESCE(:yt_duration, yt_duration),
+                            yt_unavailable_reason = :yt_unavailable_reason,
+                            yt_checked_at = :checked_at
+                        WHERE yt_video_id = :yt_video_id
+                        """,
+                        [dict(video, checked_at=checked_at) for video in refreshed],
+                    )
+                    self._conn.executemany(
+                        """
+                        UPDATE video_ratings
+                        SET yt_unavailable_reason = ?, yt_checked_at = ?
+                        WHERE yt_video_id = ?
+                        """,
+                        [(reason, checked_at, video_id) for video_id, reason in unavailable.items()],
+                    )
+            except sqlite3.DatabaseError as exc:
+                log_and_suppress(
+                    exc,
+                    f"Failed to apply metadata refresh for {len(refreshed) + len(unavailable)} videos",
+                    level="error"
+                )
+
+    def mark_video_unavailable(self, yt_video_id: str, reason: str) -> None:
+        """Flag a video as unavailable on YouTube so ratings are refused locally."""
+        self.apply_metadata_refresh([], {yt_video_id: reason})
+
     def find_cached_video_combined(self, title: str, duration: int, artist: Optional[str] = None, return_hash: bool = False):
         """
         Optimized cache lookup combining content hash and title+duration in a single query.
@@ -2,7 +2,7 @@
 Decorators for simplifying repetitive patterns in the codebase.
 """
 from functools import wraps
-from typing import Any, Callable
+from typing import Any, Callable, Optional
 from googleapiclient.errors import HttpError
 from logging_helper import LoggingHelper, LogType
 
@@ -21,7 +21,19 @@ from quota_error import (
 _db = None
 
 
-def handle_youtube_error(context: str, api_method: str = None, quota_cost: int = 0):
+def _quota_cost(api_method: str, success: bool = True) -> int:
+    """Quota cost from the central cost model (imported lazily: youtube_api imports this module)."""
+    from youtube_api.quota_manager import quota_cost
+    return quota_cost(api_method, success)
+
+
+def _credential_of(youtube_client) -> str:
+    """Credential a client was built for (imported lazily: youtube_api imports this module)."""
+    from youtube_api.auth import credential_of
+    return credential_of(youtube_client)
+
+
+def handle_youtube_error(context: str, api_method: str = None, quota_cost: Optional[int] = None):
     """
     Decorator to convert YouTube API HttpErrors to specific exception types.
 
@@ -31,7 +43,8 @@ def handle_youtube_error(context: str, api_method: str = None, quota_cost: int =
     Args:
         context: Description of the operation for logging
         api_method: Optional API method name (e.g., "videos.rate") for database logging
-        quota_cost: Optional quota cost for this API call (for database logging)
+        quota_cost: Optional override of the quota cost of a successful call
+                    (default: youtube_api.quota_manager cost model)
 
     Raises:
         QuotaExceededError: When API quota is exhausted
@@ -49,12 +62,13 @@ def handle_youtube_error(context: str, api_method: str = None, quota_cost: int =
 
                 # v4.0.26: Log successful API calls (not just failures!)
                 if api_method and _db:
-                    _db.record_api_call(api_method, success=True, quota_cost=quota_cost)
+                    cost = quota_cost if quota_cost is not None else _quota_cost(api_method)
+                    _db.record_api_call(api_method, success=True, quota_cost=cost, credential=_credential_of(self))
                     _db.log_api_call_detailed(
                         api_method=api_method,
                         operation_type=context,
                         query_params=str(args[0]) if args else None,
-                        quota_cost=quota_cost,
+                        quota_cost=cost,
                         success=True,
                         error_message=None,
                         results_count=None,
@@ -76,14 +90,21 @@ def handle_youtube_error(context: str, api_method: str = None, quota_cost: int =
                     error_context += f" | {args[0]}"
 
                 # Check for quota error first
-                detail = self._quota_error_detail(e) if hasattr(self, '_quota_error_detail') else None
+                # (module-level API functions receive the client as "self", so fall back to the shared detector)
+                if hasattr(self, '_quota_error_detail'):
+                    detail = self._quota_error_detail(e)
+                else:
+                    from youtube_api.quota_manager import quota_error_detail
+                    detail = quota_error_detail(e)
                 if detail:
                     logger.error(f"Quota exceeded: {error_context}")
                     # v4.0.13: Record quota error to BOTH aggregate and detailed logs
-                    # Aggregate: quota_cost=1 for visibility (shows call was made)
-                    # Detailed: quota_cost=0 for accuracy (YouTube didn't charge us)
+                    # Requests rejected for quota are not charged
                     if api_method and _db:
-                        _db.record_api_call(api_method, success=False, quota_cost=1, error_message="Quota exceeded")
+                        from helpers.api_helpers import record_quota_exhausted
+                        record_quota_exhausted(_db, api_method, _credential_of(self))
+                        _db.record_api_call(api_method, success=False, quota_cost=0, error_message="Quota exceeded",
+                                            credential=_credential_of(self))
                         _db.log_api_call_detailed(
                             api_method=api_method,
                             operation_type=context,
@@ -96,16 +117,17 @@ def handle_youtube_error(context: str, api_method: str = None, quota_cost: int =
                     raise QuotaExceededError("YouTube API quota exceeded")
 
                 # v4.0.13: Record API call error to BOTH aggregate and detailed logs
-                # Aggregate: quota_cost=1 for visibility (shows call was made)
-                # Detailed: quota_cost=0 for accuracy (YouTube didn't charge us)
+                # Same cost in both (failed requests are still charged the minimum cost)
                 error_msg = f"{context} | Status: {status_code}"
                 if api_method and _db:
-                    _db.record_api_call(api_method, success=False, quota_cost=1, error_message=error_msg)
+                    cost = _quota_cost(api_method, success=False)
+                    _db.record_api_call(api_method, success=False, quota_cost=cost, error_message=error_msg,
+                                        credential=_credential_of(self))
                     _db.log_api_call_detailed(
                         api_method=api_method,
                         operation_type=context,
                         query_params=str(args[0]) if args else None,
-                        quota_cost=0,
+                        quota_cost=cost,
                         success=False,
                         error_message=error_msg,
                         context=error_context
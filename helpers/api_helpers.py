@@ -8,7 +8,7 @@ from logging_helper import LoggingHelper, LogType
 
 # Get logger instance
 logger = LoggingHelper.get_logger(LogType.MAIN)
-from helpers.time_helpers import get_last_quota_reset_time, get_next_quota_reset_time, get_time_until_quota_reset
+from helpers.time_helpers import get_next_quota_reset_time, get_time_until_quota_reset
 
 
 def check_quota_recently_exceeded(db):
@@ -17,6 +17,9 @@ def check_quota_recently_exceeded(db):
     YouTube API quota resets at midnight Pacific Time, so any quota error
     since the last reset means we should skip API calls until the next reset.
 
+    Reads the quota_state row (cached in-process, O(1)) written when
+    YouTube reports the quota as exhausted.
+
     Args:
         db: Database instance
 
@@ -24,53 +27,69 @@ def check_quota_recently_exceeded(db):
         bool: True if quota exceeded since last reset, False otherwise
     """
     try:
-        with db._lock:
-            cursor = db._conn.execute(
-                """
-                SELECT timestamp, error_message
-                FROM api_call_log
-                WHERE success = 0
-                  AND (error_message LIKE '%quota%' OR error_message LIKE '%Quota%')
-                ORDER BY timestamp DESC
-                LIMIT 1
-                """,
-            )
-            row = cursor.fetchone()
-
-            if not row:
-                return False
-
-            last_quota_error = dict(row)
-            error_time_str = last_quota_error.get('timestamp')
-
-            if not error_time_str:
-                return False
-
-            # Parse timestamp
-            if isinstance(error_time_str, str):
-                error_dt = datetime.fromisoformat(error_time_str.replace('Z', '+00:00'))
-            else:
-                error_dt = error_time_str
-
-            # Ensure error_dt has timezone
-            if error_dt.tzinfo is None:
-                error_dt = error_dt.replace(tzinfo=timezone.utc)
-
-            # Get last quota reset time
-            last_reset = get_last_quota_reset_time()
-           
-
-            # If quota error occurred AFTER last reset, quota is still exhausted
-            if error_dt > last_reset:
-                return True
-
-            return False
+        return _state_active(db.get_quota_state())
 
     except Exception as e:
         logger.debug(f"Error checking quota status: {e}")
         return False  # If we can't check, allow the attempt
 
 
+def check_credential_quota_exceeded(db, credential: str) -> bool:
+    """
+    Check if one credential's quota was exceeded since the last quota reset.
+
+    Args:
+        db: Database instance
+        credential: Credential (project) name
+
+    Returns:
+        bool: True if the credential's quota is exhausted until the next reset
+    """
+    try:
+        return _state_active(db.get_credential_quota_states().get(credential, {}))
+
+    except Exception as e:
+        logger.debug(f"Error checking quota status of {credential}: {e}")
+        return False
+
+
+def _state_active(state: dict) -> bool:
+    """Whether a quota state row's resets_at is still in the future."""
+    resets_at = state.get('resets_at')
+    if not resets_at:
+        return False
+    if isinstance(resets_at, str):
+        resets_at = datetime.fromisoformat(resets_at.replace(' ', 'T'))
+    return datetime.now(timezone.utc) < resets_at.replace(tzinfo=timezone.utc)
+
+
+def record_quota_exhausted(db, source: str, credential: str = 'primary') -> None:
+    """
+    Record that YouTube reported a credential's quota as exhausted until the next Pacific midnight.
+
+    The pool-wide quota_state (which makes the worker sleep until reset) is
+    only set once every credential in the active pool is exhausted.
+
+    Args:
+        db: Database instance
+        source: API method or component that hit the limit
+        credential: Credential (project) the request was made with
+    """
+    # Imported lazily: youtube_api imports decorators, which import this module lazily
+    from youtube_api.credential_pool import active_credentials
+
+    try:
+        now = datetime.now(timezone.utc)
+        resets_at = get_next_quota_reset_time()
+        db.set_credential_quota_exhausted(credential, now, resets_at, source)
+        if all(check_credential_quota_exceeded(db, name) for name in active_credentials()):
+            db.set_quota_exhausted(now, resets_at, source)
+        else:
+            logger.warning(f"Quota exhausted for credential '{credential}' - other credentials in the pool still have quota")
+    except Exception as e:
+        logger.error(f"Failed to record quota exhausted state: {e}")
+
+
 # ========================================
 # API Endpoint Decorators and Helpers
 # ========================================
@@ -0,0 +1,160 @@
+"""
+Compact debug records for YouTube searches run by the queue worker.
+
+The full api_debug_data of a search holds the raw search.list response and
+every videos.list batch, including descriptions, thumbnails and tags - tens
+of kilobytes per search, most of it never looked at. The compact record keeps
+what the queue item detail page and the replay tools need (IDs, titles,
+channels, durations and title-similarity scores) and is stored
+zlib-compressed in queue_debug_records until the retention window expires.
+"""
+import json
+import zlib
+from typing import Dict, Any, List, Optional
+
+from logging_helper import LoggingHelper, LogType
+from error_handler import validate_environment_variable
+
+# Get logger instance
+logger = LoggingHelper.get_logger(LogType.MAIN)
+
+# Version of the compact record layout (legacy api_response_data blobs are format 1)
+DEBUG_RECORD_FORMAT = 2
+
+# Days a debug record is kept before the queue worker prunes it
+DEBUG_RECORD_RETENTION_DAYS = validate_environment_variable(
+    'YTT_DEBUG_RECORD_RETENTION_DAYS',
+    default=30,
+    converter=int,
+    validator=lambda x: 1 <= x <= 365
+)
+
+# Top-level summary fields copied unchanged from api_debug_data
+SUMMARY_FIELDS = ('search_query', 'cache_hit', 'videos_checked', 'candidates_found', 'match_rank',
+                  'fetch_plan', 'error')
+
+
+def _duration_seconds(duration: Optional[str]) -> Optional[int]:
+    """Parse an ISO 8601 duration, returning None if it is missing or malformed."""
+    from youtube_api.video_parser import parse_duration
+    try:
+        return parse_duration(duration)
+    except (TypeError, ValueError):
+        return None
+
+
+def _title_scores(search_items: List[Dict[str, Any]], title: Optional[str]) -> Dict[str, float]:
+    """Score search results against the HA title (for records saved before scores were captured)."""
+    if not title:
+        return {}
+    from youtube_api.search import calculate_title_similarity
+    return {
+        item['id']['videoId']: round(calculate_title_similarity(item['snippet'].get('title', ''), title), 3)
+        for item in search_items
+    }
+
+
+def compact_debug_record(api_debug_data: Dict[str, Any], title: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Reduce search debug data to the fields worth keeping.
+
+    Args:
+        api_debug_data: Debug data from search_video_globally (or an already compact record)
+        title: HA title the search was for, used to score results when the
+            debug data has no title_scores
+
+    Returns:
+        Compact record dict (format 2)
+    """
+    if api_debug_data.get('format') == DEBUG_RECORD_FORMAT:
+        return api_debug_data
+
+    record = {'format': DEBUG_RECORD_FORMAT}
+    for field in SUMMARY_FIELDS:
+        if api_debug_data.get(field) is not None:
+            record[field] = api_debug_data[field]
+
+    search_items = [
+        item for item in (api_debug_data.get('search_response') or {}).get('items', [])
+        if (item.get('id') or {}).get('videoId')
+    ]
+    if search_items:
+        scores = api_debug_data.get('title_scores') or _title_scores(search_items, title)
+        record['search_results'] = [
+            {
+                'id': item['id']['videoId'],
+                'title': item['snippet'].get('title', ''),
+                'score': scores.get(item['id']['videoId'])
+            }
+            for item in search_items
+        ]
+
+    batches = api_debug_data.get('batch_responses')
+    if batches:
+        record['batches'] = [
+            {
+                'phase': batch.get('phase'),
+                'batch_num': batch.get('batch_num'),
+                'requested': batch.get('video_ids_requested', 0),
+                'cached': batch.get('video_ids_cached', 0),
+                'videos': [
+                    {
+                        'id': video['id'],
+                        'title': (video.get('snippet') or {}).get('title', ''),
+                        'channel': (video.get('snippet') or {}).get('channelTitle'),
+                        'duration': _duration_seconds((video.get('contentDetails') or {}).get('duration'))
+                    }
+                    for video in (batch.get('response') or {}).get('items', [])
+                    if video.get('id')
+                ]
+            }
+            for batch in batches
+        ]
+
+    return record
+
+
+def encode_debug_record(record: Dict[str, Any]) -> bytes:
+    """Serialize and zlib-compress a compact debug record."""
+    return zlib.compress(json.dumps(record, separators=(',', ':')).encode('utf-8'))
+
+
+def decode_debug_record(data: Optional[bytes]) -> Optional[Dict[str, Any]]:
+    """
+    Decompress a stored debug record.
+
+    Args:
+        data: Compressed record from queue_debug_records
+
+    Returns:
+        Compact record dict, or None if the data is missing or corrupt
+    """
+    if not data:
+        return None
+    try:
+        return json.loads(zlib.decompress(data).decode('utf-8'))
+    except (zlib.error, UnicodeDecodeError, ValueError) as e:
+        logger.warning(f"Could not decode debug record: {e}")
+        return None
+
+
+def debug_record_row(record: Dict[str, Any], raw_size: int) -> tuple:
+    """
+    Build the stored column values for a compact debug record.
+
+    Args:
+        record: Compact record from compact_debug_record
+        raw_size: Size in bytes of the original JSON debug data
+
+    Returns:
+        Tuple of (format, raw_size, cache_hit, match_rank, batch_count, candidates_found, data)
+    """
+    return (
+        record['format'],
+        raw_size,
+        1 if record.get('cache_hit') else 0,
+        record.get('match_rank'),
+        len(record.get('batches') or []),
+        record.get('candidates_found'),
+        encode_debug_record(record)
+    )
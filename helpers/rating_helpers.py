@@ -15,7 +15,12 @@ from .video_helpers import prepare_video_upsert
 from .response_helpers import error_response, success_response
 
 
-def validate_current_media(ha_api, rating_type: str, error_response_func) -> Tuple[Optional[Dict], Optional[Tuple[Response, int]]]:
+def validate_current_media(
+    ha_api,
+    rating_type: str,
+    error_response_func,
+    entity: Optional[str] = None
+) -> Tuple[Optional[Dict], Optional[Tuple[Response, int]]]:
     """
     Get and validate current media from Home Assistant.
 
@@ -23,16 +28,18 @@ def validate_current_media(ha_api, rating_type: str, error_response_func) -> Tup
         ha_api: Home Assistant API instance
         rating_type: Type of rating for logging
         error_response_func: Function to create error responses
+        entity: Media player to rate (default: the first configured player)
 
     Returns:
         Tuple of (media_dict, error_response)
         - media_dict is None if error
         - error_response is None if success
     """
-    ha_media = ha_api.get_current_media()
+    ha_media = ha_api.get_current_media(entity)
     if not ha_media:
-        logger.error(f"No media currently playing | Context: rate_video ({rating_type})")
-        rating_logger.info(f"{rating_type.upper()} | FAILED | No media currently playing")
+        where = f" on {entity}" if entity else ""
+        logger.error(f"No media currently playing{where} | Context: rate_video ({rating_type})")
+        rating_logger.info(f"{rating_type.upper()} | FAILED | No media currently playing{where}")
         err_response = error_response_func("No media currently playing")
         return None, err_response
     return ha_media, None
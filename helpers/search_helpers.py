@@ -75,7 +75,7 @@ def search_youtube_for_video(
         return (None, api_debug_data) if return_api_response else None
 
     # Record successful search
-    metrics.record_search_query(title)
+    metrics.record_search_query(title, len(candidates))
     return (candidates, api_debug_data) if return_api_response else candidates
 
 
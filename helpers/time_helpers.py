@@ -3,51 +3,58 @@ Time utility functions for YouTube Thumbs Rating.
 
 Handles quota reset time calculations and other time-related operations.
 """
-from datetime import datetime, timedelta, timezone
-from typing import Tuple, Union
+from datetime import datetime, date, time, timedelta, timezone
+from typing import Optional, Tuple, Union
+from zoneinfo import ZoneInfo
 
+# YouTube API quota resets at midnight Pacific Time (PST/PDT, DST-aware)
+PACIFIC_TZ = ZoneInfo('America/Los_Angeles')
 
-def get_last_quota_reset_time() -> datetime:
+
+def get_quota_day(moment: Optional[datetime] = None) -> str:
     """
-    Calculate when quota last reset (midnight Pacific Time).
-    YouTube API quota resets at midnight Pacific Time (UTC-8 or UTC-7 during DST).
+    Get the quota day (Pacific date) a moment falls in.
+
+    Args:
+        moment: Time to bucket (naive datetimes are treated as UTC); default now
 
     Returns:
-        datetime: The last quota reset time in UTC (timezone-aware)
+        str: Pacific date in YYYY-MM-DD format
     """
-    # Get current time in UTC
-    now_utc = datetime.now(timezone.utc)
+    if moment is None:
+        moment = datetime.now(timezone.utc)
+    elif moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(PACIFIC_TZ).strftime('%Y-%m-%d')
 
-    # Convert to Pacific Time (simplified: assume PST = UTC-8)
-    # TODO: Handle PST/PDT transition properly
-    pacific_offset = timedelta(hours=-8)
-    now_pacific = now_utc + pacific_offset
 
-    # Get midnight today in Pacific Time
-    midnight_today_pacific = now_pacific.replace(hour=0, minute=0, second=0, microsecond=0)
+def _pacific_midnight_utc(day: date) -> datetime:
+    """Midnight Pacific Time at the start of a Pacific date, in UTC."""
+    return datetime.combine(day, time.min, tzinfo=PACIFIC_TZ).astimezone(timezone.utc)
 
-    # Convert back to UTC
-    midnight_today_utc = midnight_today_pacific - pacific_offset
 
-    # If current time is before today's reset, use yesterday's reset
-    if now_utc < midnight_today_utc:
-        last_reset_utc = midnight_today_utc - timedelta(days=1)
-    else:
-        last_reset_utc = midnight_today_utc
+def get_last_quota_reset_time() -> datetime:
+    """
+    Calculate when quota last reset (midnight Pacific Time).
+    YouTube API quota resets at midnight Pacific Time (UTC-8, or UTC-7 during DST).
 
-    return last_reset_utc
+    Returns:
+        datetime: The last quota reset time in UTC (timezone-aware)
+    """
+    return _pacific_midnight_utc(datetime.now(PACIFIC_TZ).date())
 
 
 def get_next_quota_reset_time() -> datetime:
     """
     Calculate when quota will next reset (midnight Pacific Time).
 
+    Days on which DST starts or ends are 23 or 25 hours long, so this is the
+    next Pacific midnight rather than last reset + 24h.
+
     Returns:
         datetime: The next quota reset time in UTC (timezone-aware)
     """
-    last_reset = get_last_quota_reset_time()
-    next_reset = last_reset + timedelta(days=1)
-    return next_reset
+    return _pacific_midnight_utc(datetime.now(PACIFIC_TZ).date() + timedelta(days=1))
 
 
 def get_time_until_quota_reset() -> Tuple[int, int]:
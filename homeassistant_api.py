@@ -1,19 +1,155 @@
+import logging
 import requests
-from typing import Optional, Dict, Any
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple, Callable
 import os
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from logging_helper import LoggingHelper, LogType
+from error_handler import validate_environment_variable
+from metrics_tracker import metrics
+from homeassistant_transport import (
+    CircuitBreaker, CircuitOpenError, create_session, timed_get, READ_TIMEOUT_SECONDS
+)
 
 # Get logger instance
 logger = LoggingHelper.get_logger(LogType.MAIN)
 
+# Media player states fetched by one thread are reused by the others for this long (0 = no cache)
+STATE_CACHE_SECONDS = validate_environment_variable(
+    'HOME_ASSISTANT_STATE_CACHE_SECONDS',
+    default=1.5,
+    converter=float,
+    validator=lambda x: 0 <= x <= 10
+)
+
+# Longest a caller waits for another thread's request for the same state
+STATE_WAIT_SECONDS = 30
+
+# Attributes that identify what is playing (position updates alone don't change them)
+MEDIA_SIGNATURE_ATTRIBUTES = ('media_title', 'media_artist', 'media_duration', 'media_content_id', 'app_name')
+
+
+def media_signature(state: Optional[Dict[str, Any]]) -> Optional[Tuple]:
+    """
+    Get the parts of a media player state that decide what (if anything) is playing.
+
+    Two states with the same signature resolve to the same media, so the song
+    tracker can skip parsing, hashing and DB lookups when it has not changed.
+
+    Args:
+        state: Media player state object
+
+    Returns:
+        Tuple of the player state and identifying attributes, or None for no state
+    """
+    if not state:
+        return None
+    attributes = state.get('attributes') or {}
+    return (state.get('state'),) + tuple(attributes.get(key) for key in MEDIA_SIGNATURE_ATTRIBUTES)
+
+
+def current_position(attributes: Dict[str, Any]) -> Optional[float]:
+    """
+    Estimate the current playback position from media_position and its timestamp.
+
+    Args:
+        attributes: Media player attributes
+
+    Returns:
+        Position in seconds (raw position + time elapsed since it was captured), or None
+    """
+    media_position = attributes.get('media_position')
+    media_position_updated_at = attributes.get('media_position_updated_at')
+    if media_position is None or not media_position_updated_at:
+        return None
+
+    try:
+        if isinstance(media_position_updated_at, str):
+            position_time = datetime.fromisoformat(media_position_updated_at.replace('Z', '+00:00'))
+        else:
+            position_time = media_position_updated_at
+        elapsed_seconds = (datetime.now(timezone.utc) - position_time).total_seconds()
+        return media_position + elapsed_seconds
+    except (ValueError, TypeError) as e:
+        logger.debug(f"Could not calculate current position: {e}")
+        return None
+
+
+# Upcoming tracks are best effort: core Home Assistant has no standard attribute
+# for a player's queue, but some integrations and template players expose the
+# next item(s) either as a list of track dicts or as next_media_* attributes
+UPCOMING_LIST_ATTRIBUTES = ('media_queue', 'queue', 'upcoming')
+
+
+def upcoming_media(state: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Get the tracks a media player reports as coming up next.
+
+    Args:
+        state: Media player state object
+
+    Returns:
+        Media dicts (same keys as media_from_state) in queue order; empty if the
+        player exposes no queue
+    """
+    if not state:
+        return []
+    attributes = state.get('attributes') or {}
+
+    items = []
+    for key in UPCOMING_LIST_ATTRIBUTES:
+        value = attributes.get(key)
+        if isinstance(value, list):
+            items = [item for item in value if isinstance(item, dict)]
+            break
+    if not items and attributes.get('next_media_title'):
+        items = [{key[len('next_'):]: value for key, value in attributes.items() if key.startswith('next_media_')}]
+
+    upcoming = []
+    for item in items:
+        title = item.get('media_title') or item.get('title')
+        if not title:
+            continue
+        upcoming.append({
+            'title': title,
+            'artist': item.get('media_artist') or item.get('artist') or 'Unknown',
+            'album': item.get('media_album_name') or item.get('album'),
+            'content_id': item.get('media_content_id') or item.get('content_id'),
+            'duration': item.get('media_duration') or item.get('duration'),
+            'app_name': item.get('app_name') or attributes.get('app_name')
+        })
+    return upcoming
+
+
+def parse_entities(value: Optional[str]) -> List[str]:
+    """
+    Parse MEDIA_PLAYER_ENTITY: one entity ID or a comma-separated list.
+
+    Args:
+        value: Raw configuration value
+
+    Returns:
+        Entity IDs in configured order, without blanks or duplicates
+    """
+    entities = []
+    for entity in (value or '').split(','):
+        entity = entity.strip()
+        if entity and entity not in entities:
+            entities.append(entity)
+    return entities
+
+
 class HomeAssistantAPI:
     """Interface to Home Assistant API."""
     
     def __init__(self) -> None:
         self.url = os.getenv('HOME_ASSISTANT_URL')
         self.token = os.getenv('SUPERVISOR_TOKEN') or os.getenv('HOME_ASSISTANT_TOKEN')
-        self.entity = os.getenv('MEDIA_PLAYER_ENTITY')
+        # Several media players can be followed; the first one is the default
+        # for rating endpoints called without an entity
+        self.entities = parse_entities(os.getenv('MEDIA_PLAYER_ENTITY'))
+        self.entity = self.entities[0] if self.entities else None
 
         if self.token and os.getenv('SUPERVISOR_TOKEN'):
             logger.debug("Using Supervisor token for authentication")
@@ -23,25 +159,206 @@ class HomeAssistantAPI:
         if not all([self.url, self.token, self.entity]):
             raise ValueError("Missing Home Assistant configuration. Please check add-on configuration.")
 
+        self.websocket_url = os.getenv('HOME_ASSISTANT_WS_URL') or self._websocket_url(self.url)
+
         logger.debug(f"Home Assistant URL: {self.url}")
-        logger.debug(f"Media Player Entity: {self.entity}")
+        logger.debug(f"Home Assistant WebSocket URL: {self.websocket_url}")
+        logger.debug(f"Media Player Entities: {', '.join(self.entities)}")
 
         self.headers = {
             'Authorization': f'Bearer {self.token}',
             'Content-Type': 'application/json'
         }
 
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # Shared by the web threads and the song tracker: tuned pool, GET retries,
+        # and a circuit breaker that fails fast while HA is down
+        self.session = create_session(self.headers)
+        self.breaker = CircuitBreaker()
+        metrics.register_circuit('home_assistant', self.breaker.stats)
+
+        # Media player state cache shared by the web threads and the song tracker
+        self._state_lock = threading.Lock()
+        self._states: Dict[str, Tuple[float, Dict[str, Any]]] = {}  # entity -> (monotonic time stored, state)
+        self._in_flight: Dict[str, Dict[str, Any]] = {}  # request key -> {'done': Event, 'result': ...}
+        self._push_live_since: Optional[float] = None  # set while the song tracker's WebSocket is subscribed
     
-    def get_current_media(self) -> Optional[Dict[str, Any]]:
-        """Get current playing media information."""
+    @staticmethod
+    def _websocket_url(url: str) -> str:
+        """
+        Derive the WebSocket API URL from the REST base URL.
+
+        The Supervisor proxy (http://supervisor/core) serves it at /core/websocket,
+        a direct Home Assistant URL at /api/websocket.
+        """
+        base = url.rstrip('/')
+        if base.startswith('http'):
+            base = 'ws' + base[len('http'):]
+        return f"{base}/websocket" if base.endswith('/core') else f"{base}/api/websocket"
+
+    def get_current_media(self, entity: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get current playing media information.
+
+        Args:
+            entity: Media player entity ID (default: the first configured entity)
+        """
+        state = self.get_media_player_state(entity)
+        return self.media_from_state(state) if state else None
+
+    def get_media_player_state(self, entity: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get the raw media player state object (GET /api/states/<entity>).
+
+        Served from the shared state cache when possible (see _cached_state);
+        concurrent callers for the same entity share one request.
+
+        Args:
+            entity: Media player entity ID (default: the first configured entity)
+
+        Returns:
+            State object (state, attributes, last_updated, ...), or None on error
+        """
+        entity = entity or self.entity
+        state = self._cached_state(entity)
+        if state is not None:
+            return state
+
+        def fetch():
+            logger.debug(f"Fetching current media from Home Assistant entity: {entity}")
+            fetched = self._get_json(f"{self.url}/api/states/{entity}", 'ha.states')
+            if isinstance(fetched, dict):
+                self.remember_state(fetched, entity)
+            return fetched
+
+        return self._single_flight(entity, fetch)
+
+    def get_media_player_states(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Fetch the state objects of every configured media player in one request.
+
+        A single entity is fetched directly; several are fetched with one bulk
+        GET /api/states and filtered locally, so the request count does not
+        grow with the number of players.
+
+        Returns:
+            Dict of entity ID -> state object (entities HA doesn't know are
+            missing), or None on error
+        """
+        if len(self.entities) == 1:
+            state = self.get_media_player_state()
+            return {self.entity: state} if state is not None else None
+
+        cached = {entity: self._cached_state(entity) for entity in self.entities}
+        if all(state is not None for state in cached.values()):
+            return cached
+
+        def fetch():
+            logger.debug(f"Fetching {len(self.entities)} media player states from Home Assistant")
+            states = self._get_json(f"{self.url}/api/states", 'ha.states_all')
+            if not isinstance(states, list):
+                return None
+            wanted = set(self.entities)
+            found = {state['entity_id']: state for state in states
+                     if isinstance(state, dict) and state.get('entity_id') in wanted}
+            for state in found.values():
+                self.remember_state(state)
+            return found
+
+        return self._single_flight('*', fetch)
+
+    def remember_state(self, state: Dict[str, Any], entity: Optional[str] = None) -> None:
+        """
+        Store a media player state in the shared cache.
+
+        Called for every fetched state, and by the song tracker for states
+        pushed over the WebSocket, so rating requests can use them without a
+        round-trip to Home Assistant.
+
+        Args:
+            state: State object
+            entity: Its entity ID (default: the state's entity_id)
+        """
+        entity = entity or state.get('entity_id')
+        if entity:
+            with self._state_lock:
+                self._states[entity] = (time.monotonic(), state)
+
+    def set_push_live(self, live: bool) -> None:
+        """
+        Mark whether state changes are currently pushed to remember_state().
+
+        While they are, every state stored since the subscription started is
+        current (any change would have been pushed), so it is used regardless
+        of age.
+        """
+        with self._state_lock:
+            self._push_live_since = time.monotonic() if live else None
+
+    def _cached_state(self, entity: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached state that is still current.
+
+        States stored while the push subscription is live are current;
+        others are reused for STATE_CACHE_SECONDS.
+
+        Returns:
+            State object, or None if there is no current one
+        """
+        with self._state_lock:
+            entry = self._states.get(entity)
+            push_live_since = self._push_live_since
+        if entry is None:
+            return None
+        stored_at, state = entry
+        if push_live_since is not None and stored_at >= push_live_since:
+            return state
+        return state if time.monotonic() - stored_at < STATE_CACHE_SECONDS else None
+
+    def _single_flight(self, key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        Run fetch() once for concurrent callers with the same key.
+
+        The first caller performs the request; callers arriving while it is in
+        flight wait for and share its result instead of sending their own.
+
+        Args:
+            key: Request key (entity ID, or '*' for the bulk request)
+            fetch: Performs the request
+
+        Returns:
+            fetch()'s result (None for waiters if it takes longer than STATE_WAIT_SECONDS)
+        """
+        with self._state_lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = {'done': threading.Event(), 'result': None}
+
+        if not leader:
+            flight['done'].wait(timeout=STATE_WAIT_SECONDS)
+            return flight['result']
+
         try:
-            logger.debug(f"Fetching current media from Home Assistant entity: {self.entity}")
+            flight['result'] = fetch()
+        finally:
+            with self._state_lock:
+                self._in_flight.pop(key, None)
+            flight['done'].set()
+        return flight['result']
 
-            url = f"{self.url}/api/states/{self.entity}"
+    def _get_json(self, url: str, metric: str) -> Optional[Any]:
+        """
+        GET a Home Assistant REST endpoint and parse the JSON response.
 
-            response = self.session.get(url, timeout=10)
+        Args:
+            url: Full request URL
+            metric: Latency histogram name for the endpoint
+
+        Returns:
+            Parsed JSON, or None on error (logged)
+        """
+        try:
+            response = timed_get(self.session, self.breaker, url, metric)
 
             if response.status_code != 200:
                 logger.error(f"Home Assistant API error: HTTP {response.status_code} - {response.text[:200]}")
@@ -57,7 +374,44 @@ class HomeAssistantAPI:
                 )
                 return None
 
-            data = response.json()
+            return response.json()
+
+        except CircuitOpenError as e:
+            logger.debug(str(e))
+            return None
+        except requests.exceptions.Timeout:
+            logger.warning(f"Home Assistant API request timed out after {READ_TIMEOUT_SECONDS:g} seconds")
+            return None
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Home Assistant API connection error: {str(e)}")
+            return None
+        except ValueError as e:
+            # JSON parsing error
+            logger.error(f"Failed to parse Home Assistant response as JSON: {str(e)}")
+            logger.error(f"Response preview: {response.text[:200] if 'response' in locals() else 'N/A'}")
+            return None
+        except Exception as e:
+            logger.error(f"Error fetching Home Assistant state: {str(e)}")
+            return None
+
+    def media_from_state(self, data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Extract YouTube media info from a media player state object.
+
+        Used for REST state responses and for the new_state of WebSocket
+        state_changed events, which have the same shape.
+
+        Args:
+            data: State object (state, attributes, ...)
+
+        Returns:
+            Media dict (title, artist, album, content_id, app_name, duration), or
+            None if nothing is playing or the content is not from YouTube
+        """
+        try:
+            if not data:
+                return None
+
             state = data.get('state')
             
             if state != 'playing':
@@ -66,44 +420,25 @@ class HomeAssistantAPI:
             
             attributes = data.get('attributes', {})
 
-            # Log ALL attributes to see what AppleTV is actually sending
-            logger.debug("=== ALL Home Assistant attributes ===")
-
-            # Calculate actual current position for more useful debugging
-            media_position = attributes.get('media_position')
-            media_position_updated_at = attributes.get('media_position_updated_at')
-            calculated_position = None
-
-            if media_position is not None and media_position_updated_at:
-                try:
-                    # Parse the timestamp
-                    if isinstance(media_position_updated_at, str):
-                        position_time = datetime.fromisoformat(media_position_updated_at.replace('Z', '+00:00'))
-                    else:
-                        position_time = media_position_updated_at
-
-                    # Calculate elapsed time since position was captured
-                    now = datetime.now(timezone.utc)
-                    elapsed_seconds = (now - position_time).total_seconds()
+            # Log ALL attributes to see what AppleTV is actually sending (only when DEBUG is on)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("=== ALL Home Assistant attributes ===")
 
-                    # Calculate current position (raw position + elapsed time)
-                    calculated_position = media_position + elapsed_seconds
+                # Calculate actual current position for more useful debugging
+                calculated_position = current_position(attributes)
 
-                except (ValueError, TypeError) as e:
-                    logger.debug(f"Could not calculate current position: {e}")
+                for key, value in attributes.items():
+                    # Truncate long values for readability
+                    value_str = str(value)
+                    if len(value_str) > 100:
+                        value_str = value_str[:100] + "..."
+                    logger.debug(f"  {key}: {value_str}")
 
-            for key, value in attributes.items():
-                # Truncate long values for readability
-                value_str = str(value)
-                if len(value_str) > 100:
-                    value_str = value_str[:100] + "..."
-                logger.debug(f"  {key}: {value_str}")
+                    # Add calculated position info for media_position
+                    if key == 'media_position' and calculated_position is not None:
+                        logger.debug(f"  media_position_calculated: {calculated_position:.1f} (raw HA value: {value})")
 
-                # Add calculated position info for media_position
-                if key == 'media_position' and calculated_position is not None:
-                    logger.debug(f"  media_position_calculated: {calculated_position:.1f} (raw HA value: {media_position}, elapsed: {elapsed_seconds:.1f}s)")
-
-            logger.debug("=== End attributes ===")
+                logger.debug("=== End attributes ===")
 
             media_title = attributes.get('media_title')
             media_artist = attributes.get('media_artist')
@@ -156,21 +491,75 @@ class HomeAssistantAPI:
                 media_album_name
             )
             return media_info
-            
-        except requests.exceptions.Timeout:
-            logger.warning("Home Assistant API request timed out after 10 seconds")
+
+        except Exception as e:
+            logger.error(f"Error parsing media player state: {str(e)}")
             return None
+
+    def get_media_history(self, hours: int) -> List[Dict[str, Any]]:
+        """
+        Get recently played YouTube media from the Home Assistant recorder.
+
+        Uses the REST history endpoint for the media player entities. Attribute-only
+        changes (a new track while already playing) are not "significant" state
+        changes, so significant_changes_only is disabled to see every track.
+
+        Args:
+            hours: How far back to look
+
+        Returns:
+            List of distinct media dicts (title, artist, duration, app_name), newest first
+        """
+        start = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+        url = f"{self.url}/api/history/period/{start}"
+        params = {
+            'filter_entity_id': ','.join(self.entities),
+            'significant_changes_only': '0'
+        }
+
+        try:
+            response = timed_get(self.session, self.breaker, url, 'ha.history', read_timeout=30, params=params)
+            if response.status_code != 200:
+                logger.warning(f"Home Assistant history API error: HTTP {response.status_code} - {response.text[:200]}")
+                return []
+            history = response.json()
         except requests.exceptions.RequestException as e:
-            logger.error(f"Home Assistant API connection error: {str(e)}")
-            return None
+            logger.warning(f"Home Assistant history API connection error: {str(e)}")
+            return []
         except ValueError as e:
-            # JSON parsing error
-            logger.error(f"Failed to parse Home Assistant response as JSON: {str(e)}")
-            logger.error(f"Response preview: {response.text[:200] if 'response' in locals() else 'N/A'}")
-            return None
-        except Exception as e:
-            logger.error(f"Error fetching current media: {str(e)}")
-            return None
+            logger.warning(f"Failed to parse Home Assistant history response as JSON: {str(e)}")
+            return []
+
+        media_list = []
+        seen = set()
+        # One list per entity; merge them so the newest plays come first across players
+        states = [state for entity_states in history if isinstance(entity_states, list)
+                  for state in entity_states]
+        states.sort(key=lambda state: state.get('last_updated') or state.get('last_changed') or '')
+        for state in reversed(states):
+            attributes = state.get('attributes') or {}
+            title = attributes.get('media_title')
+            app_name = attributes.get('app_name')
+            if state.get('state') != 'playing' or not title:
+                continue
+            if not app_name or 'youtube' not in app_name.lower():
+                continue
+
+            media = {
+                'title': title,
+                'artist': attributes.get('media_artist') or 'Unknown',
+                'album': attributes.get('media_album_name'),
+                'content_id': attributes.get('media_content_id'),
+                'app_name': app_name,
+                'duration': attributes.get('media_duration')
+            }
+            key = (media['title'], media['artist'], media['duration'])
+            if key not in seen:
+                seen.add(key)
+                media_list.append(media)
+
+        logger.debug(f"Loaded {len(media_list)} distinct YouTube tracks from {hours}h of Home Assistant history")
+        return media_list
 
 # Create global instance
 ha_api = HomeAssistantAPI()
@@ -0,0 +1,221 @@
+"""
+Home Assistant WebSocket subscription for media player state changes.
+
+Replaces fixed-interval REST polling in the song tracker. After authenticating,
+a state trigger for the media player entities is subscribed (subscribe_trigger),
+so Home Assistant pushes state changes of those entities only -
+including attribute-only changes such as a new track while already playing -
+instead of the add-on fetching /api/states/<entity> every 30 seconds. One
+connection serves every configured player; each pushed state carries its
+entity_id.
+
+An application-level ping is sent after a quiet period; a missing pong, a
+closed socket or a failed subscription ends listen() so the caller can fall
+back to polling and reconnect with backoff.
+"""
+import json
+import threading
+from typing import Callable, Optional, Dict, Any
+
+from logging_helper import LoggingHelper, LogType
+
+# Get logger instance
+logger = LoggingHelper.get_logger(LogType.MAIN)
+
+try:
+    import websocket
+except ImportError:  # websocket-client missing - the song tracker keeps polling
+    websocket = None
+
+# Timeout for connecting, authenticating and subscribing
+CONNECT_TIMEOUT_SECONDS = 10
+
+# Quiet period after which a ping checks the connection is still alive
+PING_INTERVAL_SECONDS = 30
+
+# How long to wait for the pong before treating the connection as dead
+PING_TIMEOUT_SECONDS = 10
+
+
+class HomeAssistantEventError(Exception):
+    """Raised when the WebSocket handshake or subscription fails."""
+    pass
+
+
+def websocket_available() -> bool:
+    """Whether the websocket-client library is installed."""
+    return websocket is not None
+
+
+class HomeAssistantEventStream:
+    """Pushes media player state changes from the Home Assistant WebSocket API."""
+
+    def __init__(self, ha_api) -> None:
+        """
+        Initialize event stream.
+
+        Args:
+            ha_api: Home Assistant API instance (URL, token and entity)
+        """
+        self.ha_api = ha_api
+        self._ws = None
+        self._ws_lock = threading.Lock()
+        self._next_id = 1
+        self._subscription_id = None
+        self._awaiting_pong = False
+        self.events_received = 0
+
+    def listen(
+        self,
+        on_state: Callable[[Optional[Dict[str, Any]]], None],
+        stop_event: threading.Event,
+        on_subscribed: Optional[Callable[[], None]] = None
+    ) -> bool:
+        """
+        Connect, subscribe and deliver state changes until disconnected or stopped.
+
+        Args:
+            on_state: Called with the new state object of each state change
+            stop_event: Set to stop listening (close() interrupts a blocking receive)
+            on_subscribed: Called once subscribed, to pick up media that started
+                playing before the subscription (changes are only pushed from now on)
+
+        Returns:
+            True if the subscription was established before the connection ended
+        """
+        subscribed = False
+        try:
+            self._connect()
+            self._subscribe()
+            subscribed = True
+            logger.info(
+                f"Subscribed to {', '.join(self.ha_api.entities)} state changes over the Home Assistant WebSocket API"
+            )
+            if on_subscribed:
+                on_subscribed()
+
+            while not stop_event.is_set():
+                message = self._receive()
+                if message is None:
+                    continue
+                if message.get('type') == 'event' and message.get('id') == self._subscription_id:
+                    self.events_received += 1
+                    on_state(self._new_state(message.get('event') or {}))
+                elif message.get('type') == 'result' and not message.get('success'):
+                    logger.warning(f"Home Assistant WebSocket command failed: {message.get('error')}")
+
+        except HomeAssistantEventError as e:
+            if not stop_event.is_set():
+                logger.warning(f"Home Assistant WebSocket: {e}")
+        except Exception as e:
+            if not stop_event.is_set():
+                logger.warning(f"Home Assistant WebSocket disconnected: {e}")
+        finally:
+            self.close()
+
+        return subscribed
+
+    def close(self) -> None:
+        """Close the connection (safe to call from another thread)."""
+        with self._ws_lock:
+            ws, self._ws = self._ws, None
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+
+    def _connect(self) -> None:
+        """Open the connection and authenticate."""
+        if websocket is None:
+            raise HomeAssistantEventError("websocket-client is not installed")
+
+        ws = websocket.create_connection(
+            self.ha_api.websocket_url,
+            timeout=CONNECT_TIMEOUT_SECONDS,
+            enable_multithread=True
+        )
+        with self._ws_lock:
+            self._ws = ws
+        self._next_id = 1
+        self._awaiting_pong = False
+
+        message = self._receive_json()
+        if message.get('type') != 'auth_required':
+            raise HomeAssistantEventError(f"unexpected handshake message: {message.get('type')}")
+
+        self._send({'type': 'auth', 'access_token': self.ha_api.token})
+        message = self._receive_json()
+        if message.get('type') == 'auth_invalid':
+            raise HomeAssistantEventError(f"authentication failed: {message.get('message')}")
+        if message.get('type') != 'auth_ok':
+            raise HomeAssistantEventError(f"unexpected auth response: {message.get('type')}")
+
+    def _subscribe(self) -> None:
+        """Subscribe to state changes of the media player entities."""
+        entities = self.ha_api.entities
+        self._subscription_id = self._send_command({
+            'type': 'subscribe_trigger',
+            'trigger': {'platform': 'state', 'entity_id': entities[0] if len(entities) == 1 else entities}
+        })
+
+        while True:
+            message = self._receive_json()
+            if message.get('id') != self._subscription_id or message.get('type') != 'result':
+                continue
+            if not message.get('success'):
+                raise HomeAssistantEventError(f"subscription failed: {message.get('error')}")
+            break
+
+        self._ws.settimeout(PING_INTERVAL_SECONDS)
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        """Send a JSON message."""
+        self._ws.send(json.dumps(message))
+
+    def _send_command(self, message: Dict[str, Any]) -> int:
+        """Send a command with the next message ID and return the ID."""
+        message_id = self._next_id
+        self._next_id += 1
+        self._send(dict(message, id=message_id))
+        return message_id
+
+    def _receive_json(self) -> Dict[str, Any]:
+        """Receive one JSON message (handshake and subscription)."""
+        raw = self._ws.recv()
+        if not raw:
+            raise HomeAssistantEventError("connection closed by Home Assistant")
+        return json.loads(raw)
+
+    def _receive(self) -> Optional[Dict[str, Any]]:
+        """
+        Receive one message, pinging Home Assistant after a quiet period.
+
+        Returns:
+            Message dict, or None if the receive timed out and a ping was sent
+
+        Raises:
+            HomeAssistantEventError: If the pong does not arrive in time
+        """
+        try:
+            message = self._receive_json()
+        except websocket.WebSocketTimeoutException:
+            if self._awaiting_pong:
+                raise HomeAssistantEventError("no pong from Home Assistant, reconnecting")
+            self._send_command({'type': 'ping'})
+            self._awaiting_pong = True
+            self._ws.settimeout(PING_TIMEOUT_SECONDS)
+            return None
+
+        if self._awaiting_pong:
+            self._awaiting_pong = False
+            self._ws.settimeout(PING_INTERVAL_SECONDS)
+        return message
+
+    @staticmethod
+    def _new_state(event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Get the new state from a trigger event (or a plain state_changed event)."""
+        trigger = (event.get('variables') or {}).get('trigger')
+        if trigger is not None:
+            return trigger.get('to_state')
+        return (event.get('data') or {}).get('new_state')
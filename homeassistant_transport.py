@@ -0,0 +1,228 @@
+"""
+Shared HTTP transport for the Home Assistant REST API.
+
+One HomeAssistantAPI (and so one requests.Session) serves the gunicorn
+threads - rating endpoints, health checks, the tests page - and the song
+tracker thread. The default requests adapter suits that poorly: a pool of 10
+connections that is not sized for those threads, no retries, and a single 10s
+timeout, so a slow Supervisor proxy holds a thumbs up for the full 10s.
+
+This transport mounts a tuned adapter instead:
+- a connection pool sized for the gunicorn threads plus the background threads
+- a short connect timeout, separate from the read timeout
+- bounded retries with backoff for GETs (connection errors and 502/503/504
+  from the proxy; read timeouts are not retried, they already took long)
+- a circuit breaker: after CIRCUIT_FAILURE_THRESHOLD consecutive failures,
+  requests fail fast for CIRCUIT_RESET_SECONDS, then one trial request decides
+  whether Home Assistant is back
+
+Every request's latency goes into the MetricsTracker histograms
+('ha.states', 'ha.states_all', 'ha.history').
+"""
+import threading
+import time
+from typing import Dict, Any, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from logging_helper import LoggingHelper, LogType
+from error_handler import validate_environment_variable
+from metrics_tracker import metrics
+
+# Get logger instance
+logger = LoggingHelper.get_logger(LogType.MAIN)
+
+# Connections kept per host: 4 gunicorn threads, the song tracker and startup/health checks
+POOL_SIZE = validate_environment_variable(
+    'HOME_ASSISTANT_POOL_SIZE',
+    default=6,
+    converter=int,
+    validator=lambda x: 1 <= x <= 50
+)
+
+# Time to establish a connection (HA is on the local network or behind the Supervisor)
+CONNECT_TIMEOUT_SECONDS = validate_environment_variable(
+    'HOME_ASSISTANT_CONNECT_TIMEOUT',
+    default=2.0,
+    converter=float,
+    validator=lambda x: 0.1 <= x <= 30
+)
+
+# Time to wait for a state response
+READ_TIMEOUT_SECONDS = validate_environment_variable(
+    'HOME_ASSISTANT_READ_TIMEOUT',
+    default=5.0,
+    converter=float,
+    validator=lambda x: 0.5 <= x <= 60
+)
+
+# Retries per GET for proxy errors, and for connection errors (fewer, as a
+# connect timeout already took CONNECT_TIMEOUT_SECONDS), with exponential backoff
+RETRY_TOTAL = 2
+RETRY_CONNECT = 1
+RETRY_BACKOFF_SECONDS = 0.2
+RETRY_STATUSES = (502, 503, 504)
+
+# Consecutive failures that open the circuit, and how long it stays open
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of sending a request while Home Assistant is considered down."""
+    pass
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    Closed: requests pass. After failure_threshold consecutive failures it
+    opens and allow() refuses requests for reset_seconds. Then it is half
+    open: one trial request passes, and its outcome closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_seconds: float = CIRCUIT_RESET_SECONDS) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.rejected = 0
+        self.opened = 0
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half_open'."""
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        return 'open' if now - self._opened_at < self.reset_seconds else 'half_open'
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now (claims the trial request when half open)."""
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        with self._lock:
+            was_open = self._opened_at is not None
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+        if was_open:
+            logger.info("Home Assistant is reachable again - circuit closed")
+
+    def record_failure(self) -> None:
+        """Count a failure, opening (or re-opening) the circuit at the threshold."""
+        with self._lock:
+            self._failures += 1
+            trial_failed = self._trial_in_flight
+            self._trial_in_flight = False
+            if not trial_failed and (self._opened_at is not None or self._failures < self.failure_threshold):
+                return
+            self._opened_at = time.monotonic()
+            self.opened += 1
+            failures = self._failures
+        logger.warning(
+            f"Home Assistant failed {failures} times in a row - failing fast for {self.reset_seconds:.0f}s"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """State and counters, for the metrics endpoint."""
+        with self._lock:
+            return {
+                'state': self._state(time.monotonic()),
+                'consecutive_failures': self._failures,
+                'times_opened': self.opened,
+                'rejected_requests': self.rejected
+            }
+
+
+def create_session(headers: Dict[str, str], pool_size: int = POOL_SIZE) -> requests.Session:
+    """
+    Create a requests session with the tuned pool and GET retry policy.
+
+    Args:
+        headers: Default headers (authorization)
+        pool_size: Connections kept alive per host
+
+    Returns:
+        Configured session
+    """
+    retry = Retry(
+        total=RETRY_TOTAL,
+        connect=RETRY_CONNECT,
+        read=0,
+        status=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF_SECONDS,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False,
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.headers.update(headers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def timed_get(session: requests.Session, breaker: CircuitBreaker, url: str, metric: str,
+              read_timeout: float = READ_TIMEOUT_SECONDS, **kwargs) -> requests.Response:
+    """
+    GET through the circuit breaker, recording the latency histogram.
+
+    5xx responses and connection errors count as failures; other responses
+    (including 401/404) mean Home Assistant is up.
+
+    Args:
+        session: Session from create_session()
+        breaker: Circuit breaker of the Home Assistant instance
+        url: Full request URL
+        metric: Latency histogram name
+        read_timeout: Seconds to wait for the response
+        **kwargs: Passed to session.get (params, ...)
+
+    Returns:
+        Response
+
+    Raises:
+        CircuitOpenError: If the circuit is open (no request was sent)
+        requests.exceptions.RequestException: On connection errors and timeouts
+    """
+    if not breaker.allow():
+        raise CircuitOpenError(f"Home Assistant circuit open, not requesting {metric}")
+
+    start = time.perf_counter()
+    try:
+        response = session.get(url, timeout=(CONNECT_TIMEOUT_SECONDS, read_timeout), **kwargs)
+    except requests.exceptions.RequestException:
+        metrics.record_latency(metric, (time.perf_counter() - start) * 1000, success=False)
+        breaker.record_failure()
+        raise
+
+    failed = response.status_code >= 500
+    metrics.record_latency(metric, (time.perf_counter() - start) * 1000, success=not failed)
+    if failed:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+    return response
@@ -0,0 +1,152 @@
+"""
+Refreshes stale YouTube metadata in video_ratings.
+
+yt_title, yt_channel, yt_category_id etc. are captured once at match time.
+Videos get renamed, made private or deleted, and a rating against a deleted
+video wastes 50 quota units on a videos.rate that fails with 404. This job
+re-fetches the stalest rows (recently played first) 50 IDs per videos.list
+call, writes the changes in bulk and flags videos YouTube no longer serves so
+ratings for them are refused locally.
+
+Runs inside the queue worker when the queue is idle (the worker is the single
+process that owns YouTube API calls).
+"""
+import time
+from typing import Dict, Any, Optional
+
+from logging_helper import LoggingHelper, LogType
+from error_handler import validate_environment_variable
+from youtube_api.video_parser import parse_duration, validate_duration
+
+# Get logger instance
+logger = LoggingHelper.get_logger(LogType.MAIN)
+
+# How often the refresh runs (hours)
+REFRESH_INTERVAL_HOURS = validate_environment_variable(
+    'YTT_METADATA_REFRESH_INTERVAL_HOURS',
+    default=6,
+    converter=int,
+    validator=lambda x: x > 0
+)
+
+# Videos refreshed per run (50 per quota unit)
+REFRESH_BATCH_SIZE = validate_environment_variable(
+    'YTT_METADATA_REFRESH_BATCH',
+    default=500,
+    converter=int,
+    validator=lambda x: 0 <= x <= 5000
+)
+
+# Metadata older than this is considered stale
+REFRESH_MAX_AGE_DAYS = validate_environment_variable(
+    'YTT_METADATA_REFRESH_AGE_DAYS',
+    default=30,
+    converter=int,
+    validator=lambda x: x > 0
+)
+
+# Upload states YouTube reports for videos that can no longer be played
+DEAD_UPLOAD_STATUSES = ('deleted', 'failed', 'rejected')
+
+
+def parse_refreshed_video(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a videos.list resource into video_ratings column values.
+
+    Args:
+        item: Video resource from videos.list (snippet, contentDetails, status)
+
+    Returns:
+        Dict of refreshed columns (None means keep the stored value)
+    """
+    snippet = item.get('snippet') or {}
+    status = item.get('status') or {}
+
+    duration = None
+    try:
+        duration = validate_duration(parse_duration((item.get('contentDetails') or {}).get('duration')))
+    except ValueError:
+        pass
+
+    category_id = snippet.get('categoryId')
+    unavailable_reason = None
+    if status.get('uploadStatus') in DEAD_UPLOAD_STATUSES:
+        unavailable_reason = status['uploadStatus']
+    elif status.get('privacyStatus') == 'private':
+        unavailable_reason = 'private'
+
+    return {
+        'yt_video_id': item['id'],
+        'yt_title': snippet.get('title') or None,
+        'yt_channel': snippet.get('channelTitle'),
+        'yt_channel_id': snippet.get('channelId'),
+        'yt_category_id': int(category_id) if category_id and str(category_id).isdigit() else None,
+        'yt_live_broadcast': snippet.get('liveBroadcastContent'),
+        'yt_duration': duration,
+        'yt_unavailable_reason': unavailable_reason
+    }
+
+
+class MetadataRefresher:
+    """Periodically refreshes stale video metadata using bulk videos.list calls."""
+
+    def __init__(self, db, interval_seconds: int = REFRESH_INTERVAL_HOURS * 3600):
+        """
+        Initialize metadata refresher.
+
+        Args:
+            db: Database instance
+            interval_seconds: Minimum time between refresh runs
+        """
+        self.db = db
+        self.interval_seconds = interval_seconds
+        self._last_run: Optional[float] = None
+
+    def due(self) -> bool:
+        """Whether a refresh run is due."""
+        if REFRESH_BATCH_SIZE == 0:
+            return False
+        return self._last_run is None or time.monotonic() - self._last_run >= self.interval_seconds
+
+    def run(self, yt_api) -> Dict[str, Any]:
+        """
+        Refresh one batch of the stalest videos.
+
+        Args:
+            yt_api: YouTube API instance
+
+        Returns:
+            Dict with checked, refreshed, unavailable, failed and quota_exceeded
+        """
+        self._last_run = time.monotonic()
+        video_ids = self.db.get_videos_due_for_refresh(REFRESH_BATCH_SIZE, REFRESH_MAX_AGE_DAYS)
+        if not video_ids:
+            logger.debug("Metadata refresh: nothing stale")
+            return {'checked': 0, 'refreshed': 0, 'unavailable': 0, 'failed': 0, 'quota_exceeded': False}
+
+        result = yt_api.list_videos_bulk(video_ids)
+
+        refreshed = [parse_refreshed_video(item) for item in result['videos'].values()]
+        missing = {video_id: 'not_found' for video_id in result['missing']}
+        self.db.apply_metadata_refresh(refreshed, missing)
+
+        unavailable = dict(missing)
+        unavailable.update({
+            video['yt_video_id']: video['yt_unavailable_reason']
+            for video in refreshed if video['yt_unavailable_reason']
+        })
+
+        summary = {
+            'checked': len(video_ids),
+            'refreshed': len(refreshed),
+            'unavailable': len(unavailable),
+            'failed': len(result['failed']),
+            'quota_exceeded': result['quota_exceeded']
+        }
+        if unavailable:
+            logger.info(f"Metadata refresh: flagged {len(unavailable)} unavailable videos: {sorted(unavailable.items())[:10]}")
+        logger.info(
+            f"Metadata refresh: {summary['refreshed']}/{summary['checked']} refreshed, "
+            f"{summary['unavailable']} unavailable, {summary['failed']} failed"
+        )
+        return summary
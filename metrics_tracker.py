@@ -12,6 +12,9 @@ from logging_helper import LoggingHelper, LogType
 # Get logger instance
 logger = LoggingHelper.get_logger(LogType.MAIN)
 
+# Upper bounds (ms) of the latency histogram buckets; slower calls land in +Inf
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
 
 class MetricsTracker:
     """Tracks and reports application metrics."""
@@ -48,6 +51,64 @@ class MetricsTracker:
         # Pending video retry tracking
         self._pending_retries = deque(maxlen=100)
 
+        # Components reporting their in-memory state size (name -> callable)
+        self._memory_sources: Dict[str, Any] = {}
+
+        # Latency histograms (name -> bucket counts, count, failures, sum and max)
+        self._latency: Dict[str, Dict[str, Any]] = {}
+
+        # Circuit breakers reporting their state (name -> callable)
+        self._circuits: Dict[str, Any] = {}
+
+    def register_memory_source(self, name: str, stats_func) -> None:
+        """
+        Report a component's in-memory state in get_system_stats().
+
+        Args:
+            name: Component name
+            stats_func: Callable returning a dict of sizes (entries, approx_bytes, ...)
+        """
+        with self._lock:
+            self._memory_sources[name] = stats_func
+
+    def register_circuit(self, name: str, stats_func) -> None:
+        """
+        Report a circuit breaker's state in get_latency_stats().
+
+        Args:
+            name: Breaker name
+            stats_func: Callable returning the breaker's state dict
+        """
+        with self._lock:
+            self._circuits[name] = stats_func
+
+    def record_latency(self, name: str, duration_ms: float, success: bool = True):
+        """
+        Add one call to a latency histogram.
+
+        Histograms are cumulative since startup with fixed buckets
+        (LATENCY_BUCKETS_MS), so they cost the same memory however many calls
+        are recorded.
+
+        Args:
+            name: Histogram name (e.g. 'ha.states')
+            duration_ms: Call duration in milliseconds
+            success: Whether the call succeeded
+        """
+        with self._lock:
+            histogram = self._latency.get(name)
+            if histogram is None:
+                histogram = self._latency[name] = {
+                    'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1),
+                    'count': 0, 'failures': 0, 'sum_ms': 0.0, 'max_ms': 0.0
+                }
+            index = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if duration_ms <= bound), len(LATENCY_BUCKETS_MS))
+            histogram['buckets'][index] += 1
+            histogram['count'] += 1
+            histogram['failures'] += 0 if success else 1
+            histogram['sum_ms'] += duration_ms
+            histogram['max_ms'] = max(histogram['max_ms'], duration_ms)
+
     def record_api_call(self, api_type: str, success: bool = True, duration_ms: Optional[float] = None):
         """Record an API call."""
         with self._lock:
@@ -213,10 +274,12 @@ class MetricsTracker:
             for api_type, calls in self._api_calls_by_type.items():
                 type_total = len(calls)
                 if type_total > 0:
+                    durations = [call['duration_ms'] for call in calls if call.get('duration_ms') is not None]
                     by_type[api_type] = {
                         'total': type_total,
                         'last_hour': self._count_recent(calls, 3600),
-                        'rate_per_minute': self._get_rate(calls, 3600)
+                        'rate_per_minute': self._get_rate(calls, 3600),
+                        'avg_duration_ms': round(sum(durations) / len(durations), 1) if durations else None
                     }
 
             return {
@@ -234,6 +297,47 @@ class MetricsTracker:
                 }
             }
 
+    def get_latency_stats(self) -> Dict[str, Any]:
+        """
+        Get latency histograms and circuit breaker states.
+
+        Percentiles are the upper bound of the bucket they fall in (the
+        maximum for the +Inf bucket).
+        """
+        with self._lock:
+            histograms = {name: dict(h, buckets=list(h['buckets'])) for name, h in self._latency.items()}
+            circuits = dict(self._circuits)
+
+        def _percentile(histogram, pct):
+            rank = histogram['count'] * pct / 100
+            seen = 0
+            for bound, count in zip(LATENCY_BUCKETS_MS, histogram['buckets']):
+                seen += count
+                if seen >= rank:
+                    return min(bound, round(histogram['max_ms'], 1))
+            return round(histogram['max_ms'], 1)
+
+        result = {}
+        for name, histogram in histograms.items():
+            labels = [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + ['+Inf']
+            result[name] = {
+                'count': histogram['count'],
+                'failures': histogram['failures'],
+                'avg_ms': round(histogram['sum_ms'] / histogram['count'], 1),
+                'p50_ms': _percentile(histogram, 50),
+                'p95_ms': _percentile(histogram, 95),
+                'max_ms': round(histogram['max_ms'], 1),
+                'buckets_ms': dict(zip(labels, histogram['buckets']))
+            }
+
+        circuit_states = {}
+        for name, stats_func in circuits.items():
+            try:
+                circuit_states[name] = stats_func()
+            except Exception as e:
+                circuit_states[name] = {'error': str(e)}
+        return {'histograms': result, 'circuits': circuit_states}
+
     def get_rating_stats(self) -> Dict[str, Any]:
         """Get rating operation statistics."""
         with self._lock:
@@ -338,9 +442,33 @@ class MetricsTracker:
                 'hours': round(uptime_hours, 2),
                 'days': round(uptime_days, 2)
             },
-            'start_time': datetime.fromtimestamp(self._start_time).isoformat()
+            'start_time': datetime.fromtimestamp(self._start_time).isoformat(),
+            'memory': self._get_memory_stats()
         }
 
+    def _get_memory_stats(self) -> Dict[str, Any]:
+        """Process memory (resident set size) and registered components' state sizes."""
+        memory: Dict[str, Any] = {'rss_bytes': None, 'peak_rss_bytes': None}
+        try:
+            # Linux (the add-on container): current and peak RSS in kB
+            with open('/proc/self/status') as status:
+                for line in status:
+                    if line.startswith('VmRSS:'):
+                        memory['rss_bytes'] = int(line.split()[1]) * 1024
+                    elif line.startswith('VmHWM:'):
+                        memory['peak_rss_bytes'] = int(line.split()[1]) * 1024
+        except (OSError, ValueError, IndexError):
+            pass
+
+        with self._lock:
+            sources = dict(self._memory_sources)
+        for name, stats_func in sources.items():
+            try:
+                memory[name] = stats_func()
+            except Exception as e:
+                memory[name] = {'error': str(e)}
+        return memory
+
     def get_all_metrics(self) -> Dict[str, Any]:
         """Get all metrics in a single call with error resilience."""
         result = {'timestamp': datetime.now().isoformat()}
@@ -349,6 +477,7 @@ class MetricsTracker:
         metric_methods = [
             ('cache', self.get_cache_stats),
             ('api', self.get_api_stats),
+            ('latency', self.get_latency_stats),
             ('ratings', self.get_rating_stats),
             ('search', self.get_search_stats),
             ('retry', self.get_retry_stats),
@@ -0,0 +1,174 @@
+"""
+Scrobble-style playback sessions for the song tracker.
+
+A session follows one track on one media player, from the first state that
+shows it until a different track (or nothing) is on that player. Listening
+time is the time the player spent in the 'playing' state: pausing stops the
+clock, and seeking neither adds nor removes time. Seeks (position jumps that
+don't match the elapsed time) are counted, and a jump back to the start of a
+track that has already counted is a repeat: the session ends and a new one
+starts for the same track.
+
+A session counts as a play once its listening time reaches half the track's
+duration or SCROBBLE_MAX_SECONDS, whichever is shorter - the rule scrobblers
+use. A session replaced by a different track before that is a skip; one that
+ends because the player stopped, went idle or turned off is neither.
+
+Sessions only need the state objects the tracker already receives, so they
+work the same for polled and pushed (WebSocket) states: the time between two
+states is credited when the second one arrives, up to the end of the track.
+"""
+from typing import Optional, Dict, Any, Tuple
+
+from homeassistant_api import MEDIA_SIGNATURE_ATTRIBUTES, current_position
+
+# A track counts as played after this fraction of its duration...
+SCROBBLE_MIN_FRACTION = 0.5
+
+# ...or after this long, whichever comes first (also used without a duration)
+SCROBBLE_MAX_SECONDS = 240
+
+# Position differences up to this much are drift, not a seek
+SEEK_TOLERANCE_SECONDS = 10
+
+# Player states a session continues through (others end it)
+SESSION_STATES = ('playing', 'paused', 'buffering')
+
+PLAY = 'play'
+SKIP = 'skip'
+
+
+def track_key(state: Optional[Dict[str, Any]]) -> Optional[Tuple]:
+    """
+    Identify the track in a media player state.
+
+    Args:
+        state: Media player state object
+
+    Returns:
+        Tuple of the identifying attributes (see MEDIA_SIGNATURE_ATTRIBUTES),
+        or None if the player is not playing or paused on a titled track
+    """
+    if not state or state.get('state') not in SESSION_STATES:
+        return None
+    attributes = state.get('attributes') or {}
+    if not attributes.get('media_title'):
+        return None
+    return tuple(attributes.get(key) for key in MEDIA_SIGNATURE_ATTRIBUTES)
+
+
+def state_position(state: Dict[str, Any]) -> Optional[float]:
+    """Playback position of a state (extrapolated to now while playing)."""
+    attributes = state.get('attributes') or {}
+    if state.get('state') == 'playing':
+        return current_position(attributes)
+    return attributes.get('media_position')
+
+
+class PlaybackSession:
+    """Listening progress of one track on one media player."""
+
+    def __init__(
+        self,
+        track: Tuple,
+        duration: Optional[float],
+        playing: bool,
+        position: Optional[float],
+        now: float,
+        joined_late: bool = False
+    ) -> None:
+        """
+        Start a session.
+
+        Args:
+            track: Track identity, from track_key()
+            duration: Track duration in seconds (None if unknown)
+            playing: Whether the player is playing (rather than paused or buffering)
+            position: Playback position in seconds (None if unknown)
+            now: Current monotonic time
+            joined_late: The track was already playing before the tracker saw the
+                player (startup), so the position so far counts as listened
+        """
+        self.track = track
+        self.duration = duration or None
+        self.playing = playing
+        self.position = position
+        self.started = now
+        self.updated = now
+        self.listened = 0.0
+        self.seeks = 0
+        self.committed = False
+        self.media: Optional[Dict[str, Any]] = None  # parsed media, set by the tracker
+        if joined_late and position:
+            self.listened = min(position, self.duration or position)
+
+    @property
+    def threshold(self) -> float:
+        """Listening time after which the session counts as a play."""
+        if not self.duration:
+            return SCROBBLE_MAX_SECONDS
+        return min(self.duration * SCROBBLE_MIN_FRACTION, SCROBBLE_MAX_SECONDS)
+
+    @property
+    def reached(self) -> bool:
+        """Whether the listening time so far counts as a play."""
+        return self.listened >= self.threshold
+
+    def advance(self, playing: bool, position: Optional[float], now: float) -> bool:
+        """
+        Credit the time since the last state and apply a new state of the same track.
+
+        Args:
+            playing: Whether the player is playing
+            position: Playback position in seconds (None if unknown)
+            now: Current monotonic time
+
+        Returns:
+            True if the track restarted after it had counted (a repeat); the
+            caller ends this session and starts a new one
+        """
+        elapsed = self._credit(now)
+        restarted = False
+        if position is not None and self.position is not None:
+            expected = self.position + (elapsed if self.playing else 0.0)
+            if abs(position - expected) > SEEK_TOLERANCE_SECONDS:
+                if position <= SEEK_TOLERANCE_SECONDS and self.reached:
+                    restarted = True
+                else:
+                    self.seeks += 1
+
+        self.playing = playing
+        self.position = position
+        return restarted
+
+    def finish(self, now: float, replaced: bool) -> Optional[str]:
+        """
+        End the session.
+
+        Args:
+            now: Current monotonic time
+            replaced: A different track started on the player (rather than
+                the player stopping)
+
+        Returns:
+            PLAY if it counts and was not committed yet, SKIP if it was replaced
+            before it counted, otherwise None
+        """
+        self._credit(now)
+        self.playing = False
+        if self.committed:
+            return None
+        if self.reached:
+            return PLAY
+        return SKIP if replaced else None
+
+    def _credit(self, now: float) -> float:
+        """Add the time since the last state while playing, up to the end of the track."""
+        elapsed = max(0.0, now - self.updated)
+        self.updated = now
+        if self.playing:
+            credit = elapsed
+            if self.duration and self.position is not None:
+                credit = min(credit, max(0.0, self.duration - self.position))
+            self.listened += credit
+        return elapsed
@@ -19,7 +19,15 @@ from database import get_database
 logger = LoggingHelper.get_logger(LogType.MAIN)
 from youtube_api import get_youtube_api, set_database as set_youtube_api_database
 from helpers.time_helpers import get_next_quota_reset_time
-from helpers.api_helpers import check_quota_recently_exceeded
+from helpers.api_helpers import check_quota_recently_exceeded, check_credential_quota_exceeded
+from metadata_refresher import MetadataRefresher
+from rating_reconciler import RatingReconciler
+from quota_forecast import QuotaForecaster
+from helpers.debug_record_helpers import DEBUG_RECORD_RETENTION_DAYS
+from database.queue_operations import (
+    RATING_PRIORITY, SEARCH_PRIORITY, DEFERRABLE_SEARCH_PRIORITY, PREFETCH_SEARCH_PRIORITY
+)
+from youtube_api.auth import PRIMARY_CREDENTIAL
 from quota_error import (
     QuotaExceededError,
     VideoNotFoundError,
@@ -32,6 +40,15 @@ from quota_error import (
 # Global flag for graceful shutdown
 running = True
 
+# Batches videos.getRating for pending ratings (created on first rating item)
+_rating_reconciler = None
+
+# Decides whether first-play searches fit in today's quota (created on first claim)
+_quota_forecaster = None
+
+# How often idle time is used to prune expired search debug records
+DEBUG_RECORD_PRUNE_INTERVAL_SECONDS = 6 * 3600
+
 
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully."""
@@ -49,14 +66,50 @@ def signal_handler(signum, frame):
         logger.warning(f"Failed to remove PID file: {e}")
 
 
+def _get_rating_reconciler(db):
+    """Get the rating reconciler for this database (created on first use)."""
+    global _rating_reconciler
+    if _rating_reconciler is None or _rating_reconciler.db is not db:
+        _rating_reconciler = RatingReconciler(db)
+    return _rating_reconciler
+
+
+def _get_quota_forecaster(db):
+    """Get the quota forecaster for this database (created on first use)."""
+    global _quota_forecaster
+    if _quota_forecaster is None or _quota_forecaster.db is not db:
+        _quota_forecaster = QuotaForecaster(db)
+    return _quota_forecaster
+
+
+def _already_rated(db, yt_api, video_id, rating, existing_video):
+    """
+    Check whether a video already has this rating on YouTube.
+
+    Verifies with videos.getRating (1 unit, batched with up to 49 other pending
+    ratings) rather than trusting the local rating column, which can drift.
+    Falls back to the local rating if the remote rating cannot be fetched.
+    """
+    remote_rating = _get_rating_reconciler(db).remote_rating(yt_api, video_id)
+    if remote_rating is not None:
+        return remote_rating == rating
+    return bool(existing_video) and existing_video.get('rating') == rating
+
+
 def process_next_item(db, yt_api, max_attempts=5):
     """
     Process the next item from the unified queue (rating or search).
-    The queue automatically prioritizes ratings (priority=1) over searches (priority=2).
+    The queue automatically prioritizes ratings (priority=1) over searches (priority=2),
+    first-play searches (priority=3) and lookahead searches (priority=4). First-play
+    searches are held back while the quota forecast says the rest of the day's budget
+    is needed for higher-value items; lookahead searches only run with budget to spare.
 
     Returns:
         'success': Processed an item
         'empty': Queue is empty
+        'deferred': Only items that are held back are pending (first-play or lookahead
+                    searches the forecast defers, or ratings while the rating account
+                    is out of quota)
         'quota': Quota exceeded during processing
         'quota_recent': Quota exceeded recently (no attempt made)
         'paused': Queue is paused
@@ -81,8 +134,24 @@ def process_next_item(db, yt_api, max_attempts=5):
         pending_count = cursor.fetchone()[0]
         logger.debug(f"Queue stats before claim: {pending_count} pending items")
 
+    # Quota admission control: skip first-play searches when the budget can't cover them,
+    # and lookahead searches unless there is budget to spare after those
+    forecaster = _get_quota_forecaster(db)
+    if forecaster.admits_prefetch():
+        max_priority = PREFETCH_SEARCH_PRIORITY
+    elif forecaster.admits_first_plays():
+        max_priority = DEFERRABLE_SEARCH_PRIORITY
+    else:
+        max_priority = SEARCH_PRIORITY
+
+    # Ratings are pinned to the primary credential; other credentials can still search
+    min_priority = SEARCH_PRIORITY if check_credential_quota_exceeded(db, PRIMARY_CREDENTIAL) else RATING_PRIORITY
+
     # Claim next item from unified queue (v5.19.8: with max attempts check)
-    item = db.claim_next_queue_item(max_attempts=max_attempts)
+    item = db.claim_next_queue_item(max_attempts=max_attempts, max_priority=max_priority, min_priority=min_priority)
+    if not item and (max_priority < PREFETCH_SEARCH_PRIORITY or min_priority != RATING_PRIORITY) and pending_count > 0:
+        logger.debug(f"Holding back {pending_count} pending items until quota reset")
+        return 'deferred'
     if not item:
         # This should never happen if pending_count > 0
         if pending_count > 0:
@@ -110,18 +179,22 @@ def process_next_item(db, yt_api, max_attempts=5):
                 # v5.0.0: Check if already rated with same rating
                 # This moves the "already rated" check from rating endpoint to queue worker
                 existing_video = db.get_video(video_id)
-                if existing_video and existing_video.get('rating') == rating:
-                    # Already rated with same rating - just increment score locally
-                    # No need to call YouTube API (it's idempotent anyway)
+                unavailable_reason = (existing_video or {}).get('yt_unavailable_reason')
+                if unavailable_reason:
+                    # Flagged by the metadata refresher - videos.rate would fail and cost 50 units
+                    error_msg = f"Video unavailable on YouTube ({unavailable_reason}): {video_id}"
+                    logger.warning(f"✗ {error_msg} - not rating")
+                    db.mark_queue_item_failed(queue_id, error_msg)
+                elif _already_rated(db, yt_api, video_id, rating, existing_video):
+                    # Already rated with same rating on YouTube - just increment score locally
                     db.record_rating(video_id, rating)
                     db.mark_queue_item_completed(queue_id)
                     logger.info(f"✓ Already rated as {rating}, incremented score for {video_id}")
                 else:
                     # New rating or changing rating - submit to YouTube
-                    # YouTube API is idempotent - rating with same rating doesn't change anything
-                    # This saves quota by not checking current rating first (1 unit saved per rating)
                     success = yt_api.set_video_rating(video_id, rating)
                     if success:
+                        _get_rating_reconciler(db).record_rating(video_id, rating)
                         db.record_rating(video_id, rating)
                         db.mark_queue_item_completed(queue_id)
                         logger.info(f"✓ Successfully rated {video_id} as {rating}")
@@ -140,6 +213,7 @@ def process_next_item(db, yt_api, max_attempts=5):
                 error_msg = f"Video not found: {video_id}"
                 logger.warning(f"✗ {error_msg} - marking as permanently failed")
                 db.mark_queue_item_failed(queue_id, error_msg)
+                db.mark_video_unavailable(video_id, 'not_found')
                 # Don't return quota error - continue processing
 
             except AuthenticationError as e:
@@ -205,7 +279,6 @@ def process_next_item(db, yt_api, max_attempts=5):
             from helpers.cache_helpers import find_cached_video
             from helpers.search_helpers import search_and_match_video
             from helpers.video_helpers import prepare_video_upsert
-            import json
 
             video = find_cached_video(db, ha_media)
             api_debug_data = None
@@ -221,9 +294,6 @@ def process_next_item(db, yt_api, max_attempts=5):
                 result = search_and_match_video(ha_media, yt_api, db, return_api_response=True)
                 video, api_debug_data = result if result else (None, None)
 
-            # Serialize API debug data for storage
-            api_response_json = json.dumps(api_debug_data) if api_debug_data else None
-
             if video and video.get('yt_video_id'):
                 video_id = video['yt_video_id']
 
@@ -236,11 +306,15 @@ def process_next_item(db, yt_api, max_attempts=5):
 
                     # v4.0.33: Record play for newly matched videos (they were playing when search was queued)
                     # This fixes issue #68 - newly added videos showing play_count=0
-                    db.record_play(video_id)
-                    logger.debug(f"  → Recorded play for {video_id} (play_count incremented)")
+                    # Lookahead searches ran before the song played, so there is no play yet
+                    if payload.get('prefetch'):
+                        logger.debug(f"  → Pre-resolved upcoming song as {video_id} (no play recorded)")
+                    else:
+                        db.record_play(video_id, source='queue_search')
+                        logger.debug(f"  → Recorded play for {video_id} (play_count incremented)")
                 except Exception as e:
                     logger.error(f"  ✗ Failed to add video {video_id} to database: {e}")
-                    db.mark_queue_item_failed(queue_id, f"Failed to add to database: {str(e)}", api_response_json)
+                    db.mark_queue_item_failed(queue_id, f"Failed to add to database: {str(e)}", api_debug_data)
                     return 'success'  # Continue processing other items
 
                 # If there's a callback rating, enqueue it
@@ -250,9 +324,9 @@ def process_next_item(db, yt_api, max_attempts=5):
                     logger.info(f"  → Enqueued {callback_rating} rating for {video_id}")
                     logger.debug(f"Added rating to queue for {video_id}")
 
-                db.mark_queue_item_completed(queue_id, api_response_json)
+                db.mark_queue_item_completed(queue_id, api_debug_data)
             else:
-                db.mark_queue_item_failed(queue_id, "No matching video found", api_response_json)
+                db.mark_queue_item_failed(queue_id, "No matching video found", api_debug_data)
                 logger.warning(f"✗ No video found for '{title}'")
 
         else:
@@ -322,7 +396,7 @@ def main():
 
     # v5.19.8: Get max retry attempts from environment (default 5)
     max_attempts = int(os.environ.get('QUEUE_MAX_RETRY_ATTEMPTS', '5'))
-    logger.info(f"Queue worker starting (1 item/min, ratings priority=1, searches priority=2, max attempts={max_attempts})")
+    logger.info(f"Queue worker starting (1 item/min, ratings priority=1, searches priority=2, first-play searches priority=3, max attempts={max_attempts})")
 
     # Initialize database
     db = get_database()
@@ -341,9 +415,15 @@ def main():
     # Only the main app should authenticate during startup checks
     yt_api = None
 
+    # Refreshes stale video metadata when the queue is idle
+    metadata_refresher = MetadataRefresher(db)
+
     # Track pause state to log only once when it changes
     was_paused = False
 
+    # Monotonic time of the last debug record prune (0 = prune on first idle pass)
+    last_debug_prune = 0.0
+
     while running:
         try:
             # Check if queue is paused FIRST - don't process anything if paused
@@ -393,6 +473,12 @@ def main():
             # Process next item from unified queue (automatically prioritized)
             result = process_next_item(db, yt_api, max_attempts)
 
+            if result == 'quota' and not check_quota_recently_exceeded(db):
+                # Only one credential ran out - the rest of the pool can keep working
+                logger.info("Quota exceeded on one credential - continuing with the rest of the pool")
+                time.sleep(60)
+                continue
+
             if result == 'quota' or result == 'quota_recent':
                 # Quota exceeded - sleep until midnight Pacific (quota reset time)
                 next_reset = get_next_quota_reset_time()
@@ -421,7 +507,24 @@ def main():
                 time.sleep(60)
                 continue
 
-            elif result == 'empty':
+            elif result == 'empty' or result == 'deferred':
+                # Queue is idle - use it to refresh stale video metadata (1 unit per 50 videos)
+                if metadata_refresher.due():
+                    try:
+                        metadata_refresher.run(yt_api)
+                    except Exception as e:
+                        LoggingHelper.log_error_with_trace("Metadata refresh failed", e)
+
+                # Drop search debug records past their retention window
+                if time.monotonic() - last_debug_prune >= DEBUG_RECORD_PRUNE_INTERVAL_SECONDS:
+                    last_debug_prune = time.monotonic()
+                    try:
+                        pruned = db.prune_queue_debug_records(DEBUG_RECORD_RETENTION_DAYS)
+                        if pruned:
+                            logger.info(f"Pruned {pruned} search debug records older than {DEBUG_RECORD_RETENTION_DAYS} days")
+                    except Exception as e:
+                        LoggingHelper.log_error_with_trace("Debug record prune failed", e)
+
                 # Queue is empty, sleep 60 seconds
                 logger.debug("Queue empty, sleeping 60 seconds")
                 time.sleep(60)
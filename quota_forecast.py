@@ -0,0 +1,177 @@
+"""
+Projects end-of-day quota consumption and decides which searches to admit.
+
+Without a forecast the queue attempts searches in FIFO order until YouTube
+rejects one with quotaExceeded, by which point the remaining budget may have
+gone to songs played once while rating callbacks wait for the next day.
+
+The forecast adds up the quota already used this Pacific day, the cost of
+everything pending in the queue, and the expected consumption until reset.
+Expected consumption is the larger of two estimates: historical usage for the
+remaining clock hours (api_usage averages) and recent queue arrival rates
+priced with the quota cost model. Pending ratings, pending high-value searches
+(rating callbacks, repeat plays) and expected consumption are reserved first;
+first-play searches are only admitted while the rest of the budget covers them.
+Lookahead searches (songs expected to play next) only run when the budget is
+left over after every pending first-play search too.
+Deferred searches stay pending and run after the quota resets.
+"""
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from logging_helper import LoggingHelper, LogType
+from error_handler import validate_environment_variable
+from helpers.time_helpers import get_next_quota_reset_time
+from youtube_api.quota_manager import get_quota_usage, quota_cost
+
+# Get logger instance
+logger = LoggingHelper.get_logger(LogType.MAIN)
+
+# Days of history used for hourly usage and queue arrival rates
+FORECAST_HISTORY_DAYS = validate_environment_variable(
+    'YTT_QUOTA_FORECAST_DAYS',
+    default=7,
+    converter=int,
+    validator=lambda x: 1 <= x <= 30
+)
+
+# How long a computed forecast is reused
+FORECAST_TTL_SECONDS = 60
+
+# Quota cost of processing one queue item (a search also resolves durations with videos.list)
+SEARCH_ITEM_COST = quota_cost('search') + quota_cost('videos.list')
+RATING_ITEM_COST = quota_cost('videos.rate')
+
+
+def _usage_until(now: datetime, reset_at: datetime, hourly_averages: List[float]) -> float:
+    """Sum historical average usage over the UTC clock hours between now and reset."""
+    expected = 0.0
+    cursor = now
+    while cursor < reset_at:
+        hour_end = cursor.replace(minute=0, second=0, microsecond=0).timestamp() + 3600
+        step = min(hour_end, reset_at.timestamp()) - cursor.timestamp()
+        expected += hourly_averages[cursor.hour] * step / 3600
+        cursor = datetime.fromtimestamp(cursor.timestamp() + step, tz=timezone.utc)
+    return expected
+
+
+def forecast_quota(
+    usage: Dict[str, Any],
+    pending: Dict[str, int],
+    hourly_averages: List[float],
+    arrival_rates: Dict[str, float],
+    now: datetime,
+    reset_at: datetime
+) -> Dict[str, Any]:
+    """
+    Project end-of-day quota consumption and the searches it leaves room for.
+
+    Args:
+        usage: Quota usage for the current quota day (from get_quota_usage)
+        pending: Pending ratings, searches, deferrable_searches and prefetch_searches
+            (from get_queue_pending_demand)
+        hourly_averages: Average units per UTC hour (from get_api_hourly_averages)
+        arrival_rates: Ratings and searches arriving per hour (from get_queue_arrival_rates)
+        now: Current time (UTC, timezone-aware)
+        reset_at: Next quota reset (UTC, timezone-aware)
+
+    Returns:
+        Dict with the projection, the reserved budget and the admission decision
+    """
+    hours_left = max(0.0, (reset_at - now).total_seconds() / 3600)
+
+    historical = _usage_until(now, reset_at, hourly_averages)
+    arrivals = hours_left * (
+        arrival_rates.get('ratings', 0) * RATING_ITEM_COST +
+        arrival_rates.get('searches', 0) * SEARCH_ITEM_COST
+    )
+    expected_future = max(historical, arrivals)
+
+    pending_priority = pending['ratings'] * RATING_ITEM_COST + pending['searches'] * SEARCH_ITEM_COST
+    pending_deferrable = pending['deferrable_searches'] * SEARCH_ITEM_COST
+    projected = usage['used'] + pending_priority + pending_deferrable + expected_future
+
+    reserved = pending_priority + expected_future
+    affordable_searches = max(0, int((usage['remaining'] - reserved) // SEARCH_ITEM_COST))
+    deferring = pending['deferrable_searches'] > 0 and affordable_searches < pending['deferrable_searches']
+
+    return {
+        'quota_day': usage['quota_day'],
+        'used': usage['used'],
+        'limit': usage['limit'],
+        'remaining': usage['remaining'],
+        'hours_left': round(hours_left, 1),
+        'expected_historical': round(historical),
+        'expected_arrivals': round(arrivals),
+        'pending_ratings': pending['ratings'],
+        'pending_searches': pending['searches'],
+        'deferrable_searches': pending['deferrable_searches'],
+        'pending_units': pending_priority + pending_deferrable,
+        'projected': round(projected),
+        'projected_percent': round(projected / usage['limit'] * 100, 1),
+        'shortfall': max(0, round(projected - usage['limit'])),
+        'reserved': round(reserved),
+        'affordable_searches': affordable_searches,
+        'admit_first_plays': affordable_searches > 0,
+        'deferring': deferring,
+        'deferred_searches': max(0, pending['deferrable_searches'] - affordable_searches) if deferring else 0,
+        'prefetch_searches': pending.get('prefetch_searches', 0),
+        'admit_prefetch': affordable_searches > pending['deferrable_searches'],
+        'resets_at': reset_at
+    }
+
+
+class QuotaForecaster:
+    """Caches the quota forecast and answers admission questions for the queue worker."""
+
+    def __init__(self, db, ttl_seconds: int = FORECAST_TTL_SECONDS):
+        """
+        Initialize quota forecaster.
+
+        Args:
+            db: Database instance
+            ttl_seconds: How long a computed forecast is reused
+        """
+        self.db = db
+        self.ttl_seconds = ttl_seconds
+        self._forecast: Optional[Dict[str, Any]] = None
+        self._computed_at = 0.0
+
+    def forecast(self, refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get the current quota forecast (recomputed at most once per TTL).
+
+        Args:
+            refresh: Recompute even if the cached forecast is still fresh
+
+        Returns:
+            Same dict as forecast_quota()
+        """
+        if not refresh and self._forecast and time.monotonic() - self._computed_at < self.ttl_seconds:
+            return self._forecast
+
+        self._forecast = forecast_quota(
+            get_quota_usage(self.db),
+            self.db.get_queue_pending_demand(),
+            self.db.get_api_hourly_averages(FORECAST_HISTORY_DAYS),
+            self.db.get_queue_arrival_rates(FORECAST_HISTORY_DAYS * 24),
+            datetime.now(timezone.utc),
+            get_next_quota_reset_time()
+        )
+        self._computed_at = time.monotonic()
+        return self._forecast
+
+    def admits_first_plays(self) -> bool:
+        """Whether the budget left after reservations covers another first-play search."""
+        forecast = self.forecast()
+        if not forecast['admit_first_plays'] and forecast['deferrable_searches']:
+            logger.debug(
+                f"Quota forecast: deferring {forecast['deferrable_searches']} first-play searches "
+                f"(projected {forecast['projected']}/{forecast['limit']}, {forecast['reserved']} reserved)"
+            )
+        return forecast['admit_first_plays']
+
+    def admits_prefetch(self) -> bool:
+        """Whether the budget also covers a lookahead search after every pending first play."""
+        return self.forecast()['admit_prefetch']
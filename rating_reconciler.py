@@ -0,0 +1,140 @@
+"""
+Verifies current YouTube ratings in bulk before spending quota on videos.rate.
+
+videos.rate costs 50 units, videos.getRating costs 1 unit for up to 50 IDs.
+Ratings made on YouTube directly, or local state lost in a DB restore, make
+the local rating column wrong, so instead of trusting it the queue worker
+asks the reconciler for the remote rating. The reconciler fetches it for the
+item being processed plus up to 49 other pending rating items in one call,
+completes the pending items whose remote rating already matches, and syncs
+the local rating for rows that drifted. Only the newest pending item of each
+video counts; older ones are completed as superseded so they can never be
+applied after it.
+"""
+import time
+from typing import Dict, Optional, Tuple
+
+from logging_helper import LoggingHelper, LogType
+from quota_error import QuotaExceededError
+
+# Get logger instance
+logger = LoggingHelper.get_logger(LogType.MAIN)
+
+# videos.getRating accepts at most 50 IDs per request
+MAX_IDS_PER_CALL = 50
+
+# How long a fetched remote rating is trusted
+REMOTE_RATING_TTL_SECONDS = 600
+
+
+class RatingReconciler:
+    """Batches videos.getRating for pending rating queue items."""
+
+    def __init__(self, db, ttl_seconds: int = REMOTE_RATING_TTL_SECONDS):
+        """
+        Initialize rating reconciler.
+
+        Args:
+            db: Database instance
+            ttl_seconds: How long a fetched remote rating is trusted
+        """
+        self.db = db
+        self.ttl_seconds = ttl_seconds
+        self._remote: Dict[str, Tuple[str, float]] = {}
+
+    def _remember(self, yt_video_id: str, rating: str, now: float) -> None:
+        """Store a remote rating and evict entries older than the TTL."""
+        # Re-insert so the dict stays ordered by fetch time and expired entries sit at the front
+        self._remote.pop(yt_video_id, None)
+        self._remote[yt_video_id] = (rating, now)
+        for video_id, (_, fetched_at) in list(self._remote.items()):
+            if now - fetched_at < self.ttl_seconds:
+                break
+            del self._remote[video_id]
+
+    def remote_rating(self, yt_api, yt_video_id: str) -> Optional[str]:
+        """
+        Get the current YouTube rating for a video, reconciling pending items on a miss.
+
+        Args:
+            yt_api: YouTube API instance
+            yt_video_id: Video being rated
+
+        Returns:
+            'like', 'dislike' or 'none', or None if it could not be verified
+
+        Raises:
+            QuotaExceededError: If quota ran out during the getRating call
+        """
+        cached = self._remote.get(yt_video_id)
+        if cached and time.monotonic() - cached[1] < self.ttl_seconds:
+            return cached[0]
+
+        self.reconcile(yt_api, yt_video_id)
+        cached = self._remote.get(yt_video_id)
+        return cached[0] if cached else None
+
+    def record_rating(self, yt_video_id: str, rating: str) -> None:
+        """Remember a rating just applied via videos.rate."""
+        self._remember(yt_video_id, rating, time.monotonic())
+
+    def reconcile(self, yt_api, yt_video_id: str) -> Dict[str, int]:
+        """
+        Fetch remote ratings for a video plus pending rating items (one getRating call).
+
+        Args:
+            yt_api: YouTube API instance
+            yt_video_id: Video being rated (always included)
+
+        Returns:
+            Dict with checked, completed, superseded and drifted counts
+        """
+        # Pending items come oldest first, so the last item seen for a video is its newest
+        newest: Dict[str, Dict] = {}
+        superseded = 0
+        for item in self.db.list_pending_rating_items(limit=MAX_IDS_PER_CALL * 2):
+            video_id = item['payload'].get('yt_video_id')
+            if not video_id:
+                continue
+            older = newest.get(video_id)
+            if older:
+                logger.info(f"Rating #{older['id']} for {video_id} superseded by #{item['id']} - skipping")
+                self.db.mark_queue_item_completed(older['id'])
+                superseded += 1
+            newest[video_id] = item
+
+        video_ids = list(dict.fromkeys([yt_video_id] + list(newest)))[:MAX_IDS_PER_CALL]
+
+        result = yt_api.get_ratings_bulk(video_ids)
+        if result['quota_exceeded']:
+            raise QuotaExceededError("YouTube API quota exceeded")
+
+        now = time.monotonic()
+        drifted = 0
+        for video_id, remote in result['ratings'].items():
+            self._remember(video_id, remote, now)
+            video = self.db.get_video(video_id)
+            if video and (video.get('rating') or 'none') != remote:
+                logger.info(f"Rating drift for {video_id}: local '{video.get('rating')}', YouTube '{remote}' - syncing")
+                self.db.record_rating_local(video_id, remote)
+                drifted += 1
+
+        completed = 0
+        for video_id, item in newest.items():
+            rating = item['payload'].get('rating')
+            if video_id != yt_video_id and result['ratings'].get(video_id) == rating:
+                self.db.record_rating(video_id, rating)
+                self.db.mark_queue_item_completed(item['id'])
+                completed += 1
+
+        if completed or superseded or drifted:
+            logger.info(
+                f"Rating reconcile: {len(result['ratings'])} checked, "
+                f"{completed} pending ratings already on YouTube, {superseded} superseded, {drifted} drifted"
+            )
+        return {
+            'checked': len(result['ratings']),
+            'completed': completed,
+            'superseded': superseded,
+            'drifted': drifted
+        }
@@ -0,0 +1,448 @@
+"""
+One-time import of play history from the Home Assistant recorder database.
+
+A new install starts with an empty video_ratings, while the recorder
+(home-assistant_v2.db) may already hold months of media player states. When
+RECORDER_IMPORT_PATH points at a copy of that file, this job reads the
+states of the configured media players straight from SQLite (no REST history
+calls), oldest first and in batches, and replays them through the same
+playback sessions the song tracker uses (playback_session.py), so a play is
+only counted where the live tracker would have counted one.
+
+Plays are grouped by content hash, so each distinct song is resolved once,
+against the local database only. Plays of matched songs are deduplicated -
+within the play throttle window on the same player, against play events
+already logged for the video, and against plays an install older than the
+event log only counted (up to the video's 'migrated' event) - and written in
+bulk with their rollups. Songs
+that are not matched yet are queued as lookahead searches, most played first,
+so they only use spare quota.
+
+The import runs in a background thread and logs its progress. A completed
+import is remembered by the file's size and modification time, so it is not
+repeated on every restart.
+"""
+import bisect
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+
+from logging_helper import LoggingHelper, LogType
+from error_handler import validate_environment_variable
+from database.connection import DEFAULT_DB_PATH
+from playback_session import PlaybackSession, PLAY, track_key
+
+# Get logger instance
+logger = LoggingHelper.get_logger(LogType.MAIN)
+
+# Unmatched songs queued for a YouTube search per import (most played first)
+MAX_SEARCHES = validate_environment_variable(
+    'RECORDER_IMPORT_MAX_SEARCHES',
+    default=200,
+    converter=int,
+    validator=lambda x: 0 <= x <= 5000
+)
+
+# Recorder rows fetched per batch
+READ_BATCH_ROWS = 5000
+
+# Seconds between progress log lines
+PROGRESS_SECONDS = 10
+
+# play_events.source of imported plays
+IMPORT_SOURCE = 'recorder_import'
+
+# Completed imports (file identity and report)
+STATE_FILE = DEFAULT_DB_PATH.parent / 'recorder_import.json'
+
+
+def _timestamp(value) -> Optional[float]:
+    """Epoch seconds of a recorder timestamp (last_updated_ts, or a naive UTC last_updated string)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value)).replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+
+def _position_at(attributes: Dict[str, Any], playing: bool, at: float) -> Optional[float]:
+    """Playback position at the time of a recorded state (extrapolated while playing)."""
+    position = attributes.get('media_position')
+    updated_at = attributes.get('media_position_updated_at')
+    if position is None or not playing or not isinstance(updated_at, str):
+        return position
+    try:
+        elapsed = at - datetime.fromisoformat(updated_at.replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return position
+    return position + max(0.0, elapsed)
+
+
+def _media(attributes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Media dict (as HomeAssistantAPI.media_from_state returns) of a YouTube track, or None."""
+    title = attributes.get('media_title')
+    app_name = attributes.get('app_name')
+    if not title or not attributes.get('media_duration') or not app_name or 'youtube' not in app_name.lower():
+        return None
+    return {
+        'title': title,
+        'artist': attributes.get('media_artist') or 'Unknown',
+        'album': attributes.get('media_album_name'),
+        'content_id': attributes.get('media_content_id'),
+        'app_name': app_name,
+        'duration': attributes.get('media_duration')
+    }
+
+
+def _file_identity(path: Path) -> Dict[str, Any]:
+    stat = path.stat()
+    return {'path': str(path), 'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+
+class RecorderStates:
+    """
+    Streams media player states from a recorder database.
+
+    Supports the recorder schemas since attributes moved to state_attributes
+    and entity IDs to states_meta, as well as older files that keep both
+    inline in states.
+    """
+
+    def __init__(self, path: Path, entities: List[str]) -> None:
+        self.path = path
+        self.entities = entities
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._conn.execute("PRAGMA query_only = ON")
+        self._conn.execute("PRAGMA cache_size = -65536")  # 64 MB
+        self._query, self._params, self._count_query, self._names = self._build_query()
+
+    def _build_query(self) -> Tuple[str, Tuple, str, Dict[Any, str]]:
+        tables = {row[0] for row in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(states)")}
+        if 'states' not in tables:
+            raise ValueError(f"{self.path} is not a Home Assistant recorder database (no states table)")
+
+        if 'states_meta' in tables and 'metadata_id' in columns:
+            placeholders = ', '.join('?' * len(self.entities))
+            rows = self._conn.execute(
+                f"SELECT metadata_id, entity_id FROM states_meta WHERE entity_id IN ({placeholders})",
+                self.entities
+            ).fetchall()
+            names = {metadata_id: entity_id for metadata_id, entity_id in rows}
+            key = 's.metadata_id'
+        else:
+            names = {entity: entity for entity in self.entities}
+            key = 's.entity_id'
+
+        timestamp = 's.last_updated_ts' if 'last_updated_ts' in columns else 's.last_updated'
+        if 'state_attributes' in tables and 'attributes_id' in columns:
+            attributes = 'COALESCE(a.shared_attrs, s.attributes)' if 'attributes' in columns else 'a.shared_attrs'
+            join = 'LEFT JOIN state_attributes a ON a.attributes_id = s.attributes_id'
+            attributes_id = 's.attributes_id'
+        else:
+            attributes, join, attributes_id = 's.attributes', '', 'NULL'
+
+        placeholders = ', '.join('?' * max(len(names), 1))
+        where = f"{key} IN ({placeholders})"
+        params = tuple(names) or (None,)
+        query = f"""
+            SELECT {key}, {timestamp}, s.state, {attributes_id}, {attributes}
+            FROM states s {join}
+            WHERE {where}
+            ORDER BY {key}, {timestamp}, s.state_id
+        """
+        count_query = f"SELECT COUNT(*) FROM states s WHERE {where}"
+        return query, params, count_query, names
+
+    def count(self) -> int:
+        """Number of states of the configured media players."""
+        return self._conn.execute(self._count_query, self._params).fetchone()[0]
+
+    def __iter__(self) -> Iterator[Tuple[str, float, Dict[str, Any]]]:
+        """
+        Yield (entity, epoch seconds, state) per recorded state, each player's oldest first.
+
+        Attributes are only parsed for states a playback session can be in.
+        """
+        cursor = self._conn.execute(self._query, self._params)
+        previous_id, previous_attributes = None, {}
+        while True:
+            rows = cursor.fetchmany(READ_BATCH_ROWS)
+            if not rows:
+                break
+            for key, recorded_at, state, attributes_id, raw_attributes in rows:
+                at = _timestamp(recorded_at)
+                if at is None:
+                    continue
+                attributes = {}
+                if state in ('playing', 'paused', 'buffering') and raw_attributes:
+                    if attributes_id is not None and attributes_id == previous_id:
+                        attributes = previous_attributes
+                    else:
+                        try:
+                            attributes = json.loads(raw_attributes)
+                        except ValueError:
+                            attributes = {}
+                        previous_id, previous_attributes = attributes_id, attributes
+                yield self._names[key], at, {'state': state, 'attributes': attributes}
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class RecorderImporter:
+    """Imports plays from a Home Assistant recorder database in the background."""
+
+    def __init__(self, db, recorder_path: str, entities: List[str], state_file: Path = STATE_FILE,
+                 max_searches: int = MAX_SEARCHES):
+        """
+        Initialize the importer.
+
+        Args:
+            db: Database instance
+            recorder_path: Path of the recorder database (a copy of home-assistant_v2.db)
+            entities: Media player entity IDs to import
+            state_file: Where completed imports are remembered
+            max_searches: Unmatched songs to queue for a YouTube search
+        """
+        self.db = db
+        self.recorder_path = Path(recorder_path)
+        self.entities = entities
+        self.state_file = state_file
+        self.max_searches = max_searches
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        """Start the import in a background thread, unless this file was imported already."""
+        if not self.recorder_path.is_file():
+            logger.warning(f"Recorder import: {self.recorder_path} not found - skipping")
+            return
+        if self._already_imported():
+            logger.info(f"Recorder import: {self.recorder_path} was already imported - skipping")
+            return
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_logged, daemon=True)
+        self._thread.start()
+        logger.info(f"Recorder import started from {self.recorder_path}")
+
+    def stop(self):
+        """Stop a running import (plays written so far are kept)."""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+
+    def _run_logged(self):
+        try:
+            self.run()
+        except Exception as e:
+            logger.error(f"Recorder import failed: {e}", exc_info=True)
+
+    def run(self) -> Optional[Dict[str, Any]]:
+        """
+        Import the recorder database.
+
+        Returns:
+            Report of the import, or None if it was stopped before the end
+        """
+        start = time.perf_counter()
+        songs, report = self._read_sessions()
+        if songs is None:
+            return None
+
+        resolved, unresolved = self._resolve(songs)
+        report.update(self._write_plays(songs, resolved))
+        report.update(self._queue_searches(songs, unresolved))
+        report['songs'] = len(songs)
+        report['elapsed_s'] = round(time.perf_counter() - start, 1)
+
+        self.db.invalidate_stats_cache()
+        self._remember(report)
+        logger.info(
+            f"Recorder import finished in {report['elapsed_s']}s: {report['states']} states, "
+            f"{report['plays']} plays of {len(songs)} songs | {report['imported_plays']} plays imported "
+            f"({report['duplicate_plays']} already counted) | {report['unresolved_songs']} songs not matched yet, "
+            f"{report['searches_queued']} queued for search"
+        )
+        return report
+
+    def _read_sessions(self) -> Tuple[Optional[Dict[str, Dict[str, Any]]], Dict[str, Any]]:
+        """
+        Replay the recorded states through playback sessions.
+
+        Returns:
+            (songs, report): songs maps content hash -> {'media', 'plays': [(epoch, entity)]};
+            songs is None if the import was stopped
+        """
+        from helpers.video_helpers import get_content_hash
+
+        recorder = RecorderStates(self.recorder_path, self.entities)
+        songs: Dict[str, Dict[str, Any]] = {}
+        hashes: Dict[Tuple, str] = {}  # (title, duration, artist) -> content hash
+        report = {'states': 0, 'plays': 0}
+
+        def commit(session: PlaybackSession, entity: str):
+            session.committed = True
+            if not session.media:
+                return
+            media = session.media
+            key = (media['title'], media['duration'], media['artist'])
+            content_hash = hashes.get(key)
+            if content_hash is None:
+                content_hash = hashes[key] = get_content_hash(*key)
+            song = songs.setdefault(content_hash, {'media': media, 'plays': []})
+            song['plays'].append((session.started, entity))
+            report['plays'] += 1
+
+        try:
+            total = recorder.count()
+            logger.info(f"Recorder import: {total} states of {len(self.entities)} media players to read")
+            current_entity, session = None, None
+            last_log = time.monotonic()
+            for entity, at, state in recorder:
+                if entity != current_entity:
+                    if session is not None and session.finish(session.updated, replaced=False) == PLAY:
+                        commit(session, current_entity)
+                    current_entity, session = entity, None
+
+                report['states'] += 1
+                if report['states'] % READ_BATCH_ROWS == 0:
+                    if self._stop_event.is_set():
+                        logger.info("Recorder import stopped")
+                        return None, report
+                    if time.monotonic() - last_log >= PROGRESS_SECONDS:
+                        last_log = time.monotonic()
+                        percent = report['states'] * 100 // total if total else 100
+                        logger.info(
+                            f"Recorder import: {report['states']}/{total} states ({percent}%), "
+                            f"{report['plays']} plays of {len(songs)} songs"
+                        )
+
+                track = track_key(state)
+                if session is not None and track != session.track:
+                    if session.finish(at, replaced=track is not None) == PLAY:
+                        commit(session, entity)
+                    session = None
+                if track is None:
+                    continue
+
+                attributes = state['attributes']
+                playing = state['state'] == 'playing'
+                position = _position_at(attributes, playing, at)
+                if session is not None and session.advance(playing, position, at):
+                    session = None  # repeat of a track that already counted
+                if session is None:
+                    session = PlaybackSession(track, attributes.get('media_duration'), playing, position, now=at)
+                    session.media = _media(attributes)
+                if session.reached and not session.committed:
+                    commit(session, entity)
+
+            if session is not None and session.finish(session.updated, replaced=False) == PLAY:
+                commit(session, current_entity)
+        finally:
+            recorder.close()
+        return songs, report
+
+    def _resolve(self, songs: Dict[str, Dict[str, Any]]) -> Tuple[Dict[str, str], List[str]]:
+        """
+        Match songs against the local database (no YouTube calls).
+
+        Returns:
+            (content hash -> yt_video_id of matched songs, content hashes of unmatched songs)
+        """
+        from helpers.cache_helpers import find_cached_video
+
+        resolved, unresolved = {}, []
+        for content_hash, song in songs.items():
+            video = find_cached_video(self.db, song['media'])
+            if video and video.get('yt_video_id'):
+                resolved[content_hash] = video['yt_video_id']
+            else:
+                unresolved.append(content_hash)
+        return resolved, unresolved
+
+    def _write_plays(self, songs: Dict[str, Dict[str, Any]], resolved: Dict[str, str]) -> Dict[str, int]:
+        """
+        Write the plays of matched songs that are not counted yet.
+
+        A play is dropped if the same video already counted on the same player
+        within the play throttle window, or if a play of the video within that
+        window is already logged (earlier imports, the live tracker). Plays at
+        or before a video's 'migrated' event are dropped too: installs older
+        than the event log only counted those in play_count.
+        """
+        from song_tracker import PLAY_THROTTLE
+
+        window = PLAY_THROTTLE.total_seconds()
+        plays: List[Tuple[float, str, str]] = sorted(
+            (at, yt_video_id, entity)
+            for content_hash, yt_video_id in resolved.items()
+            for at, entity in songs[content_hash]['plays']
+        )
+        if not plays:
+            return {'imported_plays': 0, 'duplicate_plays': 0}
+
+        def utc(at: float) -> datetime:
+            return datetime.fromtimestamp(at, timezone.utc).replace(tzinfo=None)
+
+        video_ids = sorted(set(resolved.values()))
+        logged = self.db.get_play_times(video_ids, utc(plays[0][0] - window), utc(plays[-1][0] + window))
+        counted_until = self.db.get_migrated_play_times(video_ids)
+        last_counted: Dict[Tuple[str, str], float] = {}
+        events = []
+        for at, yt_video_id, entity in plays:
+            key = (entity, yt_video_id)
+            if key in last_counted and at - last_counted[key] < window:
+                continue
+            played_at = utc(at).strftime('%Y-%m-%d %H:%M:%S')
+            if yt_video_id in counted_until and played_at <= counted_until[yt_video_id]:
+                continue
+            times = logged.get(yt_video_id, [])
+            low = utc(at - window).strftime('%Y-%m-%d %H:%M:%S')
+            high = utc(at + window).strftime('%Y-%m-%d %H:%M:%S')
+            if bisect.bisect_right(times, high) > bisect.bisect_left(times, low):
+                continue
+            last_counted[key] = at
+            events.append((played_at, yt_video_id, entity, IMPORT_SOURCE))
+
+        imported = self.db.import_play_events(events)
+        return {'imported_plays': imported, 'duplicate_plays': len(plays) - len(events)}
+
+    def _queue_searches(self, songs: Dict[str, Dict[str, Any]], unresolved: List[str]) -> Dict[str, int]:
+        """Queue lookahead searches for the most played unmatched songs."""
+        ranked = sorted(unresolved, key=lambda content_hash: len(songs[content_hash]['plays']), reverse=True)
+        queued = 0
+        for content_hash in ranked[:self.max_searches]:
+            if self.db.enqueue_search(songs[content_hash]['media'], prefetch=True) is not None:
+                queued += 1
+        return {
+            'unresolved_songs': len(unresolved),
+            'unresolved_plays': sum(len(songs[content_hash]['plays']) for content_hash in unresolved),
+            'searches_queued': queued
+        }
+
+    def _already_imported(self) -> bool:
+        try:
+            state = json.loads(self.state_file.read_text())
+            return state.get('file') == _file_identity(self.recorder_path)
+        except (OSError, ValueError):
+            return False
+
+    def _remember(self, report: Dict[str, Any]):
+        try:
+            state = {
+                'file': _file_identity(self.recorder_path),
+                'completed_at': datetime.now(timezone.utc).isoformat(),
+                'report': report
+            }
+            self.state_file.write_text(json.dumps(state, indent=2))
+        except OSError as e:
+            logger.warning(f"Failed to remember recorder import in {self.state_file}: {e}")
@@ -55,7 +55,7 @@ def check_database() -> Dict[str, Any]:
                 SELECT COUNT(*) as videos,
                        (SELECT COUNT(*) FROM queue WHERE status = 'pending') as pending_queue,
                        (SELECT COUNT(*) FROM queue WHERE status = 'failed' AND attempts >= 5) as permanently_failed,
-                       (SELECT COUNT(*) FROM api_calls WHERE timestamp > datetime('now', '-1 hour')) as recent_api_calls
+                       (SELECT COUNT(*) FROM api_call_log WHERE timestamp > datetime('now', '-1 hour')) as recent_api_calls
                 FROM video_ratings
             """)
             stats = cursor.fetchone()
@@ -119,33 +119,23 @@ def check_youtube_api() -> Dict[str, Any]:
         token_file = '/app/token.json'
         token_exists = os.path.exists(token_file)
 
-        # Test 2: Check quota status
-        quota_exceeded = False
+        # Test 2: Check quota status (quota_state, cached in-process)
+        from helpers.api_helpers import check_quota_recently_exceeded
+        quota_exceeded = check_quota_recently_exceeded(_db)
         quota_reset_in = None
-        with _db._lock:
-            cursor = _db._conn.execute("""
-                SELECT COUNT(*) FROM api_calls
-                WHERE endpoint = 'videos/rate'
-                AND response_data LIKE '%quotaExceeded%'
-                AND timestamp > datetime('now', '-24 hours')
-            """)
-            recent_quota_errors = cursor.fetchone()[0]
-            quota_exceeded = recent_quota_errors > 0
 
         if quota_exceeded:
             # Calculate time until quota reset (midnight Pacific)
-            from helpers.time_helpers import get_next_quota_reset_time
-            next_reset = get_next_quota_reset_time()
-            now = datetime.utcnow()
-            quota_reset_in = int((next_reset - now).total_seconds())
+            from helpers.time_helpers import get_next_quota_reset_time, now_utc
+            quota_reset_in = int((get_next_quota_reset_time() - now_utc()).total_seconds())
 
         # Test 3: Check recent API success rate
         with _db._lock:
             cursor = _db._conn.execute("""
                 SELECT
                     COUNT(*) as total,
-                    SUM(CASE WHEN response_data NOT LIKE '%error%' THEN 1 ELSE 0 END) as successful
-                FROM api_calls
+                    SUM(CASE WHEN success = 1 THEN 1 ELSE 0 END) as successful
+                FROM api_call_log
                 WHERE timestamp > datetime('now', '-1 hour')
             """)
             api_stats = cursor.fetchone()
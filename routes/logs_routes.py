@@ -315,6 +315,9 @@ def get_queue_item_details(queue_id: int):
             logger.error(f"Invalid queue item type: {queue_item.get('type')}")
             return jsonify({'success': False, 'error': f'Invalid item type: {queue_item.get("type")}'}), 400
 
+        if queue_item.get('type') == 'search':
+            details['api_response_data'] = _db.get_queue_debug_record(queue_id)
+
         return jsonify({'success': True, 'data': details})
 
     except Exception as e:
@@ -345,6 +348,10 @@ def queue_item_detail_page(item_id: int):
                                  error=f'Invalid item type: {queue_item.get("type")}',
                                  ingress_path=ingress_path), 400
 
+        # Search debug records live compressed in a side table - decode only for this page
+        if queue_item.get('type') == 'search':
+            details['api_response_data'] = _db.get_queue_debug_record(item_id)
+
         # Parse API response data for template
         api_debug = {}
         if details.get('api_response_data'):
@@ -356,23 +363,25 @@ def queue_item_detail_page(item_id: int):
                 api_debug['cache_hit'] = api_data.get('cache_hit', False)
                 api_debug['search_query'] = api_data.get('search_query')
 
-                # Parse search results
-                if api_data.get('search_response'):
-                    items = api_data['search_response'].get('items', [])
-                    api_debug['search_results_count'] = len(items)
+                # Parse search results (ranked by title similarity when scores were recorded)
+                if api_data.get('search_results'):
+                    results = api_data['search_results']
+                    api_debug['search_results_count'] = len(results)
+                    ranked = sorted(results, key=lambda result: result.get('score') or 0, reverse=True)
                     api_debug['top_results'] = [
                         {
-                            'title': item.get('snippet', {}).get('title', 'Unknown'),
-                            'video_id': item.get('id', {}).get('videoId', 'Unknown')
+                            'title': result.get('title') or 'Unknown',
+                            'video_id': result.get('id', 'Unknown'),
+                            'score': result.get('score')
                         }
-                        for item in items[:5]
+                        for result in ranked[:5]
                     ]
 
                 api_debug['videos_checked'] = api_data.get('videos_checked')
                 api_debug['candidates_found'] = api_data.get('candidates_found')
 
-                if api_data.get('batch_responses'):
-                    api_debug['batch_responses_count'] = len(api_data['batch_responses'])
+                if api_data.get('batches'):
+                    api_debug['batch_responses_count'] = len(api_data['batches'])
 
                 if api_data.get('error'):
                     api_debug['error'] = {
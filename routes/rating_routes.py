@@ -120,6 +120,10 @@ def rate_video(rating_type: str) -> Tuple[Response, int]:
     All logic (cache checking, searching, rating) happens in the queue worker.
     This endpoint just validates input and queues the request.
 
+    The optional ?entity=<media_player> query parameter rates what is playing on
+    that player (it must be one of the configured players); without it the
+    first configured player is used.
+
     Args:
         rating_type: Type of rating ('like' or 'dislike')
     """
@@ -128,11 +132,17 @@ def rate_video(rating_type: str) -> Tuple[Response, int]:
         check_youtube_content
     )
 
-    logger.info(f"{rating_type} request received")
+    entity = request.args.get('entity')
+    logger.info(f"{rating_type} request received" + (f" for {entity}" if entity else ""))
 
     try:
+        # SECURITY: Only configured players can be queried
+        if entity is not None and entity not in _ha_api.entities:
+            logger.warning(f"Unknown media player entity in {rating_type} request: {entity[:100]} from {get_real_ip()}")
+            return error_response('Unknown media player entity')
+
         # Step 1: Get and validate current media
-        ha_media, err_resp = validate_current_media(_ha_api, rating_type, error_response)
+        ha_media, err_resp = validate_current_media(_ha_api, rating_type, error_response, entity=entity)
         if err_resp:
             return err_resp
 
@@ -216,6 +226,11 @@ def rate_song_direct(video_id: str, rating_type: str) -> Response:
         if not video_data:
             return error_response('Video not found in database', 404)
 
+        if video_data.get('yt_unavailable_reason'):
+            return error_response(
+                f"Video is no longer available on YouTube ({video_data['yt_unavailable_reason']})", 410
+            )
+
         title = video_data.get('yt_title') or video_data.get('ha_title') or 'Unknown'
 
         # Queue rating for background worker
@@ -29,6 +29,7 @@ from helpers.template import (
 from helpers.page_builder import StatsPageBuilder
 from helpers.sorting_helpers import sort_table_data
 from helpers.constants.empty_states import EMPTY_STATE_NO_LIKED, EMPTY_STATE_NO_DISLIKED
+from quota_forecast import QuotaForecaster
 
 bp = Blueprint('stats', __name__)
 
@@ -306,6 +307,29 @@ def _render_stats_api_tab(ingress_path: str) -> str:
     queue_stats = _db.get_queue_statistics()
     queue_activity = _db.get_recent_queue_activity(limit=20)
     queue_errors = _db.get_queue_errors(limit=10)
+    quota_forecast = QuotaForecaster(_db).forecast()
+
+    # Shape the summaries into the fields the API & Queue template reads
+    call_summary = api_calls.get('summary', {})
+    total_api_calls = call_summary.get('total_calls') or 0
+    api_stats = {
+        'total_api_calls': total_api_calls,
+        'successful_calls': call_summary.get('successful_calls') or 0,
+        'failed_calls': call_summary.get('failed_calls') or 0,
+        'success_rate': (call_summary.get('successful_calls') or 0) / total_api_calls * 100 if total_api_calls else 0,
+        'common_errors': []
+    }
+    overall_queue = queue_stats.get('overall_queue', {})
+    finished = overall_queue.get('completed', 0) + overall_queue.get('failed', 0)
+    queue_summary = {
+        'total_queued': overall_queue.get('total', 0),
+        'pending': overall_queue.get('pending', 0),
+        'processing': overall_queue.get('processing', 0),
+        'completed': overall_queue.get('completed', 0),
+        'failed': overall_queue.get('failed', 0),
+        'completion_rate': overall_queue.get('completed', 0) / finished * 100 if finished else 0,
+        'recent_items': []
+    }
 
     # Prepare template data with ingress_path
     template_data = {
@@ -314,9 +338,11 @@ def _render_stats_api_tab(ingress_path: str) -> str:
         'api_summary': api_summary,
         'hourly_usage': hourly_usage,
         'api_calls': api_calls,
-        'queue_stats': queue_stats,
+        'api_stats': api_stats,
+        'queue_stats': queue_summary,
         'queue_activity': queue_activity,
         'queue_errors': queue_errors,
+        'quota_forecast': quota_forecast,
         'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
 
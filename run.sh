@@ -9,7 +9,7 @@ export HOME_ASSISTANT_URL="${HOME_ASSISTANT_URL:-http://supervisor/core}"
 bashio::log.info "Home Assistant URL fixed to ${HOME_ASSISTANT_URL}"
 
 export MEDIA_PLAYER_ENTITY=$(bashio::config 'media_player_entity')
-bashio::log.info "Media Player Entity: ${MEDIA_PLAYER_ENTITY}"
+bashio::log.info "Media Player Entities: ${MEDIA_PLAYER_ENTITY}"
 
 # Only export SUPERVISOR_TOKEN if it exists (it's automatically provided by Home Assistant)
 # Don't set it to empty string, let it be unset so Python can check for it properly
@@ -59,6 +59,38 @@ if bashio::var.has_value "${SONG_TRACKING_POLL_INTERVAL_CONFIG}" && [ "${SONG_TR
     export SONG_TRACKING_POLL_INTERVAL="${SONG_TRACKING_POLL_INTERVAL_CONFIG}"
 fi
 
+SONG_TRACKING_WEBSOCKET_CONFIG=$(bashio::config 'song_tracking_websocket')
+if bashio::var.has_value "${SONG_TRACKING_WEBSOCKET_CONFIG}" && [ "${SONG_TRACKING_WEBSOCKET_CONFIG}" != "null" ]; then
+    export SONG_TRACKING_WEBSOCKET="${SONG_TRACKING_WEBSOCKET_CONFIG}"
+fi
+
+SONG_TRACKING_WARMUP_HISTORY_HOURS_CONFIG=$(bashio::config 'song_tracking_warmup_history_hours')
+if bashio::var.has_value "${SONG_TRACKING_WARMUP_HISTORY_HOURS_CONFIG}" && [ "${SONG_TRACKING_WARMUP_HISTORY_HOURS_CONFIG}" != "null" ]; then
+    export SONG_TRACKING_WARMUP_HISTORY_HOURS="${SONG_TRACKING_WARMUP_HISTORY_HOURS_CONFIG}"
+fi
+
+SONG_TRACKING_PLAY_THROTTLE_MINUTES_CONFIG=$(bashio::config 'song_tracking_play_throttle_minutes')
+if bashio::var.has_value "${SONG_TRACKING_PLAY_THROTTLE_MINUTES_CONFIG}" && [ "${SONG_TRACKING_PLAY_THROTTLE_MINUTES_CONFIG}" != "null" ]; then
+    export SONG_TRACKING_PLAY_THROTTLE_MINUTES="${SONG_TRACKING_PLAY_THROTTLE_MINUTES_CONFIG}"
+fi
+
+SONG_TRACKING_LOOKAHEAD_TRACKS_CONFIG=$(bashio::config 'song_tracking_lookahead_tracks')
+if bashio::var.has_value "${SONG_TRACKING_LOOKAHEAD_TRACKS_CONFIG}" && [ "${SONG_TRACKING_LOOKAHEAD_TRACKS_CONFIG}" != "null" ]; then
+    export SONG_TRACKING_LOOKAHEAD_TRACKS="${SONG_TRACKING_LOOKAHEAD_TRACKS_CONFIG}"
+fi
+
+# Recorder import configuration
+RECORDER_IMPORT_PATH_CONFIG=$(bashio::config 'recorder_import_path')
+if bashio::var.has_value "${RECORDER_IMPORT_PATH_CONFIG}" && [ "${RECORDER_IMPORT_PATH_CONFIG}" != "null" ]; then
+    export RECORDER_IMPORT_PATH="${RECORDER_IMPORT_PATH_CONFIG}"
+    bashio::log.info "Recorder import: ${RECORDER_IMPORT_PATH}"
+fi
+
+RECORDER_IMPORT_MAX_SEARCHES_CONFIG=$(bashio::config 'recorder_import_max_searches')
+if bashio::var.has_value "${RECORDER_IMPORT_MAX_SEARCHES_CONFIG}" && [ "${RECORDER_IMPORT_MAX_SEARCHES_CONFIG}" != "null" ]; then
+    export RECORDER_IMPORT_MAX_SEARCHES="${RECORDER_IMPORT_MAX_SEARCHES_CONFIG}"
+fi
+
 # Queue configuration
 QUEUE_MAX_RETRY_ATTEMPTS_CONFIG=$(bashio::config 'queue_max_retry_attempts')
 if bashio::var.has_value "${QUEUE_MAX_RETRY_ATTEMPTS_CONFIG}" && [ "${QUEUE_MAX_RETRY_ATTEMPTS_CONFIG}" != "null" ]; then
@@ -138,7 +170,7 @@ if [ "${HOST}" = "127.0.0.1" ] || [ "${HOST}" = "localhost" ] || [ "${HOST}" = "
     bashio::log.info "API is restricted to local calls from Home Assistant/Supervisor."
 fi
 bashio::log.info "Home Assistant URL: ${HOME_ASSISTANT_URL}"
-bashio::log.info "Target media player: ${MEDIA_PLAYER_ENTITY}"
+bashio::log.info "Target media players: ${MEDIA_PLAYER_ENTITY}"
 bashio::log.info "Log files location: /config/youtube_thumbs/"
 bashio::log.info "-------------------------------------------"
 
@@ -0,0 +1,96 @@
+"""
+Background task to keep search_results_cache bounded.
+Removes expired entries and evicts least-useful entries when over the size budget.
+"""
+import threading
+from logging_helper import LoggingHelper, LogType
+from error_handler import validate_environment_variable
+
+# Get logger instance
+logger = LoggingHelper.get_logger(LogType.MAIN)
+
+# Cache budget (a cached video is ~1-5 KB, mostly yt_description)
+MAX_ROWS = validate_environment_variable(
+    'YTT_SEARCH_CACHE_MAX_ROWS',
+    default=20000,
+    converter=int,
+    validator=lambda x: x > 0
+)
+MAX_MB = validate_environment_variable(
+    'YTT_SEARCH_CACHE_MAX_MB',
+    default=50,
+    converter=int,
+    validator=lambda x: x > 0
+)
+
+# Rows deleted per step, keeps each hold of the DB lock short
+BATCH_SIZE = 500
+
+
+class SearchCacheSweeper:
+    """Periodically sweeps the search results cache in background."""
+
+    def __init__(self, db, interval_seconds=600):
+        """
+        Initialize search cache sweeper.
+
+        Args:
+            db: Database instance
+            interval_seconds: How often to sweep (default: 10 minutes)
+        """
+        self.db = db
+        self.interval_seconds = interval_seconds
+        self.max_rows = MAX_ROWS
+        self.max_bytes = MAX_MB * 1024 * 1024
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._running = False
+
+    def start(self):
+        """Start the background sweep thread."""
+        if self._running:
+            logger.warning("Search cache sweeper already running")
+            return
+
+        self._running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._sweep_loop, daemon=True)
+        self._thread.start()
+        logger.debug(
+            f"Search cache sweeper started (interval: {self.interval_seconds}s, "
+            f"budget: {self.max_rows} rows / {MAX_MB} MB)"
+        )
+
+    def stop(self):
+        """Stop the background sweep thread."""
+        if not self._running:
+            return
+
+        logger.info("Stopping search cache sweeper...")
+        self._running = False
+        self._stop_event.set()
+
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+
+        logger.info("Search cache sweeper stopped")
+
+    def _sweep_loop(self):
+        """Main loop that periodically sweeps the cache."""
+        while self._running:
+            self._sweep()
+
+            # Wait for interval or stop event
+            if self._stop_event.wait(timeout=self.interval_seconds):
+                break
+
+    def _sweep(self):
+        """Sweep once, yielding between delete batches so request threads can take the DB lock."""
+        try:
+            self.db.sweep_search_cache(self.max_rows, self.max_bytes, BATCH_SIZE, pause=self._pause)
+        except Exception as e:
+            logger.error(f"Error in search cache sweep: {e}")
+
+    def _pause(self) -> bool:
+        """Wait briefly between delete batches; True stops the sweep."""
+        return self._stop_event.wait(timeout=0.1) or not self._running
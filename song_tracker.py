@@ -1,36 +1,223 @@
 """
-Automatic song tracking - polls Home Assistant every 30 seconds to build playback history.
-Tracks all songs played and increments play count (max 1x per hour per song).
+Automatic song tracking - follows the Home Assistant media players to build playback history.
+Tracks all songs played and increments play count (at most once per song and
+player within the play throttle window, 1 hour by default).
+
+Plays are scrobble-accurate: each track on each player is followed as a
+playback session (see playback_session.py), and the play is only counted -
+or, for a song not matched yet, its YouTube search queued - once half of it
+or 4 minutes have been listened to. Tracks replaced before that count as
+skips (skip_count) instead of plays.
+
+When a track starts, the tracker looks ahead: the songs most often played
+after it (play transitions from the play event log) are loaded into memory,
+and tracks the player reports as coming up next are resolved against the DB
+or queued as lookahead searches, which the queue worker only runs with spare
+quota. A thumbs up on the next song then finds it already matched.
+
+One tracker follows every configured media player: a single WebSocket
+subscription (or one bulk /api/states poll) covers all of them, and change
+detection and play throttling are kept per player.
+
+State changes are pushed over the Home Assistant WebSocket API, so short songs
+are not missed and track changes are seen immediately. While the WebSocket is
+down (or websocket-client is missing) the tracker polls /api/states and
+reconnects with exponential backoff. Polling is adaptive: the next poll is
+timed for just after the expected end of the current track (from
+media_position and media_duration), and slows down while paused or idle.
+
+States whose identifying attributes (title, artist, duration, content_id)
+have not changed since the last one skip parsing, hashing and DB lookups.
 """
+import sys
 import threading
 import time
+from collections import OrderedDict, deque
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 from logging_helper import LoggingHelper, LogType
+from error_handler import validate_environment_variable
+from metrics_tracker import metrics
+from homeassistant_api import media_signature, current_position, upcoming_media
+from homeassistant_events import HomeAssistantEventStream, websocket_available
+from playback_session import PlaybackSession, PLAY, SKIP, track_key, state_position
 
 # Get logger instance
 logger = LoggingHelper.get_logger(LogType.MAIN)
 
+# Startup warm-up: recently played videos kept in memory (also the LRU size)
+WARMUP_RECENT_VIDEOS = validate_environment_variable(
+    'SONG_TRACKING_WARMUP_SIZE',
+    default=200,
+    converter=int,
+    validator=lambda x: 0 <= x <= 5000
+)
+
+# Optional: also pre-resolve songs from Home Assistant recorder history (0 = disabled)
+WARMUP_HISTORY_HOURS = validate_environment_variable(
+    'SONG_TRACKING_WARMUP_HISTORY_HOURS',
+    default=0,
+    converter=int,
+    validator=lambda x: 0 <= x <= 168
+)
+
+# Share of the LRU kept for songs pre-resolved from HA history (when enabled)
+WARMUP_HISTORY_SHARE = 0.5
+
+# Adaptive polling: never poll faster than this near the end of a track...
+FAST_POLL_SECONDS = validate_environment_variable(
+    'SONG_TRACKING_FAST_POLL_SECONDS',
+    default=5,
+    converter=int,
+    validator=lambda x: 1 <= x <= 60
+)
+
+# ...and poll this slowly while the player is paused, idle or off
+IDLE_POLL_SECONDS = validate_environment_variable(
+    'SONG_TRACKING_IDLE_POLL_SECONDS',
+    default=120,
+    converter=int,
+    validator=lambda x: 10 <= x <= 900
+)
+
+# A song counts as one play per player within this window
+PLAY_THROTTLE_MINUTES = validate_environment_variable(
+    'SONG_TRACKING_PLAY_THROTTLE_MINUTES',
+    default=60,
+    converter=int,
+    validator=lambda x: 1 <= x <= 1440
+)
+
+PLAY_THROTTLE = timedelta(minutes=PLAY_THROTTLE_MINUTES)
+
+# Lookahead: songs pre-resolved per track change from play history and the player's queue (0 = disabled)
+LOOKAHEAD_TRACKS = validate_environment_variable(
+    'SONG_TRACKING_LOOKAHEAD_TRACKS',
+    default=3,
+    converter=int,
+    validator=lambda x: 0 <= x <= 10
+)
+
+# Videos checked for plays whose events were not written before a restart
+# (at most one play event batch)
+THROTTLE_RESTORE_ROWS = 100
+
+# Delay before reconnecting the WebSocket (doubles per failed attempt, polling meanwhile)
+RECONNECT_MIN_SECONDS = 5
+RECONNECT_MAX_SECONDS = 300
+
+
+class PlayThrottle:
+    """
+    Time-window play throttle: a key counts at most once per window.
+
+    The last counted time per key lives in a dict, and every count is also
+    appended to a deque in time order. evict() pops expired counts from the
+    left of the deque and drops their dict entries (unless the key has been
+    counted again since), so memory is bounded by the plays in one window
+    rather than growing with every song ever played.
+    """
+
+    def __init__(self, window: timedelta) -> None:
+        self.window = window
+        self._last: Dict[Any, datetime] = {}
+        self._order = deque()  # (counted_at, key), oldest first
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def allow(self, key, now: Optional[datetime] = None) -> bool:
+        """
+        Count the key unless it was counted within the window.
+
+        Args:
+            key: Throttle key
+            now: Current time (aware UTC; default: now)
+
+        Returns:
+            True if the key was counted
+        """
+        now = now or datetime.now(timezone.utc)
+        self.evict(now)
+        last = self._last.get(key)
+        if last is not None and now - last < self.window:
+            return False
+        self.restore(key, now)
+        return True
+
+    def restore(self, key, counted_at: datetime) -> None:
+        """
+        Record a past count (warm-up). Counts should be restored oldest first.
+
+        Args:
+            key: Throttle key
+            counted_at: When it was counted (aware UTC)
+        """
+        last = self._last.get(key)
+        if last is not None and last >= counted_at:
+            return
+        self._last[key] = counted_at
+        self._order.append((counted_at, key))
+
+    def evict(self, now: Optional[datetime] = None) -> int:
+        """
+        Drop counts that have left the window.
+
+        Args:
+            now: Current time (aware UTC; default: now)
+
+        Returns:
+            Number of keys dropped
+        """
+        cutoff = (now or datetime.now(timezone.utc)) - self.window
+        evicted = 0
+        while self._order and self._order[0][0] <= cutoff:
+            counted_at, key = self._order.popleft()
+            # The key may have been counted again since; then the newer entry stays
+            if self._last.get(key) == counted_at:
+                del self._last[key]
+                evicted += 1
+        return evicted
+
+    def memory_stats(self) -> Dict[str, int]:
+        """Entry counts and approximate size in bytes (containers, keys and times)."""
+        approx = sys.getsizeof(self._last) + sys.getsizeof(self._order)
+        for counted_at, key in self._order:
+            approx += sys.getsizeof(key) + sys.getsizeof(counted_at)
+        return {'entries': len(self._last), 'queued': len(self._order), 'approx_bytes': approx}
+
 
 class SongTracker:
-    """Automatically tracks songs playing on Home Assistant media player."""
+    """Automatically tracks songs playing on Home Assistant media players."""
 
-    def __init__(self, ha_api, db, poll_interval=30):
+    def __init__(self, ha_api, db, poll_interval=30, use_websocket=True,
+                 fast_poll_interval=FAST_POLL_SECONDS, idle_poll_interval=IDLE_POLL_SECONDS):
         """
         Initialize song tracker.
 
         Args:
             ha_api: Home Assistant API instance
             db: Database instance
-            poll_interval: How often to poll in seconds (default: 30)
+            poll_interval: Longest poll interval while playing in seconds (default: 30);
+                with the WebSocket, only used while it is disconnected
+            use_websocket: Follow state changes over the WebSocket API (default: True)
+            fast_poll_interval: Shortest poll interval, used near the end of a track
+            idle_poll_interval: Poll interval while paused or idle (at least poll_interval)
         """
         self.ha_api = ha_api
         self.db = db
         self.poll_interval = poll_interval
+        self.fast_poll_interval = min(fast_poll_interval, poll_interval)
+        self.idle_poll_interval = max(idle_poll_interval, poll_interval)
+        self._players = {}  # entity_id -> change detection state, see _player()
+        self._events = HomeAssistantEventStream(ha_api) if use_websocket and websocket_available() else None
+        if use_websocket and not self._events:
+            logger.warning("websocket-client is not installed - song tracker will poll Home Assistant")
         self._thread = None
         self._stop_event = threading.Event()
         self._running = False
-        self._last_tracked = {}  # Track last play count increment per song
+        self._throttle = PlayThrottle(PLAY_THROTTLE)  # keyed by (entity_id, content_hash)
+        self._recent_videos = OrderedDict()  # content_hash -> video result (LRU, tracker thread only)
 
     def start(self):
         """Start the background song tracking thread."""
@@ -40,9 +227,14 @@ class SongTracker:
 
         self._running = True
         self._stop_event.clear()
+        metrics.register_memory_source('song_tracker', self.memory_stats)
         self._thread = threading.Thread(target=self._tracking_loop, daemon=True)
         self._thread.start()
-        logger.info(f"Song tracker started (polling every {self.poll_interval}s)")
+        players = f"{len(self.ha_api.entities)} media players" if len(self.ha_api.entities) > 1 else self.ha_api.entity
+        if self._events:
+            logger.info(f"Song tracker started for {players} (WebSocket events, polling every {self.poll_interval}s while disconnected)")
+        else:
+            logger.info(f"Song tracker started for {players} (polling every {self.poll_interval}s)")
 
     def stop(self):
         """Stop the background song tracking thread."""
@@ -52,140 +244,617 @@ class SongTracker:
         logger.info("Stopping song tracker...")
         self._running = False
         self._stop_event.set()
+        if self._events:
+            self._events.close()
 
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=5)
 
+        # Count tracks that were far enough along when the add-on stopped
+        now = time.monotonic()
+        for entity, player in list(self._players.items()):
+            try:
+                self._end_session(player, entity, now, replaced=False)
+            except Exception as e:
+                logger.error(f"Error ending playback session on {entity}: {e}")
+
         logger.info("Song tracker stopped")
 
     def _tracking_loop(self):
-        """Main loop that polls HA and tracks songs."""
+        """Main loop that follows HA and tracks songs."""
+        self._warm_up()
+
+        if self._events:
+            self._event_loop()
+        else:
+            self._poll_loop()
+
+    def _poll_loop(self):
+        """Poll HA for the current media, timing each poll from the playback position."""
         # Wait one poll interval before first check to avoid duplicate startup fetch
         # (startup health checks already fetch current media)
         if self._stop_event.wait(timeout=self.poll_interval):
             return
 
         while self._running:
+            delay = self.poll_interval
             try:
-                self._check_and_track_song()
+                delay = self._check_and_track_song()
             except Exception as e:
                 logger.error(f"Error in song tracking loop: {e}", exc_info=True)
 
-            # Wait for poll interval or stop event
-            if self._stop_event.wait(timeout=self.poll_interval):
+            # Wait for the next poll or stop event
+            if self._stop_event.wait(timeout=delay):
+                break
+
+    def _event_loop(self):
+        """Track songs from WebSocket state changes, polling while disconnected."""
+        backoff = RECONNECT_MIN_SECONDS
+        next_poll = time.monotonic() + self.poll_interval  # startup health checks just fetched current media
+
+        while self._running:
+            subscribed = self._events.listen(self._on_state_changed, self._stop_event, on_subscribed=self._on_subscribed)
+            self.ha_api.set_push_live(False)
+            if subscribed:
+                backoff = RECONNECT_MIN_SECONDS
+            if not self._running:
                 break
 
-    def _check_and_track_song(self):
-        """Poll HA for current media and track if needed."""
+            logger.info(f"Home Assistant WebSocket unavailable - polling until reconnect in {backoff}s")
+            reconnect_at = time.monotonic() + backoff
+            while self._running:
+                now = time.monotonic()
+                if now >= reconnect_at:
+                    break
+                if now >= next_poll:
+                    next_poll = now + self._check_and_track_song()
+                    continue
+                if self._stop_event.wait(timeout=min(reconnect_at, next_poll) - now):
+                    return
+
+            backoff = min(backoff * 2, RECONNECT_MAX_SECONDS)
+
+    def _on_subscribed(self):
+        """Catch up with a poll once subscribed; from then on pushed states keep the shared state cache current."""
+        self.ha_api.set_push_live(True)
+        self._check_and_track_song()
+
+    def _on_state_changed(self, state: Optional[Dict[str, Any]]):
+        """Track the media in a state pushed over the WebSocket (and share it with rating requests)."""
+        if state:
+            self.ha_api.remember_state(state)
         try:
-            # Get current media from Home Assistant
-            media = self.ha_api.get_current_media()
+            self._handle_state(state)
+        except Exception as e:
+            logger.error(f"Error tracking state change: {e}", exc_info=True)
 
-            if not media:
-                # Nothing playing or error
-                logger.debug("Song tracker poll: No media playing")
-                return
+    def _check_and_track_song(self) -> float:
+        """
+        Poll HA for the current media of every player and track if needed.
 
-            # Only track YouTube content
-            if media.get('app_name') != 'YouTube':
-                logger.debug(f"Song tracker poll: Non-YouTube app ({media.get('app_name')}), skipping")
-                return
+        Returns:
+            Seconds until the next poll (the soonest any player needs)
+        """
+        try:
+            states = self.ha_api.get_media_player_states()
+        except Exception as e:
+            logger.error(f"Error checking/tracking song: {e}", exc_info=True)
+            states = None
+        if states is None:
+            return self.poll_interval
+
+        delays = []
+        for entity in self.ha_api.entities:
+            state = states.get(entity)
+            if state is None:
+                continue
+            try:
+                self._handle_state(state)
+            except Exception as e:
+                logger.error(f"Error checking/tracking song on {entity}: {e}", exc_info=True)
+            delays.append(self._next_poll_delay(state))
 
-            title = media.get('title')
-            duration = media.get('duration')
+        # Players unknown to HA count as idle
+        return min(delays, default=self.idle_poll_interval)
 
-            if not title or not duration:
-                logger.debug("Missing title or duration, skipping track")
-                return
-
-            # Calculate content hash for deduplication (throttling purposes)
-            from helpers.video_helpers import get_content_hash
-            content_hash = get_content_hash(
-                title=title,
-                duration=duration,
-                artist=media.get('artist')
-            )
+    def _handle_state(self, state: Optional[Dict[str, Any]]):
+        """Follow the playback session in a state object, parsing its media only if it changed."""
+        if state is None:
+            return
+        self._throttle.evict()
+        entity = state.get('entity_id') or self.ha_api.entity
+        player = self._player(entity)
+        media = self.ha_api.media_from_state(state) if self._state_changed(state, player) else None
+        self._follow_session(state, player, entity, media)
+
+    def _follow_session(self, state: Dict[str, Any], player: Dict[str, Any], entity: str,
+                        media: Optional[Dict[str, Any]]):
+        """
+        Advance, end or start the playback session of a player from its latest state.
+
+        Args:
+            state: Media player state object
+            player: Player state, from _player()
+            entity: Media player entity ID
+            media: Media parsed from the state, or None if it was not parsed
+                (unchanged state) or nothing is playing
+        """
+        now = time.monotonic()
+        track = track_key(state)
+        playing = state.get('state') == 'playing'
+        position = state_position(state)
+        session = player['session']
+
+        if session is not None and session.track == track:
+            if session.media is None and media:
+                session.media = media
+                self._look_ahead(media, state, entity)
+            if session.advance(playing, position, now):
+                # Same track started over after it counted (repeat)
+                self._end_session(player, entity, now, replaced=False)
+                self._start_session(player, entity, track, state, playing, position, now, session.media)
+            elif session.reached and not session.committed:
+                session.committed = True
+                self._track_media(session.media, entity)
+            return
 
-            # Check if we should increment play count (max 1x per hour)
-            if not self._should_increment_play_count(content_hash):
-                logger.debug(f"Song tracker poll: '{title}' already tracked recently (throttled)")
-                return
+        self._end_session(player, entity, now, replaced=track is not None)
+        if track is not None:
+            self._start_session(player, entity, track, state, playing, position, now, media)
+
+    def _start_session(self, player: Dict[str, Any], entity: str, track, state: Dict[str, Any], playing: bool,
+                       position: Optional[float], now: float, media: Optional[Dict[str, Any]]):
+        """Start following a new track on a player."""
+        duration = (state.get('attributes') or {}).get('media_duration')
+        session = PlaybackSession(track, duration, playing, position, now, joined_late=not player['sessions'])
+        session.media = media
+        player['session'] = session
+        player['sessions'] += 1
+        if media:
+            self._look_ahead(media, state, entity)
+
+    def _look_ahead(self, media: Dict[str, Any], state: Dict[str, Any], entity: str):
+        """
+        Pre-resolve the songs likely to play after the current one.
 
-            # Use same cache lookup logic as rating endpoints
-            # This checks BOTH content_hash AND title+duration matching
-            from helpers.cache_helpers import find_cached_video
-            cached_video = find_cached_video(self.db, media)
+        Songs that followed the current one before (play transitions) are
+        already matched and only loaded into memory. Tracks the player reports
+        as coming up next are resolved against the DB, or queued as lookahead
+        searches (no YouTube quota is used unless the forecast has spare budget).
 
-            if cached_video and cached_video.get('yt_video_id'):
-                # Song found in cache - increment play count
-                yt_video_id = cached_video['yt_video_id']
-                self._increment_play_count(yt_video_id, content_hash)
-                artist = media.get('artist', 'Unknown')
-                logger.info(f"Tracked play: '{title}' by '{artist}' ({duration}s) | ID: {yt_video_id} | play_count +1")
-            else:
-                # Not in cache - queue YouTube search (same as rating endpoints)
-                # This uses the established queue logic and caching strategy
-                # v4.2.5: enqueue_search() now returns None if recently failed search exists
-                search_id = self.db.enqueue_search(media)
-                if search_id is None:
-                    logger.debug(f"Skipping search for '{title}' - recent failed search found (quota protection)")
-                else:
-                    artist = media.get('artist', 'Unknown')
-                    logger.info(f"New song detected: '{title}' by '{artist}' ({duration}s) - queued for YouTube search (queue_id: {search_id})")
+        Args:
+            media: Media that just started playing
+            state: Its media player state object
+            entity: Media player entity ID
+        """
+        if LOOKAHEAD_TRACKS <= 0 or media.get('app_name') != 'YouTube' or not media.get('title'):
+            return
 
+        try:
+            from helpers.cache_helpers import build_video_result, find_cached_video
+
+            loaded = queued = 0
+            current = self._resolve_cached(media, self._tracking_hash(media['title'], media.get('duration'), media.get('artist')))
+            if current:
+                for row in self.db.get_next_videos(current['yt_video_id'], LOOKAHEAD_TRACKS):
+                    if not row.get('ha_title'):
+                        continue
+                    content_hash = self._tracking_hash(row['ha_title'], row.get('ha_duration'), row.get('ha_artist') or 'Unknown')
+                    if content_hash not in self._recent_videos:
+                        self._remember_video(content_hash, build_video_result(row, row['ha_title']))
+                        loaded += 1
+
+            for upcoming in upcoming_media(state)[:LOOKAHEAD_TRACKS]:
+                if upcoming.get('app_name') != 'YouTube' or not upcoming.get('duration'):
+                    continue
+                content_hash = self._tracking_hash(upcoming['title'], upcoming['duration'], upcoming['artist'])
+                if content_hash in self._recent_videos:
+                    continue
+                video = find_cached_video(self.db, upcoming)
+                if video and video.get('yt_video_id'):
+                    self._remember_video(content_hash, video)
+                    loaded += 1
+                elif self.db.enqueue_search(upcoming, prefetch=True) is not None:
+                    queued += 1
+
+            if loaded or queued:
+                where = f" on {entity}" if len(self.ha_api.entities) > 1 else ""
+                logger.debug(f"Song tracker lookahead{where}: {loaded} upcoming songs loaded, {queued} queued for search")
         except Exception as e:
-            logger.error(f"Error checking/tracking song: {e}", exc_info=True)
+            logger.error(f"Song tracker lookahead failed: {e}")
 
-    def _should_increment_play_count(self, content_hash: str) -> bool:
+    def _end_session(self, player: Dict[str, Any], entity: str, now: float, replaced: bool):
         """
-        Check if we should increment play count for this song.
-        Returns True if song hasn't been tracked in the last hour.
+        End the player's playback session (if any), counting it as a play or a skip.
 
         Args:
-            content_hash: Content hash of the song
+            player: Player state, from _player()
+            entity: Media player entity ID
+            now: Current monotonic time
+            replaced: A different track started on the player
+        """
+        session, player['session'] = player['session'], None
+        if session is None:
+            return
+        outcome = session.finish(now, replaced)
+        if outcome == PLAY:
+            session.committed = True
+            self._track_media(session.media, entity)
+        elif outcome == SKIP:
+            self._record_skip(session, entity)
+
+    def _player(self, entity: str) -> Dict[str, Any]:
+        """
+        Get the change detection state of one media player.
+
+        Keys: last_updated (of the last state seen), signature (media_signature()
+        of the last state parsed), session (current PlaybackSession or None) and
+        sessions (number started, so the first one knows it joined late).
+        """
+        player = self._players.get(entity)
+        if player is None:
+            player = self._players[entity] = {'last_updated': None, 'signature': None, 'session': None, 'sessions': 0}
+        return player
+
+    def _state_changed(self, state: Dict[str, Any], player: Dict[str, Any]) -> bool:
+        """
+        Check whether a state may resolve to different media than the player's last one.
+
+        An unchanged last_updated means nothing changed at all; otherwise only the
+        identifying attributes are compared (position updates don't count). A
+        track left on repeat is picked up by its playback session instead.
+
+        Args:
+            state: Media player state object
+            player: Change detection state of the player, from _player()
 
         Returns:
-            True if play count should be incremented
+            True if the media in the state should be parsed
         """
-        now = datetime.now(timezone.utc)
+        last_updated = state.get('last_updated')
+        if last_updated is not None and last_updated == player['last_updated']:
+            return False
+        player['last_updated'] = last_updated
+
+        signature = media_signature(state)
+        if signature == player['signature']:
+            logger.debug("Song tracker: media unchanged since last state, skipping")
+            return False
 
-        # Check last tracking time for this song
-        last_tracked = self._last_tracked.get(content_hash)
+        player['signature'] = signature
+        return True
 
-        if not last_tracked:
-            # Never tracked before
-            self._last_tracked[content_hash] = now
-            return True
+    def _next_poll_delay(self, state: Optional[Dict[str, Any]]) -> float:
+        """
+        Pick the delay until the next poll from the current playback state.
+
+        While playing, the poll is timed for shortly after the expected end of the
+        track (half the fast interval later, so HA has moved on to the next one),
+        bounded by the fast and regular poll intervals. Paused, idle and
+        unreachable players are polled at the idle interval.
 
-        # Check if at least 1 hour has passed
-        time_since_last = now - last_tracked
+        Args:
+            state: Media player state object from the last poll (None on error)
+
+        Returns:
+            Seconds until the next poll
+        """
+        if state is None:
+            return self.poll_interval
+        if state.get('state') != 'playing':
+            return self.idle_poll_interval
 
-        if time_since_last >= timedelta(hours=1):
-            self._last_tracked[content_hash] = now
-            return True
+        attributes = state.get('attributes') or {}
+        duration = attributes.get('media_duration')
+        position = current_position(attributes)
+        if not duration or position is None:
+            return self.poll_interval
 
-        # Too soon - skip
-        return False
+        remaining = duration - position + self.fast_poll_interval / 2
+        return min(self.poll_interval, max(self.fast_poll_interval, remaining))
 
-    def _increment_play_count(self, yt_video_id: str, content_hash: str):
+    def _track_media(self, media: Optional[Dict[str, Any]], entity: Optional[str] = None):
         """
-        Increment play count and update last played timestamp.
+        Count a play of the media (throttled to once per hour per song and player).
+
+        Called once its playback session has counted; media that is not matched
+        yet is queued for a YouTube search, and the queue worker counts the play
+        when it matches.
+
+        Args:
+            media: Media dict from HomeAssistantAPI, or None if nothing is playing
+            entity: Media player it is playing on (default: the first configured player)
+        """
+        entity = entity or self.ha_api.entity
+        # Name the player in log lines only when there is more than one
+        where = f" on {entity}" if len(self.ha_api.entities) > 1 else ""
+
+        if not media:
+            # Nothing playing or error
+            logger.debug("Song tracker: No media playing")
+            return
+
+        # Only track YouTube content
+        if media.get('app_name') != 'YouTube':
+            logger.debug(f"Song tracker: Non-YouTube app ({media.get('app_name')}), skipping")
+            return
+
+        title = media.get('title')
+        duration = media.get('duration')
+
+        if not title or not duration:
+            logger.debug("Missing title or duration, skipping track")
+            return
+
+        # Calculate content hash for deduplication (throttling purposes)
+        content_hash = self._tracking_hash(title, duration, media.get('artist'))
+
+        # Check if we should increment play count (max 1x per hour)
+        if not self._should_increment_play_count(content_hash, entity):
+            logger.debug(f"Song tracker: '{title}' already tracked recently{where} (throttled)")
+            return
+
+        cached_video = self._resolve_cached(media, content_hash)
+        if cached_video:
+            # Song found in cache - increment play count
+            yt_video_id = cached_video['yt_video_id']
+            self._increment_play_count(yt_video_id, content_hash, entity)
+            artist = media.get('artist', 'Unknown')
+            logger.info(f"Tracked play{where}: '{title}' by '{artist}' ({duration}s) | ID: {yt_video_id} | play_count +1")
+        else:
+            # Not in cache - queue YouTube search (same as rating endpoints)
+            # This uses the established queue logic and caching strategy
+            # v4.2.5: enqueue_search() now returns None if recently failed search exists
+            search_id = self.db.enqueue_search(media)
+            if search_id is None:
+                logger.debug(f"Skipping search for '{title}' - recent failed search found (quota protection)")
+            else:
+                artist = media.get('artist', 'Unknown')
+                logger.info(f"New song detected{where}: '{title}' by '{artist}' ({duration}s) - queued for YouTube search (queue_id: {search_id})")
+
+    def _resolve_cached(self, media: Dict[str, Any], content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve media to a matched video without searching YouTube.
+
+        Args:
+            media: Media dict from HomeAssistantAPI
+            content_hash: Tracking hash of the media
+
+        Returns:
+            Video result with a yt_video_id, or None if it is not matched yet
+        """
+        # Recently played songs are resolved from memory (pre-warmed at startup)
+        cached_video = self._recent_videos.get(content_hash)
+        if cached_video:
+            self._recent_videos.move_to_end(content_hash)
+            metrics.record_cache_hit('memory')
+            return cached_video
+
+        # Use same cache lookup logic as rating endpoints
+        # This checks BOTH content_hash AND title+duration matching
+        from helpers.cache_helpers import find_cached_video
+        cached_video = find_cached_video(self.db, media)
+        if cached_video and cached_video.get('yt_video_id'):
+            self._remember_video(content_hash, cached_video)
+            return cached_video
+        return None
+
+    def _record_skip(self, session: PlaybackSession, entity: str):
+        """
+        Record a skip for a track replaced before it counted as a play.
+
+        Only matched YouTube videos are recorded; nothing is searched for a skip.
+
+        Args:
+            session: The ended playback session
+            entity: Media player it was playing on
+        """
+        media = session.media
+        if not media or media.get('app_name') != 'YouTube' or not media.get('title'):
+            return
+
+        title = media['title']
+        where = f" on {entity}" if len(self.ha_api.entities) > 1 else ""
+        cached_video = self._resolve_cached(media, self._tracking_hash(title, media.get('duration'), media.get('artist')))
+        if not cached_video:
+            logger.debug(f"Song tracker: '{title}' skipped{where} after {session.listened:.0f}s (not matched yet)")
+            return
+
+        try:
+            self.db.record_skip(cached_video['yt_video_id'])
+            logger.info(f"Skipped{where}: '{title}' after {session.listened:.0f}s | ID: {cached_video['yt_video_id']} | skip_count +1")
+        except Exception as e:
+            logger.error(f"Failed to record skip for {cached_video['yt_video_id']}: {e}")
+
+    def _should_increment_play_count(self, content_hash: str, entity: str) -> bool:
+        """
+        Check if we should increment play count for this song.
+        Returns True if song hasn't been tracked on this player within the throttle window.
+
+        Args:
+            content_hash: Content hash of the song
+            entity: Media player entity ID
+
+        Returns:
+            True if play count should be incremented
+        """
+        return self._throttle.allow((entity, content_hash))
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """In-memory state sizes, reported in the system stats."""
+        recent_bytes = sys.getsizeof(self._recent_videos) + sum(
+            sys.getsizeof(key) + sys.getsizeof(video) for key, video in list(self._recent_videos.items())
+        )
+        return {
+            'play_throttle': self._throttle.memory_stats(),
+            'recent_videos': {'entries': len(self._recent_videos), 'approx_bytes': recent_bytes},
+            'players': len(self._players),
+            'sessions': sum(1 for player in self._players.values() if player['session'] is not None)
+        }
+
+    def _increment_play_count(self, yt_video_id: str, content_hash: str, entity: Optional[str] = None):
+        """
+        Increment play count, update last played timestamp and log the play event.
 
         Args:
             yt_video_id: YouTube video ID
             content_hash: Content hash for the song
+            entity: Media player it was played on
         """
         try:
-            with self.db._lock:
-                self.db._conn.execute(
-                    """
-                    UPDATE video_ratings
-                    SET play_count = play_count + 1,
-                        date_last_played = CURRENT_TIMESTAMP
-                    WHERE yt_video_id = ?
-                    """,
-                    (yt_video_id,)
-                )
-                self.db._conn.commit()
+            if not self.db.record_play(yt_video_id, entity=entity, source='song_tracker'):
+                # Video was removed since it was cached in memory - resolve it again next time
+                self._recent_videos.pop(content_hash, None)
         except Exception as e:
             logger.error(f"Failed to increment play count for {yt_video_id}: {e}")
+
+    @staticmethod
+    def _tracking_hash(title: Optional[str], duration: Optional[int], artist: Optional[str]) -> str:
+        """Content hash used for throttling and in-memory lookups (same inputs as a live poll)."""
+        from helpers.video_helpers import get_content_hash
+        return get_content_hash(title=title, duration=duration, artist=artist)
+
+    def _remember_video(self, content_hash: str, video: Dict[str, Any]):
+        """Add a resolved video to the in-memory LRU of recently played songs."""
+        if WARMUP_RECENT_VIDEOS <= 0:
+            return
+        self._recent_videos[content_hash] = video
+        self._recent_videos.move_to_end(content_hash)
+        while len(self._recent_videos) > WARMUP_RECENT_VIDEOS:
+            self._recent_videos.popitem(last=False)
+
+    def _warm_up(self):
+        """
+        Pre-warm in-memory lookups and the play throttle after a restart.
+
+        Restores the play throttle (see _restore_throttle) so a restart doesn't
+        double-count the current song, and loads the most recently played videos
+        in one query, so the first poll of a recent song skips the DB lookup.
+        Optionally pre-resolves songs from Home Assistant recorder history
+        against the DB, into the WARMUP_HISTORY_SHARE of the LRU that recent
+        plays leave free.
+        """
+        try:
+            self._restore_throttle()
+        except Exception as e:
+            logger.error(f"Song tracker throttle restore failed: {e}")
+
+        if WARMUP_RECENT_VIDEOS <= 0:
+            return
+
+        try:
+            from helpers.cache_helpers import build_video_result
+
+            start_time = time.time()
+            # Leave room for history songs, otherwise recent plays fill the whole LRU
+            recent_limit = WARMUP_RECENT_VIDEOS
+            if WARMUP_HISTORY_HOURS > 0:
+                recent_limit -= int(WARMUP_RECENT_VIDEOS * WARMUP_HISTORY_SHARE)
+            rows = self.db.get_recently_played(recent_limit)
+
+            # Oldest first so the newest plays end up most recently used
+            for row in reversed(rows):
+                ha_title = row.get('ha_title')
+                if not ha_title:
+                    continue
+
+                # Live polls hash the HA artist, which defaults to 'Unknown'
+                content_hash = self._tracking_hash(ha_title, row.get('ha_duration'), row.get('ha_artist') or 'Unknown')
+                self._remember_video(content_hash, build_video_result(row, ha_title))
+
+            history_resolved = 0
+            if WARMUP_HISTORY_HOURS > 0:
+                history_resolved = self._warm_up_from_history(WARMUP_HISTORY_HOURS)
+
+            elapsed = time.time() - start_time
+            logger.info(
+                f"Song tracker warm-up: {len(self._recent_videos)} recent videos in memory, "
+                f"{len(self._throttle)} throttled, {history_resolved} pre-resolved from HA history ({elapsed:.2f}s)"
+            )
+        except Exception as e:
+            logger.error(f"Song tracker warm-up failed: {e}")
+
+    def _restore_throttle(self):
+        """
+        Rebuild the play throttle from plays within the window.
+
+        Play events record the player, so each play is restored for the player
+        it happened on (events without a player apply to every player). Plays
+        whose events were still buffered when the process stopped are only in
+        date_last_played; those newer than the last written event are restored
+        for every player.
+        """
+        now = datetime.now(timezone.utc)
+        recent = self.db.get_recent_plays(now - PLAY_THROTTLE)
+
+        for play in recent['plays']:
+            played_at = self._as_utc(play.get('played_at'))
+            if played_at is None or not play.get('ha_title'):
+                continue
+            content_hash = self._tracking_hash(play['ha_title'], play.get('ha_duration'), play.get('ha_artist') or 'Unknown')
+            for entity in [play['entity']] if play.get('entity') else self.ha_api.entities:
+                self._throttle.restore((entity, content_hash), played_at)
+
+        latest_event = self._as_utc(recent['latest'])
+        for row in self.db.get_recently_played(THROTTLE_RESTORE_ROWS):
+            last_played = self._as_utc(row.get('date_last_played'))
+            if last_played is None or now - last_played >= PLAY_THROTTLE or not row.get('ha_title'):
+                continue
+            if latest_event is not None and last_played <= latest_event:
+                continue
+            content_hash = self._tracking_hash(row['ha_title'], row.get('ha_duration'), row.get('ha_artist') or 'Unknown')
+            for entity in self.ha_api.entities:
+                self._throttle.restore((entity, content_hash), last_played)
+
+    @staticmethod
+    def _as_utc(value) -> Optional[datetime]:
+        """Parse a stored UTC timestamp (string or naive datetime) to an aware datetime."""
+        if isinstance(value, str):
+            try:
+                value = datetime.fromisoformat(value.replace('Z', ''))
+            except ValueError:
+                return None
+        if not isinstance(value, datetime):
+            return None
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+    def _warm_up_from_history(self, hours: int) -> int:
+        """
+        Pre-resolve songs from Home Assistant recorder history against the DB.
+
+        Only local lookups are done here (no YouTube searches are queued), so
+        warm-up never costs API quota.
+
+        Args:
+            hours: How much HA history to load
+
+        Returns:
+            Number of history songs added to the in-memory lookups
+        """
+        from helpers.cache_helpers import build_video_result
+
+        # Nothing would fit, don't fetch hours of history for nothing
+        if len(self._recent_videos) >= WARMUP_RECENT_VIDEOS:
+            return 0
+
+        resolved = 0
+        for media in self.ha_api.get_media_history(hours):
+            # Don't push out recently played videos
+            if len(self._recent_videos) >= WARMUP_RECENT_VIDEOS:
+                break
+
+            title = media.get('title')
+            duration = media.get('duration')
+            if not title or not duration:
+                continue
+
+            content_hash = self._tracking_hash(title, duration, media.get('artist'))
+            if content_hash in self._recent_videos:
+                continue
+
+            cached_video = self.db.find_cached_video_combined(title, duration, media.get('artist'))
+            if cached_video and cached_video.get('yt_video_id'):
+                self._remember_video(content_hash, build_video_result(cached_video, title))
+                resolved += 1
+
+        return resolved
@@ -4,6 +4,9 @@ Startup checks to verify all components are working properly
 
 from typing import Tuple, Optional
 from logging_helper import LoggingHelper, LogType
+from helpers.time_helpers import get_time_until_quota_reset
+from helpers.api_helpers import check_quota_recently_exceeded
+from youtube_api.quota_manager import get_quota_usage
 
 # Get logger instance
 logger = LoggingHelper.get_logger(LogType.MAIN)
@@ -23,9 +26,10 @@ def check_home_assistant_api(ha_api) -> Tuple[bool, dict]:
         media = ha_api.get_current_media()
         response_time = int((time.time() - start_time) * 1000)  # ms
 
-        # Get full entity state
+        # Get full entity state (through the circuit breaker, so a down HA fails fast)
+        from homeassistant_transport import timed_get
         url = f"{ha_api.url}/api/states/{ha_api.entity}"
-        response = ha_api.session.get(url, timeout=10)
+        response = timed_get(ha_api.session, ha_api.breaker, url, 'ha.states')
 
         if response.status_code != 200:
             if response.status_code == 404:
@@ -33,6 +37,13 @@ def check_home_assistant_api(ha_api) -> Tuple[bool, dict]:
             else:
                 return False, {'message': f"HTTP {response.status_code}", 'details': {}}
 
+        # Other configured players only need to exist (one bulk request)
+        if len(ha_api.entities) > 1:
+            states = ha_api.get_media_player_states() or {}
+            missing = [entity for entity in ha_api.entities if entity not in states]
+            if missing:
+                return False, {'message': f"Entity {', '.join(missing)} not found", 'details': {}}
+
         entity_data = response.json()
         state = entity_data.get('state', 'unknown')
         attributes = entity_data.get('attributes', {})
@@ -41,6 +52,7 @@ def check_home_assistant_api(ha_api) -> Tuple[bool, dict]:
         details = {
             'url': ha_api.url,
             'entity': ha_api.entity,
+            'entities': ha_api.entities,
             'state': state,
             'response_time_ms': response_time,
             'media': media if media else None,
@@ -101,59 +113,12 @@ def check_youtube_api(yt_api, db=None) -> Tuple[bool, dict]:
         next_reset_str = None
         if db:
             try:
-                from datetime import datetime, timedelta, timezone
-
-                # Check for recent quota errors (same logic as queue_worker.py)
-                cursor = db._conn.execute(
-                    """
-                    SELECT timestamp, error_message
-                    FROM api_call_log
-                    WHERE success = 0
-                      AND (error_message LIKE '%quota%' OR error_message LIKE '%Quota%')
-                    ORDER BY timestamp DESC
-                    LIMIT 1
-                    """,
-                )
-                row = cursor.fetchone()
-
-                if row:
-                    last_quota_error = dict(row)
-                    error_time_str = last_quota_error.get('timestamp')
-
-                    if error_time_str:
-                        # Parse timestamp
-                        if isinstance(error_time_str, str):
-                            error_dt = datetime.fromisoformat(error_time_str.replace('Z', '+00:00'))
-                        else:
-                            error_dt = error_time_str
-
-                        # Ensure error_dt has timezone
-                        if error_dt.tzinfo is None:
-                            error_dt = error_dt.replace(tzinfo=timezone.utc)
-
-                        # Calculate last quota reset (midnight Pacific Time)
-                        now_utc = datetime.now(timezone.utc)
-                        pacific_offset = timedelta(hours=-8)
-                        now_pacific = now_utc + pacific_offset
-                        midnight_today_pacific = now_pacific.replace(hour=0, minute=0, second=0, microsecond=0)
-                        midnight_today_utc = midnight_today_pacific - pacific_offset
-
-                        if now_utc < midnight_today_utc:
-                            last_reset_utc = midnight_today_utc - timedelta(days=1)
-                        else:
-                            last_reset_utc = midnight_today_utc
-
-                        # Calculate next reset
-                        next_reset_utc = last_reset_utc + timedelta(days=1)
-                        time_until_reset = next_reset_utc - now_utc
-                        hours_until = int(time_until_reset.total_seconds() / 3600)
-                        minutes_until = int((time_until_reset.total_seconds() % 3600) / 60)
-                        next_reset_str = f"{hours_until}h {minutes_until}m"
-
-                        # If quota error occurred AFTER last reset, quota is still exhausted
-                        if error_dt > last_reset_utc:
-                            quota_recently_exceeded = True
-                            logger.debug(f"Quota exceeded - paused until midnight Pacific (in {next_reset_str})")
+                # Check quota state (same logic as queue_worker.py)
+                if check_quota_recently_exceeded(db):
+                    quota_recently_exceeded = True
+                    hours_until, minutes_until = get_time_until_quota_reset()
+                    next_reset_str = f"{hours_until}h {minutes_until}m"
+                    logger.debug(f"Quota exceeded - paused until midnight Pacific (in {next_reset_str})")
             except Exception as e:
                 logger.debug(f"Error checking quota status: {e}")
 
@@ -164,6 +129,7 @@ def check_youtube_api(yt_api, db=None) -> Tuple[bool, dict]:
                 pause_msg += f" (in {next_reset_str})"
 
             # Return early with quota pause message - no API check needed
+            quota_limit = get_quota_usage(db)['limit']
             details = {
                 'authenticated': True,  # We have auth object, just can't use it
                 'worker_running': worker_running,
@@ -171,8 +137,8 @@ def check_youtube_api(yt_api, db=None) -> Tuple[bool, dict]:
                 'quota': {
                     'exceeded': True,
                     'time_until_reset': next_reset_str,
-                    'used': 10000,  # Assume quota fully used when exceeded
-                    'total': 10000,
+                    'used': quota_limit,  # Assume quota fully used when exceeded
+                    'total': quota_limit,
                     'percent': 100.0
                 },
                 'queue': {},
@@ -222,12 +188,12 @@ def check_youtube_api(yt_api, db=None) -> Tuple[bool, dict]:
         # Get detailed statistics if database available
         if db:
             try:
-                from datetime import datetime, timedelta, timezone
-
                 # Get quota usage and call stats (24h)
                 summary_data = db.get_api_call_summary(hours=24)
                 summary = summary_data.get('summary', {})
-                quota_used = summary.get('total_quota', 0) or 0
+                # Quota used since the last Pacific midnight reset (quota ledger)
+                quota_usage = get_quota_usage(db)
+                quota_used = quota_usage['used']
                 total_calls = summary.get('total_calls', 0) or 0
                 successful_calls = summary.get('successful_calls', 0) or 0
                 failed_calls = summary.get('failed_calls', 0) or 0
@@ -244,55 +210,15 @@ def check_youtube_api(yt_api, db=None) -> Tuple[bool, dict]:
 
                 # Calculate time until next reset if not already calculated
                 if next_reset_str is None:
-                    now_utc = datetime.now(timezone.utc)
-
-                    # Determine Pacific Time offset based on DST
-                    # DST in Pacific Time runs from 2nd Sunday in March to 1st Sunday in November
-                    # During DST (PDT): UTC-7, Standard (PST): UTC-8
-                    # For simplicity, we'll check if we're in the DST period
-                    month = now_utc.month
-                    if 3 <= month <= 11:
-                        # Rough DST check (March through November)
-                        # More precise would check exact DST transition dates
-                        if month > 3 and month < 11:
-                            # Definitely DST (April through October)
-                            pacific_offset = timedelta(hours=-7)
-                        elif month == 3:
-                            # March: DST starts 2nd Sunday, approximate as after March 10
-                            if now_utc.day >= 10:
-                                pacific_offset = timedelta(hours=-7)
-                            else:
-                                pacific_offset = timedelta(hours=-8)
-                        else:  # November
-                            # November: DST ends 1st Sunday, approximate as before Nov 7
-                            if now_utc.day < 7:
-                                pacific_offset = timedelta(hours=-7)
-                            else:
-                                pacific_offset = timedelta(hours=-8)
-                    else:
-                        # December through February: Standard time
-                        pacific_offset = timedelta(hours=-8)
-
-                    now_pacific = now_utc + pacific_offset
-                    midnight_today_pacific = now_pacific.replace(hour=0, minute=0, second=0, microsecond=0)
-                    midnight_today_utc = midnight_today_pacific - pacific_offset
-
-                    if now_utc < midnight_today_utc:
-                        last_reset_utc = midnight_today_utc - timedelta(days=1)
-                    else:
-                        last_reset_utc = midnight_today_utc
-
-                    next_reset_utc = last_reset_utc + timedelta(days=1)
-                    time_until_reset = next_reset_utc - now_utc
-                    hours_until = int(time_until_reset.total_seconds() / 3600)
-                    minutes_until = int((time_until_reset.total_seconds() % 3600) / 60)
+                    hours_until, minutes_until = get_time_until_quota_reset()
                     next_reset_str = f"{hours_until}h {minutes_until}m"
 
                 # Populate details
                 details['quota'] = {
                     'used': quota_used,
-                    'total': 10000,
-                    'percent': (quota_used / 10000 * 100) if quota_used > 0 else 0,
+                    'total': quota_usage['limit'],
+                    'remaining': quota_usage['remaining'],
+                    'percent': quota_usage['percent'],
                     'exceeded': quota_recently_exceeded,
                     'time_until_reset': next_reset_str
                 }
@@ -331,7 +257,7 @@ def check_youtube_api(yt_api, db=None) -> Tuple[bool, dict]:
                     message = f"⚠️ QUOTA EXCEEDED • Worker paused until midnight PT (in {next_reset_str})"
                     return False, {'message': message, 'details': details}
                 else:
-                    message = f"✓ Authenticated • Quota: {quota_used:,}/10,000 ({details['quota']['percent']:.1f}%)"
+                    message = f"✓ Authenticated • Quota: {quota_used:,}/{quota_usage['limit']:,} ({details['quota']['percent']:.1f}%)"
                     return True, {'message': message, 'details': details}
 
             except Exception as e:
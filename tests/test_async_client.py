@@ -0,0 +1,69 @@
+"""
+Tests for the bounded-concurrency bulk YouTube client against the local fake API.
+"""
+import pytest
+from google.auth.credentials import AnonymousCredentials
+
+from tools.fake_youtube_api import FakeYouTubeState, start_in_thread
+from youtube_api.async_client import chunk_ids, get_ratings_bulk, list_videos_bulk
+from youtube_api.auth import build_client
+
+
+def _video(video_id):
+    return {'id': video_id, 'snippet': {'title': video_id}, 'contentDetails': {'duration': 'PT3M'}}
+
+
+@pytest.fixture
+def fake_api():
+    videos = {f"vid{index:08d}": _video(f"vid{index:08d}") for index in range(120)}
+    state = FakeYouTubeState(latency_ms=20, videos=videos)
+    server, base_url = start_in_thread(state)
+    yield state, build_client(AnonymousCredentials(), api_endpoint=base_url)
+    server.shutdown()
+
+
+def test_bulk_list_batches_50_ids_per_request(fake_api):
+    """Test that IDs are chunked by 50 and unknown IDs are reported as missing."""
+    state, youtube = fake_api
+    ids = [f"vid{index:08d}" for index in range(120)] + ['deleted0001', 'vid00000000']
+
+    result = list_videos_bulk(youtube, ids, max_concurrency=3)
+
+    assert len(result['videos']) == 120
+    assert result['missing'] == ['deleted0001']
+    assert result['failed'] == []
+    assert result['quota_exceeded'] is False
+    assert state.stats()['requests']['videos.list'] == 3
+
+
+def test_quota_exhaustion_stops_remaining_requests(fake_api):
+    """Test that the first quota error marks the job and fails the rest without calling the API."""
+    state, youtube = fake_api
+    state.configure({'quota_limit': 1})
+    ids = [f"vid{index:08d}" for index in range(120)]
+
+    result = list_videos_bulk(youtube, ids, max_concurrency=1)
+
+    assert result['quota_exceeded'] is True
+    assert len(result['videos']) == 50
+    assert len(result['failed']) == 70
+    assert state.stats()['requests']['videos.list'] == 2
+
+
+def test_chunk_ids_deduplicates_and_keeps_order():
+    """Test request chunking."""
+    assert chunk_ids(['a', 'b', 'a', 'c'], size=2) == [['a', 'b'], ['c']]
+
+
+def test_bulk_get_ratings_uses_one_call_per_50_ids(fake_api):
+    """Test that ratings for many videos come back from one getRating call per 50 IDs."""
+    state, youtube = fake_api
+    state.ratings['vid00000001'] = 'like'
+    ids = [f"vid{index:08d}" for index in range(60)]
+
+    result = get_ratings_bulk(youtube, ids)
+
+    assert result['ratings']['vid00000001'] == 'like'
+    assert result['ratings']['vid00000059'] == 'none'
+    assert len(result['ratings']) == 60
+    assert state.stats()['requests']['videos.getRating'] == 2
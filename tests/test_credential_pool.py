@@ -0,0 +1,86 @@
+"""
+Tests for the multi-project credential pool against two local fake APIs.
+"""
+import pytest
+from google.auth.credentials import AnonymousCredentials
+
+from tools.fake_youtube_api import FakeYouTubeState, start_in_thread
+from youtube_api import YouTubeAPI, credential_pool, search
+from youtube_api.auth import build_client
+from youtube_api.credential_pool import CredentialPool
+from youtube_api.search import search_video_globally
+from quota_error import QuotaExceededError
+
+
+@pytest.fixture
+def two_projects(monkeypatch):
+    monkeypatch.setattr(credential_pool, '_active_credentials', list(credential_pool._active_credentials))
+    monkeypatch.setattr(credential_pool, '_db', None)
+    monkeypatch.setattr(search, '_db', None)
+    servers = []
+    clients = {}
+    states = {}
+    for name, quota_limit in (('primary', 50), ('spare', 10000)):
+        state = FakeYouTubeState(seed=1, quota_limit=quota_limit)
+        server, base_url = start_in_thread(state)
+        client = build_client(AnonymousCredentials(), api_endpoint=base_url)
+        client.ytt_credential = name
+        servers.append(server)
+        clients[name] = client
+        states[name] = state
+    yield CredentialPool(clients), states
+    for server in servers:
+        server.shutdown()
+
+
+def test_search_fails_over_to_credential_with_quota(two_projects):
+    """Test that quotaExceeded on one project retries the search on the next one."""
+    pool, states = two_projects
+
+    candidates = pool.call('search', lambda youtube: search_video_globally(youtube, 'hello world'))
+
+    assert states['primary'].stats()['requests'].get('search') == 1
+    assert states['spare'].stats()['requests'].get('search') == 1
+    assert candidates
+    assert credential_pool.active_credentials() == ['primary', 'spare']
+
+
+def test_bulk_videos_list_fails_over_without_losing_results(two_projects):
+    """Test that chunks rejected for quota on one project are fetched on the next one."""
+    pool, states = two_projects
+    states['primary'].quota_limit = 2
+    yt_api = YouTubeAPI(pool.primary)
+    yt_api.pool = pool
+    video_ids = [f"vid{index:08d}" for index in range(120)]  # 3 requests
+
+    result = yt_api.list_videos_bulk(video_ids, max_concurrency=1)
+
+    assert states['primary'].stats()['quota_used'] == 2
+    assert states['spare'].stats()['requests'].get('videos.list') == 1
+    assert not result['quota_exceeded'] and result['failed'] == []
+    assert sorted(list(result['videos']) + result['missing']) == video_ids
+
+
+def test_ratings_stay_on_primary_and_exhausted_pool_raises(two_projects):
+    """Test that rating calls are pinned to the rating owner and an empty pool raises."""
+    pool, _ = two_projects
+    assert pool.client_for('videos.rate', exclude=('primary',))[0] == 'primary'
+    assert pool.client_for('videos.list', exclude=('primary', 'spare')) is None
+    with pytest.raises(QuotaExceededError):
+        pool.call('videos.list', lambda youtube: (_ for _ in ()).throw(QuotaExceededError("quota")))
+
+
+def test_search_reuses_search_list_when_videos_list_fails_over(two_projects):
+    """Test that a videos.list quota error moves only that step, charging one search.list."""
+    pool, states = two_projects
+    states['primary'].quota_limit = 100  # enough for search.list, not for the videos.list after it
+    states['spare'].videos = states['primary'].videos  # both projects see the same YouTube
+    yt_api = YouTubeAPI(pool.primary)
+    yt_api.pool = pool
+
+    candidates = yt_api.search_video_globally('hello world')
+
+    searches = [states[name].stats()['requests'].get('search', 0) for name in ('primary', 'spare')]
+    assert searches == [1, 0]
+    assert states['spare'].stats()['requests'].get('videos.list')
+    assert candidates
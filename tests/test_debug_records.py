@@ -0,0 +1,102 @@
+"""
+Tests for compact search debug records.
+"""
+import json
+import sqlite3
+
+from database import connection
+from database.connection import DatabaseConnection
+from helpers.debug_record_helpers import (
+    compact_debug_record,
+    encode_debug_record,
+    decode_debug_record,
+    debug_record_row,
+    DEBUG_RECORD_FORMAT
+)
+
+RAW_DEBUG_DATA = {
+    'search_query': 'artist song',
+    'search_response': {
+        'items': [
+            {'id': {'videoId': 'aaaaaaaaaaa'}, 'snippet': {'title': 'Artist - Song', 'description': 'x' * 500}},
+            {'id': {'videoId': 'bbbbbbbbbbb'}, 'snippet': {'title': 'Song (Live)', 'description': 'y' * 500}},
+        ]
+    },
+    'title_scores': {'aaaaaaaaaaa': 0.9, 'bbbbbbbbbbb': 0.4},
+    'batch_responses': [
+        {
+            'phase': 'Phase 1',
+            'batch_num': 1,
+            'video_ids_requested': 2,
+            'video_ids_cached': 0,
+            'response': {'items': [
+                {
+                    'id': 'aaaaaaaaaaa',
+                    'snippet': {'title': 'Artist - Song', 'channelTitle': 'Artist', 'description': 'x' * 500},
+                    'contentDetails': {'duration': 'PT3M21S'}
+                }
+            ]}
+        }
+    ],
+    'videos_checked': 2,
+    'candidates_found': 1,
+    'match_rank': 0
+}
+
+
+def test_compact_record_keeps_ids_titles_durations_and_scores():
+    """Test that compaction keeps the useful fields and drops descriptions."""
+    record = compact_debug_record(RAW_DEBUG_DATA)
+
+    assert record['format'] == DEBUG_RECORD_FORMAT
+    assert record['search_results'][0] == {'id': 'aaaaaaaaaaa', 'title': 'Artist - Song', 'score': 0.9}
+    assert record['batches'][0]['videos'] == [
+        {'id': 'aaaaaaaaaaa', 'title': 'Artist - Song', 'channel': 'Artist', 'duration': 201}
+    ]
+    assert record['match_rank'] == 0 and record['candidates_found'] == 1
+    assert 'x' * 10 not in str(record)
+    assert compact_debug_record(record) is record
+
+
+def test_debug_record_round_trip_and_summary_columns():
+    """Test that stored records decompress to the same dict and summarize correctly."""
+    record = compact_debug_record(RAW_DEBUG_DATA)
+    row = debug_record_row(record, raw_size=4000)
+
+    assert row[:6] == (DEBUG_RECORD_FORMAT, 4000, 0, 0, 1, 1)
+    assert len(row[6]) < 4000
+    assert decode_debug_record(row[6]) == record
+    assert decode_debug_record(encode_debug_record({'cache_hit': True})) == {'cache_hit': True}
+    assert decode_debug_record(b'not zlib') is None
+
+
+def test_inline_blobs_are_migrated_in_batches(monkeypatch):
+    """Test that queue blobs are compacted batch by batch and cleared once written."""
+    monkeypatch.setattr(connection, 'DEBUG_MIGRATION_BATCH_SIZE', 2)
+    conn = sqlite3.connect(':memory:')
+    conn.row_factory = sqlite3.Row
+    conn.executescript(DatabaseConnection.UNIFIED_QUEUE_SCHEMA)
+    conn.executescript(DatabaseConnection.QUEUE_DEBUG_RECORDS_SCHEMA)
+    blobs = [json.dumps(RAW_DEBUG_DATA)] * 3 + ['not json', None]
+    for blob in blobs:
+        conn.execute(
+            "INSERT INTO queue (type, status, payload, completed_at, api_response_data) "
+            "VALUES ('search', 'completed', ?, '2026-10-01 12:00:00', ?)",
+            (json.dumps({'ha_title': 'Song'}), blob)
+        )
+    conn.commit()
+    db = DatabaseConnection.__new__(DatabaseConnection)
+    db._conn = conn
+
+    statements = []
+    conn.set_trace_callback(statements.append)
+    db._migrate_queue_debug_records()
+    conn.set_trace_callback(None)
+
+    assert [row[0] for row in conn.execute("SELECT queue_id FROM queue_debug_records ORDER BY queue_id")] == [1, 2, 3]
+    assert conn.execute("SELECT COUNT(*) FROM queue WHERE api_response_data IS NOT NULL").fetchone()[0] == 0
+    assert sum(1 for statement in statements if statement == 'COMMIT') == 2
+    record = decode_debug_record(
+        conn.execute("SELECT data FROM queue_debug_records WHERE queue_id = 3").fetchone()[0]
+    )
+    assert record['match_rank'] == 0
@@ -0,0 +1,49 @@
+"""
+Tests for the local fake YouTube API server used by the replay benchmark.
+"""
+import pytest
+from googleapiclient.errors import HttpError
+
+from tools.fake_youtube_api import FakeYouTubeState, create_app, format_duration
+from youtube_api.quota_manager import quota_error_detail
+
+
+@pytest.fixture
+def client():
+    state = FakeYouTubeState(seed=1, quota_limit=250)
+    return create_app(state).test_client(), state
+
+
+def test_search_and_videos_list_are_deterministic(client):
+    """Test that synthetic results are stable and videos.list resolves them."""
+    test_client, _ = client
+    first = test_client.get('/youtube/v3/search?q=hello&maxResults=5').get_json()
+    second = test_client.get('/youtube/v3/search?q=hello&maxResults=5').get_json()
+    assert first == second
+    assert len(first['items']) == 5
+
+    ids = ','.join(item['id']['videoId'] for item in first['items'])
+    videos = test_client.get(f'/youtube/v3/videos?id={ids}').get_json()
+    assert [video['id'] for video in videos['items']] == ids.split(',')
+
+
+def test_quota_exhaustion_returns_detectable_quota_error(client):
+    """Test that exceeding the quota limit returns a 403 the add-on recognises as quota."""
+    test_client, state = client
+    assert test_client.get('/youtube/v3/search?q=a').status_code == 200
+    assert test_client.get('/youtube/v3/search?q=b').status_code == 200
+
+    response = test_client.get('/youtube/v3/search?q=c')
+    assert response.status_code == 403
+    assert state.stats()['quota_used'] == 200
+
+    resp = type('Resp', (), {'status': 403, 'reason': 'Forbidden'})()
+    error = HttpError(resp, response.data)
+    assert quota_error_detail(error)
+
+
+def test_format_duration():
+    """Test ISO 8601 duration formatting."""
+    assert format_duration(200) == 'PT3M20S'
+    assert format_duration(3600) == 'PT1H'
+    assert format_duration(0) == 'PT0S'
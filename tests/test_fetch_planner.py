@@ -0,0 +1,75 @@
+"""
+Unit tests for the adaptive videos.list fetch planner.
+"""
+import time
+import pytest
+from youtube_api import fetch_planner
+from youtube_api.fetch_planner import plan_fetch, PHASE_1_LIMIT
+
+
+@pytest.fixture
+def set_miss_rate(monkeypatch):
+    """Pin the learned estimate (restored after the test) so plan_fetch doesn't touch the database."""
+    def pin(miss_rate, samples=100):
+        monkeypatch.setattr(fetch_planner, '_history', {
+            'miss_rate': miss_rate,
+            'samples': samples,
+            'loaded_at': time.time()
+        })
+    return pin
+
+
+@pytest.fixture
+def video_ids():
+    return [f"vid{i:08d}" for i in range(25)]
+
+
+@pytest.mark.parametrize('miss_rate', [0.0, 0.1, 0.95])
+def test_uncached_phase1_always_combines(video_ids, set_miss_rate, miss_rate):
+    """Test that one request for all 25 never costs more than a Phase 1 request."""
+    set_miss_rate(miss_rate)
+    plan = plan_fetch(video_ids, set())
+    assert plan['strategy'] == 'combined'
+    assert plan['phases'] == [("Combined", video_ids)]
+    assert plan['combined_requests'] == 1
+    assert plan['phased_requests'] == 1 + miss_rate
+
+
+def test_cached_phase1_uses_phased_fetch(video_ids, set_miss_rate):
+    """Test that a free Phase 1 only pays for Phase 2 on a miss."""
+    set_miss_rate(0.3)
+    plan = plan_fetch(video_ids, set(video_ids[:PHASE_1_LIMIT]))
+    assert plan['strategy'] == 'phased'
+    assert [len(ids) for _, ids in plan['phases']] == [10, 15]
+    assert plan['combined_requests'] == 1 and plan['phased_requests'] == 0.3
+
+
+def test_cached_phase1_combines_when_phase1_always_misses(video_ids, set_miss_rate):
+    """Test that a certain Phase 1 miss makes both plans one request, so it combines."""
+    set_miss_rate(1.0)
+    plan = plan_fetch(video_ids, set(video_ids[:PHASE_1_LIMIT]))
+    assert plan['strategy'] == 'combined'
+
+
+def test_fully_cached_list_costs_nothing(video_ids, set_miss_rate):
+    """Test that a fully cached list needs no request either way."""
+    set_miss_rate(0.1)
+    plan = plan_fetch(video_ids, set(video_ids))
+    assert plan['strategy'] == 'combined'
+    assert plan['combined_requests'] == 0 and plan['phased_requests'] == 0
+
+
+def test_short_result_list_is_single_phase(video_ids, set_miss_rate):
+    """Test that 10 or fewer results never need a second phase."""
+    set_miss_rate(0.5)
+    plan = plan_fetch(video_ids[:8], set())
+    assert plan['strategy'] == 'single'
+    assert len(plan['phases']) == 1
+
+
+def test_phase1_hit_from_legacy_rows():
+    """Test that rows without match_rank are classified from batch counts."""
+    assert fetch_planner._phase1_hit({'match_rank': None, 'batch_count': 1, 'candidates_found': 1})
+    assert not fetch_planner._phase1_hit({'match_rank': None, 'batch_count': 2, 'candidates_found': 1})
+    assert not fetch_planner._phase1_hit({'match_rank': None, 'batch_count': 1, 'candidates_found': 0})
+    assert not fetch_planner._phase1_hit({'match_rank': 14, 'batch_count': 1, 'candidates_found': 1})
@@ -0,0 +1,106 @@
+"""
+Tests for the Home Assistant WebSocket subscription against a local fake server.
+"""
+import threading
+import time
+
+import pytest
+
+from homeassistant_api import HomeAssistantAPI, parse_entities
+from homeassistant_events import HomeAssistantEventStream
+from tools.fake_homeassistant import FakeHomeAssistantState, start_in_thread, stop
+
+
+@pytest.fixture(params=[1])
+def fake_ha(request, monkeypatch):
+    entities = [f"media_player.room_{index}" for index in range(request.param)]
+    state = FakeHomeAssistantState(entities=entities)
+    server, base_url = start_in_thread(state)
+    monkeypatch.setenv('HOME_ASSISTANT_URL', base_url)
+    monkeypatch.setenv('HOME_ASSISTANT_TOKEN', state.token)
+    monkeypatch.setenv('MEDIA_PLAYER_ENTITY', ', '.join(entities))
+    monkeypatch.delenv('SUPERVISOR_TOKEN', raising=False)
+    monkeypatch.delenv('HOME_ASSISTANT_WS_URL', raising=False)
+    yield state, HomeAssistantAPI()
+    stop(server, state)
+
+
+def _wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_state_changes_are_pushed_until_the_connection_drops(fake_ha):
+    """Test that subscribed state changes reach the callback and a drop ends listen()."""
+    state, ha_api = fake_ha
+    stream = HomeAssistantEventStream(ha_api)
+    media = []
+    subscribed = []
+    result = []
+    stop_event = threading.Event()
+
+    thread = threading.Thread(target=lambda: result.append(
+        stream.listen(lambda new_state: media.append(ha_api.media_from_state(new_state)), stop_event,
+                      on_subscribed=lambda: subscribed.append(True))
+    ))
+    thread.start()
+    assert _wait_for(lambda: state.stats()['subscribers'] == 1)
+
+    state.play('Short Song', 12)
+    state.set_state('paused')
+    assert _wait_for(lambda: len(media) == 2)
+
+    state.drop_connections()
+    thread.join(timeout=3)
+    assert result == [True]
+    assert subscribed == [True]
+    assert media[0]['title'] == 'Short Song' and media[0]['duration'] == 12
+    assert media[1] is None
+    assert state.stats()['requests']['states'] == 0
+
+
+def test_invalid_token_fails_without_subscribing(fake_ha, monkeypatch):
+    """Test that a rejected token makes listen() return False so the tracker keeps polling."""
+    state, ha_api = fake_ha
+    monkeypatch.setattr(ha_api, 'token', 'wrong-token')
+
+    assert HomeAssistantEventStream(ha_api).listen(lambda new_state: None, threading.Event()) is False
+    assert state.stats()['websocket']['auth_failed'] == 1
+
+
+def test_websocket_url_follows_supervisor_proxy():
+    """Test that the Supervisor proxy and direct URLs map to their WebSocket endpoints."""
+    assert HomeAssistantAPI._websocket_url('http://supervisor/core') == 'ws://supervisor/core/websocket'
+    assert HomeAssistantAPI._websocket_url('https://ha.local:8123/') == 'wss://ha.local:8123/api/websocket'
+
+
+@pytest.mark.parametrize('fake_ha', [3], indirect=True)
+def test_several_players_share_one_subscription_and_one_poll(fake_ha):
+    """Test that every configured player is followed over one connection and one bulk request."""
+    state, ha_api = fake_ha
+    stream = HomeAssistantEventStream(ha_api)
+    pushed = []
+    stop_event = threading.Event()
+
+    thread = threading.Thread(target=stream.listen, args=(lambda new_state: pushed.append(new_state), stop_event))
+    thread.start()
+    assert _wait_for(lambda: state.stats()['subscribers'] == 1)
+
+    state.play('Kitchen Song', 200, entity='media_player.room_2')
+    state.play('Lounge Song', 180, entity='media_player.room_0')
+    assert _wait_for(lambda: len(pushed) == 2)
+    stop_event.set()
+    stream.close()
+    thread.join(timeout=3)
+
+    assert [new_state['entity_id'] for new_state in pushed] == ['media_player.room_2', 'media_player.room_0']
+    states = ha_api.get_media_player_states()
+    assert sorted(states) == ['media_player.room_0', 'media_player.room_1', 'media_player.room_2']
+    assert ha_api.get_current_media('media_player.room_2')['title'] == 'Kitchen Song'
+    assert state.stats()['requests']['states_all'] == 1
+    assert state.stats()['requests']['websocket_connect'] == 1
+    assert parse_entities(' media_player.a,media_player.b,,media_player.a ') == ['media_player.a', 'media_player.b']
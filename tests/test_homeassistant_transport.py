@@ -0,0 +1,58 @@
+"""
+Tests for the Home Assistant transport: GET retries, circuit breaker and latency histograms.
+"""
+import time
+
+import pytest
+
+from homeassistant_api import HomeAssistantAPI
+from homeassistant_transport import CircuitBreaker
+from metrics_tracker import metrics
+from tools.fake_homeassistant import FakeHomeAssistantState, start_in_thread, stop
+
+
+@pytest.fixture
+def fake_ha(monkeypatch):
+    state = FakeHomeAssistantState()
+    server, base_url = start_in_thread(state)
+    monkeypatch.setenv('HOME_ASSISTANT_URL', base_url)
+    monkeypatch.setenv('HOME_ASSISTANT_TOKEN', state.token)
+    monkeypatch.setenv('MEDIA_PLAYER_ENTITY', state.entity)
+    monkeypatch.delenv('SUPERVISOR_TOKEN', raising=False)
+    yield state, HomeAssistantAPI()
+    stop(server, state)
+
+
+def test_proxy_errors_are_retried(fake_ha):
+    """Test that a GET survives transient 503s from the proxy within one call."""
+    state, ha_api = fake_ha
+    before = metrics.get_latency_stats()['histograms'].get('ha.states', {}).get('count', 0)
+    state.fail_next(2)
+
+    assert ha_api.get_media_player_state()['entity_id'] == state.entity
+    assert state.stats()['requests']['faults'] == 2
+    assert state.stats()['requests']['states'] == 1
+    assert metrics.get_latency_stats()['histograms']['ha.states']['count'] == before + 1
+    assert ha_api.breaker.state == 'closed'
+
+
+def test_circuit_fails_fast_while_home_assistant_is_down(fake_ha):
+    """Test that repeated failures open the circuit and a trial request closes it again."""
+    state, ha_api = fake_ha
+    ha_api.breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.3)
+    state.fail_next(6)  # two calls, each retried twice
+
+    assert ha_api.get_media_player_state() is None
+    assert ha_api.get_media_player_state() is None
+    assert ha_api.breaker.state == 'open'
+
+    start = time.monotonic()
+    assert ha_api.get_media_player_state() is None
+    assert time.monotonic() - start < 0.05
+    assert state.stats()['requests']['faults'] == 6  # nothing was sent
+    assert ha_api.breaker.stats()['rejected_requests'] == 1
+
+    time.sleep(0.35)
+    assert ha_api.breaker.state == 'half_open'
+    assert ha_api.get_media_player_state() is not None
+    assert ha_api.breaker.stats()['state'] == 'closed'
@@ -0,0 +1,74 @@
+"""
+Tests for lookahead searches: upcoming tracks from HA, queue priority and quota admission.
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from database.connection import DatabaseConnection
+from database.queue_operations import (
+    QueueOperations, SEARCH_PRIORITY, DEFERRABLE_SEARCH_PRIORITY, PREFETCH_SEARCH_PRIORITY
+)
+from homeassistant_api import upcoming_media
+from quota_forecast import forecast_quota
+
+
+def _queue():
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(DatabaseConnection.UNIFIED_QUEUE_SCHEMA)
+    return conn, QueueOperations(conn, threading.Lock())
+
+
+def _item(conn, queue_id):
+    row = conn.execute("SELECT priority, payload FROM queue WHERE id = ?", (queue_id,)).fetchone()
+    return row['priority'], json.loads(row['payload'])
+
+
+def test_prefetch_search_becomes_a_regular_search_when_played_or_rated():
+    """Test that a lookahead search waits at the lowest priority until the song is wanted."""
+    conn, queue = _queue()
+    media = {'title': 'Next Song', 'artist': 'Band', 'duration': 180, 'app_name': 'YouTube'}
+
+    queue_id = queue.enqueue_search(media, prefetch=True)
+    assert queue.enqueue_search(media, prefetch=True) == queue_id
+    priority, payload = _item(conn, queue_id)
+    assert priority == PREFETCH_SEARCH_PRIORITY and payload['prefetch'] and payload['play_count'] == 0
+    assert queue.get_pending_demand() == {'ratings': 0, 'searches': 0, 'deferrable_searches': 0, 'prefetch_searches': 1}
+
+    assert queue.enqueue_search(media) == queue_id  # first play
+    priority, payload = _item(conn, queue_id)
+    assert priority == DEFERRABLE_SEARCH_PRIORITY and not payload['prefetch'] and payload['play_count'] == 1
+
+    assert queue.enqueue_search(media, callback_rating='like') == queue_id
+    priority, payload = _item(conn, queue_id)
+    assert priority == SEARCH_PRIORITY and payload['callback_rating'] == 'like'
+
+
+def test_prefetch_needs_budget_beyond_first_plays():
+    """Test that lookahead searches are only admitted with budget left after first plays."""
+    usage = {'quota_day': '2026-10-18', 'used': 9000, 'limit': 10000, 'remaining': 1000}
+    args = ([0.0] * 24, {'ratings': 0.0, 'searches': 0.0},
+            datetime(2026, 10, 18, 1, 0, tzinfo=timezone.utc), datetime(2026, 10, 18, 7, 0, tzinfo=timezone.utc))
+
+    quiet = forecast_quota(usage, {'ratings': 0, 'searches': 0, 'deferrable_searches': 0, 'prefetch_searches': 4}, *args)
+    assert quiet['admit_first_plays'] and quiet['admit_prefetch']
+
+    busy = forecast_quota(usage, {'ratings': 0, 'searches': 0, 'deferrable_searches': 9, 'prefetch_searches': 4}, *args)
+    assert busy['affordable_searches'] == 9
+    assert busy['admit_first_plays'] and not busy['admit_prefetch']
+
+
+def test_upcoming_media_from_queue_attributes():
+    """Test both queue attribute shapes, inheriting the player's app."""
+    state = {'state': 'playing', 'attributes': {
+        'app_name': 'YouTube',
+        'media_queue': [{'media_title': 'One', 'media_duration': 200}, {'title': 'Two', 'artist': 'B'}, 'junk']
+    }}
+    assert [(m['title'], m['artist'], m['app_name']) for m in upcoming_media(state)] == [
+        ('One', 'Unknown', 'YouTube'), ('Two', 'B', 'YouTube')]
+
+    state = {'state': 'playing', 'attributes': {'next_media_title': 'Three', 'next_media_duration': 90}}
+    assert [(m['title'], m['duration']) for m in upcoming_media(state)] == [('Three', 90)]
+    assert upcoming_media({'state': 'playing', 'attributes': {}}) == []
@@ -0,0 +1,30 @@
+"""
+Tests for parsing refreshed video metadata.
+"""
+from metadata_refresher import parse_refreshed_video
+
+
+def test_parse_refreshed_video_maps_columns():
+    """Test that a videos.list resource maps onto video_ratings columns."""
+    item = {
+        'id': 'abc123def45',
+        'snippet': {'title': 'Renamed', 'channelTitle': 'Chan', 'channelId': 'UC1', 'categoryId': '10',
+                    'liveBroadcastContent': 'none'},
+        'contentDetails': {'duration': 'PT4M5S'},
+        'status': {'privacyStatus': 'public', 'uploadStatus': 'processed'}
+    }
+    video = parse_refreshed_video(item)
+    assert video['yt_title'] == 'Renamed'
+    assert video['yt_category_id'] == 10
+    assert video['yt_duration'] == 245
+    assert video['yt_unavailable_reason'] is None
+
+
+def test_parse_refreshed_video_flags_dead_videos():
+    """Test that private and rejected uploads are flagged and bad durations are kept."""
+    private = parse_refreshed_video({'id': 'a', 'status': {'privacyStatus': 'private'}})
+    rejected = parse_refreshed_video({'id': 'b', 'status': {'uploadStatus': 'rejected'},
+                                      'contentDetails': {'duration': 'bogus'}})
+    assert private['yt_unavailable_reason'] == 'private'
+    assert rejected['yt_unavailable_reason'] == 'rejected'
+    assert rejected['yt_duration'] is None
@@ -0,0 +1,101 @@
+"""
+Tests for the buffered play event writer and the rollup-based analytics.
+"""
+import sqlite3
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+from database.connection import DatabaseConnection, MIGRATION_PLAY_TRANSITIONS
+from database.play_event_operations import PlayEventOperations
+from database.stats_operations import StatsOperations
+
+
+def _connection():
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(DatabaseConnection.VIDEO_RATINGS_SCHEMA)
+    conn.executescript(DatabaseConnection.PLAY_EVENTS_SCHEMA)
+    for video_id, title in (('aaaaaaaaaaa', 'Song A'), ('bbbbbbbbbbb', 'Song B')):
+        conn.execute(
+            "INSERT INTO video_ratings (yt_video_id, ha_title, yt_title, yt_url) VALUES (?, ?, ?, ?)",
+            (video_id, title, title, f"https://www.youtube.com/watch?v={video_id}")
+        )
+    return SimpleNamespace(connection=conn, lock=threading.Lock())
+
+
+def test_events_are_buffered_then_rolled_up():
+    """Test that events are written on flush and every play counts in the rollups."""
+    connection = _connection()
+    writer = PlayEventOperations(connection.connection, connection.lock)
+    stats = StatsOperations(connection)
+
+    # Wednesday 2026-10-14, two plays of A in the 09:00 hour, one of B at 21:00
+    writer.record('aaaaaaaaaaa', entity='media_player.kitchen', source='song_tracker',
+                  played_at=datetime(2026, 10, 14, 9, 5))
+    writer.record('aaaaaaaaaaa', entity='media_player.kitchen', source='song_tracker',
+                  played_at=datetime(2026, 10, 14, 9, 55))
+    writer.record('bbbbbbbbbbb', source='queue_search', played_at=datetime(2026, 10, 14, 21, 0))
+    assert connection.connection.execute("SELECT COUNT(*) FROM play_events").fetchone()[0] == 0
+
+    assert writer.flush() == 3
+    assert writer.flush() == 0
+
+    patterns = stats.get_listening_patterns()
+    assert patterns['by_day'] == [{'day_of_week': 3, 'play_count': 3}]
+    assert patterns['by_hour'] == [{'hour': 9, 'play_count': 2}, {'hour': 21, 'play_count': 1}]
+
+    daily = connection.connection.execute("SELECT yt_video_id, plays FROM play_rollups_daily ORDER BY 1").fetchall()
+    assert [tuple(row) for row in daily] == [('aaaaaaaaaaa', 2), ('bbbbbbbbbbb', 1)]
+
+    history = stats.get_play_history(limit=10)
+    assert [row['yt_title'] for row in history] == ['Song B', 'Song A', 'Song A']
+    assert history[1]['entity'] == 'media_player.kitchen' and history[0]['play_source'] == 'queue_search'
+    assert len(stats.get_play_history(limit=10, date_to='2026-10-14 12:00:00')) == 2
+
+
+def test_transitions_follow_each_player_across_flushes():
+    """Test that consecutive plays on one player become transitions, gaps and repeats don't."""
+    connection = _connection()
+    writer = PlayEventOperations(connection.connection, connection.lock)
+    kitchen = 'media_player.kitchen'
+
+    writer.record('aaaaaaaaaaa', entity=kitchen, played_at=datetime(2026, 10, 14, 9, 0))
+    writer.record('bbbbbbbbbbb', entity='media_player.lounge', played_at=datetime(2026, 10, 14, 9, 1))
+    writer.flush()
+    writer.record('aaaaaaaaaaa', entity=kitchen, played_at=datetime(2026, 10, 14, 9, 3))  # repeat
+    writer.record('bbbbbbbbbbb', entity=kitchen, played_at=datetime(2026, 10, 14, 9, 6))
+    writer.record('aaaaaaaaaaa', entity=kitchen, played_at=datetime(2026, 10, 14, 12, 0))  # after a gap
+    writer.record('bbbbbbbbbbb', source='queue_search', played_at=datetime(2026, 10, 14, 12, 1))  # no player
+    writer.flush()
+
+    # A fresh writer continues the chain from the written events
+    restarted = PlayEventOperations(connection.connection, connection.lock)
+    restarted.record('bbbbbbbbbbb', entity=kitchen, played_at=datetime(2026, 10, 14, 12, 4))
+    restarted.flush()
+
+    assert restarted.get_next_videos('bbbbbbbbbbb') == []
+    next_videos = restarted.get_next_videos('aaaaaaaaaaa')
+    assert [(row['yt_video_id'], row['transitions']) for row in next_videos] == [('bbbbbbbbbbb', 2)]
+
+
+def test_transition_seeding_runs_once_even_when_nothing_is_seeded():
+    """Test that an event log of only 'migrated' rows doesn't rescan on every startup."""
+    connection = _connection()
+    conn = connection.connection
+    conn.execute(
+        "INSERT INTO play_events (played_at, yt_video_id, entity, source) "
+        "VALUES ('2026-10-14 09:00:00', 'aaaaaaaaaaa', NULL, 'migrated')"
+    )
+    db = DatabaseConnection.__new__(DatabaseConnection)
+    db._conn = conn
+
+    statements = []
+    conn.set_trace_callback(statements.append)
+    db._migrate_play_transitions()
+    db._migrate_play_transitions()
+    conn.set_trace_callback(None)
+
+    assert conn.execute("SELECT COUNT(*) FROM play_transitions").fetchone()[0] == 0
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == MIGRATION_PLAY_TRANSITIONS
+    assert sum(1 for statement in statements if 'INSERT INTO play_transitions' in statement) == 1
@@ -0,0 +1,88 @@
+"""
+Tests for scrobble-style playback sessions and how the song tracker uses them.
+"""
+from datetime import datetime, timezone
+
+from playback_session import PlaybackSession, PLAY, SKIP, track_key
+from song_tracker import SongTracker
+
+
+def test_pauses_and_seeks_do_not_count_as_listening():
+    """Test that only time spent playing counts towards the play threshold."""
+    session = PlaybackSession(('Song',), 300, playing=True, position=0, now=0)
+    assert session.threshold == 150
+
+    session.advance(False, 60, now=60)  # paused after a minute
+    session.advance(True, 60, now=600)  # resumed much later
+    session.advance(True, 250, now=610)  # seeked forward
+    assert session.seeks == 1
+    assert session.listened == 70 and not session.reached
+    assert session.finish(now=620, replaced=True) == SKIP
+
+    long_track = PlaybackSession(('Mix',), 3600, playing=True, position=0, now=0)
+    assert long_track.threshold == 240
+    assert long_track.finish(now=250, replaced=True) == PLAY
+
+
+def test_session_end_and_repeat():
+    """Test stopped, committed and repeated sessions."""
+    stopped = PlaybackSession(('Song',), 200, playing=True, position=0, now=0)
+    assert stopped.finish(now=30, replaced=False) is None
+
+    # Time after the end of the track is not credited
+    short = PlaybackSession(('Short',), 20, playing=True, position=15, now=0)
+    assert short.finish(now=60, replaced=True) == SKIP and short.listened == 5
+
+    repeated = PlaybackSession(('Song',), 200, playing=True, position=0, now=0)
+    assert not repeated.advance(True, 120, now=120)
+    assert repeated.reached
+    assert repeated.advance(True, 2, now=202)
+
+    joined = PlaybackSession(('Song',), 200, playing=True, position=150, now=0, joined_late=True)
+    assert joined.reached
+    assert track_key({'state': 'idle', 'attributes': {'media_title': 'Song'}}) is None
+
+
+class _FakeHomeAssistant:
+    entities = ['media_player.living_room']
+    entity = 'media_player.living_room'
+
+    def media_from_state(self, state):
+        if state['state'] != 'playing':
+            return None
+        return {'title': state['attributes']['media_title'], 'duration': 200, 'app_name': 'YouTube'}
+
+
+def _state(title, position, last_updated):
+    return {
+        'state': 'playing',
+        'last_updated': last_updated,
+        'attributes': {
+            'media_title': title,
+            'media_duration': 200,
+            'media_position': position,
+            'media_position_updated_at': datetime.now(timezone.utc).isoformat()
+        }
+    }
+
+
+def test_tracker_counts_plays_and_skips_per_session(monkeypatch):
+    """Test that the tracker counts a play only past the threshold and a skip otherwise."""
+    tracker = SongTracker(_FakeHomeAssistant(), db=None)
+    plays, skips = [], []
+    monkeypatch.setattr(tracker, '_track_media', lambda media, entity: plays.append(media['title']))
+    monkeypatch.setattr(tracker, '_record_skip', lambda session, entity: skips.append(session.media['title']))
+    clock = [1000.0]
+    monkeypatch.setattr('song_tracker.time.monotonic', lambda: clock[0])
+
+    tracker._handle_state(_state('First', 0, 't1'))
+    clock[0] += 20
+    tracker._handle_state(_state('Second', 0, 't2'))  # First skipped after 20s
+    assert plays == [] and skips == ['First']
+
+    clock[0] += 110
+    tracker._handle_state(_state('Second', 110, 't3'))  # past half of 200s
+    assert plays == ['Second']
+    clock[0] += 90
+    tracker._handle_state(_state('Third', 0, 't4'))  # Second already counted
+    assert plays == ['Second'] and skips == ['First']
@@ -0,0 +1,47 @@
+"""
+Tests for quota forecasting and first-play search admission.
+"""
+from datetime import datetime, timezone
+
+from quota_forecast import forecast_quota, SEARCH_ITEM_COST, RATING_ITEM_COST
+
+NOW = datetime(2026, 7, 10, 1, 30, tzinfo=timezone.utc)
+RESET = datetime(2026, 7, 10, 7, 0, tzinfo=timezone.utc)
+
+
+def _usage(used, limit=10000):
+    return {'quota_day': '2026-07-09', 'used': used, 'limit': limit, 'remaining': max(0, limit - used)}
+
+
+def test_forecast_admits_first_plays_with_spare_budget():
+    """Test that a quiet day admits every pending search."""
+    forecast = forecast_quota(
+        _usage(1000),
+        {'ratings': 2, 'searches': 1, 'deferrable_searches': 5},
+        [10.0] * 24,
+        {'ratings': 0.0, 'searches': 0.0},
+        NOW, RESET
+    )
+    assert forecast['hours_left'] == 5.5
+    assert forecast['expected_historical'] == 55
+    assert forecast['projected'] == 1000 + 2 * RATING_ITEM_COST + 6 * SEARCH_ITEM_COST + 55
+    assert forecast['admit_first_plays']
+    assert not forecast['deferring']
+    assert forecast['shortfall'] == 0
+
+
+def test_forecast_defers_first_plays_when_budget_is_short():
+    """Test that ratings and priority searches are reserved before first plays."""
+    forecast = forecast_quota(
+        _usage(9000),
+        {'ratings': 4, 'searches': 3, 'deferrable_searches': 10},
+        [0.0] * 24,
+        {'ratings': 0.5, 'searches': 0.2},
+        NOW, RESET
+    )
+    # Arrival-based estimate beats the (empty) history
+    assert forecast['expected_arrivals'] > forecast['expected_historical']
+    assert forecast['shortfall'] > 0
+    assert forecast['deferring']
+    assert forecast['deferred_searches'] == 10 - forecast['affordable_searches']
+    assert forecast['reserved'] == 4 * RATING_ITEM_COST + 3 * SEARCH_ITEM_COST + forecast['expected_arrivals']
@@ -0,0 +1,144 @@
+"""
+Tests for Pacific quota-day bucketing, the quota ledger and the quota cost model.
+"""
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from database.connection import DatabaseConnection, MIGRATION_QUOTA_LEDGER
+from database.quota_ledger_operations import QuotaLedgerOperations
+from helpers.api_helpers import check_quota_recently_exceeded, record_quota_exhausted
+from helpers.time_helpers import get_quota_day
+from youtube_api import credential_pool
+from youtube_api.quota_manager import quota_cost
+
+
+def _connection(path=':memory:'):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(DatabaseConnection.API_USAGE_SCHEMA)
+    conn.executescript(DatabaseConnection.QUOTA_LEDGER_SCHEMA)
+    return conn
+
+
+def test_quota_day_follows_pacific_dst():
+    """Test that quota days roll over at Pacific midnight in both PST and PDT."""
+    # PST (UTC-8): midnight is 08:00 UTC
+    assert get_quota_day(datetime(2026, 1, 10, 7, 59)) == '2026-01-09'
+    assert get_quota_day(datetime(2026, 1, 10, 8, 0)) == '2026-01-10'
+    # PDT (UTC-7): midnight is 07:00 UTC
+    assert get_quota_day(datetime(2026, 7, 10, 6, 59, tzinfo=timezone.utc)) == '2026-07-09'
+    assert get_quota_day(datetime(2026, 7, 10, 7, 0, tzinfo=timezone.utc)) == '2026-07-10'
+
+
+def test_quota_cost_model():
+    """Test per-method costs, minimum cost for failures and free quota rejections."""
+    assert quota_cost('search') == 100
+    assert quota_cost('videos.rate') == 50
+    assert quota_cost('videos.list') == 1
+    assert quota_cost('videos.rate', success=False) == 1
+    assert quota_cost('search', success=False, quota_exceeded=True) == 0
+
+
+def test_append_keeps_the_day_total_running():
+    """Test that every append updates quota_day_totals in step with the ledger."""
+    conn = _connection()
+    ledger = QuotaLedgerOperations(conn, threading.Lock())
+
+    ledger.append('search', 100)
+    ledger.append('videos.list', 1, credential='spare')
+    ledger.append('videos.rate', 1, success=False)
+    ledger.append('search', 0, success=False)  # rejected for quota, still a call
+
+    usage = ledger.get_day_usage()
+    assert usage == {'quota_day': get_quota_day(), 'used': 102, 'calls': 4}
+    assert conn.execute("SELECT SUM(units), COUNT(*) FROM quota_ledger").fetchone()[:] == (102, 4)
+    assert ledger.get_daily_totals() == [{'quota_day': get_quota_day(), 'used': 102, 'calls': 4}]
+    assert ledger.get_credential_usage() == {'primary': 101, 'spare': 1}
+    assert ledger.get_day_breakdown()[0] == {'api_method': 'search', 'used': 100, 'calls': 2}
+
+
+def test_api_usage_is_rebucketed_into_pacific_days_once():
+    """Test the one-time api_usage migration across the spring DST change."""
+    conn = _connection()
+    # DST starts 2026-03-08: Pacific midnight is 08:00 UTC that day, 07:00 UTC the next
+    conn.execute("INSERT INTO api_usage (date, hour_07, hour_08) VALUES ('2026-03-08', 5, 10)")
+    conn.execute("INSERT INTO api_usage (date, hour_06, hour_07) VALUES ('2026-03-09', 20, 40)")
+    db = DatabaseConnection.__new__(DatabaseConnection)
+    db._conn = conn
+
+    db._migrate_api_usage_to_ledger()
+
+    totals = conn.execute("SELECT quota_day, units, calls FROM quota_day_totals ORDER BY quota_day").fetchall()
+    assert [tuple(row) for row in totals] == [('2026-03-07', 5, 0), ('2026-03-08', 30, 0), ('2026-03-09', 40, 0)]
+    ledger = QuotaLedgerOperations(conn, threading.Lock())
+    assert ledger.get_day_breakdown('2026-03-08') == [{'api_method': 'unknown', 'used': 30, 'calls': 0}]
+    assert conn.execute("PRAGMA user_version").fetchone()[0] & MIGRATION_QUOTA_LEDGER
+
+    # Recorded as done: an emptied ledger isn't seeded again
+    conn.execute("DELETE FROM quota_ledger")
+    conn.execute("DELETE FROM quota_day_totals")
+    db._migrate_api_usage_to_ledger()
+    assert conn.execute("SELECT COUNT(*) FROM quota_ledger").fetchone()[0] == 0
+
+
+def _database(ledger):
+    """The Database methods the quota state helpers use."""
+    return SimpleNamespace(
+        set_credential_quota_exhausted=ledger.set_credential_exhausted,
+        set_quota_exhausted=ledger.set_quota_exhausted,
+        get_credential_quota_states=ledger.get_credential_states,
+        get_quota_state=ledger.get_quota_state,
+    )
+
+
+def test_pool_quota_state_waits_for_every_credential(monkeypatch):
+    """Test that the pool-wide state is only set once every active credential is exhausted."""
+    monkeypatch.setattr(credential_pool, '_active_credentials', ['primary', 'spare'])
+    db = _database(QuotaLedgerOperations(_connection(), threading.Lock()))
+
+    record_quota_exhausted(db, 'search', 'primary')
+    assert set(db.get_credential_quota_states()) == {'primary'}
+    assert db.get_quota_state() == {}
+    assert not check_quota_recently_exceeded(db)
+
+    record_quota_exhausted(db, 'videos.list', 'spare')
+    assert db.get_quota_state()['source'] == 'videos.list'
+    assert check_quota_recently_exceeded(db)
+
+
+def test_quota_exceeded_clears_after_reset():
+    """Test that an exhausted state stops counting once resets_at has passed."""
+    ledger = QuotaLedgerOperations(_connection(), threading.Lock())
+    db = _database(ledger)
+    now = datetime.now(timezone.utc)
+
+    ledger.set_quota_exhausted(now - timedelta(hours=2), now + timedelta(minutes=5), 'search')
+    assert check_quota_recently_exceeded(db)
+
+    ledger.set_quota_exhausted(now - timedelta(days=1), now - timedelta(seconds=1), 'search')
+    assert not check_quota_recently_exceeded(db)
+
+
+def test_cached_state_is_reread_after_another_connection_commits(tmp_path):
+    """Test that PRAGMA data_version makes the cached state follow the other process."""
+    path = tmp_path / 'ratings.db'
+    worker = QuotaLedgerOperations(_connection(path), threading.Lock())
+    web_conn = _connection(path)
+    web = QuotaLedgerOperations(web_conn, threading.Lock())
+    assert web.get_quota_state() == {}
+
+    statements = []
+    web_conn.set_trace_callback(statements.append)
+    assert web.get_quota_state() == {}
+    assert not any('FROM quota_state' in statement for statement in statements)  # served from the cache
+
+    now = datetime.now(timezone.utc)
+    worker.set_quota_exhausted(now, now + timedelta(hours=3), 'search')
+    worker.set_credential_exhausted('spare', now, now + timedelta(hours=3), 'videos.list')
+    assert web.get_quota_state()['source'] == 'search'
+    assert web.get_credential_states()['spare']['source'] == 'videos.list'
+
+    worker.clear_quota_exhausted()
+    assert web.get_quota_state() == {} and web.get_credential_states() == {}
@@ -0,0 +1,75 @@
+"""
+Tests for verifying pending ratings against YouTube in bulk.
+"""
+from rating_reconciler import RatingReconciler
+
+
+class _Database:
+    """The Database methods the reconciler uses."""
+
+    def __init__(self, pending, local=None):
+        self.pending = pending
+        self.local = local or {}
+        self.completed = []
+        self.rated = []
+
+    def list_pending_rating_items(self, limit=50):
+        return [item for item in self.pending if item['id'] not in self.completed][:limit]
+
+    def mark_queue_item_completed(self, queue_id, api_response_data=None):
+        self.completed.append(queue_id)
+
+    def get_video(self, yt_video_id):
+        return {'yt_video_id': yt_video_id, 'rating': self.local.get(yt_video_id)}
+
+    def record_rating(self, yt_video_id, rating):
+        self.rated.append((yt_video_id, rating))
+
+    def record_rating_local(self, yt_video_id, rating):
+        self.local[yt_video_id] = rating
+
+
+class _YouTube:
+    def __init__(self, ratings):
+        self.ratings = ratings
+        self.calls = []
+
+    def get_ratings_bulk(self, video_ids):
+        self.calls.append(video_ids)
+        return {'ratings': {video_id: self.ratings.get(video_id, 'none') for video_id in video_ids},
+                'quota_exceeded': False}
+
+
+def _item(queue_id, video_id, rating):
+    return {'id': queue_id, 'payload': {'yt_video_id': video_id, 'rating': rating}}
+
+
+def test_older_conflicting_rating_is_superseded_not_applied():
+    """Test that only the newest pending item of a video is checked and older ones are dropped."""
+    db = _Database([
+        _item(1, 'aaaaaaaaaaa', 'dislike'),
+        _item(2, 'bbbbbbbbbbb', 'like'),
+        _item(3, 'aaaaaaaaaaa', 'like'),  # changed their mind; YouTube already has it
+    ], local={'aaaaaaaaaaa': 'like', 'bbbbbbbbbbb': 'none'})
+    yt_api = _YouTube({'aaaaaaaaaaa': 'like'})
+
+    result = RatingReconciler(db).reconcile(yt_api, 'ccccccccccc')
+
+    assert yt_api.calls == [['ccccccccccc', 'aaaaaaaaaaa', 'bbbbbbbbbbb']]
+    assert result == {'checked': 3, 'completed': 1, 'superseded': 1, 'drifted': 0}
+    assert sorted(db.completed) == [1, 3]
+    # The older dislike is neither applied nor left pending for the worker
+    assert db.rated == [('aaaaaaaaaaa', 'like')]
+    assert db.list_pending_rating_items() == [_item(2, 'bbbbbbbbbbb', 'like')]
+
+
+def test_remote_ratings_expire_from_memory():
+    """Test that remembered remote ratings older than the TTL are evicted on write."""
+    reconciler = RatingReconciler(_Database([]), ttl_seconds=10)
+    reconciler._remember('aaaaaaaaaaa', 'like', now=100)
+    reconciler._remember('bbbbbbbbbbb', 'none', now=105)
+    reconciler._remember('aaaaaaaaaaa', 'dislike', now=108)  # refreshed, moves to the back
+
+    reconciler._remember('ccccccccccc', 'like', now=116)
+    assert list(reconciler._remote) == ['aaaaaaaaaaa', 'ccccccccccc']
+    assert reconciler._remote['aaaaaaaaaaa'] == ('dislike', 108)
@@ -0,0 +1,147 @@
+"""
+Tests for importing plays from a Home Assistant recorder database.
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+from database.connection import DatabaseConnection
+from database.play_event_operations import PlayEventOperations
+from recorder_import import RecorderImporter
+
+ENTITY = 'media_player.living_room'
+T0 = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc).timestamp()
+
+
+def _recorder(path, states):
+    """Write states in the current recorder schema (states_meta, state_attributes)."""
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE states_meta (metadata_id INTEGER PRIMARY KEY, entity_id TEXT);
+        CREATE TABLE state_attributes (attributes_id INTEGER PRIMARY KEY, hash INTEGER, shared_attrs TEXT);
+        CREATE TABLE states (
+            state_id INTEGER PRIMARY KEY, entity_id TEXT, state TEXT, attributes TEXT,
+            last_updated_ts FLOAT, attributes_id INTEGER, metadata_id INTEGER
+        );
+        INSERT INTO states_meta VALUES (1, 'media_player.living_room'), (2, 'media_player.other');
+    """)
+    for metadata_id, offset, state, title in states:
+        attributes_id = None
+        if title:
+            attributes = {
+                'media_title': title, 'media_artist': 'Artist', 'media_duration': 200, 'app_name': 'YouTube',
+                'media_position': 0,
+                'media_position_updated_at': datetime.fromtimestamp(T0 + offset, timezone.utc).isoformat()
+            }
+            attributes_id = conn.execute(
+                "INSERT INTO state_attributes (shared_attrs) VALUES (?)", (json.dumps(attributes),)
+            ).lastrowid
+        conn.execute(
+            "INSERT INTO states (state, last_updated_ts, attributes_id, metadata_id) VALUES (?, ?, ?, ?)",
+            (state, T0 + offset, attributes_id, metadata_id)
+        )
+    conn.commit()
+    conn.close()
+
+
+class _Database:
+    """The Database methods the importer uses, over an in-memory add-on schema."""
+
+    def __init__(self):
+        self.conn = sqlite3.connect(':memory:', check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(DatabaseConnection.VIDEO_RATINGS_SCHEMA)
+        self.conn.executescript(DatabaseConnection.PLAY_EVENTS_SCHEMA)
+        for video_id, title in (('aaaaaaaaaaa', 'Song A'), ('ddddddddddd', 'Song D')):
+            self.conn.execute(
+                "INSERT INTO video_ratings (yt_video_id, ha_title, ha_duration, yt_title, yt_url) VALUES (?, ?, 200, ?, ?)",
+                (video_id, title, title, f"https://www.youtube.com/watch?v={video_id}")
+            )
+        self.events = PlayEventOperations(self.conn, threading.Lock())
+        self.searches = []
+
+    def find_cached_video_combined(self, title, duration, artist, return_hash=False):
+        row = self.conn.execute(
+            "SELECT * FROM video_ratings WHERE ha_title = ? AND ha_duration = ?", (title, duration)
+        ).fetchone()
+        return (dict(row) if row else None), None
+
+    def get_play_times(self, yt_video_ids, since, until):
+        self.events.flush()
+        return self.events.get_play_times(yt_video_ids, since, until)
+
+    def get_migrated_play_times(self, yt_video_ids):
+        self.events.flush()
+        return self.events.get_migrated_play_times(yt_video_ids)
+
+    def import_play_events(self, events):
+        return self.events.import_events(events)
+
+    def enqueue_search(self, media, callback_rating=None, prefetch=False):
+        self.searches.append((media['title'], prefetch))
+        return len(self.searches)
+
+    def invalidate_stats_cache(self, cache_key=None):
+        pass
+
+
+def test_plays_are_rebuilt_deduplicated_and_unmatched_songs_queued(tmp_path):
+    """Test sessions, the throttle window, logged plays and search ranking on a recorder file."""
+    recorder_path = tmp_path / 'home-assistant_v2.db'
+    _recorder(recorder_path, [
+        (1, 0, 'playing', 'Song A'),
+        (1, 150, 'playing', 'Song B'),      # A counted (150s of 200s)
+        (1, 170, 'playing', 'Song D'),      # B skipped after 20s
+        (2, 180, 'playing', 'Song X'),      # player that is not configured
+        (1, 400, 'off', None),              # D counted, but the live tracker logged it already
+        (1, 1000, 'playing', 'Song A'),
+        (1, 1200, 'off', None),             # A again within the hour on the same player
+        (1, 2000, 'playing', 'Song C'),
+        (1, 2300, 'idle', None),            # C counted, not matched yet
+    ])
+    db = _Database()
+    db.events.record('ddddddddddd', entity=ENTITY, source='song_tracker',
+                     played_at=datetime.fromtimestamp(T0 + 270, timezone.utc))
+    state_file = tmp_path / 'recorder_import.json'
+
+    importer = RecorderImporter(db, str(recorder_path), [ENTITY], state_file=state_file)
+    report = importer.run()
+
+    assert report['states'] == 8 and report['plays'] == 4 and report['songs'] == 3
+    assert report['imported_plays'] == 1 and report['duplicate_plays'] == 2
+    assert report['unresolved_songs'] == 1 and report['searches_queued'] == 1
+    assert db.searches == [('Song C', True)]
+
+    row = db.conn.execute(
+        "SELECT play_count, date_last_played FROM video_ratings WHERE yt_video_id = 'aaaaaaaaaaa'"
+    ).fetchone()
+    assert row['play_count'] == 2 and str(row['date_last_played']) == '2026-10-01 12:00:00'  # default 1 + import
+    sources = db.conn.execute("SELECT source, COUNT(*) FROM play_events GROUP BY source ORDER BY source").fetchall()
+    assert [tuple(source) for source in sources] == [('recorder_import', 1), ('song_tracker', 1)]
+
+    # The same file is not imported again
+    assert importer._already_imported()
+
+
+def test_plays_only_counted_before_the_event_log_are_not_imported_again(tmp_path):
+    """Test that plays up to a video's 'migrated' event (already in play_count) are skipped."""
+    recorder_path = tmp_path / 'home-assistant_v2.db'
+    _recorder(recorder_path, [
+        (1, 0, 'playing', 'Song A'),
+        (1, 200, 'off', None),              # counted in play_count before the event log existed
+        (1, 10000, 'playing', 'Song A'),
+        (1, 10200, 'off', None),            # after the event log started, imported
+    ])
+    db = _Database()
+    db.conn.execute(
+        "INSERT INTO play_events (played_at, yt_video_id, entity, source) VALUES (?, 'aaaaaaaaaaa', NULL, 'migrated')",
+        (datetime.fromtimestamp(T0 + 5000, timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),)
+    )
+
+    report = RecorderImporter(db, str(recorder_path), [ENTITY], state_file=tmp_path / 'state.json').run()
+
+    assert report['plays'] == 2
+    assert report['imported_plays'] == 1 and report['duplicate_plays'] == 1
+    imported = db.conn.execute("SELECT played_at FROM play_events WHERE source = 'recorder_import'").fetchall()
+    assert [str(row['played_at']) for row in imported] == ['2026-10-01 14:46:40']
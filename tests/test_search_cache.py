@@ -0,0 +1,263 @@
+"""
+Tests for search_results_cache: serving cached videos during a search and the
+in-memory duration index.
+"""
+import json
+import sqlite3
+import threading
+from types import SimpleNamespace
+
+import pytest
+from googleapiclient.errors import HttpError
+
+from database import search_cache_operations
+from database.connection import DatabaseConnection
+from database.search_cache_operations import SearchCacheOperations
+from quota_error import QuotaExceededError
+from search_cache_sweeper import SearchCacheSweeper
+from youtube_api import search
+from youtube_api.search import fetch_uncached_videos, fetch_video_batch
+
+
+class _VideosList:
+    """Records videos.list requests and answers with a video per requested ID."""
+
+    def __init__(self):
+        self.requests = []
+
+    def videos(self):
+        return self
+
+    def list(self, part, id, fields):
+        self.requests.append(id.split(','))
+        items = [
+            {'id': video_id, 'snippet': {'title': f"Fetched {video_id}"}, 'contentDetails': {'duration': 'PT3M20S'}}
+            for video_id in id.split(',')
+        ]
+        return _Response({'items': items})
+
+
+class _Response:
+    def __init__(self, body):
+        self.body = body
+
+    def execute(self):
+        return self.body
+
+
+def _cached(video_id, duration=200):
+    return {'yt_video_id': video_id, 'yt_title': f"Cached {video_id}", 'yt_duration': duration}
+
+
+def test_cached_videos_skip_videos_list_and_keep_rank_order():
+    """Test that only uncached IDs are fetched and results keep the similarity order."""
+    ranked = ['aaaaaaaaaa1', 'bbbbbbbbbb2', 'cccccccccc3', 'dddddddddd4']
+    cached = {'aaaaaaaaaa1': _cached('aaaaaaaaaa1'), 'cccccccccc3': _cached('cccccccccc3', duration=90)}
+    client = _VideosList()
+    debug = {'batch_responses': []}
+
+    candidates, fetched, checked = fetch_video_batch(client, ranked, 200, 'Song', 'Phase 1', 1, debug,
+                                                     cached_entries=cached)
+
+    assert client.requests == [['bbbbbbbbbb2', 'dddddddddd4']]
+    assert checked == 4
+    # cccccccccc3 is cached but has the wrong duration
+    assert [video['yt_video_id'] for video in candidates] == ['aaaaaaaaaa1', 'bbbbbbbbbb2', 'dddddddddd4']
+    assert candidates[0]['title'] == 'Cached aaaaaaaaaa1'
+    # Only fetched videos are handed back for caching
+    assert [video['yt_video_id'] for video in fetched] == ['bbbbbbbbbb2', 'dddddddddd4']
+    assert debug['batch_responses'][0]['video_ids_cached'] == 2
+
+
+def test_fully_cached_batch_sends_no_request():
+    """Test that a batch served entirely from the cache makes no videos.list call."""
+    client = _VideosList()
+    ranked = ['aaaaaaaaaa1', 'bbbbbbbbbb2']
+    candidates, fetched, checked = fetch_video_batch(
+        client, ranked, None, 'Song', 'Phase 1', 1, {'batch_responses': []},
+        cached_entries={video_id: _cached(video_id) for video_id in ranked}
+    )
+    assert client.requests == []
+    assert [video['yt_video_id'] for video in candidates] == ranked
+    assert fetched == [] and checked == 2
+
+
+class _QuotaRejected:
+    """Rejects every videos.list request with quotaExceeded."""
+
+    def videos(self):
+        return self
+
+    def list(self, **kwargs):
+        return self
+
+    def execute(self):
+        resp = type('Resp', (), {'status': 403, 'reason': 'Forbidden'})()
+        body = {'error': {'errors': [{'reason': 'quotaExceeded'}], 'message': 'Quota exceeded'}}
+        raise HttpError(resp, json.dumps(body).encode())
+
+
+def test_quota_rejected_batch_is_not_charged(monkeypatch):
+    """Test that a videos.list call rejected for quota is logged with no quota cost."""
+    calls = []
+    db = SimpleNamespace(
+        record_api_call=lambda method, **kwargs: calls.append(kwargs['quota_cost']),
+        log_api_call_detailed=lambda **kwargs: calls.append(kwargs['quota_cost']),
+    )
+    monkeypatch.setattr(search, '_db', db)
+    monkeypatch.setattr('helpers.api_helpers.record_quota_exhausted', lambda *args: None)
+
+    with pytest.raises(QuotaExceededError):
+        fetch_uncached_videos(_QuotaRejected(), ['aaaaaaaaaa1', 'bbbbbbbbbb2'], 'Song', 'Phase 1', 1)
+    assert calls == [0, 0]
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(DatabaseConnection.SEARCH_RESULTS_CACHE_SCHEMA)
+    conn.executescript(DatabaseConnection.SEARCH_RESULTS_CACHE_EVICTION_INDEX)
+    return conn
+
+
+def _video(video_id, duration, title=None):
+    return {'yt_video_id': video_id, 'title': title or f"Song {video_id}", 'duration': duration}
+
+
+def _sql_matches(conn, duration, tolerance=1):
+    """The range scan the duration index replaces."""
+    rows = conn.execute(
+        """
+        SELECT yt_video_id FROM search_results_cache
+        WHERE yt_duration BETWEEN ? AND ? AND expires_at > datetime('now')
+        """,
+        (duration - tolerance, duration + tolerance)
+    ).fetchall()
+    return sorted(row['yt_video_id'] for row in rows)
+
+
+def _index_matches(cache, duration):
+    return sorted(row['yt_video_id'] for row in cache.find_by_duration(duration) or [])
+
+
+def test_index_picks_up_rows_cached_by_the_other_process(tmp_path):
+    """Test the incremental rowid/data_version sync between two connections."""
+    path = tmp_path / 'ratings.db'
+    web = SearchCacheOperations(_connect(path), threading.Lock())
+    worker = SearchCacheOperations(_connect(path), threading.Lock())
+
+    web.cache_search_results([_video('aaaaaaaaaa1', 200)])
+    assert _index_matches(web, 200) == ['aaaaaaaaaa1']  # loads the index
+    loaded_at = web._index_loaded_at
+
+    worker.cache_search_results([_video('bbbbbbbbbb2', 201), _video('cccccccccc3', 300)])
+    assert _index_matches(web, 200) == ['aaaaaaaaaa1', 'bbbbbbbbbb2']
+    assert web._index_loaded_at == loaded_at  # incremental, not a full reload
+    assert web._index_max_rowid == 3
+
+    # Re-caching an existing video replaces its entry instead of duplicating it
+    worker.cache_search_results([_video('aaaaaaaaaa1', 300)])
+    assert _index_matches(web, 200) == ['bbbbbbbbbb2']
+    assert _index_matches(web, 300) == ['aaaaaaaaaa1', 'cccccccccc3']
+
+
+def test_full_reload_drops_rows_deleted_by_the_other_process(tmp_path):
+    """Test that deletes by the other connection leave the index until the hourly reload."""
+    path = tmp_path / 'ratings.db'
+    web = SearchCacheOperations(_connect(path), threading.Lock())
+    worker_conn = _connect(path)
+
+    web.cache_search_results([_video('aaaaaaaaaa1', 200), _video('bbbbbbbbbb2', 200)])
+    web.find_by_duration(200)
+    worker_conn.execute("DELETE FROM search_results_cache WHERE yt_video_id = 'aaaaaaaaaa1'")
+    worker_conn.commit()
+
+    # Incremental sync only adds rows; the stale entry is skipped when its row is fetched
+    assert _index_matches(web, 200) == ['bbbbbbbbbb2']
+    assert 'aaaaaaaaaa1' in web._index_durations
+
+    web._index_loaded_at -= search_cache_operations.INDEX_FULL_RELOAD_SECONDS  # an hour later
+    stale_load = web._index_loaded_at
+    web.find_by_duration(200)
+    assert 'aaaaaaaaaa1' not in web._index_durations
+    assert web._index_loaded_at > stale_load
+
+
+def test_index_lookups_match_sql_after_inserts_and_expiry(tmp_path):
+    """Test that index lookups return what the SQL range scan would."""
+    conn = _connect(tmp_path / 'ratings.db')
+    cache = SearchCacheOperations(conn, threading.Lock())
+
+    cache.cache_search_results([_video(f"live{index:07d}", 198 + index % 5) for index in range(20)])
+    cache.find_by_duration(200)  # index loaded
+    cache.cache_search_results([_video('expired0001', 200), _video('expired0002', 201)], ttl_days=-1)
+    cache.cache_search_results([_video('late0000001', 199)])
+
+    for duration in range(196, 205):
+        assert _index_matches(cache, duration) == _sql_matches(conn, duration)
+
+    assert cache.cleanup_expired() == 2
+    assert 'expired0001' not in cache._index_durations
+    for duration in range(196, 205):
+        assert _index_matches(cache, duration) == _sql_matches(conn, duration)
+
+    hit = cache.find_by_title_and_duration('song late', 200)
+    assert hit['yt_video_id'] == 'late0000001'
+
+
+def test_sweep_evicts_least_useful_rows_in_batches(tmp_path):
+    """Test expiry, eviction by hits then recency, batching, stopping early and the stats counters."""
+    conn = _connect(tmp_path / 'ratings.db')
+    cache = SearchCacheOperations(conn, threading.Lock())
+    cache.cache_search_results([_video(f"video{index:06d}", 200) for index in range(10)])
+    cache.cache_search_results([_video('expired0001', 200)], ttl_days=-1)
+    # Hits: video000000-2 hit twice; video000003-4 hit once, 000003 less recently
+    conn.execute("UPDATE search_results_cache SET hit_count = 2, last_hit_at = '2026-10-01 10:00:00' "
+                 "WHERE yt_video_id IN ('video000000', 'video000001', 'video000002')")
+    conn.execute("UPDATE search_results_cache SET hit_count = 1, last_hit_at = '2026-10-01 09:00:00' "
+                 "WHERE yt_video_id = 'video000003'")
+    conn.execute("UPDATE search_results_cache SET hit_count = 1, last_hit_at = '2026-10-01 11:00:00' "
+                 "WHERE yt_video_id = 'video000004'")
+    conn.commit()
+
+    # Budget of 4 rows: 1 expired + 6 over budget, 3 per batch; stopped after the first batch
+    assert cache.sweep(max_rows=4, max_bytes=10 ** 9, batch_size=3, pause=lambda: True) == {
+        'expired': 1, 'evicted': 3
+    }
+    pauses = []
+    sweeper = SearchCacheSweeper(SimpleNamespace(sweep_search_cache=cache.sweep))
+    sweeper.max_rows, sweeper.max_bytes, sweeper._running = 4, 10 ** 9, True
+    sweeper._pause = lambda: pauses.append(1) and False
+    statements = []
+    conn.set_trace_callback(statements.append)
+    sweeper._sweep()
+    conn.set_trace_callback(None)
+
+    survivors = sorted(row['yt_video_id'] for row in conn.execute("SELECT yt_video_id FROM search_results_cache"))
+    assert survivors == ['video000000', 'video000001', 'video000002', 'video000004']
+    # The remaining 3 rows go in one batch, the size is measured once
+    assert pauses == []
+    assert sum(1 for statement in statements if 'COUNT(*)' in statement) == 1
+
+    stats = cache.get_stats()
+    assert stats['total'] == 4 and stats['valid'] == 4 and stats['expired'] == 0
+    assert stats['hits'] == 7
+    assert stats['expired_removed'] == 1 and stats['evicted'] == 6
+    assert stats['size_bytes'] == cache._size_locked()['bytes'] > 0
+
+    # The byte budget evicts too, in batches with a pause between them
+    assert cache.sweep(max_rows=100, max_bytes=stats['size_bytes'] // 2, batch_size=1,
+                       pause=lambda: pauses.append(1) and False)['evicted'] == 2
+    assert pauses == [1]
+    assert cache.get_stats()['size_bytes'] == cache._size_locked()['bytes']
+
+
+def test_eviction_order_uses_the_index(tmp_path):
+    """Test that the eviction query walks an index instead of sorting the table."""
+    conn = _connect(tmp_path / 'ratings.db')
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT yt_video_id FROM search_results_cache "
+        "ORDER BY COALESCE(hit_count, 0) ASC, COALESCE(last_hit_at, cached_at) ASC"
+    ).fetchall()
+    details = ' '.join(row[-1] for row in plan)
+    assert 'idx_search_cache_eviction' in details and 'TEMP B-TREE' not in details
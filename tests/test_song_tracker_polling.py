@@ -0,0 +1,125 @@
+"""
+Tests for the song tracker's state diffing, adaptive poll interval, per-player
+state and bounded play throttle.
+"""
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from song_tracker import SongTracker, PlayThrottle
+
+
+class _FakeHomeAssistant:
+    def __init__(self, entities=('media_player.living_room',)):
+        self.entities = list(entities)
+        self.entity = self.entities[0]
+        self.parsed = 0
+
+    def media_from_state(self, state):
+        self.parsed += 1
+        return None
+
+
+def _state(state='playing', last_updated='t1', position_age=0, **attributes):
+    attributes.setdefault('media_title', 'Song')
+    attributes.setdefault('media_duration', 200)
+    attributes.setdefault('media_position', 0)
+    updated_at = datetime.now(timezone.utc) - timedelta(seconds=position_age)
+    attributes.setdefault('media_position_updated_at', updated_at.isoformat())
+    return {'state': state, 'last_updated': last_updated, 'attributes': attributes}
+
+
+def test_unchanged_states_skip_tracking():
+    """Test that repeated or position-only updates are not parsed again."""
+    ha_api = _FakeHomeAssistant()
+    tracker = SongTracker(ha_api, db=None)
+
+    tracker._handle_state(_state())
+    tracker._handle_state(_state())  # same last_updated
+    tracker._handle_state(_state(last_updated='t2', media_position=30))  # position only
+    assert ha_api.parsed == 1
+
+    tracker._handle_state(_state(last_updated='t3', media_title='Next Song'))
+    tracker._handle_state(_state('paused', last_updated='t4', media_title='Next Song'))
+    assert ha_api.parsed == 3
+
+
+def test_poll_delay_follows_playback():
+    """Test that polls are timed for the end of the track and slow down when idle."""
+    tracker = SongTracker(_FakeHomeAssistant(), db=None, poll_interval=30,
+                          fast_poll_interval=5, idle_poll_interval=120)
+
+    assert tracker._next_poll_delay(_state(position_age=190)) == pytest.approx(12.5, abs=0.1)  # 10s left + half the fast interval
+    assert tracker._next_poll_delay(_state(position_age=199)) == 5
+    assert tracker._next_poll_delay(_state(position_age=10)) == 30
+    assert tracker._next_poll_delay(_state(media_duration=None)) == 30
+    assert tracker._next_poll_delay(_state('paused')) == 120
+    assert tracker._next_poll_delay(None) == 30
+
+
+def test_players_are_diffed_and_throttled_separately():
+    """Test that the same media on another player is tracked and throttled on its own."""
+    ha_api = _FakeHomeAssistant(entities=('media_player.living_room', 'media_player.kitchen'))
+    tracker = SongTracker(ha_api, db=None)
+
+    tracker._handle_state(dict(_state(), entity_id='media_player.living_room'))
+    tracker._handle_state(dict(_state(), entity_id='media_player.kitchen'))
+    assert ha_api.parsed == 2
+
+    assert tracker._should_increment_play_count('hash', 'media_player.living_room')
+    assert not tracker._should_increment_play_count('hash', 'media_player.living_room')
+    assert tracker._should_increment_play_count('hash', 'media_player.kitchen')
+
+
+def test_play_throttle_evicts_expired_counts():
+    """Test that counts leave the throttle after the window, keeping it bounded."""
+    throttle = PlayThrottle(timedelta(minutes=60))
+    start = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+
+    for minute in range(0, 180, 3):
+        assert throttle.allow(('media_player.a', f"song {minute}"), start + timedelta(minutes=minute))
+    assert not throttle.allow(('media_player.a', 'song 177'), start + timedelta(minutes=178))
+    assert len(throttle) == 20  # only the last hour of plays is kept
+
+    assert throttle.allow(('media_player.a', 'song 177'), start + timedelta(minutes=237))
+    throttle.evict(start + timedelta(minutes=600))
+    assert len(throttle) == 0 and throttle.memory_stats()['queued'] == 0
+
+
+class _FakeDatabase:
+    def __init__(self, plays, latest, recently_played):
+        self._recent = {'plays': plays, 'latest': latest}
+        self._rows = recently_played
+
+    def get_recent_plays(self, since):
+        return self._recent
+
+    def get_recently_played(self, limit):
+        return self._rows
+
+
+def test_throttle_is_restored_per_player_after_restart():
+    """Test that logged plays throttle their own player and unlogged plays every player."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    logged = (now - timedelta(minutes=10)).strftime('%Y-%m-%d %H:%M:%S')
+    db = _FakeDatabase(
+        plays=[{'entity': 'media_player.kitchen', 'played_at': logged,
+                'ha_title': 'Logged', 'ha_duration': 200, 'ha_artist': 'A'}],
+        latest=logged,
+        recently_played=[
+            {'ha_title': 'Unlogged', 'ha_duration': 100, 'ha_artist': None,
+             'date_last_played': now - timedelta(minutes=1)},
+            {'ha_title': 'Logged', 'ha_duration': 200, 'ha_artist': 'A',
+             'date_last_played': now - timedelta(minutes=10)},
+        ]
+    )
+    ha_api = _FakeHomeAssistant(entities=('media_player.living_room', 'media_player.kitchen'))
+    tracker = SongTracker(ha_api, db)
+    tracker._restore_throttle()
+
+    logged_hash = tracker._tracking_hash('Logged', 200, 'A')
+    unlogged_hash = tracker._tracking_hash('Unlogged', 100, 'Unknown')
+    assert not tracker._should_increment_play_count(logged_hash, 'media_player.kitchen')
+    assert tracker._should_increment_play_count(logged_hash, 'media_player.living_room')
+    assert not tracker._should_increment_play_count(unlogged_hash, 'media_player.kitchen')
+    assert not tracker._should_increment_play_count(unlogged_hash, 'media_player.living_room')
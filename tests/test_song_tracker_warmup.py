@@ -0,0 +1,149 @@
+"""
+Tests for the song tracker's startup warm-up: the in-memory LRU of recent
+videos, the play throttle restore and pre-resolving songs from HA history.
+"""
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+import song_tracker
+from homeassistant_api import HomeAssistantAPI
+from song_tracker import SongTracker
+
+ENTITY = 'media_player.living_room'
+
+
+def _row(video_id, title, last_played=None, artist=None):
+    return {
+        'yt_video_id': video_id, 'yt_title': f"{title} (Official Video)", 'ha_title': title,
+        'ha_artist': artist, 'ha_duration': 200, 'date_last_played': last_played
+    }
+
+
+class _Database:
+    """The Database methods warm-up and play tracking use."""
+
+    def __init__(self, recent, matched=(), plays=(), latest=None):
+        self.recent = recent
+        self.matched = {row['ha_title']: row for row in matched}
+        self.plays = list(plays)
+        self.latest = latest
+        self.recent_limits = []
+        self.lookups = []
+        self.recorded = []
+
+    def get_recently_played(self, limit=200):
+        self.recent_limits.append(limit)
+        return self.recent[:limit]
+
+    def get_recent_plays(self, since):
+        return {'plays': self.plays, 'latest': self.latest}
+
+    def find_cached_video_combined(self, title, duration, artist=None, return_hash=False):
+        self.lookups.append(title)
+        row = self.matched.get(title)
+        return (row, None) if return_hash else row
+
+    def record_play(self, yt_video_id, entity=None, source=None):
+        self.recorded.append((yt_video_id, entity))
+        return True
+
+
+class _HomeAssistant:
+    def __init__(self, history=()):
+        self.entities = [ENTITY]
+        self.entity = ENTITY
+        self.history = list(history)
+        self.history_calls = []
+
+    def get_media_history(self, hours):
+        self.history_calls.append(hours)
+        return self.history
+
+
+def _live_media(monkeypatch, title):
+    """Parse a playing state exactly as a live poll does (no media_artist reported)."""
+    monkeypatch.delenv('SUPERVISOR_TOKEN', raising=False)
+    return HomeAssistantAPI().media_from_state({
+        'state': 'playing',
+        'attributes': {'media_title': title, 'media_duration': 200, 'app_name': 'YouTube'}
+    })
+
+
+def test_warmed_up_video_is_found_by_a_live_poll(monkeypatch):
+    """Test that the LRU is keyed by the same hash a live poll computes, so no DB lookup is needed."""
+    monkeypatch.setattr(song_tracker, 'WARMUP_HISTORY_HOURS', 0)
+    db = _Database(recent=[_row('aaaaaaaaaaa', 'Song A'), _row('bbbbbbbbbbb', 'Song B', artist='Band')])
+    tracker = SongTracker(_HomeAssistant(), db)
+    tracker._warm_up()
+    assert db.recent_limits[-1] == song_tracker.WARMUP_RECENT_VIDEOS
+    assert len(tracker._recent_videos) == 2
+
+    tracker._track_media(_live_media(monkeypatch, 'Song A'), ENTITY)
+
+    assert db.recorded == [('aaaaaaaaaaa', ENTITY)]
+    assert db.lookups == []
+
+
+def test_throttle_is_restored_from_events_and_date_last_played():
+    """Test that plays within the window are not counted again after a restart."""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    event_at = (now - timedelta(minutes=40)).strftime('%Y-%m-%d %H:%M:%S')
+    db = _Database(
+        recent=[
+            _row('aaaaaaaaaaa', 'Song A', last_played=event_at),
+            # Played after the last written event (still buffered when the add-on stopped)
+            _row('bbbbbbbbbbb', 'Song B', last_played=(now - timedelta(minutes=10)).strftime('%Y-%m-%d %H:%M:%S')),
+            # Outside the throttle window
+            _row('ccccccccccc', 'Song C', last_played=(now - timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S')),
+        ],
+        plays=[{'played_at': event_at, 'ha_title': 'Song A', 'ha_duration': 200, 'entity': ENTITY}],
+        latest=event_at
+    )
+    tracker = SongTracker(_HomeAssistant(), db)
+    tracker._restore_throttle()
+
+    def throttled(title):
+        return not tracker._should_increment_play_count(tracker._tracking_hash(title, 200, 'Unknown'), ENTITY)
+
+    assert throttled('Song A') and throttled('Song B')
+    assert not throttled('Song C')
+
+
+@pytest.mark.parametrize('recent_count', [2, 20])
+def test_history_songs_get_their_share_of_the_lru(monkeypatch, recent_count):
+    """Test that history is pre-resolved into the room recent plays leave, however many plays there are."""
+    monkeypatch.setattr(song_tracker, 'WARMUP_RECENT_VIDEOS', 4)
+    monkeypatch.setattr(song_tracker, 'WARMUP_HISTORY_HOURS', 12)
+    recent = [_row(f"recent{index:05d}", f"Recent {index}") for index in range(recent_count)]
+    history = [
+        {'title': 'Recent 0', 'artist': 'Unknown', 'duration': 200},       # already in memory
+        {'title': 'History 1', 'artist': 'Unknown', 'duration': 200},
+        {'title': 'Not Matched', 'artist': 'Unknown', 'duration': 200},
+        {'title': 'History 2', 'artist': 'Unknown', 'duration': 200},
+        {'title': 'History 3', 'artist': 'Unknown', 'duration': 200},
+    ]
+    db = _Database(recent=recent, matched=[_row('hist0000001', 'History 1'), _row('hist0000002', 'History 2'),
+                                           _row('hist0000003', 'History 3')])
+    ha_api = _HomeAssistant(history)
+    tracker = SongTracker(ha_api, db)
+    tracker._warm_up()
+
+    assert db.recent_limits[-1] == 2
+    assert ha_api.history_calls == [12]
+    assert db.lookups == ['History 1', 'Not Matched', 'History 2']
+    assert [video['yt_video_id'] for video in tracker._recent_videos.values()] == [
+        'recent00001', 'recent00000', 'hist0000001', 'hist0000002'
+    ]
+
+
+def test_history_is_not_fetched_without_room(monkeypatch):
+    """Test that a full LRU skips the HA history request."""
+    monkeypatch.setattr(song_tracker, 'WARMUP_RECENT_VIDEOS', 2)
+    ha_api = _HomeAssistant([{'title': 'History 1', 'artist': 'Unknown', 'duration': 200}])
+    tracker = SongTracker(ha_api, _Database(recent=[]))
+    tracker._remember_video('hash a', {'yt_video_id': 'aaaaaaaaaaa'})
+    tracker._remember_video('hash b', {'yt_video_id': 'bbbbbbbbbbb'})
+
+    assert tracker._warm_up_from_history(12) == 0
+    assert ha_api.history_calls == []
@@ -0,0 +1,64 @@
+"""
+Tests for the media player state cache shared by web threads and the song tracker.
+"""
+import threading
+
+import pytest
+
+from homeassistant_api import HomeAssistantAPI
+from tools.fake_homeassistant import FakeHomeAssistantState, start_in_thread, stop
+
+
+@pytest.fixture
+def fake_ha(monkeypatch):
+    state = FakeHomeAssistantState()
+    server, base_url = start_in_thread(state)
+    monkeypatch.setenv('HOME_ASSISTANT_URL', base_url)
+    monkeypatch.setenv('HOME_ASSISTANT_TOKEN', state.token)
+    monkeypatch.setenv('MEDIA_PLAYER_ENTITY', state.entity)
+    monkeypatch.delenv('SUPERVISOR_TOKEN', raising=False)
+    yield state, HomeAssistantAPI()
+    stop(server, state)
+
+
+def test_concurrent_requests_share_one_fetch(fake_ha):
+    """Test that simultaneous callers share one in-flight request and its result."""
+    state, ha_api = fake_ha
+    state.play('Shared Song', 200)
+    state.set_latency(0.3)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(ha_api.get_current_media())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert [media['title'] for media in results] == ['Shared Song'] * 4
+    assert state.stats()['requests']['states'] == 1
+
+    # Within the TTL the cached state is reused
+    assert ha_api.get_current_media()['title'] == 'Shared Song'
+    assert state.stats()['requests']['states'] == 1
+
+
+def test_pushed_states_stay_current_while_subscribed(fake_ha, monkeypatch):
+    """Test that states pushed during a live subscription are served without a request."""
+    state, ha_api = fake_ha
+    monkeypatch.setattr('homeassistant_api.STATE_CACHE_SECONDS', 0)
+    state.play('Polled Song', 200)
+    pushed = {'entity_id': state.entity, 'state': 'playing',
+              'attributes': {'media_title': 'Pushed Song', 'media_duration': 180, 'app_name': 'YouTube'}}
+
+    ha_api.remember_state(pushed)
+    assert ha_api.get_current_media()['title'] == 'Polled Song'  # not live: fetched from HA
+    assert state.stats()['requests']['states'] == 1
+
+    ha_api.set_push_live(True)
+    ha_api.remember_state(pushed)
+    assert ha_api.get_current_media()['title'] == 'Pushed Song'
+    assert state.stats()['requests']['states'] == 1
+
+    ha_api.set_push_live(False)
+    ha_api.get_current_media()
+    assert state.stats()['requests']['states'] == 2
@@ -0,0 +1,87 @@
+"""
+Tests for the pooled YouTube API transport against a local fake API server.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient.discovery import build_from_document
+from googleapiclient.errors import HttpError
+
+from youtube_api import transport
+from youtube_api.transport import PooledHttp, get_discovery_document, get_transport_stats
+
+
+class _FakeYouTubeHandler(BaseHTTPRequestHandler):
+    """Minimal videos.list endpoint with HTTP/1.1 keep-alive."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.split('?')[0] == '/youtube/v3/videos':
+            status, body = 200, {'items': [{'id': 'abc123', 'contentDetails': {'duration': 'PT3M'}}]}
+        else:
+            status, body = 404, {'error': {'code': 404, 'message': 'Not Found', 'errors': []}}
+
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_POST = do_GET
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def fake_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _FakeYouTubeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def youtube(fake_server):
+    transport._timings.clear()
+    http = PooledHttp(AnonymousCredentials())
+    client = build_from_document(
+        get_discovery_document(),
+        http=http,
+        client_options={'api_endpoint': fake_server}
+    )
+    yield client
+    http.close()
+
+
+def test_calls_reuse_one_connection(youtube):
+    """Test that consecutive calls share a keep-alive connection and record timings."""
+    for _ in range(3):
+        response = youtube.videos().list(part='contentDetails', id='abc123').execute()
+        assert response['items'][0]['id'] == 'abc123'
+
+    stats = get_transport_stats()
+    assert stats['calls'] == 3
+    assert [t['reused_connection'] for t in stats['recent']] == [False, True, True]
+    assert all(t['api_method'] == 'videos.list' and t['status'] == 200 for t in stats['recent'])
+    assert stats['recent'][0]['connect_ms'] > 0
+
+
+def test_http_errors_surface_as_http_error(youtube):
+    """Test that error responses keep googleapiclient's HttpError behaviour."""
+    with pytest.raises(HttpError) as exc_info:
+        youtube.videos().rate(id='abc123', rating='like').execute()
+    assert exc_info.value.resp.status == 404
+    assert get_transport_stats()['recent'][-1]['api_method'] == 'videos.rate'
+
+
+def test_discovery_document_is_loaded_from_disk():
+    """Test that the discovery document comes from the installed client library."""
+    assert json.loads(get_discovery_document())['name'] == 'youtube'
@@ -0,0 +1,433 @@
+"""
+Local fake Home Assistant server for testing and benchmarking the song tracker.
+
+Implements the subset of the API the add-on uses, for one or more media players:
+- GET /api/states                  every state (the media players plus a few
+                                   unrelated entities, like a real instance)
+- GET /api/states/<entity>         current media player state
+- GET /api/history/period/<start>  recorder history (always empty)
+- GET /api/websocket               WebSocket API: auth, subscribe_trigger (state
+                                   trigger), subscribe_events (state_changed), ping
+
+set_state() changes a media player state and pushes it to every subscriber.
+stats() reports REST requests and WebSocket traffic, and drop_connections()
+closes every WebSocket so reconnects can be exercised. fail_next() answers
+the next REST requests with an error status and set_latency() delays every
+REST response, to exercise retries, timeouts and the circuit breaker. Only the standard
+library is used (WebSocket framing included), so no server dependency is needed.
+
+Point the add-on at it with HOME_ASSISTANT_URL=http://127.0.0.1:<port> and
+HOME_ASSISTANT_TOKEN=fake-token.
+
+Usage:
+    python -m tools.fake_homeassistant --port 8766 --entity media_player.fake
+    python -m tools.fake_homeassistant --entity media_player.living_room --entity media_player.kitchen
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+DEFAULT_ENTITY = 'media_player.fake'
+DEFAULT_TOKEN = 'fake-token'
+
+# Unrelated entities included in GET /api/states, so callers must filter
+OTHER_STATES = [
+    {'entity_id': 'sun.sun', 'state': 'above_horizon', 'attributes': {}},
+    {'entity_id': 'light.kitchen', 'state': 'off', 'attributes': {}},
+]
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+def _read_frame(rfile) -> Tuple[int, bytes]:
+    """Read one (masked) client frame and return (opcode, payload)."""
+    header = rfile.read(2)
+    if len(header) < 2:
+        return OPCODE_CLOSE, b''
+    opcode = header[0] & 0x0F
+    masked = header[1] & 0x80
+    length = header[1] & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', rfile.read(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', rfile.read(8))[0]
+    mask = rfile.read(4) if masked else b''
+    payload = rfile.read(length)
+    if masked:
+        payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+    return opcode, payload
+
+
+def _encode_frame(opcode: int, payload: bytes) -> bytes:
+    """Encode an unmasked server frame."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+class _WebSocketSession:
+    """One authenticated WebSocket connection and its subscriptions."""
+
+    def __init__(self, handler: BaseHTTPRequestHandler) -> None:
+        self.handler = handler
+        self._write_lock = threading.Lock()
+        self.subscriptions: Dict[int, str] = {}  # message id -> 'trigger' or 'events'
+        self.trigger_entities: Dict[int, set] = {}  # trigger subscription id -> entity IDs
+
+    def send(self, message: Dict[str, Any]) -> None:
+        """Send a JSON text frame."""
+        frame = _encode_frame(OPCODE_TEXT, json.dumps(message).encode('utf-8'))
+        with self._write_lock:
+            self.handler.wfile.write(frame)
+            self.handler.wfile.flush()
+
+    def send_control(self, opcode: int, payload: bytes = b'') -> None:
+        """Send a control frame (pong or close)."""
+        with self._write_lock:
+            self.handler.wfile.write(_encode_frame(opcode, payload))
+            self.handler.wfile.flush()
+
+    def close(self) -> None:
+        """Close the underlying socket."""
+        try:
+            self.handler.connection.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+class FakeHomeAssistantState:
+    """Media player state, subscribers and request counters for the fake server."""
+
+    def __init__(self, entity: str = DEFAULT_ENTITY, token: str = DEFAULT_TOKEN,
+                 entities: Optional[Sequence[str]] = None) -> None:
+        """
+        Args:
+            entity: Default media player entity
+            token: Accepted access token
+            entities: All media player entities (default: just entity)
+        """
+        self._lock = threading.Lock()
+        self.entities = list(entities) if entities else [entity]
+        self.entity = self.entities[0]
+        self.token = token
+        self.sessions: List[_WebSocketSession] = []
+        self.states = {name: self._state_object('idle', {}, name) for name in self.entities}
+        self.faults: List[int] = []  # statuses for the next REST requests
+        self.latency = 0.0  # seconds added to every REST response
+        self.reset()
+
+    @property
+    def state(self) -> Dict[str, Any]:
+        """State object of the default entity."""
+        return self.states[self.entity]
+
+    def reset(self) -> None:
+        """Reset request counters."""
+        with self._lock:
+            self.requests = {'states': 0, 'states_all': 0, 'history': 0, 'websocket_connect': 0, 'faults': 0}
+            self.websocket = {'messages_in': 0, 'events_pushed': 0, 'auth_failed': 0}
+
+    def stats(self) -> Dict[str, Any]:
+        """Get request counters and the number of open subscriptions."""
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'websocket': dict(self.websocket),
+                'subscribers': sum(len(session.subscriptions) for session in self.sessions)
+            }
+
+    def _state_object(self, state: str, attributes: Dict[str, Any], entity: str) -> Dict[str, Any]:
+        """Build a state object in the shape Home Assistant returns."""
+        now = datetime.now(timezone.utc).isoformat()
+        return {
+            'entity_id': entity,
+            'state': state,
+            'attributes': attributes,
+            'last_changed': now,
+            'last_updated': now
+        }
+
+    def set_state(self, state: str, entity: Optional[str] = None, **attributes) -> None:
+        """
+        Change a media player state and push it to subscribers.
+
+        Args:
+            state: New state (playing, paused, idle, ...)
+            entity: Media player to change (default: the default entity)
+            **attributes: Media player attributes (media_title, media_duration, ...)
+        """
+        entity = entity or self.entity
+        with self._lock:
+            old_state = self.states[entity]
+            new_state = self._state_object(state, attributes, entity)
+            self.states[entity] = new_state
+            sessions = list(self.sessions)
+
+        for session in sessions:
+            for message_id, kind in list(session.subscriptions.items()):
+                if kind == 'trigger':
+                    if entity not in session.trigger_entities.get(message_id, ()):
+                        continue
+                    event = {'variables': {'trigger': {
+                        'platform': 'state', 'entity_id': entity,
+                        'from_state': old_state, 'to_state': new_state
+                    }}}
+                else:
+                    event = {'event_type': 'state_changed', 'data': {
+                        'entity_id': entity, 'old_state': old_state, 'new_state': new_state
+                    }}
+                try:
+                    session.send({'id': message_id, 'type': 'event', 'event': event})
+                    with self._lock:
+                        self.websocket['events_pushed'] += 1
+                except OSError:
+                    pass
+
+    def play(self, title: str, duration: int, artist: str = 'Fake Artist', app_name: str = 'YouTube',
+             entity: Optional[str] = None) -> None:
+        """Start playing a track (on the default entity unless one is given)."""
+        self.set_state(
+            'playing',
+            entity=entity,
+            media_title=title,
+            media_artist=artist,
+            media_duration=duration,
+            media_position=0,
+            media_position_updated_at=datetime.now(timezone.utc).isoformat(),
+            app_name=app_name
+        )
+
+    def fail_next(self, count: int = 1, status: int = 503) -> None:
+        """Answer the next count REST requests with an error status (requests still counted)."""
+        with self._lock:
+            self.faults.extend([status] * count)
+
+    def set_latency(self, seconds: float) -> None:
+        """Delay every REST response (a slow Supervisor proxy)."""
+        with self._lock:
+            self.latency = seconds
+
+    def _next_fault(self) -> Tuple[Optional[int], float]:
+        """Pop the next injected status (if any) and get the response delay."""
+        with self._lock:
+            return (self.faults.pop(0) if self.faults else None), self.latency
+
+    def drop_connections(self) -> None:
+        """Close every open WebSocket connection."""
+        with self._lock:
+            sessions = list(self.sessions)
+        for session in sessions:
+            session.close()
+
+
+def _make_handler(state: FakeHomeAssistantState):
+    """Build the request handler class bound to a server state."""
+
+    class FakeHomeAssistantHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status: int, body: Any) -> None:
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _authorized(self) -> bool:
+            return self.headers.get('Authorization') == f"Bearer {state.token}"
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path in ('/api/websocket', '/core/websocket') and self.headers.get('Upgrade', '').lower() == 'websocket':
+                self._websocket()
+                return
+
+            fault, latency = state._next_fault()
+            if latency:
+                time.sleep(latency)
+            if fault is not None:
+                with state._lock:
+                    state.requests['faults'] += 1
+                self._send_json(fault, {'message': 'Injected fault'})
+                return
+
+            if path == '/api/states':
+                with state._lock:
+                    state.requests['states_all'] += 1
+                    current = list(state.states.values())
+                if not self._authorized():
+                    self._send_json(401, {'message': 'Unauthorized'})
+                else:
+                    self._send_json(200, current + OTHER_STATES)
+                return
+
+            if path.startswith('/api/states/'):
+                with state._lock:
+                    state.requests['states'] += 1
+                    current = state.states.get(path[len('/api/states/'):])
+                if not self._authorized():
+                    self._send_json(401, {'message': 'Unauthorized'})
+                elif current is None:
+                    self._send_json(404, {'message': 'Entity not found.'})
+                else:
+                    self._send_json(200, current)
+                return
+
+            if path.startswith('/api/history/period/'):
+                with state._lock:
+                    state.requests['history'] += 1
+                if not self._authorized():
+                    self._send_json(401, {'message': 'Unauthorized'})
+                else:
+                    self._send_json(200, [])
+                return
+
+            self._send_json(404, {'message': 'Not found'})
+
+        def _websocket(self) -> None:
+            key = self.headers.get('Sec-WebSocket-Key', '')
+            accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()).decode('ascii')
+            self.send_response(101, 'Switching Protocols')
+            self.send_header('Upgrade', 'websocket')
+            self.send_header('Connection', 'Upgrade')
+            self.send_header('Sec-WebSocket-Accept', accept)
+            self.end_headers()
+            self.wfile.flush()
+            self.close_connection = True
+
+            session = _WebSocketSession(self)
+            with state._lock:
+                state.requests['websocket_connect'] += 1
+                state.sessions.append(session)
+            try:
+                self._websocket_session(session)
+            except (OSError, ValueError, struct.error):
+                pass
+            finally:
+                with state._lock:
+                    if session in state.sessions:
+                        state.sessions.remove(session)
+
+        def _websocket_session(self, session: _WebSocketSession) -> None:
+            session.send({'type': 'auth_required', 'ha_version': '2025.1.0'})
+            authenticated = False
+
+            while True:
+                opcode, payload = _read_frame(self.rfile)
+                if opcode == OPCODE_CLOSE:
+                    session.send_control(OPCODE_CLOSE)
+                    return
+                if opcode == OPCODE_PING:
+                    session.send_control(OPCODE_PONG, payload)
+                    continue
+                if opcode != OPCODE_TEXT:
+                    continue
+
+                message = json.loads(payload.decode('utf-8'))
+                with state._lock:
+                    state.websocket['messages_in'] += 1
+
+                if not authenticated:
+                    if message.get('type') == 'auth' and message.get('access_token') == state.token:
+                        authenticated = True
+                        session.send({'type': 'auth_ok', 'ha_version': '2025.1.0'})
+                        continue
+                    with state._lock:
+                        state.websocket['auth_failed'] += 1
+                    session.send({'type': 'auth_invalid', 'message': 'Invalid access token or password'})
+                    return
+
+                message_id = message.get('id')
+                message_type = message.get('type')
+                if message_type == 'ping':
+                    session.send({'id': message_id, 'type': 'pong'})
+                elif message_type == 'subscribe_trigger':
+                    trigger = message.get('trigger') or {}
+                    entity_ids = trigger.get('entity_id')
+                    entity_ids = {entity_ids} if isinstance(entity_ids, str) else set(entity_ids or ())
+                    if trigger.get('platform') == 'state' and entity_ids and entity_ids <= set(state.entities):
+                        session.subscriptions[message_id] = 'trigger'
+                        session.trigger_entities[message_id] = entity_ids
+                        session.send({'id': message_id, 'type': 'result', 'success': True, 'result': None})
+                    else:
+                        session.send({'id': message_id, 'type': 'result', 'success': False,
+                                      'error': {'code': 'invalid_format', 'message': 'Unsupported trigger'}})
+                elif message_type == 'subscribe_events' and message.get('event_type') == 'state_changed':
+                    session.subscriptions[message_id] = 'events'
+                    session.send({'id': message_id, 'type': 'result', 'success': True, 'result': None})
+                elif message_type == 'unsubscribe_events':
+                    session.subscriptions.pop(message.get('subscription'), None)
+                    session.send({'id': message_id, 'type': 'result', 'success': True, 'result': None})
+                else:
+                    session.send({'id': message_id, 'type': 'result', 'success': False,
+                                  'error': {'code': 'unknown_command', 'message': 'Unknown command.'}})
+
+    return FakeHomeAssistantHandler
+
+
+def start_in_thread(state: FakeHomeAssistantState, host: str = '127.0.0.1', port: int = 0):
+    """
+    Start the fake server in a background thread.
+
+    Args:
+        state: Server state
+        host: Bind address
+        port: Port (0 picks a free port)
+
+    Returns:
+        Tuple of (server, base_url); call stop(server, state) to shut it down
+    """
+    server = ThreadingHTTPServer((host, port), _make_handler(state))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_port}"
+
+
+def stop(server, state: FakeHomeAssistantState) -> None:
+    """Stop a server started with start_in_thread and close its WebSockets."""
+    server.shutdown()
+    state.drop_connections()
+    server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--entity', action='append', help='Media player entity (repeat for several)')
+    parser.add_argument('--token', default=DEFAULT_TOKEN)
+    args = parser.parse_args()
+
+    entities = args.entity or [DEFAULT_ENTITY]
+    state = FakeHomeAssistantState(token=args.token, entities=entities)
+    server = ThreadingHTTPServer((args.host, args.port), _make_handler(state))
+    server.daemon_threads = True
+    print(f"Fake Home Assistant on http://{args.host}:{args.port} (entities {', '.join(entities)}, token {args.token})")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,444 @@
+"""
+Local fake YouTube Data API v3 server for testing and benchmarking.
+
+Implements the subset of the API the add-on uses:
+- GET  /youtube/v3/search            (search.list, 100 units)
+- GET  /youtube/v3/videos            (videos.list, 1 unit per request)
+- POST /youtube/v3/videos/rate       (videos.rate, 50 units)
+- GET  /youtube/v3/videos/getRating  (videos.getRating, 1 unit)
+
+Responses are deterministic for a given seed. Search results either come from
+recorded search debug records in an add-on database (replay mode) or are synthesized
+from the query. Latency, error injection (403 quotaExceeded, 5xx, 404) and a
+daily quota limit are configurable at startup or at runtime:
+
+- GET  /_fake/stats   quota used and request/error counters
+- POST /_fake/config  update latency/error settings (JSON body)
+- POST /_fake/reset   reset quota, counters and stored ratings
+
+Point the add-on at it with YTT_YOUTUBE_API_ENDPOINT=http://127.0.0.1:<port>/
+
+Usage:
+    python -m tools.fake_youtube_api --port 8765 --latency-ms 80 --error-5xx 0.02
+    python -m tools.fake_youtube_api --replay-db /config/youtube_thumbs/ratings.db
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Any, List, Optional, Tuple
+
+from flask import Flask, Response, jsonify, request
+
+# Quota costs charged by the fake server (as documented by Google)
+QUOTA_COSTS = {
+    'search': 100,
+    'videos.list': 1,
+    'videos.rate': 50,
+    'videos.getRating': 1,
+}
+
+DEFAULT_QUOTA_LIMIT = 10000
+SYNTHETIC_RESULTS = 25
+VALID_RATINGS = {'like', 'dislike', 'none'}
+
+
+def format_duration(seconds: int) -> str:
+    """Format seconds as an ISO 8601 duration (e.g. PT3M20S)."""
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, secs = divmod(remainder, 60)
+    result = 'PT'
+    if hours:
+        result += f"{hours}H"
+    if minutes:
+        result += f"{minutes}M"
+    if secs or result == 'PT':
+        result += f"{secs}S"
+    return result
+
+
+def _error_body(code: int, message: str, reason: str, domain: str = 'youtube.api') -> Dict[str, Any]:
+    """Build an error payload in the same shape as the real API."""
+    return {
+        'error': {
+            'code': code,
+            'message': message,
+            'errors': [{'message': message, 'domain': domain, 'reason': reason}]
+        }
+    }
+
+
+def _replay_compact_record(record: Dict[str, Any], searches: Dict[str, Dict], videos: Dict[str, Dict]) -> None:
+    """Rebuild search and video responses from a compact debug record (format 2)."""
+    query = record.get('search_query')
+    if query and record.get('search_results'):
+        searches[query] = {
+            'items': [
+                {'id': {'videoId': result['id']}, 'snippet': {'title': result.get('title', '')}}
+                for result in record['search_results']
+            ]
+        }
+
+    for batch in record.get('batches') or []:
+        for video in batch.get('videos', []):
+            item = {
+                'id': video['id'],
+                'snippet': {'title': video.get('title', ''), 'channelTitle': video.get('channel') or ''},
+            }
+            if video.get('duration') is not None:
+                item['contentDetails'] = {'duration': format_duration(video['duration'])}
+            videos[video['id']] = item
+
+
+def _replay_legacy_record(data: Dict[str, Any], searches: Dict[str, Dict], videos: Dict[str, Dict]) -> None:
+    """Collect raw search and videos.list responses from a legacy api_response_data blob."""
+    query = data.get('search_query')
+    if query and data.get('search_response'):
+        searches[query] = data['search_response']
+
+    for batch in data.get('batch_responses') or []:
+        for item in (batch.get('response') or {}).get('items', []):
+            if item.get('id'):
+                videos[item['id']] = item
+
+
+def load_replay_catalog(db_path: str) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+    """
+    Load recorded search and videos.list responses from an add-on database.
+
+    Reads the compact debug records in queue_debug_records, plus any legacy
+    api_response_data blobs still stored inline in the queue table.
+
+    Args:
+        db_path: Path to an add-on database (opened read-only)
+
+    Returns:
+        Tuple of (search responses keyed by query, video items keyed by ID)
+    """
+    searches = {}
+    videos = {}
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        records = []
+        if 'queue_debug_records' in tables:
+            records = conn.execute(
+                """
+                SELECT d.data FROM queue_debug_records d
+                JOIN queue q ON q.id = d.queue_id
+                WHERE q.type = 'search'
+                ORDER BY d.queue_id
+                """
+            ).fetchall()
+        legacy = conn.execute(
+            """
+            SELECT api_response_data FROM queue
+            WHERE type = 'search' AND api_response_data IS NOT NULL
+            ORDER BY id
+            """
+        ).fetchall()
+    finally:
+        conn.close()
+
+    for (blob,) in records:
+        try:
+            record = json.loads(zlib.decompress(blob).decode('utf-8'))
+        except (zlib.error, UnicodeDecodeError, ValueError):
+            continue
+        if isinstance(record, dict):
+            _replay_compact_record(record, searches, videos)
+
+    for (raw,) in legacy:
+        try:
+            data = json.loads(raw)
+        except (TypeError, ValueError):
+            continue
+        if isinstance(data, dict):
+            _replay_legacy_record(data, searches, videos)
+
+    return searches, videos
+
+
+class FakeYouTubeState:
+    """Catalog, quota accounting and fault injection settings for the fake server."""
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        error_quota: float = 0,
+        error_5xx: float = 0,
+        error_404: float = 0,
+        quota_limit: int = DEFAULT_QUOTA_LIMIT,
+        searches: Optional[Dict[str, Dict]] = None,
+        videos: Optional[Dict[str, Dict]] = None
+    ) -> None:
+        self._lock = threading.Lock()
+        self.seed = seed
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_quota = error_quota
+        self.error_5xx = error_5xx
+        self.error_404 = error_404
+        self.quota_limit = quota_limit
+        self.searches = searches or {}
+        self.videos = videos or {}
+        self.replay = bool(searches)
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset quota, counters, stored ratings and the random sequence."""
+        with self._lock:
+            self._rng = random.Random(self.seed)
+            self.quota_used = 0
+            self.requests = {method: 0 for method in QUOTA_COSTS}
+            self.errors = {'quotaExceeded': 0, 'backendError': 0, 'notFound': 0}
+            self.ratings = {}
+
+    def configure(self, settings: Dict[str, Any]) -> None:
+        """Update latency and fault injection settings."""
+        with self._lock:
+            for key in ('latency_ms', 'jitter_ms', 'error_quota', 'error_5xx', 'error_404', 'quota_limit'):
+                if key in settings:
+                    setattr(self, key, type(getattr(self, key))(settings[key]))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get quota and request counters."""
+        with self._lock:
+            return {
+                'quota_used': self.quota_used,
+                'quota_limit': self.quota_limit,
+                'requests': dict(self.requests),
+                'errors': dict(self.errors),
+                'replay': self.replay,
+                'catalog': {'searches': len(self.searches), 'videos': len(self.videos)}
+            }
+
+    def admit(self, api_method: str, allow_not_found: bool = False) -> Optional[Tuple[int, Dict]]:
+        """
+        Apply latency, injected faults and quota for one request.
+
+        Args:
+            api_method: API method being called
+            allow_not_found: Whether a 404 may be injected for this method
+
+        Returns:
+            (status, error body) if the request should fail, None to proceed
+        """
+        with self._lock:
+            delay = self.latency_ms + (self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0)
+            roll = self._rng.random()
+            self.requests[api_method] += 1
+
+            if self.quota_used + QUOTA_COSTS[api_method] > self.quota_limit or roll < self.error_quota:
+                self.errors['quotaExceeded'] += 1
+                failure = (403, _error_body(
+                    403,
+                    'The request cannot be completed because you have exceeded your '
+                    '<a href="/youtube/v3/getting-started#quota">quota</a>.',
+                    'quotaExceeded',
+                    domain='youtube.quota'
+                ))
+            elif roll < self.error_quota + self.error_5xx:
+                self.errors['backendError'] += 1
+                failure = (503, _error_body(503, 'The service is currently unavailable.', 'backendError'))
+            elif allow_not_found and roll < self.error_quota + self.error_5xx + self.error_404:
+                self.errors['notFound'] += 1
+                failure = (404, _error_body(404, 'The video identified by the id parameter could not be found.',
+                                            'videoNotFound', domain='youtube.video'))
+            else:
+                self.quota_used += QUOTA_COSTS[api_method]
+                failure = None
+
+        if delay > 0:
+            time.sleep(delay / 1000)
+        return failure
+
+    def _synthetic_id(self, query: str, index: int) -> str:
+        """Deterministic 11-character video ID for a synthetic search result."""
+        digest = hashlib.sha256(f"{self.seed}:{query}:{index}".encode()).hexdigest()
+        return digest[:11]
+
+    def search(self, query: str, max_results: int) -> Dict[str, Any]:
+        """Get search results (recorded in replay mode, otherwise synthesized)."""
+        if query in self.searches:
+            response = dict(self.searches[query])
+            response['items'] = response.get('items', [])[:max_results]
+            return response
+
+        items = []
+        for index in range(min(max_results, SYNTHETIC_RESULTS)):
+            video_id = self._synthetic_id(query, index)
+            title = f"{query} ({index})" if index else query
+            items.append({'id': {'videoId': video_id}, 'snippet': {'title': title}})
+            with self._lock:
+                if video_id in self.videos:
+                    continue
+                seconds = 120 + int(video_id[:6], 16) % 240
+                self.videos[video_id] = {
+                    'id': video_id,
+                    'snippet': {
+                        'title': title,
+                        'channelTitle': 'Fake Channel',
+                        'channelId': 'UCfake000000000000000000',
+                        'description': f"Synthetic result {index} for {query}",
+                        'publishedAt': '2020-01-01T00:00:00Z',
+                        'categoryId': '10',
+                        'liveBroadcastContent': 'none'
+                    },
+                    'contentDetails': {'duration': format_duration(seconds)}
+                }
+        return {'items': items}
+
+    def get_videos(self, video_ids: List[str]) -> Dict[str, Any]:
+        """Get video details for known IDs (unknown IDs are omitted, like the real API)."""
+        return {'items': [self.videos[video_id] for video_id in video_ids if video_id in self.videos]}
+
+
+def create_app(state: FakeYouTubeState) -> Flask:
+    """
+    Create the fake API Flask app.
+
+    Args:
+        state: Server state (catalog, quota, fault injection)
+
+    Returns:
+        Flask app
+    """
+    app = Flask(__name__)
+
+    def _fail(failure: Tuple[int, Dict]) -> Response:
+        status, body = failure
+        return jsonify(body), status
+
+    @app.get('/youtube/v3/search')
+    def search_list():
+        failure = state.admit('search')
+        if failure:
+            return _fail(failure)
+        max_results = min(int(request.args.get('maxResults', 5)), 50)
+        return jsonify(state.search(request.args.get('q', ''), max_results))
+
+    @app.get('/youtube/v3/videos')
+    def videos_list():
+        failure = state.admit('videos.list')
+        if failure:
+            return _fail(failure)
+        video_ids = [video_id for video_id in request.args.get('id', '').split(',') if video_id]
+        if len(video_ids) > 50:
+            return jsonify(_error_body(400, 'Too many IDs (max 50).', 'invalidParameter')), 400
+        return jsonify(state.get_videos(video_ids))
+
+    @app.post('/youtube/v3/videos/rate')
+    def videos_rate():
+        failure = state.admit('videos.rate', allow_not_found=True)
+        if failure:
+            return _fail(failure)
+        video_id = request.args.get('id', '')
+        rating = request.args.get('rating', '')
+        if rating not in VALID_RATINGS:
+            return jsonify(_error_body(400, f"Invalid rating: {rating}", 'invalidRating')), 400
+        if state.replay and video_id not in state.videos:
+            return jsonify(_error_body(404, 'Video not found.', 'videoNotFound', domain='youtube.video')), 404
+        state.ratings[video_id] = rating
+        return Response(status=204)
+
+    @app.get('/youtube/v3/videos/getRating')
+    def videos_get_rating():
+        failure = state.admit('videos.getRating', allow_not_found=True)
+        if failure:
+            return _fail(failure)
+        video_ids = [video_id for video_id in request.args.get('id', '').split(',') if video_id]
+        return jsonify({
+            'items': [{'videoId': video_id, 'rating': state.ratings.get(video_id, 'none')} for video_id in video_ids]
+        })
+
+    @app.get('/_fake/stats')
+    def fake_stats():
+        return jsonify(state.stats())
+
+    @app.post('/_fake/config')
+    def fake_config():
+        state.configure(request.get_json(force=True) or {})
+        return jsonify(state.stats())
+
+    @app.post('/_fake/reset')
+    def fake_reset():
+        state.reset()
+        return jsonify(state.stats())
+
+    return app
+
+
+def start_in_thread(state: FakeYouTubeState, host: str = '127.0.0.1', port: int = 0):
+    """
+    Start the fake server in a background thread.
+
+    Args:
+        state: Server state
+        host: Bind address
+        port: Port (0 picks a free port)
+
+    Returns:
+        Tuple of (server, base_url); call server.shutdown() to stop it
+    """
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class _QuietRequestHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server(host, port, create_app(state), threaded=True, request_handler=_QuietRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_port}/"
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """Build the command line parser shared with the replay benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for latency jitter and fault injection')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Added latency per request')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='Uniform +/- jitter on the added latency')
+    parser.add_argument('--error-quota', type=float, default=0, help='Probability of a 403 quotaExceeded')
+    parser.add_argument('--error-5xx', type=float, default=0, help='Probability of a 503 backendError')
+    parser.add_argument('--error-404', type=float, default=0, help='Probability of a 404 on rate/getRating')
+    parser.add_argument('--quota-limit', type=int, default=DEFAULT_QUOTA_LIMIT, help='Daily quota units')
+    parser.add_argument('--replay-db', help='Serve recorded responses from this database\'s search debug records')
+    return parser
+
+
+def state_from_args(args) -> FakeYouTubeState:
+    """Create server state from parsed command line arguments."""
+    searches, videos = load_replay_catalog(args.replay_db) if args.replay_db else ({}, {})
+    return FakeYouTubeState(
+        seed=args.seed,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_quota=args.error_quota,
+        error_5xx=args.error_5xx,
+        error_404=args.error_404,
+        quota_limit=args.quota_limit,
+        searches=searches,
+        videos=videos
+    )
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    state = state_from_args(args)
+    print(f"Fake YouTube API on http://{args.host}:{args.port}/ ({json.dumps(state.stats()['catalog'])})")
+    create_app(state).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+"""
+Deterministic replay benchmark for the queue worker and matching pipeline.
+
+Starts the local fake YouTube API (tools/fake_youtube_api.py) in-process,
+enqueues searches into a scratch database and drives
+queue_worker.process_next_item() back to back (no 60s pacing), then reports
+throughput, per-item latency, quota used and how outcomes compare to the
+recorded run.
+
+With --replay-db, searches and API responses are taken from the search
+debug records stored in that database, so the same matching
+decisions are made on every run. Without it, --synthetic N songs are
+searched against synthesized results.
+
+Usage:
+    python -m tools.replay_benchmark --replay-db /config/youtube_thumbs/ratings.db
+    python -m tools.replay_benchmark --synthetic 50 --latency-ms 100 --error-5xx 0.05
+
+The scratch database (--bench-db) is deleted and recreated on every run; it
+must be inside one of the add-on's allowed data directories.
+"""
+
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+from tools.fake_youtube_api import build_arg_parser, state_from_args, start_in_thread
+
+DEFAULT_BENCH_DB = '/config/youtube_thumbs/replay_benchmark.db'
+
+
+def load_recorded_searches(db_path: str, limit: int) -> List[Dict[str, Any]]:
+    """
+    Load recorded search queue items (payload and final status).
+
+    Args:
+        db_path: Path to an add-on database (opened read-only)
+        limit: Maximum number of searches to load (oldest first)
+
+    Returns:
+        List of dicts with 'payload' and 'status'
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        # Databases from before debug records moved out of the queue table only have the inline column
+        has_records = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'queue_debug_records'"
+        ).fetchone()
+        recorded = "q.api_response_data IS NOT NULL"
+        if has_records:
+            recorded += " OR EXISTS (SELECT 1 FROM queue_debug_records d WHERE d.queue_id = q.id)"
+        rows = conn.execute(
+            f"""
+            SELECT q.payload, q.status FROM queue q
+            WHERE q.type = 'search'
+              AND q.status IN ('completed', 'failed')
+              AND ({recorded})
+            ORDER BY q.id
+            LIMIT ?
+            """,
+            (limit,)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return [{'payload': json.loads(payload), 'status': status} for payload, status in rows]
+
+
+def synthetic_searches(count: int) -> List[Dict[str, Any]]:
+    """Generate deterministic synthetic search payloads."""
+    return [
+        {
+            'payload': {
+                'ha_title': f"Benchmark Song {index}",
+                'ha_artist': f"Benchmark Artist {index % 7}",
+                'ha_album': None,
+                'ha_content_id': None,
+                'ha_duration': 120 + (index * 37) % 240,
+                'ha_app_name': 'YouTube'
+            },
+            'status': None
+        }
+        for index in range(count)
+    ]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def main() -> int:
+    parser = build_arg_parser()
+    parser.description = __doc__
+    parser.add_argument('--bench-db', default=DEFAULT_BENCH_DB, help='Scratch database (recreated every run)')
+    parser.add_argument('--limit', type=int, default=500, help='Maximum recorded searches to replay')
+    parser.add_argument('--synthetic', type=int, default=50, help='Synthetic searches when --replay-db is not given')
+    args = parser.parse_args()
+
+    # The database module reads YTT_DB_PATH at import time
+    bench_db = Path(args.bench_db)
+    for suffix in ('', '-wal', '-shm'):
+        Path(f"{bench_db}{suffix}").unlink(missing_ok=True)
+    os.environ['YTT_DB_PATH'] = str(bench_db)
+
+    from google.auth.credentials import AnonymousCredentials
+    from database import get_database
+    from youtube_api import YouTubeAPI, set_database as set_youtube_api_database
+    from youtube_api.auth import build_client
+    from queue_worker import process_next_item
+
+    searches = load_recorded_searches(args.replay_db, args.limit) if args.replay_db else synthetic_searches(args.synthetic)
+    if not searches:
+        print("No searches to replay")
+        return 1
+
+    state = state_from_args(args)
+    server, base_url = start_in_thread(state)
+
+    try:
+        db = get_database()
+        set_youtube_api_database(db)
+        yt_api = YouTubeAPI(youtube=build_client(AnonymousCredentials(), api_endpoint=base_url))
+
+        recorded_status = {}
+        for search in searches:
+            payload = search['payload']
+            queue_id = db.enqueue_search({
+                'title': payload.get('ha_title'),
+                'artist': payload.get('ha_artist'),
+                'album': payload.get('ha_album'),
+                'content_id': payload.get('ha_content_id'),
+                'duration': payload.get('ha_duration'),
+                'app_name': payload.get('ha_app_name')
+            })
+            if queue_id is not None:
+                recorded_status[queue_id] = search['status']
+
+        latencies = []
+        outcome = 'empty'
+        start = time.perf_counter()
+        while True:
+            item_start = time.perf_counter()
+            outcome = process_next_item(db, yt_api)
+            if outcome != 'success':
+                break
+            latencies.append((time.perf_counter() - item_start) * 1000)
+        elapsed = time.perf_counter() - start
+
+        results = {}
+        for queue_id, expected in recorded_status.items():
+            item = db.get_queue_item_by_id(queue_id) or {}
+            results[queue_id] = (item.get('status'), expected)
+
+        fake_stats = state.stats()
+    finally:
+        server.shutdown()
+
+    completed = sum(1 for status, _ in results.values() if status == 'completed')
+    compared = [(status, expected) for status, expected in results.values() if expected]
+    agreed = sum(1 for status, expected in compared if status == expected)
+
+    report = {
+        'items_processed': len(latencies),
+        'stopped_on': outcome,
+        'elapsed_s': round(elapsed, 2),
+        'items_per_s': round(len(latencies) / elapsed, 2) if elapsed > 0 else None,
+        'latency_ms': {
+            'p50': round(statistics.median(latencies), 1) if latencies else None,
+            'p95': round(_percentile(latencies, 95), 1) if latencies else None,
+            'max': round(max(latencies), 1) if latencies else None
+        },
+        'matched': completed,
+        'outcome_agreement': f"{agreed}/{len(compared)}" if compared else None,
+        'fake_api': fake_stats
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
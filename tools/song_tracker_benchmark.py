@@ -0,0 +1,178 @@
+"""
+Song tracker benchmark: detection latency and Home Assistant request volume.
+
+Starts the local fake Home Assistant (tools/fake_homeassistant.py) in-process,
+plays a deterministic sequence of tracks followed by an idle (paused) period,
+and runs the song tracker against it once with REST polling only and once
+with the WebSocket subscription. For each mode it reports how many tracks were
+detected, the detection latency (track start to enqueue_search) and how many
+Home Assistant requests were made, extrapolated to a day.
+
+Plays only count once their playback session reaches the scrobble threshold
+(half the track or 4 minutes, see playback_session.py), so the latency
+includes that listening time: with the WebSocket, a track that plays through
+without intermediate state changes counts when the next one starts.
+
+Times are simulated: --time-scale 30 runs a 30s poll interval as 1s of wall
+clock time, and track lengths, the adaptive (fast and idle) poll intervals and
+the idle period are scaled the same way. The media_duration reported to the
+tracker is the scaled length, so its end-of-track timing works in wall clock
+time.
+
+Usage:
+    python -m tools.song_tracker_benchmark
+    python -m tools.song_tracker_benchmark --tracks 40 --min-track 20 --max-track 300 --time-scale 60
+
+The scratch database (--bench-db) is deleted and recreated on every run; it
+must be inside one of the add-on's allowed data directories.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List
+
+from tools.fake_homeassistant import FakeHomeAssistantState, start_in_thread, stop, DEFAULT_ENTITY, DEFAULT_TOKEN
+
+DEFAULT_BENCH_DB = '/config/youtube_thumbs/song_tracker_benchmark.db'
+
+
+class _TimedDatabase:
+    """Delegates to the real database and records when each search is enqueued."""
+
+    def __init__(self, db) -> None:
+        self._db = db
+        self.enqueued: Dict[str, float] = {}
+
+    def enqueue_search(self, ha_media, callback_rating=None):
+        self.enqueued.setdefault(ha_media.get('title'), time.monotonic())
+        return self._db.enqueue_search(ha_media, callback_rating)
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_mode(mode: str, args, ha_api, db, fake: FakeHomeAssistantState) -> Dict[str, Any]:
+    """
+    Play the track sequence against one song tracker mode.
+
+    Returns:
+        Report dict for the mode
+    """
+    from song_tracker import SongTracker
+
+    rng = random.Random(args.seed)
+    tracks = [(f"{mode} benchmark track {index}", rng.randint(args.min_track, args.max_track))
+              for index in range(args.tracks)]
+
+    fake.set_state('idle')
+    fake.reset()
+    timed_db = _TimedDatabase(db)
+    tracker = SongTracker(ha_api, timed_db, poll_interval=args.poll_interval / args.time_scale,
+                          use_websocket=(mode == 'websocket'),
+                          fast_poll_interval=args.fast_poll_interval / args.time_scale,
+                          idle_poll_interval=args.idle_poll_interval / args.time_scale)
+
+    start = time.monotonic()
+    tracker.start()
+    time.sleep(0.5)  # let the WebSocket subscribe (polling waits one interval anyway)
+
+    started = {}
+    for title, duration in tracks:
+        started[title] = time.monotonic()
+        fake.play(title, duration / args.time_scale)
+        time.sleep(duration / args.time_scale)
+    fake.set_state('paused')
+    time.sleep(args.idle_minutes * 60 / args.time_scale)
+
+    tracker.stop()
+    elapsed_simulated = (time.monotonic() - start) * args.time_scale
+    stats = fake.stats()
+
+    latencies = [
+        (timed_db.enqueued[title] - started[title]) * args.time_scale
+        for title, _ in tracks if title in timed_db.enqueued
+    ]
+    missed = [title for title, _ in tracks if title not in timed_db.enqueued]
+    ha_requests = sum(stats['requests'].values())
+
+    return {
+        'tracks': len(tracks),
+        'detected': len(latencies),
+        'missed': len(missed),
+        'missed_short_tracks': sum(1 for title, duration in tracks
+                                   if title in missed and duration < args.poll_interval),
+        'detection_latency_s': {
+            'p50': round(statistics.median(latencies), 2) if latencies else None,
+            'p95': round(_percentile(latencies, 95), 2) if latencies else None,
+            'max': round(max(latencies), 2) if latencies else None
+        },
+        'simulated_minutes': round(elapsed_simulated / 60, 1),
+        'ha_requests': stats['requests'],
+        'websocket_events': stats['websocket']['events_pushed'],
+        'ha_requests_per_day': round(ha_requests / elapsed_simulated * 86400) if elapsed_simulated else None
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bench-db', default=DEFAULT_BENCH_DB, help='Scratch database (recreated every run)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for track lengths')
+    parser.add_argument('--tracks', type=int, default=20, help='Number of tracks to play')
+    parser.add_argument('--min-track', type=int, default=15, help='Shortest track (simulated seconds)')
+    parser.add_argument('--max-track', type=int, default=240, help='Longest track (simulated seconds)')
+    parser.add_argument('--idle-minutes', type=float, default=30, help='Paused period after the tracks (simulated)')
+    parser.add_argument('--poll-interval', type=float, default=30, help='Song tracker poll interval (simulated seconds)')
+    parser.add_argument('--fast-poll-interval', type=float, default=5,
+                        help='Shortest adaptive poll interval (simulated seconds)')
+    parser.add_argument('--idle-poll-interval', type=float, default=120,
+                        help='Poll interval while paused or idle (simulated seconds)')
+    parser.add_argument('--time-scale', type=float, default=30, help='Simulated seconds per wall clock second')
+    parser.add_argument('--mode', choices=('poll', 'websocket', 'both'), default='both')
+    args = parser.parse_args()
+
+    # The database and Home Assistant modules read their configuration at import time
+    bench_db = Path(args.bench_db)
+    for suffix in ('', '-wal', '-shm'):
+        Path(f"{bench_db}{suffix}").unlink(missing_ok=True)
+
+    fake = FakeHomeAssistantState()
+    server, base_url = start_in_thread(fake)
+    os.environ.update({
+        'YTT_DB_PATH': str(bench_db),
+        'HOME_ASSISTANT_URL': base_url,
+        'HOME_ASSISTANT_TOKEN': DEFAULT_TOKEN,
+        'MEDIA_PLAYER_ENTITY': DEFAULT_ENTITY
+    })
+    os.environ.pop('SUPERVISOR_TOKEN', None)
+    os.environ.pop('HOME_ASSISTANT_WS_URL', None)
+
+    try:
+        from database import get_database
+        from homeassistant_api import HomeAssistantAPI
+
+        db = get_database()
+        ha_api = HomeAssistantAPI()
+        modes = ('poll', 'websocket') if args.mode == 'both' else (args.mode,)
+        report = {mode: run_mode(mode, args, ha_api, db, fake) for mode in modes}
+    finally:
+        stop(server, fake)
+
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
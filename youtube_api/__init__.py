@@ -10,11 +10,16 @@ The module is organized into focused submodules:
 - rating: Get/set video ratings
 - video_parser: Video data processing
 - title_cleaner: Title sanitization and cleaning
-- quota_manager: Quota error detection
+- quota_manager: Quota error detection and cost model
+- fetch_planner: Adaptive videos.list fetch planning
+- transport: Pooled keep-alive HTTP transport with per-call timings
+- async_client: Bounded-concurrency bulk videos.list / getRating for backfills
+- credential_pool: Multiple Google Cloud projects for searches and videos.list
 """
 
-from typing import Optional
+from typing import Optional, Dict, Any, List
 from logging_helper import LoggingHelper, LogType
+from quota_error import QuotaExceededError
 
 # Import submodule functions
 from .auth import authenticate, SCOPES
@@ -22,7 +27,11 @@ from .search import search_video_globally, set_database as set_search_database
 from .rating import get_video_rating, set_video_rating, NO_RATING
 from .video_parser import parse_duration
 from .title_cleaner import build_smart_search_query
-from .quota_manager import quota_error_detail
+from .quota_manager import quota_error_detail, quota_cost, get_quota_usage
+from .fetch_planner import set_database as set_fetch_planner_database
+from .transport import get_transport_stats
+from .async_client import AsyncYouTubeClient, list_videos_bulk, get_ratings_bulk
+from .credential_pool import CredentialPool, set_database as set_credential_pool_database
 
 # Get logger instance
 logger = LoggingHelper.get_logger(LogType.MAIN)
@@ -37,6 +46,10 @@ def set_database(db):
     _db = db
     # Also set database in search module for API call logging
     set_search_database(db)
+    # Also set database in fetch planner so it can learn from past searches
+    set_fetch_planner_database(db)
+    # Also set database in credential pool so it can pick the credential with most quota left
+    set_credential_pool_database(db)
     # Also set database in decorators module so it can log API call errors
     import decorators
     decorators._db = db
@@ -48,13 +61,22 @@ class YouTubeAPI:
     SCOPES = SCOPES
     NO_RATING = NO_RATING
 
-    def __init__(self) -> None:
-        self.youtube = None
-        self.authenticate()
+    def __init__(self, youtube: Optional[object] = None) -> None:
+        """
+        Args:
+            youtube: Pre-built API client (e.g. for a local fake API); authenticates via OAuth2 if omitted
+        """
+        self.youtube = youtube
+        self.pool = None
+        if self.youtube is None:
+            self.authenticate()
+        else:
+            self.pool = CredentialPool.from_client(youtube)
 
     def authenticate(self) -> None:
-        """Authenticate with YouTube API using OAuth2."""
-        self.youtube = authenticate()
+        """Authenticate every credential in the pool using OAuth2 (self.youtube owns the ratings)."""
+        self.pool = CredentialPool.authenticate_all()
+        self.youtube = self.pool.primary
 
     def search_video_globally(
         self,
@@ -76,13 +98,16 @@ class YouTubeAPI:
             If return_api_response=False: List of candidate videos or None
             If return_api_response=True: Tuple of (candidates or None, api_debug_data dict)
         """
-        return search_video_globally(
-            self.youtube,
+        # search.list fails over as a whole; the videos.list steps fail over on their own,
+        # so a videos.list quota error doesn't repeat the 100-unit search.list
+        return self.pool.call('search', lambda youtube: search_video_globally(
+            youtube,
             title,
             expected_duration,
             artist,
-            return_api_response
-        )
+            return_api_response,
+            videos_list_call=lambda fetch: self.pool.call('videos.list', fetch)
+        ))
 
     def get_video_rating(self, yt_video_id: str) -> str:
         """
@@ -115,6 +140,56 @@ class YouTubeAPI:
         """
         return set_video_rating(self.youtube, yt_video_id, rating)
 
+    def list_videos_bulk(self, video_ids: List[str], max_concurrency: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Fetch metadata for many videos (50 IDs per request, requests pipelined).
+
+        Runs on the credential with the most headroom; if its quota runs out,
+        the IDs it didn't fetch are retried on the next credential.
+
+        Args:
+            video_ids: YouTube video IDs
+            max_concurrency: Maximum requests in flight (default YTT_BULK_CONCURRENCY)
+
+        Returns:
+            Dict with 'videos' (keyed by ID), 'missing', 'failed' and 'quota_exceeded'
+        """
+        result = {'videos': {}, 'missing': [], 'failed': [], 'quota_exceeded': False}
+        remaining = list(video_ids)
+
+        def fetch(youtube):
+            if max_concurrency is None:
+                partial = list_videos_bulk(youtube, remaining)
+            else:
+                partial = list_videos_bulk(youtube, remaining, max_concurrency)
+            result['videos'].update(partial['videos'])
+            result['missing'].extend(partial['missing'])
+            if partial['quota_exceeded']:
+                # Retry the IDs this credential didn't get to on the next one
+                remaining[:] = partial['failed']
+                raise QuotaExceededError("YouTube API quota exceeded")
+            result['failed'].extend(partial['failed'])
+            return result
+
+        try:
+            return self.pool.call('videos.list', fetch)
+        except QuotaExceededError:
+            result['failed'].extend(remaining)
+            result['quota_exceeded'] = True
+            return result
+
+
+    def get_ratings_bulk(self, video_ids: List[str]) -> Dict[str, Any]:
+        """
+        Get current ratings for many videos (50 IDs per 1-unit request).
+
+        Args:
+            video_ids: YouTube video IDs
+
+        Returns:
+            Dict with 'ratings' (keyed by ID), 'failed' and 'quota_exceeded'
+        """
+        return get_ratings_bulk(self.youtube, video_ids)
 
 # Create global instance (will be initialized when module is imported)
 yt_api = None
@@ -141,6 +216,13 @@ __all__ = [
     'parse_duration',
     'build_smart_search_query',
     'quota_error_detail',
+    'quota_cost',
+    'get_quota_usage',
+    'get_transport_stats',
+    'AsyncYouTubeClient',
+    'list_videos_bulk',
+    'get_ratings_bulk',
+    'CredentialPool',
     'SCOPES',
     'NO_RATING',
 ]
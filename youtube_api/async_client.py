@@ -0,0 +1,214 @@
+"""
+Async YouTube API client for bulk operations.
+
+Bulk jobs (metadata refreshes, rating reconciliation) need many independent
+videos.list / videos.getRating calls. Running them one at a time leaves the connection idle
+between round-trips, so this client pipelines them with asyncio, bounded by
+a semaphore so YouTube never sees more than max_concurrency requests at once.
+
+Requests run on worker threads through the same client as everything else,
+so they share the OAuth token and the pooled keep-alive transport (which is
+thread-safe). Each call goes through handle_youtube_error, so quota is
+recorded in api_usage/api_call_log exactly like synchronous calls. The first
+QuotaExceededError stops all remaining calls of the client.
+"""
+
+import asyncio
+from typing import Dict, Any, List, Tuple
+
+from logging_helper import LoggingHelper, LogType
+from decorators import handle_youtube_error
+from error_handler import validate_environment_variable
+from quota_error import QuotaExceededError, YouTubeAPIError
+from .rating import get_video_ratings
+
+# Get logger instance
+logger = LoggingHelper.get_logger(LogType.MAIN)
+
+# videos.list and videos.getRating accept at most 50 IDs per request (1 quota unit per request)
+MAX_IDS_PER_REQUEST = 50
+
+# Concurrent requests in flight per bulk job
+DEFAULT_CONCURRENCY = validate_environment_variable(
+    'YTT_BULK_CONCURRENCY',
+    default=4,
+    converter=int,
+    validator=lambda x: 1 <= x <= 16
+)
+
+# Metadata refreshed by bulk jobs (status tells private/rejected videos apart)
+BULK_VIDEO_PARTS = 'snippet,contentDetails,status'
+BULK_VIDEO_FIELDS = (
+    'items(id,snippet(title,channelTitle,channelId,categoryId,liveBroadcastContent),'
+    'contentDetails(duration),status(privacyStatus,uploadStatus))'
+)
+
+
+@handle_youtube_error(context='bulk_video_details', api_method='videos.list')
+def fetch_video_details(youtube_client, ids_csv: str) -> List[Dict[str, Any]]:
+    """
+    Fetch metadata for up to 50 videos in one videos.list call.
+
+    Args:
+        youtube_client: Authenticated YouTube API client
+        ids_csv: Comma-separated video IDs (max 50)
+
+    Returns:
+        List of video resources (deleted/private videos are omitted by YouTube)
+
+    Raises:
+        Specific exceptions on failure (no error suppression)
+    """
+    response = youtube_client.videos().list(
+        part=BULK_VIDEO_PARTS,
+        id=ids_csv,
+        fields=BULK_VIDEO_FIELDS,
+        maxResults=MAX_IDS_PER_REQUEST
+    ).execute()
+    return response.get('items', [])
+
+
+def chunk_ids(video_ids: List[str], size: int = MAX_IDS_PER_REQUEST) -> List[List[str]]:
+    """Split video IDs into request-sized chunks (duplicates removed, order kept)."""
+    unique_ids = list(dict.fromkeys(video_ids))
+    return [unique_ids[i:i + size] for i in range(0, len(unique_ids), size)]
+
+
+class AsyncYouTubeClient:
+    """Bounded-concurrency asyncio wrapper around the YouTube API client."""
+
+    def __init__(self, youtube_client, max_concurrency: int = DEFAULT_CONCURRENCY) -> None:
+        """
+        Initialize async client.
+
+        Args:
+            youtube_client: Authenticated YouTube API client (shared with sync callers)
+            max_concurrency: Maximum requests in flight at once
+        """
+        self._youtube = youtube_client
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.quota_exceeded = False
+
+    async def _call(self, func, *args):
+        """Run one blocking API call on a worker thread once a slot is free."""
+        async with self._semaphore:
+            if self.quota_exceeded:
+                raise QuotaExceededError("YouTube API quota exceeded")
+            try:
+                return await asyncio.to_thread(func, self._youtube, *args)
+            except QuotaExceededError:
+                self.quota_exceeded = True
+                raise
+
+    async def _gather_chunks(self, func, chunks: List[List[str]]) -> List[Tuple[List[str], Any]]:
+        """Run func once per chunk concurrently; failed chunks yield their exception."""
+        results = await asyncio.gather(
+            *(self._call(func, ','.join(chunk)) for chunk in chunks),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, (QuotaExceededError, YouTubeAPIError)):
+                logger.error(f"Bulk {func.__name__} request failed: {result}")
+        return list(zip(chunks, results))
+
+    async def list_videos(self, video_ids: List[str]) -> Dict[str, Any]:
+        """
+        Fetch metadata for any number of videos, 50 IDs per request, pipelined.
+
+        Args:
+            video_ids: YouTube video IDs
+
+        Returns:
+            Dict with:
+            - videos: video resources keyed by ID
+            - missing: IDs YouTube did not return (deleted or private)
+            - failed: IDs whose request failed (unknown state, retry later)
+            - quota_exceeded: True if quota ran out during the job
+        """
+        chunks = chunk_ids(video_ids)
+        videos = {}
+        missing = []
+        failed = []
+        for chunk, result in await self._gather_chunks(fetch_video_details, chunks):
+            if isinstance(result, BaseException):
+                failed.extend(chunk)
+                continue
+
+            returned = {item['id']: item for item in result if item.get('id')}
+            videos.update(returned)
+            missing.extend(video_id for video_id in chunk if video_id not in returned)
+
+        logger.debug(
+            f"Bulk videos.list: {len(chunks)} requests, {len(videos)} found, "
+            f"{len(missing)} missing, {len(failed)} failed"
+        )
+        return {
+            'videos': videos,
+            'missing': missing,
+            'failed': failed,
+            'quota_exceeded': self.quota_exceeded
+        }
+
+
+    async def get_ratings(self, video_ids: List[str]) -> Dict[str, Any]:
+        """
+        Fetch the current user's ratings for any number of videos, 50 IDs per request.
+
+        Args:
+            video_ids: YouTube video IDs
+
+        Returns:
+            Dict with:
+            - ratings: 'like', 'dislike' or 'none' keyed by ID
+            - failed: IDs whose request failed
+            - quota_exceeded: True if quota ran out during the job
+        """
+        ratings = {}
+        failed = []
+        for chunk, result in await self._gather_chunks(get_video_ratings, chunk_ids(video_ids)):
+            if isinstance(result, BaseException):
+                failed.extend(chunk)
+            else:
+                ratings.update(result)
+
+        return {
+            'ratings': ratings,
+            'failed': failed,
+            'quota_exceeded': self.quota_exceeded
+        }
+
+
+def list_videos_bulk(youtube_client, video_ids: List[str], max_concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, Any]:
+    """
+    Synchronous entry point for bulk videos.list (runs its own event loop).
+
+    Args:
+        youtube_client: Authenticated YouTube API client
+        video_ids: YouTube video IDs
+        max_concurrency: Maximum requests in flight at once
+
+    Returns:
+        Same dict as AsyncYouTubeClient.list_videos()
+    """
+    async def _run():
+        return await AsyncYouTubeClient(youtube_client, max_concurrency).list_videos(video_ids)
+
+    return asyncio.run(_run())
+
+
+def get_ratings_bulk(youtube_client, video_ids: List[str], max_concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, Any]:
+    """
+    Synchronous entry point for bulk videos.getRating (runs its own event loop).
+
+    Args:
+        youtube_client: Authenticated YouTube API client
+        video_ids: YouTube video IDs
+        max_concurrency: Maximum requests in flight at once
+
+    Returns:
+        Same dict as AsyncYouTubeClient.get_ratings()
+    """
+    async def _run():
+        return await AsyncYouTubeClient(youtube_client, max_concurrency).get_ratings(video_ids)
+
+    return asyncio.run(_run())
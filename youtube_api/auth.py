@@ -6,12 +6,15 @@ This module handles authentication with YouTube using OAuth2 credentials.
 
 import json
 import os
+import re
 import stat
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build_from_document
 from logging_helper import LoggingHelper, LogType
+from error_handler import validate_environment_variable
+from .transport import PooledHttp, get_discovery_document
 
 # Get logger instance
 logger = LoggingHelper.get_logger(LogType.MAIN)
@@ -19,16 +22,82 @@ logger = LoggingHelper.get_logger(LogType.MAIN)
 # OAuth2 scopes for YouTube API
 SCOPES = ['https://www.googleapis.com/auth/youtube']
 
+# Optional API endpoint override (e.g. a local fake YouTube API server for testing)
+API_ENDPOINT = os.getenv('YTT_YOUTUBE_API_ENDPOINT')
 
-def authenticate() -> object:
+# The credential in credentials.json/token.json owns the ratings
+PRIMARY_CREDENTIAL = 'primary'
+
+# Extra Google Cloud projects for searches and videos.list, each with its own quota
+# (comma-separated names; NAME uses credentials_NAME.json and token_NAME.json)
+EXTRA_CREDENTIALS = validate_environment_variable(
+    'YTT_CREDENTIAL_POOL',
+    default=[],
+    converter=lambda x: [name.strip() for name in x.split(',') if name.strip()],
+    validator=lambda names: all(
+        re.fullmatch(r'[A-Za-z0-9_-]+', name) and name != PRIMARY_CREDENTIAL for name in names
+    )
+)
+
+# All configured credentials, rating owner first
+CREDENTIAL_POOL = [PRIMARY_CREDENTIAL] + list(dict.fromkeys(EXTRA_CREDENTIALS))
+
+
+def credential_files(credential: str = PRIMARY_CREDENTIAL) -> tuple:
+    """
+    Get the OAuth client secrets and token file names for a credential.
+
+    Args:
+        credential: Credential name
+
+    Returns:
+        Tuple of (credentials file, token file)
+    """
+    if credential == PRIMARY_CREDENTIAL:
+        return 'credentials.json', 'token.json'
+    return f'credentials_{credential}.json', f'token_{credential}.json'
+
+
+def credential_of(youtube_client) -> str:
+    """Get the name of the credential a client was built for (primary for pre-built clients)."""
+    return getattr(youtube_client, 'ytt_credential', PRIMARY_CREDENTIAL)
+
+
+def build_client(creds: Credentials, api_endpoint: str = None) -> object:
+    """
+    Build the YouTube API client on the pooled keep-alive transport.
+
+    Args:
+        creds: Valid OAuth2 credentials (refreshed automatically by the transport)
+        api_endpoint: Optional endpoint override (defaults to YTT_YOUTUBE_API_ENDPOINT)
+
+    Returns:
+        YouTube API client
+    """
+    api_endpoint = api_endpoint or API_ENDPOINT
+    client_options = {'api_endpoint': api_endpoint} if api_endpoint else None
+    if api_endpoint:
+        logger.info(f"Using YouTube API endpoint override: {api_endpoint}")
+
+    return build_from_document(
+        get_discovery_document(),
+        http=PooledHttp(creds),
+        client_options=client_options
+    )
+
+
+def authenticate(credential: str = PRIMARY_CREDENTIAL) -> object:
     """
     Authenticate with YouTube API using OAuth2.
 
+    Args:
+        credential: Credential name (see credential_files)
+
     Returns:
         Authenticated YouTube API client
     """
     creds = None
-    token_file = 'token.json'  # nosec B105 - filename, not password
+    credentials_file, token_file = credential_files(credential)  # nosec B105 - filenames, not passwords
 
     # Load credentials from JSON file
     if os.path.exists(token_file):
@@ -69,13 +138,13 @@ def authenticate() -> object:
             creds.refresh(Request())
         else:
             logger.info("No valid credentials found, starting OAuth2 flow")
-            if not os.path.exists('credentials.json'):
+            if not os.path.exists(credentials_file):
                 raise FileNotFoundError(
-                    "credentials.json not found. Please download OAuth2 credentials "
-                    "from Google Cloud Console and save as 'credentials.json'"
+                    f"{credentials_file} not found. Please download OAuth2 credentials "
+                    f"from Google Cloud Console and save as '{credentials_file}'"
                 )
             flow = InstalledAppFlow.from_client_secrets_file(
-                'credentials.json', SCOPES
+                credentials_file, SCOPES
             )
             creds = flow.run_local_server(port=0)
 
@@ -91,6 +160,8 @@ def authenticate() -> object:
         finally:
             os.umask(old_umask)  # Restore original umask
 
-    youtube = build('youtube', 'v3', credentials=creds)
-    logger.debug("YouTube API credentials loaded successfully")
+    youtube = build_client(creds)
+    # Tag the client so API calls are charged to this credential's quota
+    youtube.ytt_credential = credential
+    logger.debug(f"YouTube API credentials loaded successfully ({credential})")
     return youtube
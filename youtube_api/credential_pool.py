@@ -0,0 +1,169 @@
+"""
+Pool of OAuth credentials from separate Google Cloud projects.
+
+Each project has its own daily quota, so searches and videos.list can be
+spread across several projects. Ratings are per YouTube account, so rating
+calls (videos.rate, videos.getRating) always use the primary credential,
+the account that owns the ratings.
+
+For every other call the pool picks the credential with the most headroom
+(daily limit minus what the quota ledger charged to it today), skipping
+credentials YouTube reported as exhausted. A quotaExceeded error only takes
+that credential out of rotation until the reset; the call is retried on the
+next one, and the pool-wide quota state is set once none are left.
+"""
+
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+from logging_helper import LoggingHelper, LogType
+from quota_error import QuotaExceededError
+from .auth import authenticate, credential_of, CREDENTIAL_POOL, PRIMARY_CREDENTIAL
+from .quota_manager import DAILY_QUOTA_LIMIT
+
+# Get logger instance
+logger = LoggingHelper.get_logger(LogType.MAIN)
+
+# Calls that act on the rating owner's account
+RATING_METHODS = ('videos.rate', 'videos.getRating')
+
+# Global database instance (injected from youtube_api.set_database)
+_db = None
+
+# Credentials authenticated in this process (rating owner first)
+_active_credentials: List[str] = [PRIMARY_CREDENTIAL]
+
+
+class PoolExhaustedError(QuotaExceededError):
+    """Raised once every credential is out of quota (an outer pool call doesn't fail over on it)."""
+    pass
+
+
+def set_database(db):
+    """Set the database instance used to read per-credential quota."""
+    global _db
+    _db = db
+
+
+def active_credentials() -> List[str]:
+    """Get the names of the credentials authenticated in this process."""
+    return list(_active_credentials)
+
+
+class CredentialPool:
+    """Authenticated YouTube clients, one per Google Cloud project."""
+
+    def __init__(self, clients: Dict[str, object]) -> None:
+        """
+        Args:
+            clients: YouTube API clients keyed by credential name (rating owner first)
+        """
+        global _active_credentials
+        self.clients = dict(clients)
+        self.primary = next(iter(self.clients.values()))
+        _active_credentials = list(self.clients)
+
+    @classmethod
+    def authenticate_all(cls) -> 'CredentialPool':
+        """
+        Authenticate every configured credential.
+
+        The primary credential must authenticate; extra credentials that fail
+        are logged and left out of the pool.
+
+        Returns:
+            Credential pool
+        """
+        clients = {PRIMARY_CREDENTIAL: authenticate(PRIMARY_CREDENTIAL)}
+        for name in CREDENTIAL_POOL[1:]:
+            try:
+                clients[name] = authenticate(name)
+            except Exception as e:
+                logger.error(f"Failed to authenticate credential '{name}', leaving it out of the pool: {e}")
+        if len(clients) > 1:
+            logger.info(f"YouTube credential pool: {', '.join(clients)}")
+        return cls(clients)
+
+    @classmethod
+    def from_client(cls, youtube_client) -> 'CredentialPool':
+        """Create a single-credential pool around a pre-built client."""
+        return cls({credential_of(youtube_client): youtube_client})
+
+    def headroom(self) -> Dict[str, int]:
+        """
+        Get the quota left today for each usable credential.
+
+        Returns:
+            Units remaining keyed by credential name (exhausted credentials omitted)
+        """
+        usage: Dict[str, int] = {}
+        states: Dict[str, Dict[str, Any]] = {}
+        if _db:
+            try:
+                usage = _db.get_quota_credential_usage()
+                states = _db.get_credential_quota_states()
+            except Exception as e:
+                logger.debug(f"Could not read per-credential quota: {e}")
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        headroom = {}
+        for name in self.clients:
+            resets_at = states.get(name, {}).get('resets_at')
+            if isinstance(resets_at, datetime) and resets_at > now:
+                continue
+            headroom[name] = max(0, DAILY_QUOTA_LIMIT - usage.get(name, 0))
+        return headroom
+
+    def client_for(self, api_method: str, exclude: Tuple[str, ...] = ()) -> Optional[Tuple[str, object]]:
+        """
+        Pick the client for an API call.
+
+        Args:
+            api_method: YouTube API method about to be called
+            exclude: Credentials already tried for this call
+
+        Returns:
+            Tuple of (credential name, client), or None if no credential is left
+        """
+        if api_method in RATING_METHODS:
+            return (credential_of(self.primary), self.primary)
+        if len(self.clients) == 1:
+            name = next(iter(self.clients))
+            return None if name in exclude else (name, self.primary)
+
+        candidates = {name: units for name, units in self.headroom().items() if name not in exclude}
+        if not candidates:
+            return None
+        name = max(candidates, key=candidates.get)
+        return (name, self.clients[name])
+
+    def call(self, api_method: str, func: Callable[[object], Any]) -> Any:
+        """
+        Run an API call on the credential with the most headroom, failing over on quotaExceeded.
+
+        Args:
+            api_method: YouTube API method the call is charged as
+            func: Function taking a YouTube API client
+
+        Returns:
+            Result of func
+
+        Raises:
+            PoolExhaustedError: If every credential's quota is exhausted (a QuotaExceededError)
+        """
+        tried: Tuple[str, ...] = ()
+        while True:
+            picked = self.client_for(api_method, exclude=tried)
+            if picked is None:
+                raise PoolExhaustedError("YouTube API quota exceeded on every credential")
+            name, client = picked
+            try:
+                return func(client)
+            except PoolExhaustedError:
+                # A nested pool call (e.g. videos.list inside a search) already tried every credential
+                raise
+            except QuotaExceededError:
+                if api_method in RATING_METHODS or len(self.clients) == 1:
+                    raise
+                tried += (name,)
+                logger.warning(f"Quota exceeded on credential '{name}' for {api_method}, trying the next credential")
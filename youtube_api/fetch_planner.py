@@ -0,0 +1,161 @@
+"""
+Adaptive fetch planning for videos.list calls during search.
+
+After a search, the ranked video IDs are checked for a duration match with
+videos.list. videos.list costs 1 unit per request no matter how many IDs it
+carries, and IDs already in the search cache are not requested at all. The
+phased approach (top 10, then 15 more only on a miss) makes a second request
+on a Phase 1 miss; a single combined request covers all 25 in one request.
+
+Combined is therefore never more expensive, except when every Phase 1 ID is
+cached: then Phase 1 is free and the phased approach only pays for Phase 2
+on a miss. This module picks per query, using how often Phase 1 has missed
+in recent searches (learned from the debug data stored in the queue) and
+which IDs are already in the search cache.
+"""
+
+import threading
+import time
+from typing import Dict, Any, List, Tuple
+from logging_helper import LoggingHelper, LogType
+
+# Get logger instance
+logger = LoggingHelper.get_logger(LogType.MAIN)
+
+# Global database instance for match history lookups (injected from app.py / queue_worker.py)
+_db = None
+
+# Phase boundaries (ranked positions in the similarity-sorted result list)
+PHASE_1_LIMIT = 10  # High-confidence check
+PHASE_2_LIMIT = 25  # Extended search if needed
+
+# Match history configuration
+HISTORY_SAMPLE_SIZE = 200  # Most recent searches to learn from
+MIN_HISTORY_SAMPLES = 20  # Below this, use the default estimate
+DEFAULT_PHASE1_MISS_RATE = 0.3
+HISTORY_REFRESH_SECONDS = 3600
+
+_history_lock = threading.Lock()
+_history = {
+    'miss_rate': DEFAULT_PHASE1_MISS_RATE,
+    'samples': 0,
+    'loaded_at': 0.0
+}
+
+
+def set_database(db):
+    """Set the database instance for match history lookups."""
+    global _db
+    _db = db
+
+
+def _phase1_hit(row: Dict[str, Any]) -> bool:
+    """
+    Decide whether a past search found its match within Phase 1.
+
+    Newer rows record match_rank directly. Older rows only have the phased
+    batch list: Phase 2 only ran on a Phase 1 miss, so a single batch with
+    candidates means the match was in the top PHASE_1_LIMIT.
+    """
+    match_rank = row.get('match_rank')
+    if match_rank is not None:
+        return match_rank < PHASE_1_LIMIT
+    return bool(row.get('candidates_found')) and (row.get('batch_count') or 0) == 1
+
+
+def get_phase1_miss_rate() -> Tuple[float, int]:
+    """
+    Get the learned probability that Phase 1 finds no duration match.
+
+    The estimate is recomputed at most once per HISTORY_REFRESH_SECONDS.
+
+    Returns:
+        Tuple of (miss_rate, samples); samples=0 means the default estimate is used
+    """
+    with _history_lock:
+        if time.time() - _history['loaded_at'] < HISTORY_REFRESH_SECONDS:
+            return _history['miss_rate'], _history['samples']
+
+        _history['loaded_at'] = time.time()
+        if not _db:
+            return _history['miss_rate'], _history['samples']
+
+        try:
+            rows = _db.get_search_match_history(HISTORY_SAMPLE_SIZE)
+        except Exception as exc:
+            logger.warning(f"Failed to load search match history, keeping previous estimate: {exc}")
+            return _history['miss_rate'], _history['samples']
+
+        if len(rows) < MIN_HISTORY_SAMPLES:
+            _history['miss_rate'] = DEFAULT_PHASE1_MISS_RATE
+            _history['samples'] = 0
+        else:
+            misses = sum(1 for row in rows if not _phase1_hit(row))
+            _history['miss_rate'] = misses / len(rows)
+            _history['samples'] = len(rows)
+            logger.debug(
+                f"Fetch planner: Phase 1 missed in {misses}/{len(rows)} recent searches "
+                f"({_history['miss_rate']:.0%})"
+            )
+
+        return _history['miss_rate'], _history['samples']
+
+
+def plan_fetch(video_ids: List[str], cached_ids: set) -> Dict[str, Any]:
+    """
+    Choose between one combined videos.list request and the phased approach.
+
+    Each videos.list request costs 1 unit and one round-trip, so the plans are
+    compared by expected request count:
+
+        combined_requests <= phase1_requests + miss_rate * phase2_requests
+
+    where a phase makes a request (1) only if it has uncached IDs (else 0).
+
+    Args:
+        video_ids: Video IDs in similarity order (already limited to PHASE_2_LIMIT)
+        cached_ids: IDs that are already in the search cache (no quota cost)
+
+    Returns:
+        Dict with strategy ('combined', 'phased' or 'single'), phases as a list
+        of (phase_name, video_ids) tuples, and the inputs behind the decision
+    """
+    phase1_ids = video_ids[:PHASE_1_LIMIT]
+    phase2_ids = video_ids[PHASE_1_LIMIT:PHASE_2_LIMIT]
+    miss_rate, samples = get_phase1_miss_rate()
+
+    phase1_requests = int(any(video_id not in cached_ids for video_id in phase1_ids))
+    if not phase2_ids:
+        return {
+            'strategy': 'single',
+            'phases': [("Phase 1", phase1_ids)],
+            'phase1_miss_rate': round(miss_rate, 3),
+            'history_samples': samples,
+            'combined_requests': phase1_requests,
+            'phased_requests': phase1_requests
+        }
+
+    phase2_requests = int(any(video_id not in cached_ids for video_id in phase2_ids))
+    combined_requests = int(bool(phase1_requests or phase2_requests))
+    phased_requests = phase1_requests + miss_rate * phase2_requests
+
+    if combined_requests <= phased_requests:
+        strategy = 'combined'
+        phases = [("Combined", phase1_ids + phase2_ids)]
+    else:
+        strategy = 'phased'
+        phases = [("Phase 1", phase1_ids), ("Phase 2", phase2_ids)]
+
+    logger.debug(
+        f"Fetch plan: {strategy} | Phase 1 miss rate {miss_rate:.0%} ({samples} samples) | "
+        f"expected requests {combined_requests} combined, {phased_requests:.2f} phased"
+    )
+
+    return {
+        'strategy': strategy,
+        'phases': phases,
+        'phase1_miss_rate': round(miss_rate, 3),
+        'history_samples': samples,
+        'combined_requests': combined_requests,
+        'phased_requests': round(phased_requests, 3)
+    }
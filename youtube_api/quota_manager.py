@@ -1,12 +1,75 @@
 """
-Quota error detection and analysis for YouTube API.
+Quota error detection and cost model for YouTube API.
 
-This module handles detection of quota-related errors from YouTube API responses.
+This module handles detection of quota-related errors from YouTube API responses
+and is the single source of truth for what each API call costs.
 """
 
 import json
 from typing import Optional
 from googleapiclient.errors import HttpError
+from error_handler import validate_environment_variable
+
+# Quota units per request (https://developers.google.com/youtube/v3/determine_quota_cost)
+# videos.list and videos.getRating cost 1 unit per request regardless of how many IDs it carries
+API_QUOTA_COSTS = {
+    'search': 100,
+    'videos.list': 1,
+    'videos.rate': 50,
+    'videos.getRating': 1,
+}
+
+# Every request is charged at least 1 unit, even invalid ones
+FAILED_REQUEST_COST = 1
+
+# Daily quota of each Google Cloud project
+DAILY_QUOTA_LIMIT = validate_environment_variable(
+    'YTT_DAILY_QUOTA',
+    default=10000,
+    converter=int,
+    validator=lambda x: x > 0
+)
+
+
+def get_quota_usage(db) -> dict:
+    """
+    Get quota used and remaining for the current Pacific quota day.
+
+    The limit covers every credential authenticated in this process
+    (each Google Cloud project has its own daily quota).
+
+    Args:
+        db: Database instance
+
+    Returns:
+        Dict with quota_day, used, calls, limit, remaining and percent
+    """
+    # Imported lazily: credential_pool imports this module
+    from .credential_pool import active_credentials
+
+    usage = db.get_quota_day_usage()
+    usage['limit'] = DAILY_QUOTA_LIMIT * len(active_credentials())
+    usage['remaining'] = max(0, usage['limit'] - usage['used'])
+    usage['percent'] = round(usage['used'] / usage['limit'] * 100, 1)
+    return usage
+
+
+def quota_cost(api_method: str, success: bool = True, quota_exceeded: bool = False) -> int:
+    """
+    Get the quota units charged for one API request.
+
+    Args:
+        api_method: YouTube API method (e.g. 'search', 'videos.rate')
+        success: Whether the request succeeded
+        quota_exceeded: Whether the request was rejected for exhausted quota (not charged)
+
+    Returns:
+        Quota units charged
+    """
+    if quota_exceeded:
+        return 0
+    cost = API_QUOTA_COSTS.get(api_method, 1)
+    return cost if success else min(cost, FAILED_REQUEST_COST)
 
 
 # YouTube API quota-related error codes
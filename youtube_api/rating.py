@@ -4,6 +4,7 @@ YouTube video rating operations (get/set rating).
 This module handles getting and setting ratings (like/dislike) for YouTube videos.
 """
 
+from typing import Dict
 from logging_helper import LoggingHelper, LogType
 from decorators import handle_youtube_error
 
@@ -13,7 +14,7 @@ logger = LoggingHelper.get_logger(LogType.MAIN)
 NO_RATING = 'none'  # YouTube API rating value for unrated videos
 
 
-@handle_youtube_error(context='get_rating', api_method='videos.getRating', quota_cost=1)
+@handle_youtube_error(context='get_rating', api_method='videos.getRating')
 def get_video_rating(youtube_client, yt_video_id: str) -> str:
     """
     Get current rating for a video.
@@ -44,7 +45,30 @@ def get_video_rating(youtube_client, yt_video_id: str) -> str:
     return NO_RATING
 
 
-@handle_youtube_error(context='set_rating', api_method='videos.rate', quota_cost=50)
+@handle_youtube_error(context='get_ratings_bulk', api_method='videos.getRating')
+def get_video_ratings(youtube_client, ids_csv: str) -> Dict[str, str]:
+    """
+    Get current ratings for up to 50 videos in one call.
+
+    Args:
+        youtube_client: Authenticated YouTube API client
+        ids_csv: Comma-separated video IDs (max 50)
+
+    Returns:
+        Dict mapping video ID to 'like', 'dislike', or 'none'
+
+    Raises:
+        Specific exceptions on failure (no error suppression)
+    """
+    response = youtube_client.videos().getRating(id=ids_csv).execute()
+    return {
+        item['videoId']: item.get('rating', NO_RATING)
+        for item in response.get('items', [])
+        if item.get('videoId')
+    }
+
+
+@handle_youtube_error(context='set_rating', api_method='videos.rate')
 def set_video_rating(youtube_client, yt_video_id: str, rating: str) -> bool:
     """
     Set rating for a video.
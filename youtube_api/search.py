@@ -5,16 +5,18 @@ This module handles video search functionality including query building,
 result scoring, and batch video fetching.
 """
 
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Callable, Optional, List, Dict, Any, Tuple
 from googleapiclient.errors import HttpError
 from logging_helper import LoggingHelper, LogType
 from error_handler import log_and_suppress, validate_environment_variable
 from quota_error import QuotaExceededError
 from constants import YOUTUBE_DURATION_OFFSET
 
-from .quota_manager import quota_error_detail
+from .auth import credential_of, PRIMARY_CREDENTIAL
+from .quota_manager import quota_error_detail, quota_cost as api_quota_cost
 from .title_cleaner import build_smart_search_query
-from .video_parser import process_search_result
+from .video_parser import process_search_result, process_cached_result
+from .fetch_planner import plan_fetch, PHASE_2_LIMIT
 
 # Get logger instance
 logger = LoggingHelper.get_logger(LogType.MAIN)
@@ -40,6 +42,9 @@ MAX_CANDIDATES = validate_environment_variable(
 SEARCH_FIELDS = 'items(id/videoId,snippet/title)'
 VIDEO_FIELDS = 'items(id,snippet(title,channelTitle,channelId,description,publishedAt,categoryId,liveBroadcastContent),contentDetails(duration),recordingDetails(location,recordingDate))'
 
+# videos.list accepts at most 50 comma-separated IDs per request
+MAX_IDS_PER_VIDEOS_LIST = 50
+
 
 def set_database(db):
     """Set the database instance for API usage tracking."""
@@ -88,13 +93,14 @@ def calculate_title_similarity(result_title: str, query_title: str) -> float:
     return intersection / union if union > 0 else 0.0
 
 
-def score_and_sort_results(items: list, title: str) -> list:
+def score_and_sort_results(items: list, title: str, scores: Optional[Dict[str, float]] = None) -> list:
     """
     Score search results by title similarity and sort by relevance.
 
     Args:
         items: List of search result items from YouTube API
         title: Original query title for comparison
+        scores: Optional dict filled with each video ID's score (for debug records)
 
     Returns:
         List of video IDs sorted by relevance (best matches first)
@@ -105,6 +111,8 @@ def score_and_sort_results(items: list, title: str) -> list:
         result_title = item['snippet'].get('title', '')
         score = calculate_title_similarity(result_title, title)
         scored_items.append((score, item))
+        if scores is not None:
+            scores[item['id']['videoId']] = round(score, 3)
 
     # Sort by score descending (best matches first)
     scored_items.sort(key=lambda x: x[0], reverse=True)
@@ -119,7 +127,14 @@ def score_and_sort_results(items: list, title: str) -> list:
     return video_ids
 
 
-def log_search_api_call(search_query: str, title: str, success: bool, results_count: int = 0, error_message: str = None):
+def log_search_api_call(
+    search_query: str,
+    title: str,
+    success: bool,
+    results_count: int = 0,
+    error_message: str = None,
+    credential: str = PRIMARY_CREDENTIAL
+):
     """
     Log YouTube search API call to database.
 
@@ -129,14 +144,16 @@ def log_search_api_call(search_query: str, title: str, success: bool, results_co
         success: Whether the API call succeeded
         results_count: Number of results returned
         error_message: Error message if failed
+        credential: Credential (project) the call was charged to
     """
     if not _db:
         return
 
-    quota_cost = 100 if success else 0  # Search costs 100 quota units
+    quota_cost = api_quota_cost('search', success)
     title_truncated = f"title='{title[:50]}...'" if len(title) > 50 else f"title='{title}'"
 
-    _db.record_api_call('search', success=success, quota_cost=quota_cost, error_message=error_message)
+    _db.record_api_call('search', success=success, quota_cost=quota_cost, error_message=error_message,
+                        credential=credential)
     _db.log_api_call_detailed(
         api_method='search',
         operation_type='search_video',
@@ -149,7 +166,16 @@ def log_search_api_call(search_query: str, title: str, success: bool, results_co
     )
 
 
-def log_batch_api_call(phase: str, batch_num: int, video_count: int, title: str, success: bool, error_message: str = None):
+def log_batch_api_call(
+    phase: str,
+    batch_num: int,
+    video_count: int,
+    title: str,
+    success: bool,
+    error_message: str = None,
+    credential: str = PRIMARY_CREDENTIAL,
+    quota_exceeded: bool = False
+):
     """
     Log YouTube batch video fetch API call to database.
 
@@ -160,15 +186,18 @@ def log_batch_api_call(phase: str, batch_num: int, video_count: int, title: str,
         title: Original title being searched
         success: Whether the API call succeeded
         error_message: Error message if failed
+        credential: Credential (project) the call was charged to
+        quota_exceeded: Whether the call was rejected for exhausted quota (not charged)
     """
     if not _db:
         return
 
-    quota_cost = video_count if success else 0  # videos.list costs 1 quota unit per video
+    quota_cost = api_quota_cost('videos.list', success, quota_exceeded)  # 1 unit per request, not per video
     title_truncated = f"{title[:30]}..." if len(title) > 30 else title
     context = f"[{phase}] batch {batch_num} of search for '{title_truncated}'"
 
-    _db.record_api_call('videos.list', success=success, quota_cost=quota_cost, error_message=error_message)
+    _db.record_api_call('videos.list', success=success, quota_cost=quota_cost, error_message=error_message,
+                        credential=credential)
     _db.log_api_call_detailed(
         api_method='videos.list',
         operation_type='batch_get_video_details',
@@ -181,6 +210,131 @@ def log_batch_api_call(phase: str, batch_num: int, video_count: int, title: str,
     )
 
 
+def log_batch_cache_savings(phase: str, batch_num: int, cached_count: int, title: str):
+    """
+    Log videos served from search_results_cache instead of videos.list.
+
+    Recorded in api_call_log with quota_cost=0 so cache hits show up next
+    to the real batch calls for the same search.
+
+    Args:
+        phase: Phase identifier (e.g., "Phase 1", "Phase 2")
+        batch_num: Batch number within phase
+        cached_count: Number of videos served from the cache
+        title: Original title being searched
+    """
+    if not _db or cached_count <= 0:
+        return
+
+    title_truncated = f"{title[:30]}..." if len(title) > 30 else title
+    context = f"[{phase}] batch {batch_num} of search for '{title_truncated}' ({cached_count} videos served from cache)"
+
+    _db.log_api_call_detailed(
+        api_method='videos.list',
+        operation_type='batch_cache_hit',
+        query_params=f"ids={cached_count} videos (served from search cache)",
+        quota_cost=0,
+        success=True,
+        results_count=cached_count,
+        context=context
+    )
+
+
+def lookup_cached_videos(video_ids: list) -> Dict[str, Dict[str, Any]]:
+    """
+    Find unexpired search_results_cache entries for the given video IDs.
+
+    Args:
+        video_ids: List of video IDs to look up
+
+    Returns:
+        Dict mapping video ID to cached row (empty if no database or on error)
+    """
+    if not _db or not video_ids:
+        return {}
+
+    try:
+        return _db.get_search_cache_entries(video_ids)
+    except Exception as exc:
+        # Cache lookup is an optimization - fall back to fetching everything
+        logger.warning(f"Search cache lookup failed, fetching all {len(video_ids)} videos: {exc}")
+        return {}
+
+
+def fetch_uncached_videos(
+    youtube_client,
+    video_ids: list,
+    title: str,
+    phase: str,
+    batch_num: int
+) -> List[Dict[str, Any]]:
+    """
+    Fetch video details from videos.list, up to 50 IDs per request.
+
+    Args:
+        youtube_client: Authenticated YouTube API client
+        video_ids: List of video IDs to fetch (not already cached)
+        title: Original title being searched (for logging)
+        phase: Phase identifier (e.g., "Phase 1", "Phase 2")
+        batch_num: Batch number within phase
+
+    Returns:
+        List of raw video items from the API (empty list on non-quota errors)
+
+    Raises:
+        QuotaExceededError: If YouTube quota is exceeded
+    """
+    items = []
+    credential = credential_of(youtube_client)
+
+    for start in range(0, len(video_ids), MAX_IDS_PER_VIDEOS_LIST):
+        chunk = video_ids[start:start + MAX_IDS_PER_VIDEOS_LIST]
+
+        try:
+            # OPTIMIZED: Single batch API call instead of N sequential calls
+            details = youtube_client.videos().list(
+                part='contentDetails,snippet,recordingDetails',
+                id=','.join(chunk),  # Batch request - up to 50 IDs
+                fields=VIDEO_FIELDS,
+            ).execute()
+
+            chunk_items = details.get('items', [])
+            items.extend(chunk_items)
+
+            # Track successful batch API call (quota = 1 per request)
+            log_batch_api_call(phase, batch_num, len(chunk_items), title, success=True, credential=credential)
+
+        except HttpError as e:
+            # Check for quota errors
+            detail = quota_error_detail(e)
+            is_quota_error = detail is not None
+
+            # Log failed API call
+            error_msg = "Quota exceeded" if is_quota_error else str(e)
+            log_batch_api_call(phase, batch_num, len(chunk), title, success=False, error_message=error_msg,
+                               credential=credential, quota_exceeded=is_quota_error)
+
+            # Raise quota errors to stop processing
+            if is_quota_error:
+                if _db:
+                    from helpers.api_helpers import record_quota_exhausted
+                    record_quota_exhausted(_db, 'videos.list', credential)
+                raise QuotaExceededError("YouTube quota exceeded")
+
+            # Log and continue on other errors
+            logger.warning(f"[{phase}] Error fetching batch {batch_num}: {e}")
+
+        except Exception as e:
+            # Unexpected error - log and continue
+            logger.error(f"[{phase}] Unexpected error fetching batch {batch_num}: {e}", exc_info=True)
+            log_batch_api_call(
+                phase, batch_num, len(chunk), title,
+                success=False, error_message=f"Unexpected error: {str(e)}", credential=credential
+            )
+
+    return items
+
+
 def fetch_video_batch(
     youtube_client,
     video_id_batch: list,
@@ -188,28 +342,35 @@ def fetch_video_batch(
     title: str,
     phase: str,
     batch_num: int,
-    api_debug_data: dict
+    api_debug_data: dict,
+    cached_entries: Optional[Dict[str, Dict[str, Any]]] = None,
+    videos_list_call: Optional[Callable[[Callable[[Any], Any]], Any]] = None
 ) -> tuple:
     """
-    Fetch and process a batch of videos from YouTube API.
+    Fetch and process a batch of videos, serving cached videos from search_results_cache.
 
-    OPTIMIZED: Fetches multiple videos in a single API call (reduces network latency 10x).
-    Processes videos and separates duration-matched candidates from all fetched videos.
+    IDs are partitioned into cached (unexpired in search_results_cache) and uncached.
+    Only the uncached IDs are requested from videos.list (up to 50 per call), so
+    overlapping results from earlier searches cost no quota. Results are merged back
+    in the order of video_id_batch, preserving the title-similarity ranking.
 
     Args:
         youtube_client: Authenticated YouTube API client
-        video_id_batch: List of video IDs to fetch
+        video_id_batch: List of video IDs to fetch (in similarity order)
         expected_duration: Expected duration for filtering (or None for no filter)
         title: Original title being searched (for logging)
         phase: Phase identifier (e.g., "Phase 1", "Phase 2")
         batch_num: Batch number within phase
         api_debug_data: Debug data dict to append batch response
+        cached_entries: Optional pre-fetched cache lookup (avoids a second query)
+        videos_list_call: Runs the videos.list request, given a function taking a client
+            (e.g. CredentialPool failover); default runs it on youtube_client
 
     Returns:
         Tuple of (candidates, all_videos, videos_checked_count):
         - candidates: List of videos matching duration filter
-        - all_videos: List of all videos fetched (for caching)
-        - videos_checked_count: Number of videos fetched
+        - all_videos: List of videos fetched from the API (for caching)
+        - videos_checked_count: Number of videos checked (fetched + cached)
 
     Raises:
         QuotaExceededError: If YouTube quota is exceeded
@@ -217,77 +378,72 @@ def fetch_video_batch(
     if not video_id_batch:
         return ([], [], 0)
 
-    batch_ids = ','.join(video_id_batch)
-    logger.debug(f"[{phase}] Batch {batch_num}: Fetching {len(video_id_batch)} videos in single API call")
-
-    try:
-        # OPTIMIZED: Single batch API call instead of N sequential calls
-        details = youtube_client.videos().list(
-            part='contentDetails,snippet,recordingDetails',
-            id=batch_ids,  # Batch request - up to 50 IDs
-            fields=VIDEO_FIELDS,
-        ).execute()
-
-        # Capture batch response for debugging
-        api_debug_data['batch_responses'].append({
-            'phase': phase,
-            'batch_num': batch_num,
-            'video_ids_requested': len(video_id_batch),
-            'response': details
-        })
-
-        videos_fetched = len(details.get('items', []))
-
-        # Track successful batch API call (quota = 1 per video)
-        log_batch_api_call(phase, batch_num, videos_fetched, title, success=True)
-
-        # Process ALL fetched videos in score order (best title matches first)
-        candidates = []
-        all_videos = []
-
-        for video in details.get('items', []):
-            # First, cache video WITHOUT duration filtering
-            video_info_all = process_search_result(video, expected_duration=None)
-            if video_info_all:
-                all_videos.append(video_info_all)
+    if cached_entries is None:
+        cached_entries = lookup_cached_videos(video_id_batch)
+    else:
+        cached_entries = {
+            video_id: cached_entries[video_id] for video_id in video_id_batch if video_id in cached_entries
+        }
+    uncached_ids = [video_id for video_id in video_id_batch if video_id not in cached_entries]
 
-            # Then check for duration match
-            video_info = process_search_result(video, expected_duration)
+    if cached_entries:
+        logger.debug(
+            f"[{phase}] Batch {batch_num}: {len(cached_entries)}/{len(video_id_batch)} videos "
+            f"served from search cache"
+        )
+        log_batch_cache_savings(phase, batch_num, len(cached_entries), title)
+
+    fetched_items = []
+    if uncached_ids:
+        logger.debug(f"[{phase}] Batch {batch_num}: Fetching {len(uncached_ids)} videos in single API call")
+        def fetch(youtube):
+            return fetch_uncached_videos(youtube, uncached_ids, title, phase, batch_num)
+        fetched_items = videos_list_call(fetch) if videos_list_call else fetch(youtube_client)
+
+    # Capture batch response for debugging
+    api_debug_data['batch_responses'].append({
+        'phase': phase,
+        'batch_num': batch_num,
+        'video_ids_requested': len(uncached_ids),
+        'video_ids_cached': len(cached_entries),
+        'response': {'items': fetched_items}
+    })
+
+    # Process ALL videos in score order (best title matches first)
+    fetched_by_id = {video['id']: video for video in fetched_items}
+    candidates = []
+    all_videos = []
+    videos_checked = 0
+
+    for video_id in video_id_batch:
+        cached = cached_entries.get(video_id)
+        if cached:
+            videos_checked += 1
+            video_info = process_cached_result(cached, expected_duration)
             if video_info:
                 candidates.append(video_info)
+            continue
 
-        # Log results
-        if candidates:
-            logger.debug(f"[{phase}] Found {len(candidates)} match(es) in batch {batch_num}")
-
-        return (candidates, all_videos, videos_fetched)
+        video = fetched_by_id.get(video_id)
+        if not video:
+            continue
+        videos_checked += 1
 
-    except HttpError as e:
-        # Check for quota errors
-        detail = quota_error_detail(e)
-        is_quota_error = detail is not None
+        # First, cache video WITHOUT duration filtering
+        video_info_all = process_search_result(video, expected_duration=None)
+        if video_info_all:
+            all_videos.append(video_info_all)
 
-        # Log failed API call
-        error_msg = "Quota exceeded" if is_quota_error else str(e)
-        quota_cost = 0 if is_quota_error else len(video_id_batch)
-        log_batch_api_call(phase, batch_num, quota_cost, title, success=False, error_message=error_msg)
-
-        # Raise quota errors to stop processing
-        if is_quota_error:
-            raise QuotaExceededError("YouTube quota exceeded")
+        # Then check for duration match
+        video_info = process_search_result(video, expected_duration)
+        if video_info:
+            candidates.append(video_info)
 
-        # Log and continue on other errors
-        logger.warning(f"[{phase}] Error fetching batch {batch_num}: {e}")
-        return ([], [], 0)
+    # Log results
+    if candidates:
+        logger.debug(f"[{phase}] Found {len(candidates)} match(es) in batch {batch_num}")
 
-    except Exception as e:
-        # Unexpected error - log and continue
-        logger.error(f"[{phase}] Unexpected error fetching batch {batch_num}: {e}", exc_info=True)
-        log_batch_api_call(
-            phase, batch_num, len(video_id_batch), title,
-            success=False, error_message=f"Unexpected error: {str(e)}"
-        )
-        return ([], [], 0)
+    return (candidates, all_videos, videos_checked)
 
 
 def search_video_globally(
@@ -295,7 +451,8 @@ def search_video_globally(
     title: str,
     expected_duration: Optional[int] = None,
     artist: Optional[str] = None,
-    return_api_response: bool = False
+    return_api_response: bool = False,
+    videos_list_call: Optional[Callable[[Callable[[Any], Any]], Any]] = None
 ):
     """
     Search for a video globally. Filters by duration (exact or +1s) if provided.
@@ -306,6 +463,8 @@ def search_video_globally(
         expected_duration: Expected HA duration in seconds (YouTube must be exact or +1s)
         artist: Artist/channel name (optional, improves accuracy for generic titles like "Flowers", "Electric")
         return_api_response: If True, return tuple of (candidates, api_debug_data)
+        videos_list_call: Runs each videos.list request, given a function taking a client;
+            lets videos.list fail over to another credential without repeating search.list
 
     Note: v4.0.68+ now uses artist parameter to improve search accuracy for generic titles.
 
@@ -340,7 +499,8 @@ def search_video_globally(
         api_debug_data['search_response'] = response
 
         # Track API usage
-        log_search_api_call(search_query, title, success=True, results_count=len(response.get('items', [])))
+        log_search_api_call(search_query, title, success=True, results_count=len(response.get('items', [])),
+                            credential=credential_of(youtube_client))
 
         items = response.get('items', [])
         if not items:
@@ -353,44 +513,50 @@ def search_video_globally(
 
         # OPTIMIZATION: Score results by title similarity before checking durations
         # This ensures we check the most relevant matches first
-        video_ids = score_and_sort_results(items, title)
+        api_debug_data['title_scores'] = {}
+        video_ids = score_and_sort_results(items, title, api_debug_data['title_scores'])
 
         # v4.0.60: OPTIMIZED with batched API calls to reduce network latency
-        # Phase 1: Batch fetch first 10 videos (high confidence - best title matches)
-        # Phase 2: If no match, batch fetch up to 15 more (up to 25 total)
+        # The fetch planner decides per query between:
+        # - Phased: Phase 1 fetches the first 10 (best title matches), Phase 2 the next 15 on a miss
+        # - Combined: all 25 in one videos.list request (one round-trip, pays for all 25)
         # IMPORTANT: Cache ALL videos checked, not just the ones that match
-        PHASE_1_LIMIT = 10  # High-confidence check
-        PHASE_2_LIMIT = 25  # Extended search if needed
+        ranked_ids = video_ids[:PHASE_2_LIMIT]
+        cached_entries = lookup_cached_videos(ranked_ids)
+        fetch_plan = plan_fetch(ranked_ids, set(cached_entries))
+        api_debug_data['fetch_plan'] = {
+            key: value for key, value in fetch_plan.items() if key != 'phases'
+        }
+
         candidates = []
         all_fetched_videos = []  # Track ALL videos fetched for caching
         videos_checked = 0
 
-        # Phase 1: Batch fetch first 10 videos (single API call = 10x faster than sequential)
-        logger.debug(f"Starting Phase 1: Batch fetching first {PHASE_1_LIMIT} videos (high confidence)")
-        phase1_ids = video_ids[:PHASE_1_LIMIT]
-        if phase1_ids:
+        for batch_num, (phase, phase_ids) in enumerate(fetch_plan['phases'], start=1):
+            if candidates:
+                break
+            if not phase_ids:
+                continue
+
+            logger.debug(f"Starting {phase}: Batch fetching {len(phase_ids)} videos")
             batch_candidates, batch_all_videos, batch_count = fetch_video_batch(
-                youtube_client, phase1_ids, expected_duration, title, "Phase 1", 1, api_debug_data
+                youtube_client, phase_ids, expected_duration, title, phase, batch_num, api_debug_data,
+                cached_entries=cached_entries, videos_list_call=videos_list_call
             )
             candidates.extend(batch_candidates)
             all_fetched_videos.extend(batch_all_videos)
             videos_checked += batch_count
 
-        # Phase 2: If no match found, batch fetch next 15 videos (up to 25 total)
-        if not candidates and len(video_ids) > PHASE_1_LIMIT:
-            remaining = min(PHASE_2_LIMIT - PHASE_1_LIMIT, len(video_ids) - PHASE_1_LIMIT)
-            logger.debug(f"No match in Phase 1, starting Phase 2: Batch fetching {remaining} more videos")
-            phase2_ids = video_ids[PHASE_1_LIMIT:PHASE_1_LIMIT + remaining]
-            if phase2_ids:
-                batch_candidates, batch_all_videos, batch_count = fetch_video_batch(
-                    youtube_client, phase2_ids, expected_duration, title, "Phase 2", 2, api_debug_data
-                )
-                candidates.extend(batch_candidates)
-                all_fetched_videos.extend(batch_all_videos)
-                videos_checked += batch_count
+        # Record where the first match fell so the planner can learn from it
+        api_debug_data['match_rank'] = (
+            ranked_ids.index(candidates[0]['yt_video_id']) if candidates else None
+        )
 
         if candidates:
-            logger.info(f"Found match after checking {videos_checked} videos (saved checking {min(PHASE_2_LIMIT, len(video_ids)) - videos_checked} videos)")
+            logger.info(
+                f"Found match after checking {videos_checked} videos "
+                f"(saved checking {len(ranked_ids) - videos_checked} videos, {fetch_plan['strategy']} fetch)"
+            )
         else:
             logger.debug(f"No match found after checking {videos_checked} videos")
 
@@ -441,15 +607,20 @@ def search_video_globally(
         }
 
         # v4.0.29: ALWAYS log failed API calls (including quota errors) BEFORE raising
-        # This ensures check_quota_recently_exceeded() can find recent quota errors
+        # Quota errors also set quota_state, which check_quota_recently_exceeded() reads
         if _db:
-            _db.record_api_call('search', success=False, quota_cost=100 if not is_quota_error else 0,
-                               error_message="Quota exceeded" if is_quota_error else str(e))
+            if is_quota_error:
+                from helpers.api_helpers import record_quota_exhausted
+                record_quota_exhausted(_db, 'search', credential_of(youtube_client))
+            failed_cost = api_quota_cost('search', success=False, quota_exceeded=is_quota_error)
+            _db.record_api_call('search', success=False, quota_cost=failed_cost,
+                               error_message="Quota exceeded" if is_quota_error else str(e),
+                               credential=credential_of(youtube_client))
             _db.log_api_call_detailed(
                 api_method='search',
                 operation_type='search_video',
                 query_params=f"q='{api_debug_data.get('search_query', title)}', maxResults={MAX_SEARCH_RESULTS}",
-                quota_cost=100 if not is_quota_error else 0,  # No quota consumed if quota already exceeded
+                quota_cost=failed_cost,
                 success=False,
                 error_message="Quota exceeded" if is_quota_error else str(e),
                 context=f"title='{title[:50]}...'" if len(title) > 50 else f"title='{title}'"
@@ -469,6 +640,9 @@ def search_video_globally(
             return_value=None,
             log_traceback=not is_quota_error  # Skip traceback for quota errors
         )
+    except QuotaExceededError:
+        # videos.list ran out of quota mid-search - let the caller fail over or stop
+        raise
     except Exception as e:
         # Capture unexpected error in debug data
         api_debug_data['error'] = {
@@ -0,0 +1,257 @@
+"""
+Pooled keep-alive HTTP transport for the YouTube API client.
+
+googleapiclient normally talks to YouTube through a per-client httplib2.Http,
+which is not thread-safe and re-handshakes whenever a connection is dropped.
+This module provides an httplib2-compatible adapter over google-auth's
+AuthorizedSession (requests + urllib3 connection pool), so every search.list,
+videos.list and videos.rate call reuses the same TLS connections and gets
+automatic token refresh.
+
+Each call records connect, TLS and time-to-first-byte timings so slow calls
+can be told apart from slow connections.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+
+import httplib2
+from google.auth.transport.requests import AuthorizedSession
+from googleapiclient import discovery_cache
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from logging_helper import LoggingHelper, LogType
+from metrics_tracker import metrics
+
+# Get logger instance
+logger = LoggingHelper.get_logger(LogType.MAIN)
+
+# Transport configuration
+POOL_MAXSIZE = 10  # Connections kept alive per host (only googleapis.com in practice)
+REQUEST_TIMEOUT = 60  # Seconds, same as googleapiclient's default socket timeout
+TIMING_HISTORY_SIZE = 200
+
+# Per-thread timings of the connection opened by the current call (if any)
+_call_timing = threading.local()
+
+_timings_lock = threading.Lock()
+_timings = deque(maxlen=TIMING_HISTORY_SIZE)
+
+# Parsed discovery document, loaded once per process
+_discovery_doc = None
+_discovery_lock = threading.Lock()
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    """HTTP connection that records how long the TCP connect took."""
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = super()._new_conn()
+        _call_timing.connect_ms = (time.perf_counter() - start) * 1000
+        return sock
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    """HTTPS connection that records TCP connect and TLS handshake time separately."""
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = super()._new_conn()
+        _call_timing.connect_ms = (time.perf_counter() - start) * 1000
+        return sock
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        total_ms = (time.perf_counter() - start) * 1000
+        _call_timing.tls_ms = max(0.0, total_ms - getattr(_call_timing, 'connect_ms', 0.0))
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """requests adapter whose connection pools use the timed connection classes."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool
+        }
+
+
+def _api_method_from_uri(uri: str, method: str) -> str:
+    """
+    Derive the API method name (e.g. 'videos.list') from a request URI.
+
+    Args:
+        uri: Full request URI
+        method: HTTP method
+
+    Returns:
+        API method name used in logs and metrics
+    """
+    path = urlparse(uri).path.rstrip('/')
+    parts = path.split('/youtube/v3/', 1)
+    resource = parts[1] if len(parts) == 2 else path.rsplit('/', 1)[-1]
+
+    if '/' in resource:
+        # e.g. videos/rate, videos/getRating
+        return resource.replace('/', '.')
+    if method.upper() == 'GET':
+        return f"{resource}.list" if resource != 'search' else 'search'
+    return f"{resource}.{method.lower()}"
+
+
+class PooledHttp:
+    """
+    httplib2.Http-compatible adapter over a pooled AuthorizedSession.
+
+    googleapiclient only calls request() (and close() on shutdown), so that is
+    all this implements. Responses are returned as (httplib2.Response, bytes)
+    exactly like httplib2 so HttpError and retry handling work unchanged.
+    """
+
+    def __init__(self, credentials, timeout: int = REQUEST_TIMEOUT) -> None:
+        self.timeout = timeout
+        self.session = AuthorizedSession(credentials)
+        adapter = _TimedHTTPAdapter(pool_connections=2, pool_maxsize=POOL_MAXSIZE)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                redirections=httplib2.DEFAULT_MAX_REDIRECTS, connection_type=None) -> Tuple[httplib2.Response, bytes]:
+        """Perform a request with httplib2's calling convention."""
+        _call_timing.connect_ms = 0.0
+        _call_timing.tls_ms = 0.0
+        api_method = _api_method_from_uri(uri, method)
+
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method,
+                uri,
+                data=body,
+                headers=headers,
+                timeout=self.timeout,
+                allow_redirects=redirections > 0
+            )
+            content = response.content
+        except Exception:
+            total_ms = (time.perf_counter() - start) * 1000
+            _record_timing(api_method, None, total_ms)
+            raise
+
+        total_ms = (time.perf_counter() - start) * 1000
+        _record_timing(api_method, response.status_code, total_ms, response.elapsed.total_seconds() * 1000)
+
+        info = {key.lower(): value for key, value in response.headers.items()}
+        info['status'] = str(response.status_code)
+        resp = httplib2.Response(info)
+        resp.reason = response.reason
+        return resp, content
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+
+def _record_timing(api_method: str, status: Optional[int], total_ms: float, elapsed_ms: float = None) -> None:
+    """
+    Record one call's timings in memory and in the metrics tracker.
+
+    requests' elapsed covers connect + TLS + waiting for response headers,
+    so TTFB is what is left after the handshake.
+    """
+    connect_ms = getattr(_call_timing, 'connect_ms', 0.0)
+    tls_ms = getattr(_call_timing, 'tls_ms', 0.0)
+    ttfb_ms = max(0.0, elapsed_ms - connect_ms - tls_ms) if elapsed_ms is not None else None
+    success = status is not None and status < 400
+
+    timing = {
+        'timestamp': time.time(),
+        'api_method': api_method,
+        'status': status,
+        'reused_connection': connect_ms == 0.0,
+        'connect_ms': round(connect_ms, 1),
+        'tls_ms': round(tls_ms, 1),
+        'ttfb_ms': round(ttfb_ms, 1) if ttfb_ms is not None else None,
+        'total_ms': round(total_ms, 1)
+    }
+    with _timings_lock:
+        _timings.append(timing)
+
+    metrics.record_api_call(api_method, success=success, duration_ms=total_ms)
+    logger.debug(
+        f"YouTube {api_method}: HTTP {status} in {total_ms:.0f}ms "
+        f"(connect {connect_ms:.0f}ms, TLS {tls_ms:.0f}ms, "
+        f"TTFB {timing['ttfb_ms'] if ttfb_ms is not None else '-'}ms, "
+        f"{'reused' if timing['reused_connection'] else 'new'} connection)"
+    )
+
+
+def get_transport_stats() -> Dict[str, Any]:
+    """
+    Summarize recent YouTube API call timings.
+
+    Returns:
+        Dict with call count, connection reuse rate, average timings and the
+        most recent calls
+    """
+    with _timings_lock:
+        recent = list(_timings)
+
+    if not recent:
+        return {'calls': 0, 'reuse_rate': None, 'avg_connect_ms': None,
+                'avg_tls_ms': None, 'avg_ttfb_ms': None, 'avg_total_ms': None, 'recent': []}
+
+    new_connections = [t for t in recent if not t['reused_connection']]
+    ttfbs = [t['ttfb_ms'] for t in recent if t['ttfb_ms'] is not None]
+
+    def _avg(values):
+        return round(sum(values) / len(values), 1) if values else None
+
+    return {
+        'calls': len(recent),
+        'reuse_rate': round(1 - len(new_connections) / len(recent), 3),
+        'avg_connect_ms': _avg([t['connect_ms'] for t in new_connections]),
+        'avg_tls_ms': _avg([t['tls_ms'] for t in new_connections]),
+        'avg_ttfb_ms': _avg(ttfbs),
+        'avg_total_ms': _avg([t['total_ms'] for t in recent]),
+        'recent': recent[-20:]
+    }
+
+
+def get_discovery_document() -> str:
+    """
+    Get the YouTube v3 discovery document from disk.
+
+    Uses the copy shipped with google-api-python-client (no network fetch),
+    read once per process.
+
+    Returns:
+        Discovery document JSON string
+
+    Raises:
+        RuntimeError: If the installed client library has no static copy
+    """
+    global _discovery_doc
+    with _discovery_lock:
+        if _discovery_doc is None:
+            doc = discovery_cache.get_static_doc('youtube', 'v3')
+            if not doc:
+                raise RuntimeError("YouTube v3 discovery document not found in google-api-python-client")
+            _discovery_doc = doc
+        return _discovery_doc
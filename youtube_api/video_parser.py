@@ -147,3 +147,40 @@ def process_search_result(video: Dict[str, Any], expected_duration: Optional[int
         )
 
     return video_info
+
+
+def process_cached_result(cached: Dict[str, Any], expected_duration: Optional[int]) -> Optional[Dict[str, Any]]:
+    """
+    Convert a search_results_cache row into the same video_info dict as process_search_result().
+
+    Args:
+        cached: Row from search_results_cache (yt_* columns)
+        expected_duration: Expected HA duration (YouTube will be +1s)
+
+    Returns:
+        Processed video_info dict or None if the cached duration doesn't match
+    """
+    video_info = {
+        'yt_video_id': cached['yt_video_id'],
+        'title': cached.get('yt_title'),
+        'channel': cached.get('yt_channel'),
+        'channel_id': cached.get('yt_channel_id'),
+        'description': cached.get('yt_description'),
+        'published_at': cached.get('yt_published_at'),
+        'category_id': cached.get('yt_category_id'),
+        'live_broadcast': cached.get('yt_live_broadcast'),
+        'location': cached.get('yt_location'),
+        'recording_date': cached.get('yt_recording_date'),
+        'duration': cached.get('yt_duration')
+    }
+
+    duration = video_info['duration']
+    if expected_duration is not None and duration is not None:
+        # Same rule as process_search_result(): exact match or +1s only
+        if duration != expected_duration and duration != expected_duration + YOUTUBE_DURATION_OFFSET:
+            return None
+        logger.debug(
+            f"Duration match (cached): {expected_duration}s (HA) → {duration}s (YT) | ID: {video_info['yt_video_id']}"
+        )
+
+    return video_info